@@ -2,15 +2,20 @@
 
 import sys
 from PyQt6.QtWidgets import QApplication
-from .main_window import MainWindow
 from .log_config import setup_logger
+from .settings_manager import SettingsManager
+from .file_watch import configure_hdf5_file_locking
 import logging
 
 def run_app():
     setup_logger()
     logging.info("애플리케이션 시작.")
+    settings_manager = SettingsManager()
+    # HDF5 파일 잠금 설정은 h5py/netCDF4를 가져오기 전에 정해야 하므로 MainWindow는 그 뒤에 가져옵니다.
+    configure_hdf5_file_locking(settings_manager.get_app_setting('watch_files', True))
+    from .main_window import MainWindow
     app = QApplication(sys.argv)
-    win = MainWindow()
+    win = MainWindow(settings_manager)
     win.show()
     sys.exit(app.exec())
 
@@ -0,0 +1,22 @@
+# oceanocal_v2/app_paths.py
+
+import os
+from PyQt6.QtCore import QStandardPaths
+
+# 북마크, 세션 등 사용자별 데이터를 표준 애플리케이션 데이터 위치에 저장합니다.
+try:
+    APP_DATA_DIR = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    if not APP_DATA_DIR: # 시스템 경로를 찾지 못한 경우
+        APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".oceanocal_v2")
+except Exception: # Qt 환경이 아니거나 오류가 난 경우
+    APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".oceanocal_v2")
+
+if not os.path.exists(APP_DATA_DIR):
+    os.makedirs(APP_DATA_DIR, exist_ok=True)
+
+
+def app_data_path(*parts):
+    """APP_DATA_DIR 아래 경로를 반환합니다. 중간 폴더가 없으면 만듭니다."""
+    path = os.path.join(APP_DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
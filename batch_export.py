@@ -0,0 +1,311 @@
+# oceanocal_v2/batch_export.py
+
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FRAME_PATTERN = "frame_%05d.png"
+FRAME_DIM_NAMES = ('time', 'depth', 'lev', 'level', 'z', 'deptht', 's_rho')
+
+_renderer = None # 프로세스마다 하나씩 재사용하는 헤드리스 렌더러
+
+
+class ExportCancelled(Exception):
+    """사용자가 내보내기를 취소했을 때 발생합니다."""
+
+
+def choose_frame_dim(dims):
+    """애니메이션 프레임으로 넘길 차원(시간 또는 깊이 우선, 없으면 첫 차원)을 고릅니다."""
+    for name in FRAME_DIM_NAMES:
+        for dim in dims:
+            if dim.lower() == name or dim.lower().startswith(name):
+                return dim
+    return dims[0] if dims else None
+
+
+def build_job(dataset_manager, filepath, var_name, frame_dim=None, options=None, output_dir="."):
+    """
+    변수 하나를 프레임 차원을 따라 내보내는 작업 명세(프로세스 간 전달 가능한 dict)를 만듭니다.
+    플롯 옵션의 region/time_range/index_ranges는 인덱서로 바꾸고, 프레임/수평 두 차원 외의 차원은
+    'slice' 옵션(기본 0)으로 고정합니다. 색 범위가 없으면 첫 프레임의 2~98 백분위수로 정해 모든 프레임에 씁니다.
+    파생 변수는 작업자 프로세스가 파일만으로 계산할 수 없으므로 'virtual' 표시를 남겨 render_frames가 대신 읽게 합니다.
+    """
+    options = dict(options or {})
+    ds = dataset_manager.get_variable_dataset(filepath, var_name)
+    dims = list(ds[var_name].dims)
+    frame_dim = frame_dim if frame_dim in dims else choose_frame_dim(dims)
+    indexers = dataset_manager.resolve_indexers(filepath, var_name, options)
+    shown_dims = [d for d in dims if d != frame_dim][-2:]
+    slice_state = options.get('slice', {})
+    for dim in dims:
+        if dim not in shown_dims and dim != frame_dim and not isinstance(indexers.get(dim), (int, np.integer)):
+            indexers[dim] = int(slice_state.get(dim, 0))
+
+    frame_selection = indexers.pop(frame_dim, slice(None))
+    if isinstance(frame_selection, slice):
+        frame_indices = list(range(*frame_selection.indices(ds.sizes[frame_dim])))
+    else:
+        frame_indices = [int(i) for i in np.atleast_1d(frame_selection)]
+
+    vmin, vmax = options.get('vmin'), options.get('vmax')
+    if (vmin is None or vmax is None) and frame_indices:
+        first = dataset_manager.read_variable(filepath, var_name, {**indexers, frame_dim: frame_indices[0]})
+        values = np.asarray(first.values, dtype=float)
+        if np.isfinite(values).any():
+            low, high = np.nanpercentile(values, [2, 98])
+            vmin = low if vmin is None else vmin
+            vmax = high if vmax is None else vmax
+
+    name = f"{os.path.splitext(os.path.basename(filepath))[0]}_{var_name.strip('/').replace('/', '_')}"
+    return {
+        'filepath': filepath,
+        'var_name': var_name,
+        'virtual': dataset_manager.is_virtual_variable(filepath, var_name),
+        'decode_options': dataset_manager.get_decode_options(filepath),
+        'frame_dim': frame_dim,
+        'frame_indices': frame_indices,
+        'indexers': indexers,
+        'title': options.get('title', var_name),
+        'cmap': options.get('cmap', 'viridis'),
+        'vmin': vmin,
+        'vmax': vmax,
+        'colorbar_label': options.get('colorbar_label', var_name),
+        'time_format': options.get('time_format', '%Y-%m-%d %H:%M'),
+        'output_dir': os.path.join(output_dir, name),
+    }
+
+
+class _FrameRenderer:
+    """
+    Agg 캔버스 하나를 만들어 두고 프레임마다 아티스트 값만 바꿔 저장합니다.
+    같은 변수/격자의 프레임이 이어지면 pcolormesh와 컬러바를 다시 만들지 않습니다.
+    """
+    def __init__(self, figsize, dpi):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.dpi = dpi
+        self._key = None
+        self._artist = None
+        self._title = None
+
+    def render(self, job, frame_label, variable, path):
+        values = np.asarray(variable.values)
+        key = (job['filepath'], job['var_name'], values.shape)
+        if key != self._key:
+            self._setup(job, variable)
+            self._key = key
+        elif values.ndim == 2:
+            self._artist.set_array(np.ma.masked_invalid(values).ravel())
+        else:
+            self._artist.set_ydata(values)
+        self._title.set_text(f"{job['title']}  {frame_label}")
+        self.figure.savefig(path, dpi=self.dpi)
+
+    def _setup(self, job, variable):
+        self.figure.clear()
+        ax = self.figure.add_subplot(111)
+        values = np.asarray(variable.values)
+        if values.ndim == 2:
+            y_dim, x_dim = variable.dims
+            x = variable.coords[x_dim].values if x_dim in variable.coords else np.arange(values.shape[1])
+            y = variable.coords[y_dim].values if y_dim in variable.coords else np.arange(values.shape[0])
+            self._artist = ax.pcolormesh(x, y, np.ma.masked_invalid(values), cmap=job['cmap'],
+                                         vmin=job['vmin'], vmax=job['vmax'], shading='auto')
+            self.figure.colorbar(self._artist, ax=ax, label=job['colorbar_label'])
+            ax.set_xlabel(x_dim)
+            ax.set_ylabel(y_dim)
+        else:
+            dim = variable.dims[0] if variable.dims else 'index'
+            x = variable.coords[dim].values if dim in variable.coords else np.arange(values.size)
+            (self._artist,) = ax.plot(x, values)
+            if job['vmin'] is not None and job['vmax'] is not None:
+                ax.set_ylim(job['vmin'], job['vmax'])
+            ax.set_xlabel(dim)
+            ax.grid(True)
+        self._title = ax.set_title(job['title'])
+        self.figure.tight_layout()
+
+
+def _init_renderer(figsize, dpi):
+    global _renderer
+    import matplotlib
+    matplotlib.use('Agg')
+    _renderer = _FrameRenderer(figsize, dpi)
+
+
+def _frame_label(job, variable, index):
+    frame_dim = job['frame_dim']
+    if frame_dim in variable.coords:
+        value = variable.coords[frame_dim].values
+        if np.issubdtype(value.dtype, np.datetime64):
+            return f"{frame_dim}={np.datetime64(value, 'ns').astype('datetime64[ms]').item().strftime(job['time_format'])}"
+        return f"{frame_dim}={value}"
+    return f"{frame_dim}={index}"
+
+
+def _render_frame(job, position, variable):
+    index = job['frame_indices'][position]
+    path = os.path.join(job['output_dir'], FRAME_PATTERN % position)
+    _renderer.render(job, _frame_label(job, variable, index), variable, path)
+
+
+def _render_block(job, positions, variables=None):
+    """
+    작업자 프로세스에서 job의 프레임 일부(positions: frame_indices 안의 위치)를 PNG로 그립니다.
+    파일은 작업자마다 한 번 열어 블록 안의 프레임에 재사용합니다.
+    variables가 주어지면(파생 변수) 파일을 열지 않고 GUI 프로세스가 읽어 보낸 프레임 값을 그립니다.
+    """
+    if variables is not None:
+        for position, variable in zip(positions, variables):
+            _render_frame(job, position, variable)
+        return len(positions)
+    from .hdf5_backend import HDF5File, is_hdf5_path
+    if is_hdf5_path(job['filepath']):
+        handle = HDF5File(job['filepath'])
+        read = lambda indexers: handle.read(job['var_name'], indexers)
+    else:
+        import xarray as xr
+        handle = xr.open_dataset(job['filepath'], **job['decode_options'])
+        read = lambda indexers: handle[job['var_name']].isel(indexers).load()
+    try:
+        for position in positions:
+            _render_frame(job, position, read({**job['indexers'], job['frame_dim']: job['frame_indices'][position]}))
+    finally:
+        handle.close()
+    return len(positions)
+
+
+def render_frames(jobs, max_workers=None, figsize=(10, 6), dpi=100, progress_callback=None, cancel_event=None,
+                  dataset_manager=None):
+    """
+    작업 명세 목록의 모든 프레임을 헤드리스 렌더러 프로세스 풀에서 PNG로 그립니다.
+    프레임은 연속된 블록으로 나눠 보내므로 각 프로세스는 그림과 파일 핸들을 블록 동안 재사용합니다.
+    파생 변수 작업은 이 스레드에서 dataset_manager.read_variable로 블록을 읽어 값을 보내며,
+    읽은 프레임이 메모리에 쌓이지 않도록 동시에 보낸 블록 수를 제한합니다.
+    """
+    if dataset_manager is None and any(job.get('virtual') for job in jobs):
+        raise ValueError("파생 변수를 내보내려면 DatasetManager가 필요합니다.")
+    max_workers = max_workers or os.cpu_count() or 2
+    tasks = []
+    for job in jobs:
+        os.makedirs(job['output_dir'], exist_ok=True)
+        count = len(job['frame_indices'])
+        block = max(1, int(np.ceil(count / (max_workers * 4))))
+        tasks += [(job, list(range(start, min(start + block, count)))) for start in range(0, count, block)]
+    total = sum(len(job['frame_indices']) for job in jobs)
+    if not total:
+        return 0
+
+    done = 0
+    # Qt 애플리케이션에서 fork하지 않도록 spawn 컨텍스트를 사용합니다.
+    context = multiprocessing.get_context('spawn')
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                   initializer=_init_renderer, initargs=(figsize, dpi))
+
+    def submit(job, positions):
+        if not job.get('virtual'):
+            return executor.submit(_render_block, job, positions)
+        variables = [dataset_manager.read_variable(job['filepath'], job['var_name'],
+                                                   {**job['indexers'], job['frame_dim']: job['frame_indices'][position]},
+                                                   use_cache=False)
+                     for position in positions]
+        return executor.submit(_render_block, job, positions, variables)
+
+    def collect(futures):
+        nonlocal done
+        for future in futures:
+            done += future.result()
+        if progress_callback:
+            progress_callback(int(100 * done / total), f"프레임 렌더링 {done}/{total}")
+
+    try:
+        pending = set()
+        for job, positions in tasks:
+            while len(pending) >= max_workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled("프레임 내보내기 취소됨")
+            pending.add(submit(job, positions))
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled("프레임 내보내기 취소됨")
+            collect(finished)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    logger.info(f"일괄 내보내기 프레임 {total}개 렌더링 완료 ({max_workers}개 프로세스)")
+    return total
+
+
+def write_mp4(frame_dir, fps=10, output_path=None):
+    """ffmpeg로 PNG 프레임을 H.264 MP4로 묶습니다."""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("MP4를 만들려면 ffmpeg가 PATH에 있어야 합니다.")
+    output_path = output_path or f"{frame_dir.rstrip(os.sep)}.mp4"
+    subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-framerate', str(fps),
+                    '-i', os.path.join(frame_dir, FRAME_PATTERN),
+                    '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                    output_path], check=True)
+    return output_path
+
+
+def write_gif(frame_dir, fps=10, output_path=None):
+    """
+    Pillow로 PNG 프레임을 반복 재생 GIF로 묶습니다.
+    프레임을 하나씩 읽어 (프레임별 색상표와 함께) 바로 파일에 쓰므로 메모리에는 한 프레임만 올라갑니다.
+    """
+    from PIL import Image, GifImagePlugin
+    output_path = output_path or f"{frame_dir.rstrip(os.sep)}.gif"
+    paths = sorted(os.path.join(frame_dir, name) for name in os.listdir(frame_dir) if name.startswith('frame_'))
+    if not paths:
+        raise RuntimeError(f"GIF로 묶을 프레임이 없습니다: {frame_dir}")
+    duration = int(1000 / fps)
+    with open(output_path, 'wb') as f:
+        for number, path in enumerate(paths):
+            with Image.open(path) as image:
+                frame = image.convert('P', palette=Image.Palette.ADAPTIVE)
+            if number == 0:
+                header, _ = GifImagePlugin.getheader(frame, info={'loop': 0, 'duration': duration})
+                f.writelines(header)
+            f.writelines(GifImagePlugin.getdata(frame, duration=duration, include_color_table=True))
+        f.write(b';') # GIF 끝 표시
+    return output_path
+
+
+def run_batch_export(jobs, formats=('png',), fps=10, max_workers=None, dpi=100,
+                     progress_callback=None, cancel_event=None, dataset_manager=None):
+    """
+    프레임을 렌더링한 뒤 요청된 애니메이션(mp4, gif)을 만듭니다.
+    'png'가 formats에 없으면 애니메이션을 만든 뒤 프레임 폴더를 지웁니다. 만든 파일 경로 목록을 반환합니다.
+    """
+    render_frames(jobs, max_workers=max_workers, dpi=dpi,
+                  progress_callback=progress_callback, cancel_event=cancel_event, dataset_manager=dataset_manager)
+    outputs = []
+    for job in jobs:
+        frame_dir = job['output_dir']
+        if cancel_event is not None and cancel_event.is_set():
+            raise ExportCancelled("애니메이션 인코딩 취소됨")
+        if 'mp4' in formats:
+            if progress_callback:
+                progress_callback(100, f"MP4 인코딩: {os.path.basename(frame_dir)}")
+            outputs.append(write_mp4(frame_dir, fps))
+        if 'gif' in formats:
+            if progress_callback:
+                progress_callback(100, f"GIF 생성: {os.path.basename(frame_dir)}")
+            outputs.append(write_gif(frame_dir, fps))
+        if 'png' in formats:
+            outputs.append(frame_dir)
+        else:
+            shutil.rmtree(frame_dir, ignore_errors=True)
+    return outputs
@@ -0,0 +1,183 @@
+# oceanocal_v2/batch_export_dialog.py
+
+import os
+import logging
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGroupBox, QGridLayout, QLabel, QLineEdit, QPushButton,
+    QCheckBox, QListWidget, QListWidgetItem, QSpinBox, QComboBox, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt
+
+from .batch_export import choose_frame_dim
+
+logger = logging.getLogger(__name__)
+
+
+class BatchExportDialog(QDialog):
+    """
+    열린 파일들의 변수를 골라 시간/깊이 슬라이스마다 PNG 프레임과 MP4/GIF 애니메이션으로 내보내는 설정 창.
+    """
+    def __init__(self, dataset_manager, settings_manager, default_selection=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("일괄 내보내기")
+        self.setGeometry(150, 150, 520, 560)
+        self.dataset_manager = dataset_manager
+        self.settings_manager = settings_manager
+        self.default_selection = default_selection # (filepath, var_name) - 현재 플롯 창의 변수
+        self.init_ui()
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+
+        vars_group = QGroupBox("내보낼 변수")
+        vars_layout = QVBoxLayout()
+        self.variable_list = QListWidget()
+        for filepath in self.dataset_manager.get_file_list():
+            for var_name in self._variables_of(filepath):
+                item = QListWidgetItem(f"{os.path.basename(filepath)}: {var_name}")
+                item.setData(Qt.ItemDataRole.UserRole, (filepath, var_name))
+                checked = self.default_selection == (filepath, var_name)
+                item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+                self.variable_list.addItem(item)
+        self.variable_list.itemChanged.connect(self._update_frame_dims)
+        vars_layout.addWidget(self.variable_list)
+        vars_group.setLayout(vars_layout)
+        main_layout.addWidget(vars_group)
+
+        options_group = QGroupBox("프레임 / 출력")
+        grid = QGridLayout()
+        grid.addWidget(QLabel("프레임 차원:"), 0, 0)
+        self.frame_dim_combo = QComboBox()
+        grid.addWidget(self.frame_dim_combo, 0, 1, 1, 2)
+
+        grid.addWidget(QLabel("출력 폴더:"), 1, 0)
+        default_dir = self.settings_manager.get_app_setting('batch_export_directory', os.path.expanduser('~'))
+        self.output_dir_edit = QLineEdit(default_dir)
+        grid.addWidget(self.output_dir_edit, 1, 1)
+        browse_button = QPushButton("찾아보기...")
+        browse_button.clicked.connect(self._browse_output_dir)
+        grid.addWidget(browse_button, 1, 2)
+
+        formats_layout = QHBoxLayout()
+        self.png_check = QCheckBox("PNG 프레임")
+        self.png_check.setChecked(True)
+        self.mp4_check = QCheckBox("MP4")
+        self.gif_check = QCheckBox("GIF")
+        for check in (self.png_check, self.mp4_check, self.gif_check):
+            formats_layout.addWidget(check)
+        grid.addWidget(QLabel("형식:"), 2, 0)
+        grid.addLayout(formats_layout, 2, 1, 1, 2)
+
+        grid.addWidget(QLabel("초당 프레임:"), 3, 0)
+        self.fps_spin = QSpinBox()
+        self.fps_spin.setRange(1, 60)
+        self.fps_spin.setValue(10)
+        grid.addWidget(self.fps_spin, 3, 1)
+
+        grid.addWidget(QLabel("DPI:"), 4, 0)
+        self.dpi_spin = QSpinBox()
+        self.dpi_spin.setRange(50, 600)
+        self.dpi_spin.setValue(100)
+        grid.addWidget(self.dpi_spin, 4, 1)
+
+        grid.addWidget(QLabel("렌더링 프로세스 수:"), 5, 0)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max(1, os.cpu_count() or 1) * 2)
+        self.workers_spin.setValue(max(1, os.cpu_count() or 1))
+        grid.addWidget(self.workers_spin, 5, 1)
+        options_group.setLayout(grid)
+        main_layout.addWidget(options_group)
+
+        button_box = QHBoxLayout()
+        self.ok_button = QPushButton("내보내기")
+        self.ok_button.clicked.connect(self._accept_if_valid)
+        self.cancel_button = QPushButton("취소")
+        self.cancel_button.clicked.connect(self.reject)
+        button_box.addStretch(1)
+        button_box.addWidget(self.ok_button)
+        button_box.addWidget(self.cancel_button)
+        main_layout.addLayout(button_box)
+
+        self._update_frame_dims()
+
+    def _variables_of(self, filepath):
+        if self.dataset_manager.is_hdf5(filepath):
+            hdf5_file = self.dataset_manager.get_hdf5(filepath)
+            names = self._hdf5_datasets(hdf5_file, '/')
+        else:
+            dataset = self.dataset_manager.get_dataset(filepath)
+            names = [name for name in dataset.data_vars if dataset[name].ndim >= 2]
+        # 파생 변수도 내보낼 수 있습니다 (값은 DatasetManager가 읽어 렌더러에 보냅니다).
+        for name in self.dataset_manager.get_virtual_variables(filepath):
+            if self.dataset_manager.get_variable_dataset(filepath, name)[name].ndim >= 2:
+                names.append(name)
+        return names
+
+    def _hdf5_datasets(self, hdf5_file, group_path):
+        names = []
+        for child in hdf5_file.list_group(group_path):
+            if child['type'] == 'group':
+                names += self._hdf5_datasets(hdf5_file, child['path'])
+            elif len(child['shape']) >= 2:
+                names.append(child['path'])
+        return names
+
+    def selected_variables(self):
+        selection = []
+        for row in range(self.variable_list.count()):
+            item = self.variable_list.item(row)
+            if item.checkState() == Qt.CheckState.Checked:
+                selection.append(item.data(Qt.ItemDataRole.UserRole))
+        return selection
+
+    def _update_frame_dims(self, *_):
+        """선택된 변수들의 차원을 프레임 차원 후보로 보여줍니다 (첫 변수의 시간/깊이 차원을 기본으로)."""
+        current = self.frame_dim_combo.currentText()
+        dims = []
+        for filepath, var_name in self.selected_variables():
+            for dim in self.dataset_manager.get_variable_dataset(filepath, var_name)[var_name].dims:
+                if dim not in dims:
+                    dims.append(dim)
+        self.frame_dim_combo.blockSignals(True)
+        self.frame_dim_combo.clear()
+        self.frame_dim_combo.addItems(dims)
+        default = current if current in dims else choose_frame_dim(dims)
+        if default:
+            self.frame_dim_combo.setCurrentText(default)
+        self.frame_dim_combo.blockSignals(False)
+
+    def _browse_output_dir(self):
+        directory = QFileDialog.getExistingDirectory(self, "출력 폴더 선택", self.output_dir_edit.text())
+        if directory:
+            self.output_dir_edit.setText(directory)
+
+    def _accept_if_valid(self):
+        if not self.selected_variables():
+            QMessageBox.warning(self, "일괄 내보내기", "내보낼 변수를 하나 이상 선택하세요.")
+            return
+        if not self.get_formats():
+            QMessageBox.warning(self, "일괄 내보내기", "출력 형식을 하나 이상 선택하세요.")
+            return
+        self.settings_manager.save_app_setting('batch_export_directory', self.output_dir_edit.text())
+        self.accept()
+
+    def get_formats(self):
+        formats = []
+        if self.png_check.isChecked():
+            formats.append('png')
+        if self.mp4_check.isChecked():
+            formats.append('mp4')
+        if self.gif_check.isChecked():
+            formats.append('gif')
+        return formats
+
+    def get_export_settings(self):
+        return {
+            'variables': self.selected_variables(),
+            'frame_dim': self.frame_dim_combo.currentText() or None,
+            'output_dir': self.output_dir_edit.text(),
+            'formats': self.get_formats(),
+            'fps': self.fps_spin.value(),
+            'dpi': self.dpi_spin.value(),
+            'max_workers': self.workers_spin.value(),
+        }
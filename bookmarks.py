@@ -2,21 +2,11 @@
 
 import json
 import os
-from PyQt6.QtCore import QStandardPaths
 import logging
 
-BOOKMARKS_FILE_NAME = "oceanocal_bookmarks.json"
-
-# Store bookmarks in a standard application data location
-try:
-    APP_DATA_DIR = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
-    if not APP_DATA_DIR: # Fallback if system path is not found
-        APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".oceanocal_v2")
-except Exception: # Fallback for non-Qt environments or errors
-    APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".oceanocal_v2")
+from .app_paths import APP_DATA_DIR
 
-if not os.path.exists(APP_DATA_DIR):
-    os.makedirs(APP_DATA_DIR, exist_ok=True)
+BOOKMARKS_FILE_NAME = "oceanocal_bookmarks.json"
 BOOKMARKS_FILE_PATH = os.path.join(APP_DATA_DIR, BOOKMARKS_FILE_NAME)
 
 
@@ -0,0 +1,181 @@
+# oceanocal_v2/chunk_cache.py
+
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VAR_CACHE_MAX_BYTES = 256 * 1024 * 1024 # 변수 하나에 할당할 청크 캐시 상한
+DEFAULT_TOTAL_CACHE_MAX_BYTES = 1024 * 1024 * 1024 # 조정한 청크 캐시 전체(프로세스) 상한. 슬라이스 캐시와 별도
+MIN_CACHE_SLOTS = 1009 # netCDF 기본 해시 슬롯 수
+
+
+def selection_ranges(dims, shape, indexers):
+    """
+    isel 인덱서를 축마다 (start, stop) 범위로 바꿉니다.
+    정수 배열 선택은 최소~최대 범위로 근사합니다.
+    """
+    indexers = indexers or {}
+    ranges = []
+    for dim, size in zip(dims, shape):
+        index = indexers.get(dim, slice(None))
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(size)
+            stop = max(stop, start + 1)
+        elif np.ndim(index) == 0:
+            start = int(index) % size if size else 0
+            stop = start + 1
+        else:
+            values = np.asarray(index, dtype=int) % max(size, 1)
+            start, stop = (int(values.min()), int(values.max()) + 1) if values.size else (0, 1)
+        ranges.append((start, min(stop, size)))
+    return ranges
+
+
+def access_pattern(dims, ranges, time_dim=None):
+    """읽기 범위의 모양에서 접근 패턴 이름(map / timeseries / section / point)을 추정합니다."""
+    spanned = [dim for dim, (start, stop) in zip(dims, ranges) if stop - start > 1]
+    if not spanned:
+        return 'point'
+    if time_dim is not None and spanned == [time_dim]:
+        return 'timeseries'
+    if len(spanned) == 1 and spanned[0] == dims[0]:
+        return 'timeseries'
+    if len(spanned) >= 2 and spanned == list(dims[-2:]):
+        return 'map'
+    return 'section'
+
+
+def recommend_chunk_cache(shape, chunks, itemsize, ranges, max_bytes=DEFAULT_VAR_CACHE_MAX_BYTES):
+    """
+    한 번의 읽기가 지나는 청크들을 모두 담을 수 있는 청크 캐시 설정을 계산합니다.
+    반환값: {'size', 'nelems', 'preemption', 'chunks_touched', 'chunk_bytes', 'requested_bytes', 'decoded_bytes'}
+
+    - size: 지나는 청크 전체 크기 (최소 청크 1개, 최대 max_bytes)
+    - preemption: 읽기가 청크를 통째로 소비하면 0.75(다 읽은 청크 우선 제거),
+      일부만 읽으면(시계열처럼 같은 청크를 다음 읽기에서 다시 쓰는 경우) 0.0
+    """
+    chunk_bytes = int(np.prod(chunks)) * itemsize
+    touched = 1
+    fully_consumed = True
+    for (start, stop), chunk, size in zip(ranges, chunks, shape):
+        first, last = start // chunk, (stop - 1) // chunk
+        touched *= last - first + 1
+        # 청크 경계에 맞지 않는 끝(배열 끝 제외)이 있으면 그 청크는 일부만 읽힙니다.
+        if start % chunk or (stop % chunk and stop != size):
+            fully_consumed = False
+    requested = int(np.prod([stop - start for start, stop in ranges])) * itemsize
+    size = int(min(max(touched * chunk_bytes, chunk_bytes), max(max_bytes, chunk_bytes)))
+    n_fit = max(1, size // max(chunk_bytes, 1))
+    return {
+        'size': size,
+        'nelems': _next_prime(max(MIN_CACHE_SLOTS, 10 * n_fit)),
+        'preemption': 0.75 if fully_consumed else 0.0,
+        'chunks_touched': touched,
+        'chunk_bytes': chunk_bytes,
+        'requested_bytes': requested,
+        'decoded_bytes': touched * chunk_bytes,
+    }
+
+
+def _next_prime(n):
+    """해시 슬롯 수로 쓸 n 이상의 소수."""
+    candidate = max(2, int(n))
+    while True:
+        if all(candidate % p for p in range(2, int(candidate ** 0.5) + 1)):
+            return candidate
+        candidate += 1
+
+
+class ChunkCacheTuner:
+    """
+    파일/변수별 청크 캐시 크기와 선점(preemption) 값을 읽기 모양에 맞춰 조정하고 효율 통계를 모읍니다.
+    변수 캐시는 커지기만 하므로(max_bytes까지) 지도/시계열을 번갈아 그려도 캐시가 비워지지 않고,
+    모든 변수 캐시의 합이 total_max_bytes를 넘으면 가장 오래 읽지 않은 변수부터 청크 하나 크기로 줄입니다.
+    """
+    def __init__(self, max_bytes=DEFAULT_VAR_CACHE_MAX_BYTES, total_max_bytes=DEFAULT_TOTAL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_max_bytes = total_max_bytes
+        self._settings = OrderedDict() # {(filepath, var_name): 적용된 설정} - 최근에 읽은 변수가 끝
+        self._stats = {} # {(filepath, var_name): {'reads', 'requested_bytes', 'decoded_bytes', 'patterns'}}
+
+    def total_bytes(self):
+        """조정해 적용한 변수별 청크 캐시 크기의 합."""
+        return sum(setting['size'] for setting in self._settings.values())
+
+    def plan(self, filepath, var_name, dims, shape, chunks, itemsize, indexers, time_dim=None):
+        """
+        이번 읽기에 필요한 설정을 계산하고 통계를 갱신합니다.
+        바꿔야 할 캐시 설정을 {(filepath, var_name): 설정} 딕셔너리로 반환합니다. 이번 변수 외에
+        전체 상한을 지키려고 줄인 다른 변수의 설정도 들어 있으며, 바꿀 것이 없으면 빈 딕셔너리입니다.
+        """
+        ranges = selection_ranges(dims, shape, indexers)
+        pattern = access_pattern(list(dims), ranges, time_dim)
+        recommended = recommend_chunk_cache(shape, chunks, itemsize, ranges, min(self.max_bytes, self.total_max_bytes))
+
+        key = (filepath, var_name)
+        stats = self._stats.setdefault(key, {'reads': 0, 'requested_bytes': 0, 'decoded_bytes': 0, 'patterns': {}})
+        stats['reads'] += 1
+        stats['requested_bytes'] += recommended['requested_bytes']
+        stats['decoded_bytes'] += recommended['decoded_bytes']
+        stats['patterns'][pattern] = stats['patterns'].get(pattern, 0) + 1
+
+        current = self._settings.get(key)
+        if current is not None:
+            self._settings.move_to_end(key)
+        if current is not None and current['size'] >= recommended['size']:
+            # 부분 읽기 패턴이 한 번이라도 있었다면 선점을 낮게 유지합니다.
+            if recommended['preemption'] >= current['preemption']:
+                return {}
+            recommended['size'] = current['size']
+            recommended['nelems'] = current['nelems']
+        if current is not None:
+            recommended['preemption'] = min(recommended['preemption'], current['preemption'])
+        recommended['pattern'] = pattern
+        self._settings[key] = recommended
+        self._settings.move_to_end(key)
+        return {key: recommended, **self._shrink_to_budget(key)}
+
+    def _shrink_to_budget(self, keep):
+        """전체 상한을 넘으면 오래 읽지 않은 변수(keep 제외)의 캐시를 청크 하나 크기로 줄이고 바뀐 설정을 반환합니다."""
+        changed = {}
+        total = self.total_bytes()
+        for key, setting in self._settings.items():
+            if total <= self.total_max_bytes:
+                break
+            if key == keep or setting['size'] <= setting['chunk_bytes']:
+                continue
+            shrunk = {**setting, 'size': setting['chunk_bytes'], 'nelems': MIN_CACHE_SLOTS}
+            total -= setting['size'] - shrunk['size']
+            self._settings[key] = changed[key] = shrunk
+            logger.debug(f"청크 캐시 전체 상한 초과로 축소: {key[1]} ({setting['size'] / 1024 / 1024:.1f}MB -> "
+                         f"{shrunk['size'] / 1024 / 1024:.1f}MB)")
+        return changed
+
+    def forget(self, filepath):
+        """파일이 닫히거나 다시 열리면 적용된 설정을 잊습니다 (통계는 유지)."""
+        for key in [k for k in self._settings if k[0] == filepath]:
+            del self._settings[key]
+
+    def report(self):
+        """
+        진단용 요약: 변수별 캐시 설정과 추정 읽기 효율(요청 바이트 / 압축 해제해야 하는 청크 바이트).
+        추정 효율은 읽기 모양으로 계산한 값이며 실제 캐시 적중률을 잰 것이 아닙니다.
+        """
+        report = {}
+        for key, stats in self._stats.items():
+            setting = self._settings.get(key, {})
+            decoded = stats['decoded_bytes']
+            report[key] = {
+                'cache_bytes': setting.get('size'),
+                'nelems': setting.get('nelems'),
+                'preemption': setting.get('preemption'),
+                'reads': stats['reads'],
+                'patterns': dict(stats['patterns']),
+                'requested_bytes': stats['requested_bytes'],
+                'decoded_bytes': decoded,
+                'estimated_efficiency': stats['requested_bytes'] / decoded if decoded else None,
+            }
+        return report
@@ -0,0 +1,109 @@
+# oceanocal_v2/chunked_io.py
+
+import logging
+
+import numpy as np
+import xarray as xr
+
+from .hdf5_backend import HDF5File, is_hdf5_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_BYTES = 64 * 1024 * 1024 # 한 번에 메모리로 읽어들일 블록의 목표 크기
+
+
+class ReadCancelled(Exception):
+    """사용자가 블록 단위 읽기를 취소했을 때 발생합니다."""
+
+
+def chunk_sizes(variable):
+    """
+    변수의 저장 청크 크기를 {dim: size}로 반환합니다. 청크 정보가 없으면(연속 저장) 빈 딕셔너리입니다.
+    """
+    encoding = getattr(variable, 'encoding', {}) or {}
+    chunks = encoding.get('chunksizes') or encoding.get('chunks')
+    if chunks and not encoding.get('contiguous', False) and len(chunks) == len(variable.dims):
+        return dict(zip(variable.dims, (int(c) for c in chunks)))
+    preferred = encoding.get('preferred_chunks')
+    if preferred:
+        return {dim: int(size) for dim, size in preferred.items() if dim in variable.dims}
+    return {}
+
+
+def iter_blocks(variable, dim, block_bytes=DEFAULT_BLOCK_BYTES, chunk_len=None):
+    """
+    dim을 따라 청크 경계에 맞춘 slice를 차례로 돌려줍니다.
+    블록 길이는 청크 길이의 배수이므로 각 청크는 정확히 한 블록에서만 압축 해제됩니다.
+    """
+    length = variable.sizes[dim]
+    if chunk_len is None:
+        chunk_len = chunk_sizes(variable).get(dim, 1)
+    chunk_len = max(1, min(int(chunk_len), length))
+    other_bytes = variable.dtype.itemsize * int(np.prod([size for d, size in variable.sizes.items() if d != dim]))
+    chunks_per_block = max(1, int(block_bytes // max(1, other_bytes * chunk_len)))
+    step = chunk_len * chunks_per_block
+    for start in range(0, length, step):
+        yield slice(start, min(start + step, length))
+
+
+def read_along(variable, dim, progress_callback=None, cancel_event=None, block_bytes=DEFAULT_BLOCK_BYTES,
+               chunk_len=None, message=""):
+    """
+    (이미 isel로 좁힌) 지연 로드 변수를 dim을 따라 청크 정렬 블록으로 읽어 하나의 DataArray로 만듭니다.
+    결과 배열은 미리 할당하고 블록마다 채웁니다. cancel_event가 설정되면 ReadCancelled를 발생시킵니다.
+    """
+    axis = variable.dims.index(dim)
+    out = np.empty(variable.shape, dtype=variable.dtype)
+    blocks = list(iter_blocks(variable, dim, block_bytes, chunk_len))
+    for count, block in enumerate(blocks, start=1):
+        if cancel_event is not None and cancel_event.is_set():
+            raise ReadCancelled(message or "읽기 취소됨")
+        selector = [slice(None)] * variable.ndim
+        selector[axis] = block
+        out[tuple(selector)] = variable.isel({dim: block}).values
+        if progress_callback:
+            progress_callback(int(100 * count / len(blocks)), message)
+    return variable.copy(data=out)
+
+
+def compose_indexer(outer, block, size):
+    """부분집합 인덱서(outer) 안에서의 블록 slice를 원래 변수 기준 인덱서로 바꿉니다."""
+    if outer is None:
+        return block
+    if isinstance(outer, slice):
+        start, _, step = outer.indices(size)
+        return slice(start + block.start * step, start + block.stop * step, step)
+    return np.asarray(outer)[block]
+
+
+class SourceReader:
+    """
+    변수 하나를 블록 단위로 읽기 위한 컨텍스트 관리자. (좌표 Dataset, read(indexers)) 쌍을 돌려줍니다.
+    DatasetManager에 열린 파일은 그 경로(병렬 읽기·CF 디코딩 포함, 캐시 없이)로 읽고,
+    열려 있지 않은 파일(시계열의 다른 파일 등)은 잠깐 열었다가 닫습니다.
+    """
+    def __init__(self, dataset_manager, filepath, var_name):
+        self.dataset_manager = dataset_manager
+        self.filepath = filepath
+        self.var_name = var_name
+        self.handle = None
+
+    def __enter__(self):
+        manager = self.dataset_manager
+        if self.filepath in manager.get_file_list():
+            ds = manager.get_variable_dataset(self.filepath, self.var_name)
+            read = lambda indexers: manager.read_variable(self.filepath, self.var_name, indexers, use_cache=False)
+        elif is_hdf5_path(self.filepath):
+            self.handle = HDF5File(self.filepath)
+            ds = self.handle.coordinate_dataset(self.var_name)
+            read = lambda indexers: self.handle.read(self.var_name, indexers)
+        else:
+            self.handle = xr.open_dataset(self.filepath)
+            ds = self.handle
+            read = lambda indexers: self.handle[self.var_name].isel(indexers).load()
+        return ds, read
+
+    def __exit__(self, *exc):
+        if self.handle is not None:
+            self.handle.close()
+        return False
@@ -0,0 +1,256 @@
+# oceanocal_v2/climatology.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import xarray as xr
+from xarray.coding.times import decode_cf_datetime
+
+from .app_paths import APP_DATA_DIR
+from .chunked_io import iter_blocks, chunk_sizes, SourceReader, DEFAULT_BLOCK_BYTES
+from .compute_backend import binned_sum
+from .slice_cache import make_slice_key
+from . import subset
+
+logger = logging.getLogger(__name__)
+
+# 달력 구간 이름: (구간 수, 좌표 값)
+CALENDAR_BINS = {
+    'month': (12, np.arange(1, 13)),
+    'season': (4, np.array(['DJF', 'MAM', 'JJA', 'SON'])),
+    'dayofyear': (366, np.arange(1, 367)),
+}
+ACCUMULATOR_VERSION = 1
+
+
+def calendar_bins(times, freq, attrs=None):
+    """
+    시간 값(datetime64 또는 cftime)을 0부터 시작하는 달력 구간 번호 배열로 바꿉니다.
+    디코딩되지 않은 숫자 시간(HDF5 원본)은 attrs의 'units'/'calendar'로 먼저 디코딩합니다.
+    """
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.number):
+        attrs = attrs or {}
+        if ' since ' not in str(attrs.get('units', '')):
+            raise ValueError(f"시간 단위가 없어 달력 구간을 계산할 수 없습니다: units={attrs.get('units')!r}")
+        times = decode_cf_datetime(times, attrs['units'], attrs.get('calendar', 'standard'))
+    accessor = xr.DataArray(times).dt
+    if freq == 'month':
+        return accessor.month.values - 1
+    if freq == 'season':
+        return (accessor.month.values % 12) // 3 # DJF=0, MAM=1, JJA=2, SON=3
+    if freq == 'dayofyear':
+        return accessor.dayofyear.values - 1
+    raise ValueError(f"지원하지 않는 달력 구간입니다: {freq}")
+
+
+class ClimatologyAccumulator:
+    """
+    달력 구간별 누적 합계와 유효값 개수. 어떤 파일(경로, mtime)을 더했는지 기록해 두므로
+    새 파일이 추가되면 그 파일만 더해서 기후값을 갱신할 수 있습니다.
+    """
+    def __init__(self, var_name, freq, dims, shape, indexers=None):
+        n_bins = CALENDAR_BINS[freq][0]
+        self.var_name = var_name
+        self.freq = freq
+        self.dims = tuple(dims) # 시간 차원을 뺀 공간 차원
+        self.shape = tuple(shape)
+        self.indexers = dict(indexers or {})
+        self.sums = np.zeros((n_bins,) + self.shape, dtype=np.float64)
+        self.counts = np.zeros((n_bins,) + self.shape, dtype=np.int32)
+        self.sources = {} # {파일 경로: 더할 때의 mtime_ns}
+        self.coords = {} # {공간 차원: 1차원 좌표 값}
+
+    def add(self, values, bins):
+        """(시간, *공간) 블록을 구간별로 더합니다. NaN은 합계와 개수에서 빠집니다."""
+        self.merge(binned_sum(values, bins, len(self.sums)))
+
+    def merge(self, partial):
+        """계산 백엔드의 'binned_sum' 부분 결과({'sums', 'counts'})를 더합니다."""
+        if partial is not None:
+            self.sums += partial['sums']
+            self.counts += partial['counts']
+
+    def climatology(self):
+        """구간별 평균 (개수가 0인 칸은 NaN)을 DataArray로 반환합니다."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(self.counts > 0, self.sums / np.maximum(self.counts, 1), np.nan)
+        coords = {self.freq: CALENDAR_BINS[self.freq][1]}
+        coords.update({dim: values for dim, values in self.coords.items() if dim in self.dims})
+        return xr.DataArray(mean, dims=(self.freq,) + self.dims, coords=coords, name=self.var_name,
+                            attrs={'climatology_bins': self.freq, 'n_sources': len(self.sources)})
+
+    def save(self, path):
+        """누적값을 .npz 하나로 저장합니다 (임시 파일에 쓴 뒤 교체)."""
+        meta = {
+            'version': ACCUMULATOR_VERSION, 'var_name': self.var_name, 'freq': self.freq,
+            'dims': list(self.dims), 'shape': list(self.shape),
+            'indexers': repr(make_slice_key(self.indexers)), 'sources': self.sources,
+        }
+        coords = {f"coord_{dim}": np.asarray(values) for dim, values in self.coords.items()}
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(temp_path, sums=self.sums, counts=self.counts, meta=np.array(json.dumps(meta)), **coords)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path, indexers=None):
+        """저장된 누적값을 읽습니다. 파일이 없거나 형식이 다르면 None."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                if meta.get('version') != ACCUMULATOR_VERSION:
+                    return None
+                accumulator = cls(meta['var_name'], meta['freq'], meta['dims'], meta['shape'], indexers)
+                accumulator.sums = data['sums']
+                accumulator.counts = data['counts']
+                accumulator.sources = {p: int(m) for p, m in meta['sources'].items()}
+                accumulator.coords = {dim: data[f"coord_{dim}"] for dim in meta['dims'] if f"coord_{dim}" in data}
+            return accumulator
+        except Exception as e:
+            logger.warning(f"기후값 누적 파일을 읽을 수 없어 새로 계산합니다 ({path}): {e}")
+            return None
+
+
+class ClimatologyEngine:
+    """
+    단일 파일 또는 여러 파일 시계열을 시간 축 블록 단위로 훑으며 달력 구간별 누적값을 만들고,
+    누적값을 디스크에 보관해 새 파일이 추가되면 그 파일만 더해 기후값을 갱신합니다.
+    편차(anomaly)는 읽은 슬라이스에서 각 시점의 구간 기후값을 빼서 구합니다.
+    """
+    def __init__(self, dataset_manager, cache_dir=None, block_bytes=DEFAULT_BLOCK_BYTES):
+        self.dataset_manager = dataset_manager
+        self.cache_dir = cache_dir or os.path.join(APP_DATA_DIR, "climatology")
+        self.block_bytes = block_bytes
+        self._accumulators = {} # {누적 파일 경로: ClimatologyAccumulator}
+        self._lock = threading.Lock()
+
+    def accumulator_path(self, filepaths, var_name, freq, indexers=None):
+        """
+        누적 파일 경로. 파일 목록 대신 파일들이 있는 폴더로 키를 만들므로
+        같은 폴더에 새 날짜 파일이 추가되어도 같은 누적값을 이어서 갱신합니다.
+        """
+        folder = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in filepaths])
+        key = f"{folder}|{var_name}|{freq}|{make_slice_key(indexers)!r}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.cache_dir, f"{var_name.strip('/').replace('/', '_')}_{freq}_{digest}.npz")
+
+    def update(self, filepaths, var_name, freq='month', indexers=None, progress_callback=None, cancel_event=None):
+        """
+        filepaths의 시계열로 누적값을 갱신하고 ClimatologyAccumulator를 반환합니다.
+        이미 더한 파일은 건너뛰고, 더한 뒤 바뀌었거나 목록에서 빠진 파일이 있으면 처음부터 다시 계산합니다.
+        indexers는 시간 외 차원의 isel 인덱서(영역/깊이 고정 등)입니다.
+        """
+        if freq not in CALENDAR_BINS:
+            raise ValueError(f"지원하지 않는 달력 구간입니다: {freq}")
+        filepaths = [os.path.abspath(p) for p in filepaths]
+        path = self.accumulator_path(filepaths, var_name, freq, indexers)
+        with self._lock:
+            accumulator = self._accumulators.get(path) or ClimatologyAccumulator.load(path, indexers)
+        if accumulator is not None:
+            stale = [p for p, mtime in accumulator.sources.items()
+                     if p not in filepaths or not os.path.exists(p) or os.stat(p).st_mtime_ns != mtime]
+            if stale:
+                logger.info(f"기후값 원본 파일이 바뀌어 다시 계산합니다: {[os.path.basename(p) for p in stale]}")
+                accumulator = None
+        pending = [p for p in filepaths if accumulator is None or p not in accumulator.sources]
+
+        for number, filepath in enumerate(pending, start=1):
+            message = f"기후값 누적 ({number}/{len(pending)}): {os.path.basename(filepath)}"
+            accumulator = self._accumulate_file(accumulator, filepath, var_name, freq, indexers,
+                                                progress_callback, cancel_event, message)
+        if accumulator is None:
+            raise ValueError("기후값을 계산할 파일이 없습니다.")
+        if pending:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            accumulator.save(path)
+            logger.info(f"기후값 누적 갱신: {var_name} ({freq}) 새 파일 {len(pending)}개, 전체 {len(accumulator.sources)}개")
+        with self._lock:
+            self._accumulators[path] = accumulator
+        return accumulator
+
+    def climatology(self, filepaths, var_name, freq='month', indexers=None, **kwargs):
+        """갱신한 누적값의 구간별 평균 DataArray (freq × 공간 차원)."""
+        return self.update(filepaths, var_name, freq, indexers, **kwargs).climatology()
+
+    def anomaly(self, filepath, var_name, indexers=None, freq='month', series_files=None):
+        """
+        filepath의 슬라이스(indexers)에서 각 시점의 달력 구간 기후값을 뺀 편차를 반환합니다.
+        기후값은 series_files(기본: filepath 하나)의 누적값이며, 공간 차원은 같은 인덱서로 잘라 맞춥니다.
+        """
+        indexers = dict(indexers or {})
+        ds = self.dataset_manager.get_variable_dataset(filepath, var_name)
+        time_dim = subset.find_axis_dim(ds, ds[var_name], 'time')
+        if time_dim is None:
+            raise ValueError(f"변수 '{var_name}'에 시간 차원이 없습니다.")
+        clim = self.climatology(series_files or [filepath], var_name, freq)
+        data = self.dataset_manager.read_variable(filepath, var_name, indexers)
+        spatial = {dim: index for dim, index in indexers.items() if dim in clim.dims}
+        clim = clim.isel(spatial) if spatial else clim
+        if time_dim in data.dims:
+            bins = calendar_bins(data[time_dim].values, freq, ds[time_dim].attrs)
+            matched = clim.isel({freq: xr.DataArray(bins, dims=time_dim)}).drop_vars(freq)
+        else:
+            bins = calendar_bins(np.atleast_1d(data[time_dim].values), freq, ds[time_dim].attrs)
+            matched = clim.isel({freq: int(bins[0])}, drop=True)
+        anomaly = data - matched.assign_coords({dim: data[dim] for dim in matched.dims if dim in data.coords})
+        anomaly.name = f"{var_name}_anomaly"
+        anomaly.attrs = {**data.attrs, 'long_name': f"{var_name} anomaly ({freq} climatology)"}
+        return anomaly
+
+    def _accumulate_file(self, accumulator, filepath, var_name, freq, indexers, progress_callback, cancel_event,
+                         message):
+        with self._open_source(filepath, var_name) as (ds, read):
+            variable = ds[var_name]
+            time_dim = subset.find_axis_dim(ds, variable, 'time') or variable.dims[0]
+            indexers = {dim: index for dim, index in (indexers or {}).items() if dim != time_dim}
+            template = variable.isel(indexers) if indexers else variable
+            if time_dim not in template.dims:
+                raise ValueError(f"변수 '{var_name}'에 시간 차원이 없습니다: {filepath}")
+            spatial_dims = [dim for dim in template.dims if dim != time_dim]
+            if accumulator is None:
+                accumulator = ClimatologyAccumulator(var_name, freq, spatial_dims,
+                                                     [template.sizes[d] for d in spatial_dims], indexers)
+                accumulator.coords = {dim: template[dim].values for dim in spatial_dims if dim in template.coords}
+            elif tuple(spatial_dims) != accumulator.dims or \
+                    tuple(template.sizes[d] for d in spatial_dims) != accumulator.shape:
+                raise ValueError(f"격자가 기존 기후값과 다릅니다: {os.path.basename(filepath)}")
+            times = ds[time_dim].values
+            time_attrs = ds[time_dim].attrs
+            chunk_len = chunk_sizes(variable).get(time_dim)
+            blocks = list(iter_blocks(template, time_dim, self.block_bytes, chunk_len))
+            n_bins = CALENDAR_BINS[freq][0]
+
+            def block_values():
+                # 다음 블록을 읽는 동안 계산 백엔드가 앞 블록의 구간 합계를 계산합니다.
+                for block in blocks:
+                    values = read({**indexers, time_dim: block}).transpose(time_dim, *spatial_dims).values
+                    yield values, {'bins': calendar_bins(times[block], freq, time_attrs), 'n_bins': n_bins}
+
+            accumulator.merge(self.dataset_manager.compute_backend.reduce(
+                block_values(), 'binned_sum', progress_callback, cancel_event, total=len(blocks), message=message))
+            accumulator.sources[filepath] = os.stat(filepath).st_mtime_ns
+        return accumulator
+
+    def _open_source(self, filepath, var_name):
+        """
+        열려 있는 파일은 DatasetManager로(슬라이스 캐시는 거치지 않음), 아니면 임시로 열어 읽습니다.
+        수천 개의 일별 파일을 훑어도 DatasetManager에 파일이 쌓이지 않습니다.
+        """
+        return SourceReader(self.dataset_manager, filepath, var_name)
+
+
+def export_climatology(dataset_manager, filepaths, var_name, freq, output_path, progress_callback=None,
+                       cancel_event=None):
+    """파일 시계열의 기후값을 갱신해 NetCDF로 저장하고 저장한 경로를 반환합니다."""
+    engine = dataset_manager.climatology
+    climatology = engine.climatology(filepaths, var_name, freq, progress_callback=progress_callback,
+                                     cancel_event=cancel_event)
+    climatology.to_dataset(name=var_name.strip('/').replace('/', '_')).to_netcdf(output_path)
+    logger.info(f"기후값 저장: {output_path}")
+    return output_path
@@ -0,0 +1,262 @@
+# oceanocal_v2/compare.py
+
+import logging
+
+import numpy as np
+import xarray as xr
+
+from .chunked_io import iter_blocks, chunk_sizes, compose_indexer, ReadCancelled, DEFAULT_BLOCK_BYTES
+from .coord_index import SortedAxis
+from .regrid import Grid
+from .subset import find_axis_dim
+
+logger = logging.getLogger(__name__)
+
+COMPARE_MODES = {
+    'difference': "A − B",
+    'ratio': "A / B",
+    'rmse': "RMSE(A, B)",
+}
+_AXIS_KINDS = ('time', 'depth', 'lat', 'lon')
+
+
+def _positions(index, size):
+    """isel 인덱서(None/slice/int/배열)를 절대 인덱스로 바꿉니다."""
+    if index is None:
+        return np.arange(size)
+    return np.arange(size)[index]
+
+
+def _as_indexer(indices):
+    """정수 배열이 간격 1로 이어지면 slice로 바꿔 하이퍼슬랩 한 번으로 읽게 합니다."""
+    indices = np.asarray(indices)
+    if indices.ndim == 0:
+        return int(indices)
+    if indices.size and np.all(np.diff(indices) == 1):
+        return slice(int(indices[0]), int(indices[-1]) + 1)
+    return indices
+
+
+def _numeric(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64) / 1e9 # 초 단위
+    return values.astype(float)
+
+
+class _Statistics:
+    """A, B 짝 값의 스트리밍 요약 통계 (편차, RMSE, MAE, 상관계수)."""
+    def __init__(self):
+        self.count = 0
+        self.sums = np.zeros(7) # a, b, a², b², ab, d², |d|
+
+    def add(self, a, b):
+        valid = np.isfinite(a) & np.isfinite(b)
+        a, b = a[valid], b[valid]
+        d = a - b
+        self.count += a.size
+        self.sums += [a.sum(), b.sum(), (a * a).sum(), (b * b).sum(), (a * b).sum(), (d * d).sum(), np.abs(d).sum()]
+
+    def summary(self):
+        if self.count == 0:
+            return {'count': 0}
+        n = self.count
+        sa, sb, saa, sbb, sab, sdd, sad = self.sums
+        cov = sab / n - (sa / n) * (sb / n)
+        var_a, var_b = saa / n - (sa / n) ** 2, sbb / n - (sb / n) ** 2
+        correlation = cov / np.sqrt(var_a * var_b) if var_a > 0 and var_b > 0 else np.nan
+        return {'count': int(n), 'mean_a': sa / n, 'mean_b': sb / n, 'bias': (sa - sb) / n,
+                'rmse': float(np.sqrt(sdd / n)), 'mae': sad / n, 'correlation': float(correlation)}
+
+
+def format_summary(attrs):
+    """비교 결과 DataArray 속성의 요약 통계를 정보 패널에 보여줄 문자열로 만듭니다."""
+    lines = [f"--- 비교: {attrs.get('comparison', '')} ---",
+             f"A: {attrs.get('source_a', '')}", f"B: {attrs.get('source_b', '')}"]
+    if attrs.get('regridded'):
+        lines.append(f"B는 A 격자로 재격자화됨 ({attrs['regridded']})")
+    for key, label in (('count', "유효 격자점 수"), ('mean_a', "A 평균"), ('mean_b', "B 평균"), ('bias', "편차 (A−B)"),
+                       ('rmse', "RMSE"), ('mae', "MAE"), ('correlation', "상관계수")):
+        if key in attrs:
+            value = attrs[key]
+            lines.append(f"{label}: {value:.6g}" if isinstance(value, float) else f"{label}: {value}")
+    return "\n".join(lines)
+
+
+class Comparison:
+    """
+    같은 물리량을 담은 두 데이터셋(A: 기준 창의 변수, B: 비교 대상)의 슬라이스를 좌표로 맞추고
+    A의 저장 청크 블록과 그에 대응하는 B 블록을 번갈아 읽으며(lock-step) 차이/비율/RMSE를 계산합니다.
+    좌표는 허용 오차 안에서 가장 가까운 값으로 맞추고, 수평 격자가 맞지 않으면 B를 A 격자로 재격자화합니다.
+    """
+    def __init__(self, dataset_manager, file_a, var_a, file_b, var_b, tolerance=None, regrid_method='bilinear',
+                 block_bytes=DEFAULT_BLOCK_BYTES):
+        self.dataset_manager = dataset_manager
+        self.file_a, self.var_a = file_a, var_a
+        self.file_b, self.var_b = file_b, var_b
+        self.tolerance = tolerance or {} # {축 종류 또는 차원: 좌표 단위(시간은 초)의 허용 오차}
+        self.regrid_method = regrid_method
+        self.block_bytes = block_bytes
+        self.ds_a = dataset_manager.get_variable_dataset(file_a, var_a)
+        self.ds_b = dataset_manager.get_variable_dataset(file_b, var_b)
+        self.dims_b = self._map_dims()
+
+    def _map_dims(self):
+        """A 차원마다 대응하는 B 차원 (이름이 같거나 같은 축 종류)."""
+        variable_a, variable_b = self.ds_a[self.var_a], self.ds_b[self.var_b]
+        mapping = {}
+        for dim in variable_a.dims:
+            if dim in variable_b.dims:
+                mapping[dim] = dim
+                continue
+            for kind in _AXIS_KINDS:
+                if find_axis_dim(self.ds_a, variable_a, kind) == dim:
+                    other = find_axis_dim(self.ds_b, variable_b, kind)
+                    if other is not None:
+                        mapping[dim] = other
+                    break
+        # B의 수평 차원은 이름이 달라도 재격자화로 맞출 수 있으므로 제외합니다.
+        index_b = self.dataset_manager.get_coord_index(self.file_b, self.var_b)
+        horizontal_b = {index_b.lat_dim, index_b.lon_dim} if index_b.kind == 'rectilinear' else \
+            set(getattr(index_b, 'grid_dims', ()))
+        # B에만 있는 차원(예: A는 표층 위성 자료, B는 깊이가 있는 모델)은 첫 단계로 고정합니다.
+        self.fixed_b = {dim: 0 for dim in variable_b.dims if dim not in mapping.values() and dim not in horizontal_b}
+        if self.fixed_b:
+            logger.info(f"비교: B에만 있는 차원을 첫 단계로 고정합니다: {list(self.fixed_b)}")
+        return mapping
+
+    def _match_axis(self, dim, positions_a, horizontal=False):
+        """
+        A 인덱스의 좌표 값에 가장 가까운 B 인덱스. 허용 오차를 넘는 점이 있으면 None.
+        기본 허용 오차는 시간/깊이는 B 간격의 절반(가장 가까운 단계), 수평 축은 간격의 1%(같은 격자점)입니다.
+        """
+        dim_b = self.dims_b[dim]
+        size_b = self.ds_b[self.var_b].sizes[dim_b]
+        if dim not in self.ds_a.coords or dim_b not in self.ds_b.coords:
+            # 좌표가 없으면 인덱스 그대로 맞춥니다.
+            return positions_a if np.all(np.atleast_1d(positions_a) < size_b) else None
+        values_a = np.atleast_1d(self.ds_a[dim].values[positions_a])
+        values_b = self.ds_b[dim_b].values
+        kind = next((k for k in _AXIS_KINDS if find_axis_dim(self.ds_a, self.ds_a[self.var_a], k) == dim), None)
+        axis = SortedAxis(values_b, periodic=360 if kind == 'lon' else None)
+        matched = np.array([axis.nearest(value) for value in values_a])
+        numeric_a, numeric_b = _numeric(values_a), _numeric(values_b)
+        tolerance = self.tolerance.get(dim, self.tolerance.get(kind))
+        if tolerance is None:
+            spacing = np.abs(np.diff(numeric_b))
+            tolerance = (0.01 if horizontal else 0.5) * float(np.median(spacing)) if spacing.size else 0.0
+        error = np.abs(numeric_b[matched] - numeric_a)
+        if kind == 'lon':
+            error = np.minimum(error % 360, 360 - error % 360)
+        if np.any(error > tolerance + 1e-9 * max(1.0, abs(tolerance))):
+            return None
+        return matched if np.ndim(positions_a) else matched[0]
+
+    def plan(self, indexers_a):
+        """
+        A 인덱서에 대응하는 B 인덱서와 재격자화 정보(격자가 맞으면 None)를 구합니다.
+        수평 외 차원이 허용 오차 안에서 맞지 않으면 ValueError.
+        """
+        variable_a = self.ds_a[self.var_a]
+        horizontal = set()
+        index_a = self.dataset_manager.get_coord_index(self.file_a, self.var_a)
+        if index_a.kind == 'rectilinear':
+            horizontal = {index_a.lat_dim, index_a.lon_dim}
+        elif index_a.kind == 'curvilinear':
+            horizontal = set(index_a.grid_dims)
+        indexers_b, regrid = dict(self.fixed_b), None
+        for dim in variable_a.dims:
+            dim_b = self.dims_b.get(dim)
+            if dim_b is None:
+                if dim in horizontal:
+                    regrid = True
+                elif not isinstance(indexers_a.get(dim), (int, np.integer)):
+                    # 한 단계로 고정된 A 차원(예: 표층 깊이)은 B에 없어도 비교할 수 있습니다.
+                    raise ValueError(f"A 차원 '{dim}'에 대응하는 B 차원이 없습니다.")
+                continue
+            positions = _positions(indexers_a.get(dim), variable_a.sizes[dim])
+            matched = self._match_axis(dim, positions, dim in horizontal)
+            if matched is None and dim in horizontal:
+                regrid = True
+                continue
+            if matched is None:
+                raise ValueError(f"차원 '{dim}'의 좌표가 허용 오차 안에서 B와 맞지 않습니다.")
+            indexers_b[dim_b] = _as_indexer(matched)
+        if regrid:
+            # 수평 격자가 다르면 B 전체 수평 격자를 A의 선택 영역 격자로 옮깁니다.
+            indexers_b = {d: i for d, i in indexers_b.items() if d not in {self.dims_b.get(h) for h in horizontal}}
+            source = Grid.from_coord_index(self.dataset_manager.get_coord_index(self.file_b, self.var_b))
+            target = Grid.from_coord_index(index_a, {d: i for d, i in indexers_a.items() if d in horizontal})
+            regrid = (source, target, self.dataset_manager.regrid_engine.get_weights(source, target,
+                                                                                   self.regrid_method))
+        return indexers_b, regrid
+
+    def run(self, indexers_a, mode='difference', progress_callback=None, cancel_event=None):
+        """
+        A 슬라이스(indexers_a)에 대한 비교 결과 DataArray를 반환합니다. 'rmse'는 시간 차원을 따라 줄인 지도입니다.
+        요약 통계(편차, RMSE, MAE, 상관계수)는 결과의 속성에 들어갑니다.
+        """
+        if mode not in COMPARE_MODES:
+            raise ValueError(f"지원하지 않는 비교 방식입니다: {mode}")
+        indexers_a = dict(indexers_a or {})
+        variable_a = self.ds_a[self.var_a]
+        template = variable_a.isel(indexers_a) if indexers_a else variable_a
+        indexers_b, regrid = self.plan(indexers_a)
+        time_dim = find_axis_dim(self.ds_a, variable_a, 'time')
+        if mode == 'rmse':
+            if time_dim not in template.dims:
+                raise ValueError("RMSE 지도를 만들려면 시간 차원이 고정되지 않아야 합니다.")
+            stream_dim = time_dim
+        else:
+            stream_dim = next((d for d in template.dims if regrid is None or d not in regrid[1].dims), None)
+
+        statistics = _Statistics()
+        pieces, squared, counts = [], None, None
+        blocks = list(iter_blocks(template, stream_dim, self.block_bytes, chunk_sizes(variable_a).get(stream_dim))) \
+            if stream_dim else [None]
+        for number, block in enumerate(blocks, start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ReadCancelled("비교 취소됨")
+            block_a, block_b = dict(indexers_a), dict(indexers_b)
+            if block is not None:
+                block_a[stream_dim] = compose_indexer(indexers_a.get(stream_dim), block, variable_a.sizes[stream_dim])
+                dim_b = self.dims_b[stream_dim]
+                block_b[dim_b] = _as_indexer(_positions(indexers_b.get(dim_b), self.ds_b[self.var_b].sizes[dim_b])[block])
+            # 같은 블록 구간을 A, B에서 차례로 읽으므로 메모리에는 블록 한 쌍만 있습니다.
+            a = self.dataset_manager.read_variable(self.file_a, self.var_a, block_a, use_cache=False)
+            b = self.dataset_manager.read_variable(self.file_b, self.var_b, block_b, use_cache=False)
+            if regrid:
+                # 재격자화한 B의 수평 차원 이름은 A 격자의 차원 이름입니다.
+                b = self.dataset_manager.regrid_engine.apply(regrid[2], b, regrid[0], regrid[1])
+            order_b = [self.dims_b.get(dim, dim) if not (regrid and dim in regrid[1].dims) else dim for dim in a.dims]
+            values_a = np.asarray(a.values, dtype=np.float64)
+            values_b = np.asarray(b.transpose(*order_b).values, dtype=np.float64)
+            statistics.add(values_a, values_b)
+            if mode == 'rmse':
+                axis = a.dims.index(stream_dim)
+                diff2 = np.where(np.isfinite(values_a) & np.isfinite(values_b), (values_a - values_b) ** 2, np.nan)
+                block_sum, block_count = np.nansum(diff2, axis=axis), np.sum(np.isfinite(diff2), axis=axis)
+                squared = block_sum if squared is None else squared + block_sum
+                counts = block_count if counts is None else counts + block_count
+            else:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    values = values_a - values_b if mode == 'difference' else \
+                        np.where(values_b != 0, values_a / np.where(values_b != 0, values_b, 1.0), np.nan)
+                pieces.append(a.copy(data=values))
+            if progress_callback:
+                progress_callback(int(100 * number / len(blocks)), f"비교 중 ({COMPARE_MODES[mode]})")
+
+        if mode == 'rmse':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = np.where(counts > 0, np.sqrt(squared / np.maximum(counts, 1)), np.nan)
+            reduced = template.isel({stream_dim: 0}, drop=True)
+            result = xr.DataArray(values, dims=reduced.dims,
+                                  coords={k: v for k, v in reduced.coords.items() if set(v.dims) <= set(reduced.dims)})
+        else:
+            result = pieces[0] if len(pieces) == 1 else xr.concat(pieces, dim=stream_dim)
+        result.name = f"{self.var_a}_{mode}"
+        result.attrs = {'comparison': COMPARE_MODES[mode], 'source_a': f"{self.file_a}:{self.var_a}",
+                        'source_b': f"{self.file_b}:{self.var_b}", 'regridded': self.regrid_method if regrid else '',
+                        **statistics.summary()}
+        logger.info(f"비교 완료: {COMPARE_MODES[mode]} {self.var_a} ({statistics.count}개 격자점)")
+        return result
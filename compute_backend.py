@@ -0,0 +1,247 @@
+# oceanocal_v2/compute_backend.py
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from .chunked_io import ReadCancelled
+from .shared_transport import SharedSegment, attach
+
+logger = logging.getLogger(__name__)
+
+PROCESS_MIN_BYTES = 4 * 1024 * 1024 # 이보다 작은 블록은 전송 비용이 더 커서 현재 스레드에서 계산합니다
+COMPUTE_BACKENDS = {'process': "프로세스 풀", 'serial': "현재 스레드"}
+
+
+# --- 블록 축소 커널 ---------------------------------------------------------------------------------------
+# 커널은 (첫 축 = 읽기 축) 블록 하나를 작은 부분 결과 {이름: 배열}로 줄이고, 결합 함수는 부분 결과 두 개를 합칩니다.
+# 결합은 교환 법칙이 성립하므로 작업자 프로세스가 끝나는 순서대로 합칠 수 있습니다.
+
+def binned_sum(values, bins, n_bins):
+    """(시간, *공간) 블록의 구간별 합계와 유효값 개수. NaN은 합계와 개수에서 빠집니다."""
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    clean = np.where(finite, values, 0.0)
+    sums = np.zeros((n_bins,) + values.shape[1:], dtype=np.float64)
+    counts = np.zeros((n_bins,) + values.shape[1:], dtype=np.int32)
+    for b in np.unique(bins):
+        rows = bins == b
+        sums[b] = clean[rows].sum(axis=0)
+        counts[b] = finite[rows].sum(axis=0, dtype=np.int32)
+    return {'sums': sums, 'counts': counts}
+
+
+def _combine_sum(a, b):
+    return {key: a[key] + b[key] for key in a}
+
+
+def moments(values):
+    """블록의 첫 축을 따라 유효값 개수, 평균, 편차 제곱합(M2), 최솟값, 최댓값을 구합니다."""
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    count = finite.sum(axis=0, dtype=np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, np.where(finite, values, 0.0).sum(axis=0) / np.maximum(count, 1), 0.0)
+    m2 = np.where(finite, (values - mean) ** 2, 0.0).sum(axis=0)
+    return {'count': count, 'mean': mean, 'm2': m2,
+            'min': np.where(finite, values, np.inf).min(axis=0),
+            'max': np.where(finite, values, -np.inf).max(axis=0)}
+
+
+def _combine_moments(a, b):
+    """두 부분 결과의 평균/M2를 Chan의 병렬 알고리즘으로 합칩니다 (큰 값에서도 분산이 안정적)."""
+    count = a['count'] + b['count']
+    safe = np.maximum(count, 1)
+    delta = b['mean'] - a['mean']
+    return {'count': count,
+            'mean': a['mean'] + delta * b['count'] / safe,
+            'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / safe,
+            'min': np.minimum(a['min'], b['min']),
+            'max': np.maximum(a['max'], b['max'])}
+
+
+def finalize_moments(partial, statistic):
+    """moments 부분 결과에서 통계('mean', 'std', 'var', 'min', 'max', 'count', 'sum')를 꺼냅니다. 값이 없는 칸은 NaN."""
+    count = partial['count']
+    empty = count == 0
+    if statistic == 'count':
+        return count
+    if statistic == 'mean':
+        value = partial['mean']
+    elif statistic == 'sum':
+        value = partial['mean'] * count
+    elif statistic in ('var', 'std'):
+        value = partial['m2'] / np.maximum(count, 1) # 모분산 (ddof=0)
+        value = np.sqrt(value) if statistic == 'std' else value
+    elif statistic in ('min', 'max'):
+        value = partial[statistic]
+    else:
+        raise ValueError(f"지원하지 않는 통계입니다: {statistic}")
+    return np.where(empty, np.nan, value)
+
+
+KERNELS = {
+    'binned_sum': (binned_sum, _combine_sum),
+    'moments': (moments, _combine_moments),
+}
+
+
+def run_kernel(kernel, values, **kwargs):
+    return KERNELS[kernel][0](values, **kwargs)
+
+
+def _shared_kernel(kernel, descriptor, kwargs):
+    """작업자 프로세스: 공유 세그먼트의 블록을 복사 없이 배열로 보고 커널을 실행해 작은 부분 결과만 돌려줍니다."""
+    with attach(descriptor) as values:
+        partial = run_kernel(kernel, values, **kwargs)
+        del values
+    return partial
+
+
+# --- 계산 백엔드 ------------------------------------------------------------------------------------------
+
+class SerialBackend:
+    """블록을 읽는 스레드에서 바로 계산하는 기본 백엔드 (작은 작업, 디버깅, 프로세스를 띄울 수 없는 환경)."""
+    name = 'serial'
+
+    def reduce(self, blocks, kernel, progress_callback=None, cancel_event=None, total=None, message=''):
+        """
+        blocks((값 배열, 커널 인자) 이터러블)를 커널로 줄이고 부분 결과를 합쳐 반환합니다. 블록이 없으면 None.
+        total이 주어지면 끝난 블록 수로 진행률을 보고합니다.
+        """
+        combine = KERNELS[kernel][1]
+        result = None
+        for number, (values, kwargs) in enumerate(blocks, start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ReadCancelled("계산 취소됨")
+            partial = run_kernel(kernel, values, **kwargs)
+            result = partial if result is None else combine(result, partial)
+            self._report(progress_callback, number, total, message)
+        return result
+
+    def submit(self, fn, *args):
+        """fn(*args)를 바로 실행하고 완료된 Future를 반환합니다 (프로세스 백엔드와 같은 인터페이스)."""
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self):
+        pass
+
+    @staticmethod
+    def _report(progress_callback, done, total, message):
+        if progress_callback and total:
+            progress_callback(int(100 * min(done, total) / total), message)
+
+
+class ProcessPoolBackend(SerialBackend):
+    """
+    블록 축소를 로컬 프로세스 풀에 나눠 맡기는 백엔드.
+    읽은 블록은 pickle 대신 공유 세그먼트(shared_transport)로 넘기고 작업자는 작은 부분 결과만 돌려주므로,
+    GUI 프로세스의 GIL과 전송 비용 없이 코어 수만큼 계산합니다. 다음 블록을 읽는 동안 이전 블록이 계산되며,
+    동시에 떠 있는 블록 수는 작업자 수의 두 배로 제한해 메모리를 묶어 둡니다.
+    """
+    name = 'process'
+
+    def __init__(self, max_workers=None, min_bytes=PROCESS_MIN_BYTES):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.min_bytes = min_bytes
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # GUI 프로세스(Qt)를 fork하지 않도록 spawn으로 띄웁니다.
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                logger.info(f"계산 프로세스 풀 시작: 작업자 {self.max_workers}개")
+            return self._executor
+
+    def reduce(self, blocks, kernel, progress_callback=None, cancel_event=None, total=None, message=''):
+        combine = KERNELS[kernel][1]
+        result = None
+        done = 0
+        in_flight = {} # {Future: SharedSegment}
+
+        def collect(futures):
+            nonlocal result, done
+            for future in futures:
+                in_flight.pop(future).release()
+                partial = future.result()
+                result = partial if result is None else combine(result, partial)
+                done += 1
+                self._report(progress_callback, done, total, message)
+
+        try:
+            for values, kwargs in blocks:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ReadCancelled("계산 취소됨")
+                values = np.ascontiguousarray(values)
+                if values.nbytes < self.min_bytes:
+                    partial = run_kernel(kernel, values, **kwargs)
+                    result = partial if result is None else combine(result, partial)
+                    done += 1
+                    self._report(progress_callback, done, total, message)
+                    continue
+                while len(in_flight) >= 2 * self.max_workers:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                segment = SharedSegment(values.shape, values.dtype)
+                segment.array[...] = values
+                try:
+                    future = self._pool().submit(_shared_kernel, kernel, segment.descriptor(), kwargs)
+                except Exception:
+                    segment.release()
+                    raise
+                in_flight[future] = segment
+            while in_flight:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ReadCancelled("계산 취소됨")
+                finished, _ = wait(in_flight, timeout=0.2, return_when=FIRST_COMPLETED)
+                collect(finished)
+        except BrokenProcessPool as e:
+            logger.error(f"계산 프로세스가 비정상 종료되어 풀을 다시 만듭니다: {e}")
+            self.shutdown()
+            raise RuntimeError(f"계산 프로세스가 비정상 종료되었습니다: {e}") from e
+        finally:
+            if in_flight:
+                # 취소/오류: 아직 시작하지 않은 작업은 취소하고 실행 중인 작업이 끝난 뒤 공유 메모리를 해제합니다.
+                for future in in_flight:
+                    future.cancel()
+                wait(in_flight)
+                for segment in in_flight.values():
+                    segment.release()
+        return result
+
+    def submit(self, fn, *args):
+        """fn(*args)를 작업자 프로세스에서 실행하는 Future (fn은 모듈 최상위 함수여야 합니다)."""
+        try:
+            return self._pool().submit(fn, *args)
+        except BrokenProcessPool:
+            self.shutdown()
+            return self._pool().submit(fn, *args)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.info("계산 프로세스 풀 종료.")
+
+
+def create_backend(kind='process', max_workers=None):
+    """설정 값('process' 또는 'serial')으로 계산 백엔드를 만듭니다."""
+    if kind == 'serial':
+        return SerialBackend()
+    if kind == 'process':
+        return ProcessPoolBackend(max_workers)
+    raise ValueError(f"알 수 없는 계산 백엔드입니다: {kind}")
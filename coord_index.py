@@ -0,0 +1,163 @@
+# oceanocal_v2/coord_index.py
+
+import logging
+
+import numpy as np
+
+from .subset import find_axis_dim, find_2d_coord, axis_slice, lon_selection, lon_wrap_width, lonlat_to_xyz
+from .time_index import TimeIndex, decode_epochs
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError: # scipy가 없으면 곡선 격자에서 전수 탐색으로 대체
+    cKDTree = None
+
+logger = logging.getLogger(__name__)
+
+
+def _to_numeric(values):
+    """
+    좌표 값을 이진 탐색용 숫자 배열로 바꿉니다. 시간 축(datetime64, cftime 객체)이면
+    time_index와 같은 int64 epoch(마이크로초)와 달력을, 아니면 float 배열과 None을 반환합니다.
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64) or (values.dtype == object and values.size
+                                                      and hasattr(values.flat[0], 'calendar')):
+        return decode_epochs(values)
+    return values.astype(float), None
+
+
+class SortedAxis:
+    """
+    정렬된 1차원 좌표축. 오름차순/내림차순 모두 이진 탐색으로 최근접 인덱스를 찾습니다.
+    periodic=360이면 경도처럼 순환하는 축으로 취급합니다.
+    """
+    def __init__(self, values, periodic=None):
+        self.values, calendar = _to_numeric(values)
+        self.periodic = periodic
+        # 시간 축은 달력을 아는 TimeIndex가 질의 값을 epoch로 바꾸고 최근접 인덱스를 찾습니다
+        self.time_index = TimeIndex(self.values, calendar) if calendar is not None else None
+        self.size = len(self.values)
+        self.descending = self.size > 1 and self.values[0] > self.values[-1]
+        self._ascending_values = self.values[::-1] if self.descending else self.values
+
+    def nearest(self, value):
+        """value에 가장 가까운 인덱스를 반환합니다."""
+        if self.size == 0:
+            return None
+        if self.time_index is not None:
+            return self.time_index.nearest(value)
+        values = self._ascending_values
+        if self.periodic:
+            value = (value - values[0]) % self.periodic + values[0]
+        position = int(np.searchsorted(values, value))
+        candidates = [c for c in (position - 1, position) if 0 <= c < self.size]
+        if self.periodic and position >= self.size:
+            candidates.append(0) # 마지막 점 다음은 첫 점으로 순환
+        distances = [self._distance(values[c], value) for c in candidates]
+        index = candidates[int(np.argmin(distances))]
+        return self.size - 1 - index if self.descending else index
+
+    def _distance(self, a, b):
+        d = abs(a - b)
+        if self.periodic:
+            d = min(d, self.periodic - d)
+        return d
+
+
+class CoordinateIndex:
+    """
+    변수 하나의 격자에 대한 좌표 색인.
+    직교 격자(1D 위도/경도)는 축별 이진 탐색, 곡선 격자(2D 위도/경도)는 KD-트리를 사용합니다.
+    DatasetManager가 데이터셋/격자당 한 번 만들어 캐시합니다.
+    """
+    def __init__(self, dataset, var_name):
+        variable = dataset[var_name]
+        self.var_name = var_name
+        self.dims = tuple(variable.dims)
+        self.kind = None
+        self.lat_dim = find_axis_dim(dataset, variable, 'lat')
+        self.lon_dim = find_axis_dim(dataset, variable, 'lon')
+        self.axes = {} # {dim: SortedAxis} - 1차원 좌표가 있는 모든 차원
+        for dim in self.dims:
+            if dim in dataset.coords and dataset[dim].ndim == 1:
+                periodic = 360 if dim == self.lon_dim else None
+                self.axes[dim] = SortedAxis(dataset[dim].values, periodic=periodic)
+
+        if self.lat_dim in self.axes and self.lon_dim in self.axes:
+            self.kind = 'rectilinear'
+            return
+
+        lat2d = find_2d_coord(dataset, variable, 'lat')
+        lon2d = find_2d_coord(dataset, variable, 'lon')
+        if lat2d is not None and lon2d is not None and lat2d.dims == lon2d.dims:
+            self.kind = 'curvilinear'
+            self.grid_dims = tuple(lat2d.dims)
+            self.lat2d = np.asarray(lat2d.values, dtype=float)
+            self.lon2d = np.asarray(lon2d.values, dtype=float)
+            self._xyz = lonlat_to_xyz(self.lon2d.ravel(), self.lat2d.ravel())
+            valid = np.all(np.isfinite(self._xyz), axis=1)
+            self._valid_positions = np.nonzero(valid)[0]
+            self._tree = cKDTree(self._xyz[valid]) if cKDTree is not None else None
+            logger.info(f"곡선 격자 KD-트리 생성: {var_name} {self.lat2d.shape}")
+
+    def nearest_indexers(self, lat=None, lon=None, **axis_values):
+        """
+        위도/경도(및 시간, 깊이 등 다른 축 값)에 가장 가까운 격자점의 isel 인덱서를 반환합니다.
+        """
+        indexers = {}
+        if lat is not None and lon is not None:
+            if self.kind == 'rectilinear':
+                indexers[self.lat_dim] = self.axes[self.lat_dim].nearest(lat)
+                indexers[self.lon_dim] = self.axes[self.lon_dim].nearest(lon)
+            elif self.kind == 'curvilinear':
+                point = lonlat_to_xyz(np.array([lon]), np.array([lat]))
+                if self._tree is not None:
+                    _, position = self._tree.query(point[0])
+                else:
+                    position = np.argmin(np.sum((self._xyz[self._valid_positions] - point) ** 2, axis=1))
+                flat_index = self._valid_positions[int(position)]
+                row, col = np.unravel_index(flat_index, self.lat2d.shape)
+                indexers[self.grid_dims[0]] = int(row)
+                indexers[self.grid_dims[1]] = int(col)
+        for dim, value in axis_values.items():
+            if value is not None and dim in self.axes:
+                indexers[dim] = self.axes[dim].nearest(value)
+        return indexers
+
+    def nearest_grid_points(self, lats, lons):
+        """곡선 격자에서 여러 위치의 최근접 격자점 (행, 열) 인덱스 배열을 한 번에 구합니다."""
+        points = lonlat_to_xyz(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        if self._tree is not None:
+            _, positions = self._tree.query(points)
+        else:
+            valid_xyz = self._xyz[self._valid_positions]
+            positions = np.array([np.argmin(np.sum((valid_xyz - p) ** 2, axis=1)) for p in points])
+        rows, cols = np.unravel_index(self._valid_positions[positions], self.lat2d.shape)
+        return rows, cols
+
+    def region_indexers(self, lat_range=None, lon_range=None):
+        """
+        위도/경도 범위를 isel 인덱서로 변환합니다.
+        곡선 격자는 범위에 드는 격자점을 모두 포함하는 최소 인덱스 사각형을 반환합니다.
+        """
+        indexers = {}
+        if self.kind == 'rectilinear':
+            if lat_range is not None:
+                indexers[self.lat_dim] = axis_slice(self.axes[self.lat_dim].values, *lat_range)
+            if lon_range is not None:
+                indexers[self.lon_dim] = lon_selection(self.axes[self.lon_dim].values, *lon_range)
+        elif self.kind == 'curvilinear':
+            mask = np.isfinite(self.lat2d)
+            if lat_range is not None:
+                mask &= (self.lat2d >= min(lat_range)) & (self.lat2d <= max(lat_range))
+            if lon_range is not None:
+                width = lon_wrap_width(*lon_range)
+                if width < 360:
+                    mask &= ((self.lon2d - lon_range[0]) % 360) <= width
+            rows = np.nonzero(mask.any(axis=1))[0]
+            cols = np.nonzero(mask.any(axis=0))[0]
+            if rows.size and cols.size:
+                indexers[self.grid_dims[0]] = slice(int(rows[0]), int(rows[-1]) + 1)
+                indexers[self.grid_dims[1]] = slice(int(cols[0]), int(cols[-1]) + 1)
+        return indexers
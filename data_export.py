@@ -0,0 +1,310 @@
+# oceanocal_v2/data_export.py
+
+import logging
+import os
+import shutil
+
+import numpy as np
+import xarray as xr
+
+from .chunked_io import iter_blocks, chunk_sizes, DEFAULT_BLOCK_BYTES
+from .batch_export import ExportCancelled
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'netcdf': ('NetCDF4 (*.nc)', '.nc'),
+    'zarr': ('Zarr (*.zarr)', '.zarr'),
+    'csv': ('CSV (*.csv)', '.csv'),
+    'parquet': ('Parquet (*.parquet)', '.parquet'),
+}
+NETCDF_COMPRESSION_LEVEL = 4
+# 값 자체가 아닌 인코딩 정보라 새 파일에 그대로 복사하면 안 되는 속성
+_ENCODING_ATTRS = ('_FillValue', 'missing_value', 'scale_factor', 'add_offset', '_Unsigned', 'coordinates')
+# 이전 내보내기가 만든 디렉터리 저장소(Zarr v2/v3, Parquet 데이터셋)임을 알려 주는 파일
+_STORE_MARKERS = ('.zgroup', '.zarray', 'zarr.json', '_metadata', '_common_metadata')
+
+
+def format_from_path(path):
+    """파일 확장자로 내보내기 형식을 정합니다."""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, (_, ext) in EXPORT_FORMATS.items():
+        if extension == ext:
+            return fmt
+    raise ValueError(f"지원하지 않는 내보내기 형식입니다: {extension}")
+
+
+class _SubsetSource:
+    """
+    (파일, 변수, isel 인덱서)로 정한 부분집합을 스트리밍 축을 따라 블록 단위로 읽습니다.
+    template은 값을 읽지 않은 부분집합(차원, 크기, 좌표, 속성)입니다.
+    """
+    def __init__(self, dataset_manager, filepath, var_name, indexers):
+        self.dataset_manager = dataset_manager
+        self.filepath = filepath
+        self.var_name = var_name
+        self.indexers = dict(indexers or {})
+        self.hdf5 = dataset_manager.get_hdf5(filepath)
+        self.virtual = dataset_manager.is_virtual_variable(filepath, var_name)
+        if self.hdf5 is None and not self.virtual:
+            variable = dataset_manager.get_dataset(filepath)[var_name]
+        else:
+            variable = dataset_manager.get_variable_dataset(filepath, var_name)[var_name]
+        self.template = variable.isel(self.indexers) if self.indexers else variable
+        self.dtype = self.template.dtype
+        if self.hdf5 is not None and any(key in variable.attrs for key in ('_FillValue', 'scale_factor', 'add_offset')):
+            self.dtype = np.dtype('f8') # HDF5File.read가 채움값 마스킹/스케일을 적용해 실수로 돌려줍니다.
+        # 첫 차원(보통 시간 축이며 저장 청크도 이 축으로 나뉩니다)을 따라 스트리밍합니다.
+        self.dim = self.template.dims[0] if self.template.ndim else None
+
+    def blocks(self, block_bytes=DEFAULT_BLOCK_BYTES):
+        if self.dim is None:
+            yield None
+            return
+        chunk_len = None
+        if self.hdf5 is None and not self.virtual:
+            chunk_len = chunk_sizes(self.dataset_manager.get_dataset(self.filepath)[self.var_name]).get(self.dim)
+        yield from iter_blocks(self.template, self.dim, block_bytes, chunk_len)
+
+    def read(self, block):
+        """부분집합 안의 블록(스트리밍 축 기준 slice)을 디코딩된 DataArray로 읽습니다."""
+        if block is None:
+            return self._read_indexers(self.indexers)
+        indexers = dict(self.indexers)
+        outer = indexers.get(self.dim, slice(None))
+        if isinstance(outer, slice):
+            start, _, step = outer.indices(self.dataset_manager.get_variable_dataset(
+                self.filepath, self.var_name).sizes[self.dim])
+            indexers[self.dim] = slice(start + block.start * step, start + block.stop * step, step)
+        else:
+            indexers[self.dim] = np.asarray(outer)[block]
+        return self._read_indexers(indexers)
+
+    def _read_indexers(self, indexers):
+        if self.virtual:
+            return self.dataset_manager.read_variable(self.filepath, self.var_name, indexers, use_cache=False)
+        if self.hdf5 is not None:
+            return self.hdf5.read(self.var_name, indexers)
+        # 슬라이스 캐시를 거치지 않고 읽어 큰 내보내기가 캐시를 밀어내지 않게 합니다.
+        variable = self.dataset_manager.get_dataset(self.filepath)[self.var_name]
+        return variable.isel(indexers).load()
+
+
+def export_subset(dataset_manager, filepath, var_name, indexers, output_path, fmt=None,
+                  block_bytes=DEFAULT_BLOCK_BYTES, progress_callback=None, cancel_event=None):
+    """
+    변수의 부분집합(indexers)을 NetCDF4/Zarr/CSV/Parquet으로 블록 단위 스트리밍 기록합니다.
+    한 번에 한 블록만 메모리에 올리므로 메모리보다 큰 부분집합도 내보낼 수 있습니다.
+    취소되면 만들던 파일을 지우고 ExportCancelled를 발생시킵니다.
+    """
+    fmt = fmt or format_from_path(output_path)
+    source = _SubsetSource(dataset_manager, filepath, var_name, indexers)
+    blocks = list(source.blocks(block_bytes))
+    writer = None
+    try:
+        writer = _WRITERS[fmt](output_path, source)
+        for count, block in enumerate(blocks, start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled("데이터 내보내기 취소됨")
+            writer.write(source.read(block), block)
+            if progress_callback:
+                progress_callback(int(100 * count / len(blocks)),
+                                  f"내보내기 {os.path.basename(output_path)}: {count}/{len(blocks)} 블록")
+        writer.close()
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    logger.info(f"데이터 내보내기 완료: {var_name} -> {output_path} ({fmt}, {len(blocks)}개 블록)")
+    return output_path
+
+
+class _Writer:
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        if os.path.isdir(path):
+            # 저장 대화상자에서 일반 데이터 폴더를 잘못 고른 경우 통째로 지우지 않도록 저장소 디렉터리만 덮어씁니다.
+            if os.listdir(path) and not any(os.path.exists(os.path.join(path, marker)) for marker in _STORE_MARKERS):
+                raise ValueError(f"내보내기 저장소가 아닌 기존 폴더에는 덮어쓸 수 없습니다: {path}")
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, data, block):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def abort(self):
+        """실패하거나 취소되면 반쯤 쓴 출력을 지웁니다."""
+        try:
+            self.close()
+        except Exception:
+            pass
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class _NetCDFWriter(_Writer):
+    """netCDF4로 압축(zlib)·청크 저장 변수를 만들고 블록마다 해당 범위를 채웁니다."""
+    def __init__(self, path, source):
+        super().__init__(path, source)
+        import netCDF4
+        template = source.template
+        self._nc = netCDF4.Dataset(path, 'w', format='NETCDF4')
+        for dim, size in template.sizes.items():
+            self._nc.createDimension(dim, size)
+        for name, coord in template.coords.items():
+            if coord.dims and all(d in template.dims for d in coord.dims):
+                self._write_coord(name, coord)
+        dtype = _output_dtype(source.dtype)
+        fill_value = np.nan if np.issubdtype(dtype, np.floating) else None
+        chunks = _netcdf_chunks(template)
+        self._var = self._nc.createVariable(_safe_name(source.var_name), dtype, template.dims, zlib=True,
+                                            complevel=NETCDF_COMPRESSION_LEVEL, shuffle=True,
+                                            chunksizes=chunks, fill_value=fill_value)
+        self._var.setncatts(_clean_attrs(template.attrs))
+        coordinate_names = [n for n, c in template.coords.items() if n not in template.dims and c.dims]
+        if coordinate_names:
+            self._var.coordinates = ' '.join(coordinate_names)
+
+    def _write_coord(self, name, coord):
+        values = coord.values
+        attrs = _clean_attrs(coord.attrs)
+        if np.issubdtype(values.dtype, np.datetime64):
+            values, units, calendar = xr.coding.times.encode_cf_datetime(values)
+            attrs.update({'units': units, 'calendar': calendar})
+        variable = self._nc.createVariable(_safe_name(name), _output_dtype(np.asarray(values).dtype), coord.dims)
+        variable.setncatts(attrs)
+        variable[...] = values
+
+    def write(self, data, block):
+        values = np.asarray(data.values)
+        if block is None:
+            self._var[...] = values
+        else:
+            self._var[block] = values
+
+    def close(self):
+        if self._nc.isopen():
+            self._nc.close()
+
+
+class _ZarrWriter(_Writer):
+    """첫 블록으로 Zarr 저장소를 만들고 이후 블록은 스트리밍 축으로 덧붙입니다."""
+    def __init__(self, path, source):
+        super().__init__(path, source)
+        try:
+            import zarr # noqa: F401
+        except ImportError:
+            raise ImportError("Zarr로 내보내려면 'zarr' 패키지를 설치해야 합니다.")
+        self._first = True
+
+    def write(self, data, block):
+        dataset = _to_dataset(data, self.source.var_name)
+        if self._first:
+            encoding = {name: {'chunks': tuple(min(s, c) for s, c in zip(var.shape, _netcdf_chunks(var)))}
+                        for name, var in dataset.data_vars.items() if var.ndim}
+            dataset.to_zarr(self.path, mode='w', encoding=encoding)
+            self._first = False
+        else:
+            dataset.to_zarr(self.path, append_dim=self.source.dim)
+
+
+class _TableWriter(_Writer):
+    """블록을 긴 형식 표(좌표 열 + 값 열)로 바꿔 씁니다."""
+    def _frame(self, data):
+        name = _safe_name(self.source.var_name)
+        frame = data.rename(name).to_dataframe().reset_index()
+        return frame[[c for c in frame.columns if c != name] + [name]]
+
+
+class _CSVWriter(_TableWriter):
+    def __init__(self, path, source):
+        super().__init__(path, source)
+        self._first = True
+
+    def write(self, data, block):
+        self._frame(data).to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+        self._first = False
+
+
+class _ParquetWriter(_TableWriter):
+    """블록마다 Parquet 행 그룹 하나를 씁니다."""
+    def __init__(self, path, source):
+        super().__init__(path, source)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet으로 내보내려면 'pyarrow' 패키지를 설치해야 합니다.")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._writer = None
+
+    def write(self, data, block):
+        table = self._pa.Table.from_pandas(self._frame(data), preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema, compression='zstd')
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+_WRITERS = {
+    'netcdf': _NetCDFWriter,
+    'zarr': _ZarrWriter,
+    'csv': _CSVWriter,
+    'parquet': _ParquetWriter,
+}
+
+
+def _safe_name(name):
+    """HDF5 경로('/a/b/sst') 변수 이름을 출력 파일에서 쓸 수 있는 이름으로 바꿉니다."""
+    return str(name).strip('/').replace('/', '_') or 'data'
+
+
+def _output_dtype(dtype):
+    dtype = np.dtype(dtype).newbyteorder('=')
+    return np.dtype('f8') if dtype.kind == 'f' and dtype.itemsize > 8 else dtype
+
+
+def _clean_attrs(attrs):
+    cleaned = {}
+    for key, value in attrs.items():
+        if key in _ENCODING_ATTRS:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = np.asarray(value)
+        if isinstance(value, np.ndarray) and (value.ndim > 1 or value.dtype.kind not in 'biufS'):
+            continue
+        if isinstance(value, (str, int, float, np.ndarray, np.generic)):
+            cleaned[key] = value
+    return cleaned
+
+
+def _netcdf_chunks(variable):
+    """다차원 변수는 스트리밍 축을 1로, 나머지 축은 한 청크가 약 4MB를 넘지 않도록 정한 청크 모양."""
+    if not variable.ndim:
+        return None
+    target = 4 * 1024 * 1024 // max(variable.dtype.itemsize, 1)
+    chunks = [max(1, int(s)) for s in variable.shape]
+    if len(chunks) > 1:
+        chunks[0] = 1
+    for axis in reversed(range(len(chunks))):
+        while int(np.prod(chunks)) > target and chunks[axis] > 1:
+            chunks[axis] = (chunks[axis] + 1) // 2
+    return chunks
+
+
+def _to_dataset(data, var_name):
+    data = data.rename(_safe_name(var_name))
+    data.attrs = _clean_attrs(data.attrs)
+    return data.to_dataset()
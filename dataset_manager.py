@@ -1,24 +1,119 @@
 import xarray as xr
+import numpy as np
+import h5py
 import os
 import logging
+import threading
+from contextlib import contextmanager
 from PyQt6.QtWidgets import QMessageBox
 
+from .slice_cache import SliceCache, make_slice_key, DEFAULT_MAX_BYTES
+from . import subset
+from .coord_index import CoordinateIndex
+from .chunked_io import read_along, chunk_sizes, iter_blocks, compose_indexer, SourceReader, ReadCancelled
+from .transect import TransectEngine, TransectWeights
+from .hdf5_backend import HDF5File, is_hdf5_path
+from .chunk_cache import ChunkCacheTuner, DEFAULT_VAR_CACHE_MAX_BYTES, DEFAULT_TOTAL_CACHE_MAX_BYTES
+from .parallel_read import read_parallel
+from .expressions import VirtualVariable
+from .climatology import ClimatologyEngine
+from .regrid import Grid, RegridEngine
+from .mesh import find_mesh
+from .compare import Comparison
+from .hovmoller import compute_hovmoller, hovmoller_indexers
+from .spectral import SpectralEngine
+from .compute_backend import create_backend
+from .shared_transport import SharedSegment, read_into_segment
+from .time_index import TimeIndex
+
 logger = logging.getLogger(__name__)
 
+
+class FileInUseError(RuntimeError):
+    """다른 스레드가 읽는 중인 파일은 지금 다시 열 수 없습니다 (읽기가 끝난 뒤 다시 시도)."""
+
+# 병렬 읽기 후 CF 디코딩에 필요한, xarray가 attrs에서 encoding으로 옮기는 속성들
+CF_ENCODING_KEYS = ('_FillValue', 'missing_value', 'scale_factor', 'add_offset', '_Unsigned', 'units', 'calendar')
+
+def _appended_slice_key(slice_key, dims, growth):
+    """
+    레코드가 덧붙은 뒤 캐시 항목(슬라이스 키, 결과 차원)의 새 슬라이스 키.
+    이전 레코드만 가리키면 그대로, 늘어난 차원의 끝까지 읽은 슬라이스면 덧붙이기 기준 키, 판단할 수 없으면 None.
+    """
+    items = dict(slice_key)
+    extend = None
+    for dim, (old_size, _new_size) in growth.items():
+        if dim not in items and dim not in dims:
+            continue # 이 변수에는 늘어난 차원이 없음
+        value = items.get(dim, ('slice', None, None, None))
+        if isinstance(value, int):
+            if not 0 <= value < old_size:
+                return None # 음수 인덱스는 덧붙이기 뒤 다른 레코드를 가리킵니다.
+        elif isinstance(value, tuple) and value[0] == 'slice':
+            _, start, stop, step = value
+            if (start is not None and start < 0) or (stop is not None and stop < 0) or (step is not None and step < 1):
+                return None
+            if stop is None or stop > old_size:
+                if extend is not None or step not in (None, 1):
+                    return None
+                extend = (dim, start or 0)
+        elif isinstance(value, tuple) and value[0] == 'array':
+            if not all(0 <= position < old_size for position in value[1:]):
+                return None
+        else:
+            return None
+    if extend is None:
+        return slice_key
+    dim, start = extend
+    return ('append_base', dim, start, tuple((name, value) for name, value in slice_key if name != dim))
+
+
 class DatasetManager:
-    def __init__(self, status_callback=None):
+    def __init__(self, status_callback=None, cache_max_bytes=DEFAULT_MAX_BYTES, hdf5_chunk_cache=None,
+                 var_chunk_cache_max_bytes=DEFAULT_VAR_CACHE_MAX_BYTES,
+                 chunk_cache_total_max_bytes=DEFAULT_TOTAL_CACHE_MAX_BYTES, compute_backend=None):
         self.open_datasets = {}  # {filepath: xarray.Dataset}
+        self.open_hdf5 = {} # {filepath: HDF5File} - h5py로 직접 여는 HDF5 파일
+        self.hdf5_chunk_cache = hdf5_chunk_cache # h5py rdcc_nbytes/rdcc_w0/rdcc_nslots 설정
+        self._hdf5_coord_datasets = {} # {(filepath, 데이터셋 경로): 좌표만 담은 경량 Dataset}
         self.current_file_path = None # 현재 활성화된 파일 경로 추가
         self.status_callback = status_callback
+        self.slice_cache = SliceCache(cache_max_bytes) # 모든 플롯 창이 공유하는 디코딩 슬라이스 캐시
+        self._file_mtimes = {} # {filepath: 파일을 열 때의 mtime_ns}
+        self._decode_options = {} # {filepath: xr.open_dataset에 전달한 디코딩 옵션}
+        self._coord_indexes = {} # {(filepath, 변수 차원, coordinates 속성): CoordinateIndex}
+        self._time_indexes = {} # {(filepath, 시간 차원): TimeIndex 또는 None} - 파일당 한 번 디코딩한 시간 축
+        self._series_time_indexes = {} # {(filepath, mtime, 변수): TimeIndex} - 열지 않은 시계열 파일의 시간 축
+        self._append_dims = {} # {filepath: {무제한 차원}} - 레코드가 덧붙어 끝이 열린 슬라이스를 이어 읽을 수 있는 차원
+        self._reopen_pending = {} # {filepath: 디코딩 옵션} - 변경 후 다시 열지 못해 다음에 다시 열 파일
+        self.transect_engine = TransectEngine() # 횡단면 보간 가중치 캐시
+        self._nc_stores = {} # {filepath: NetCDF4DataStore} - 변수별 청크 캐시 조정에 사용
+        # 파일/변수별 청크 캐시 크기(전체 상한 안에서)와 추정 효율 통계
+        self.chunk_tuner = ChunkCacheTuner(var_chunk_cache_max_bytes, chunk_cache_total_max_bytes)
+        self._parallel_handles = {} # {filepath: h5py.File 또는 None} - netCDF4 파일의 병렬 청크 읽기용
+        self.virtual_variables = {} # {filepath: {이름: VirtualVariable}} - 식으로 정의한 파생 변수
+        self.climatology = ClimatologyEngine(self) # 달력 구간별 기후값 누적/편차 계산
+        self.spectral = SpectralEngine(self) # 파랑 스펙트럼 적분 모수/파워 스펙트럼 (파일별 캐시)
+        # 기후값/시간 통계 등 블록 축소 계산을 실행하는 백엔드 (기본은 로컬 프로세스 풀)
+        self.compute_backend = compute_backend or create_backend('process')
+        # 이보다 큰 슬라이스는 작업자 프로세스가 읽어 공유 메모리로 넘깁니다 (None이면 항상 직접 읽음)
+        self.worker_read_min_bytes = None
+        self.regrid_engine = RegridEngine() # 격자 쌍별 희소 보간 가중치 (디스크 캐시)
+        self._meshes = {} # {(filepath, 변수 차원, coordinates/mesh 속성): MeshGeometry 또는 None}
+        # 작업자 스레드도 파일을 열고 변경을 감지해 다시 열므로 핸들/색인 사전의 변경은 이 잠금 안에서 합니다.
+        self._lock = threading.RLock()
+        self._active_reads = {} # {filepath: 진행 중인 읽기 수} - 읽는 동안에는 핸들을 닫거나 다시 열지 않습니다
+        self._retired_handles = {} # {filepath: [핸들]} - 읽는 중에 닫힌 파일의 핸들 (마지막 읽기가 끝나면 닫음)
         logger.info("DatasetManager 초기화.")
 
     def _report_status(self, message, timeout=2000):
         if self.status_callback:
             self.status_callback(message, timeout)
 
-    def open_file(self, filepath):
+    def open_file(self, filepath, decode_options=None):
         """
         주어진 NetCDF 파일을 열고 현재 활성화된 파일로 설정합니다.
+        decode_options는 xr.open_dataset에 그대로 전달되며 슬라이스 캐시 키에도 포함됩니다.
         """
         if not os.path.exists(filepath):
             msg = f"파일을 찾을 수 없습니다: {filepath}"
@@ -26,46 +121,105 @@ class DatasetManager:
             logger.error(msg)
             raise FileNotFoundError(msg)
 
-        if filepath in self.open_datasets:
-            self._report_status(f"'{os.path.basename(filepath)}' 파일이 이미 열려 있습니다.", 2000)
-            self.current_file_path = filepath # 이미 열려있어도 현재 파일로 설정
-            return self.open_datasets[filepath]
+        with self._lock:
+            if filepath in self.open_datasets or filepath in self.open_hdf5:
+                self._report_status(f"'{os.path.basename(filepath)}' 파일이 이미 열려 있습니다.", 2000)
+                self.current_file_path = filepath # 이미 열려있어도 현재 파일로 설정
+                return self.open_datasets.get(filepath) or self.open_hdf5.get(filepath)
 
-        try:
-            ds = xr.open_dataset(filepath)
+            try:
+                ds = self._open_dataset(filepath, decode_options)
+                self.current_file_path = filepath # 새로 열었을 때 현재 파일로 설정
+                self._report_status(f"'{os.path.basename(filepath)}' 파일 열림.", 2000)
+                logger.info(f"파일 열림: {filepath}")
+                return ds
+            except Exception as e:
+                msg = f"파일 로드 중 오류 발생: {e}"
+                self._report_status(msg, 5000)
+                logger.error(msg)
+                raise IOError(msg)
+
+    def _open_dataset(self, filepath, decode_options=None):
+        """
+        데이터셋을 열고 mtime/디코딩 옵션을 기록합니다. 상태 표시나 현재 파일 변경은 하지 않습니다.
+        HDF5 확장자이면서 HDF5 서명이 있는 파일은 xarray 대신 h5py 백엔드(HDF5File)로 엽니다.
+        """
+        decode_options = dict(decode_options) if decode_options else {}
+        if is_hdf5_path(filepath):
+            ds = HDF5File(filepath, chunk_cache=self.hdf5_chunk_cache)
+            self.open_hdf5[filepath] = ds
+        else:
+            ds = self._open_netcdf(filepath, decode_options)
             self.open_datasets[filepath] = ds
-            self.current_file_path = filepath # 새로 열었을 때 현재 파일로 설정
-            self._report_status(f"'{os.path.basename(filepath)}' 파일 열림.", 2000)
-            logger.info(f"파일 열림: {filepath}")
+        self.chunk_tuner.forget(filepath)
+        self._file_mtimes[filepath] = os.stat(filepath).st_mtime_ns
+        self._decode_options[filepath] = decode_options
+        return ds
+
+    def _open_netcdf(self, filepath, decode_options):
+        """
+        netCDF4 엔진이면 데이터 저장소를 직접 열어 보관합니다 (변수별 청크 캐시를 설정하기 위해).
+        다른 엔진이거나 실패하면 일반 xr.open_dataset으로 엽니다.
+        """
+        if decode_options.get('engine', 'netcdf4') == 'netcdf4':
+            try:
+                store = xr.backends.NetCDF4DataStore.open(filepath)
+                options = {k: v for k, v in decode_options.items() if k != 'engine'}
+                ds = xr.open_dataset(store, **options)
+                self._nc_stores[filepath] = store
+                return ds
+            except Exception as e:
+                logger.debug(f"netCDF4 저장소 직접 열기 실패, 기본 엔진 사용: {e}")
+        return xr.open_dataset(filepath, **decode_options)
+
+    def _ensure_open(self, filepath):
+        """
+        이미 열려 있으면 그 데이터셋을, 아니면 조용히 열어 반환합니다.
+        백그라운드 작업자에서도 안전하게 쓸 수 있도록 GUI 상태를 건드리지 않습니다.
+        """
+        with self._lock:
+            ds = self.open_datasets.get(filepath)
+            if ds is None:
+                ds = self.open_hdf5.get(filepath)
+            if ds is None:
+                if not os.path.exists(filepath):
+                    raise FileNotFoundError(f"파일을 찾을 수 없습니다: {filepath}")
+                ds = self._open_dataset(filepath, self._reopen_pending.get(filepath))
+                self._reopen_pending.pop(filepath, None)
             return ds
-        except Exception as e:
-            msg = f"파일 로드 중 오류 발생: {e}"
-            self._report_status(msg, 5000)
-            logger.error(msg)
-            raise IOError(msg)
 
     def close_file(self, filepath=None):
         """
         주어진 경로의 파일을 닫거나, filepath가 None이면 현재 활성화된 파일을 닫습니다.
         """
-        target_filepath = filepath if filepath else self.current_file_path
+        with self._lock:
+            target_filepath = filepath if filepath else self.current_file_path
 
-        if target_filepath and target_filepath in self.open_datasets:
-            try:
-                self.open_datasets[target_filepath].close()
-                del self.open_datasets[target_filepath]
-                logger.info(f"파일 닫기 성공: {target_filepath}")
-                self._report_status(f"파일 닫힘: {os.path.basename(target_filepath)}", 2000)
+            if target_filepath and target_filepath in self.get_file_list():
+                try:
+                    handle = self.open_hdf5.pop(target_filepath, None) or self.open_datasets.pop(target_filepath, None)
+                    self._reopen_pending.pop(target_filepath, None) # 다시 열지 못한 파일은 닫을 핸들이 없음
+                    self._nc_stores.pop(target_filepath, None)
+                    self._close_handle(target_filepath, handle)
+                    self._close_handle(target_filepath, self._parallel_handles.pop(target_filepath, None))
+                    self._file_mtimes.pop(target_filepath, None)
+                    self._decode_options.pop(target_filepath, None)
+                    self._append_dims.pop(target_filepath, None)
+                    self.virtual_variables.pop(target_filepath, None)
+                    self.slice_cache.invalidate(target_filepath)
+                    self._drop_coord_indexes(target_filepath)
+                    logger.info(f"파일 닫기 성공: {target_filepath}")
+                    self._report_status(f"파일 닫힘: {os.path.basename(target_filepath)}", 2000)
                 
-                if self.current_file_path == target_filepath:
-                    self.current_file_path = None # 현재 활성화된 파일이 닫혔다면 초기화
+                    if self.current_file_path == target_filepath:
+                        self.current_file_path = None # 현재 활성화된 파일이 닫혔다면 초기화
                     
-            except Exception as e:
-                logger.error(f"파일 닫기 중 오류 발생: {e}")
-                self._report_status(f"파일 닫기 중 오류 발생: {e}", 5000)
-        else:
-            logger.info("닫을 파일이 없습니다.")
-            # self._report_status("닫을 파일이 없습니다.", 2000) # 주석 처리 또는 위와 같이 변경
+                except Exception as e:
+                    logger.error(f"파일 닫기 중 오류 발생: {e}")
+                    self._report_status(f"파일 닫기 중 오류 발생: {e}", 5000)
+            else:
+                logger.info("닫을 파일이 없습니다.")
+                # self._report_status("닫을 파일이 없습니다.", 2000) # 주석 처리 또는 위와 같이 변경
 
     def get_dataset(self, filepath=None):
         """
@@ -128,4 +282,761 @@ class DatasetManager:
 
     def get_file_list(self):
         """현재 열려있는 파일들의 경로 리스트를 반환합니다."""
-        return list(self.open_datasets.keys())
\ No newline at end of file
+        return list(self.open_datasets.keys()) + list(self.open_hdf5.keys()) + list(self._reopen_pending)
+
+    def get_decode_options(self, filepath):
+        """파일을 열 때 xr.open_dataset에 전달한 디코딩 옵션을 반환합니다."""
+        return dict(self._decode_options.get(filepath, {}))
+
+    def is_hdf5(self, filepath):
+        """h5py 백엔드로 열린(또는 열릴) 파일인지 반환합니다."""
+        return filepath in self.open_hdf5 or (filepath not in self.open_datasets and is_hdf5_path(filepath))
+
+    def get_hdf5(self, filepath):
+        """h5py 백엔드로 열린 HDF5File을 반환합니다 (없으면 None)."""
+        return self.open_hdf5.get(filepath)
+
+    def has_variable(self, filepath, var_name):
+        """파일에 해당 변수(HDF5는 데이터셋 경로 또는 파생 변수)가 있는지 확인합니다."""
+        if self.is_virtual_variable(filepath, var_name):
+            return True
+        if filepath in self.open_hdf5:
+            return var_name in self.open_hdf5[filepath]
+        ds = self.open_datasets.get(filepath)
+        return ds is not None and (var_name in ds.data_vars or var_name in ds.coords)
+
+    def get_variable_dataset(self, filepath, var_name):
+        """
+        변수의 차원과 좌표 정보를 담은 xarray.Dataset을 반환합니다.
+        NetCDF는 열린 데이터셋 자체, HDF5는 값을 읽지 않는 좌표 전용 경량 Dataset입니다.
+        """
+        with self._lock:
+            virtual = self.virtual_variables.get(filepath, {}).get(var_name)
+            if virtual is not None:
+                return virtual.dataset()
+            ds = self._ensure_open(filepath)
+            if not isinstance(ds, HDF5File):
+                return ds
+            key = (filepath, var_name)
+            coord_ds = self._hdf5_coord_datasets.get(key)
+            if coord_ds is None:
+                coord_ds = ds.coordinate_dataset(var_name)
+                self._hdf5_coord_datasets[key] = coord_ds
+            return coord_ds
+
+    def define_virtual_variable(self, filepath, name, expression):
+        """
+        같은 파일의 변수로 이루어진 식(예: 'sqrt(u**2 + v**2)', "sst - sst.mean('time')")을 파생 변수로 등록합니다.
+        파생 변수는 일반 변수처럼 플롯/내보내기에 쓸 수 있으며 값은 읽을 때 요청된 슬라이스만 계산합니다.
+        식이 잘못되었으면 ExpressionError를 발생시킵니다.
+        """
+        self._ensure_open(filepath)
+        if not self.is_virtual_variable(filepath, name) and self.has_variable(filepath, name):
+            raise ValueError(f"'{name}'은(는) 이미 파일에 있는 변수 이름입니다.")
+        virtual = VirtualVariable(self, filepath, name, expression)
+        self.virtual_variables.setdefault(filepath, {})[name] = virtual
+        logger.info(f"파생 변수 정의: {name} = {virtual.expression} ({os.path.basename(filepath)})")
+        return virtual
+
+    def remove_virtual_variable(self, filepath, name):
+        self.virtual_variables.get(filepath, {}).pop(name, None)
+
+    def is_virtual_variable(self, filepath, name):
+        return name in self.virtual_variables.get(filepath, {})
+
+    def get_virtual_variables(self, filepath):
+        """파일의 파생 변수 {이름: 식}을 반환합니다."""
+        return {name: virtual.expression for name, virtual in self.virtual_variables.get(filepath, {}).items()}
+
+    def _cache_var_key(self, filepath, var_name):
+        """슬라이스 캐시 키의 변수 부분. 파생 변수는 식으로 만들어 다시 정의하면 이전 결과를 쓰지 않습니다."""
+        virtual = self.virtual_variables.get(filepath, {}).get(var_name)
+        return ('expr', virtual.expression) if virtual is not None else var_name
+
+    @contextmanager
+    def _reading(self, *filepaths):
+        """
+        읽기 작업 동안 파일 핸들을 붙잡아 둡니다. 들어올 때 파일을 열고 바뀌었으면 다시 연 뒤 mtime 목록을 돌려줍니다.
+        읽는 동안 다른 스레드의 변경 감지는 다시 열기를 미루고, 파일을 닫으면 핸들은 마지막 읽기가 끝난 뒤에 닫힙니다.
+        """
+        with self._lock:
+            mtimes = []
+            for filepath in filepaths:
+                self._ensure_open(filepath)
+                mtimes.append(self._refresh_if_modified(filepath))
+            for filepath in filepaths:
+                self._active_reads[filepath] = self._active_reads.get(filepath, 0) + 1
+        try:
+            yield mtimes
+        finally:
+            with self._lock:
+                for filepath in filepaths:
+                    count = self._active_reads.pop(filepath) - 1
+                    if count:
+                        self._active_reads[filepath] = count
+                    else:
+                        for handle in self._retired_handles.pop(filepath, []):
+                            handle.close()
+
+    def _close_handle(self, filepath, handle):
+        """핸들을 닫습니다. 그 파일을 읽는 중이면 마지막 읽기가 끝날 때까지 미룹니다."""
+        if handle is None:
+            return
+        with self._lock:
+            if self._active_reads.get(filepath):
+                self._retired_handles.setdefault(filepath, []).append(handle)
+            else:
+                handle.close()
+
+    def _refresh_if_modified(self, filepath):
+        """
+        파일이 디스크에서 변경되었으면 캐시를 무효화하고 데이터셋을 다시 엽니다.
+        현재 파일의 mtime_ns를 반환합니다.
+        """
+        with self._lock:
+            mtime = os.stat(filepath).st_mtime_ns
+            known_mtime = self._file_mtimes.get(filepath)
+            is_open = filepath in self.open_datasets or filepath in self.open_hdf5
+            if is_open and known_mtime is not None and known_mtime != mtime:
+                if self._active_reads.get(filepath):
+                    return known_mtime # 다른 읽기가 끝날 때까지 열린 핸들(과 그 mtime의 캐시 키)을 그대로 씁니다
+                self._reopen_changed(filepath)
+            return mtime
+
+    def refresh_file(self, filepath):
+        """
+        열린 파일이 디스크에서 바뀌었는지 확인해 다시 엽니다 (파일 감시기가 호출).
+        바뀌지 않았으면 None, 무제한 차원에 레코드만 덧붙었으면 {차원: (이전 길이, 새 길이)},
+        그 밖의 변경이면 {}(캐시 전체 무효화)를 반환합니다. 다른 스레드가 읽는 중이면 FileInUseError (나중에 다시 시도).
+        """
+        with self._lock:
+            if filepath in self._reopen_pending:
+                self._ensure_open(filepath)
+                return {}
+            if filepath not in self.open_datasets and filepath not in self.open_hdf5:
+                return None
+            if self._file_mtimes.get(filepath) == os.stat(filepath).st_mtime_ns:
+                return None
+            if self._active_reads.get(filepath):
+                raise FileInUseError(f"읽는 중인 파일입니다: {filepath}")
+            return self._reopen_changed(filepath)
+
+    def _reopen_changed(self, filepath):
+        """
+        디스크에서 바뀐 파일을 다시 엽니다. 무제한 차원에만 레코드가 덧붙은 경우(관측 중 기록되는 실시간 파일)에는
+        슬라이스 캐시를 버리지 않고 새 mtime으로 옮기며, 끝이 열린 슬라이스는 덧붙이기 기준으로 남겨
+        다음 읽기에서 새 레코드만 읽어 이어 붙이게 합니다. 늘어난 차원을 반환합니다 (덧붙이기가 아니면 {}).
+        """
+        with self._lock:
+            old_layout = self._record_layout(filepath)
+            entries = self.slice_cache.entries(filepath) if old_layout is not None else []
+            decode_options = self._decode_options.get(filepath, {})
+            self.slice_cache.invalidate(filepath)
+            self._drop_coord_indexes(filepath)
+            self._append_dims.pop(filepath, None)
+            # 같은 프로세스에 HDF5 핸들이 하나라도 남아 있으면 라이브러리가 이전 메타데이터를 재사용하므로 모두 닫고 엽니다.
+            handle = self.open_hdf5.pop(filepath, None) or self.open_datasets.pop(filepath)
+            handle.close()
+            self._nc_stores.pop(filepath, None)
+            self._close_parallel_handle(filepath)
+            try:
+                self._open_dataset(filepath, decode_options)
+            except Exception as e:
+                # 기록기가 쓰는 도중이라 아직 열 수 없음: 파일 목록에는 남겨 두고 다음 확인(또는 읽기) 때 다시 엽니다.
+                self._reopen_pending[filepath] = decode_options
+                logger.warning(f"변경된 파일을 다시 열 수 없습니다 (나중에 다시 시도): {filepath} ({e})")
+                raise
+            for virtual in self.virtual_variables.get(filepath, {}).values():
+                virtual.reset()
+
+            new_layout = self._record_layout(filepath)
+            growth = {}
+            if old_layout is not None and new_layout is not None:
+                (old_sizes, unlimited, old_variables), (new_sizes, _, new_variables) = old_layout, new_layout
+                growth = {dim: (old_sizes[dim], new_sizes.get(dim, 0)) for dim in unlimited
+                          if new_sizes.get(dim) != old_sizes[dim]}
+                fixed_same = all(new_sizes.get(dim) == size for dim, size in old_sizes.items() if dim not in growth)
+                if not (growth and fixed_same and old_variables == new_variables
+                        and all(new > old for old, new in growth.values())):
+                    growth = {}
+            if not growth:
+                logger.info(f"파일 변경 감지, 다시 엽니다: {filepath}")
+                return {}
+            carried = self._carry_appended(filepath, entries, growth)
+            self._append_dims[filepath] = set(growth)
+            logger.info(f"레코드 덧붙임 감지: {os.path.basename(filepath)} "
+                        f"{ {dim: f'{old}→{new}' for dim, (old, new) in growth.items()} } (캐시 항목 {carried}개 유지)")
+            return growth
+
+    def _record_layout(self, filepath):
+        """덧붙이기 판정용 (차원 크기, 무제한 차원, 변수 이름). h5py로 연 HDF5 파일은 None (항상 전체 다시 읽기)."""
+        ds = self.open_datasets.get(filepath)
+        if ds is None:
+            return None
+        return dict(ds.sizes), set(ds.encoding.get('unlimited_dims', ())), set(ds.variables)
+
+    def _carry_appended(self, filepath, entries, growth):
+        """
+        덧붙이기 전의 캐시 항목을 새 mtime 키로 옮깁니다. 이전 레코드만 가리키는 슬라이스는 그대로 두고,
+        늘어난 차원의 끝까지 읽었던 슬라이스는 ('append_base', 차원, 시작, 나머지 인덱서) 키의 기준으로 남깁니다.
+        파생 변수나 Hovmöller/비교처럼 추가 키가 붙은 결과는 새 레코드에 따라 값이 바뀌므로 버립니다.
+        """
+        mtime = self._file_mtimes[filepath]
+        decode_key = make_slice_key(self._decode_options.get(filepath))
+        carried = 0
+        for (_, _, var_key, slice_key, entry_decode_key), value in entries:
+            if not isinstance(var_key, str) or entry_decode_key != decode_key or not isinstance(value, xr.DataArray):
+                continue
+            if slice_key and slice_key[0] == 'append_base':
+                new_slice_key = slice_key # 기준은 여전히 앞부분 레코드와 같습니다.
+            else:
+                new_slice_key = _appended_slice_key(slice_key, value.dims, growth)
+                if new_slice_key is None:
+                    continue
+            self.slice_cache.put((filepath, mtime, var_key, new_slice_key, decode_key), value)
+            carried += 1
+        return carried
+
+    def _read_appended(self, filepath, mtime, var_name, indexers, decode_key):
+        """
+        레코드가 덧붙은 파일에서 끝이 열린 슬라이스를 요청하면, 덧붙이기 전 결과(기준)에 새 레코드만 읽어 이어 붙입니다.
+        쓸 수 있는 기준이 없으면 None.
+        """
+        indexers = indexers or {}
+        for dim in self._append_dims.get(filepath, ()):
+            index = indexers.get(dim, slice(None))
+            if not isinstance(index, slice) or index.step not in (None, 1) or (index.start or 0) < 0:
+                continue
+            start = index.start or 0
+            others = make_slice_key({name: value for name, value in indexers.items() if name != dim})
+            base = self.slice_cache.get((filepath, mtime, var_name, ('append_base', dim, start, others), decode_key))
+            if base is None or dim not in base.dims:
+                continue
+            stop = index.indices(self.get_variable_dataset(filepath, var_name)[var_name].sizes[dim])[1]
+            covered = start + base.sizes[dim]
+            if stop <= covered:
+                return base.isel({dim: slice(0, max(stop - start, 0))})
+            tail_indexers = {**indexers, dim: slice(covered, stop)}
+            tail = self._read_in_worker(filepath, var_name, tail_indexers, mtime)
+            if tail is None:
+                tail = self._read_local(filepath, var_name, tail_indexers)
+            logger.debug(f"덧붙은 레코드만 읽음: {var_name} {dim}[{covered}:{stop}]")
+            return xr.concat([base, tail], dim=dim, combine_attrs='override')
+        return None
+
+    def read_variable(self, filepath, var_name, indexers=None, use_cache=True):
+        """
+        변수(또는 indexers로 선택한 부분)를 메모리로 읽어 xarray.DataArray로 반환합니다.
+        결과는 (경로, mtime, 변수, 슬라이스, 디코딩 옵션) 키로 슬라이스 캐시에 저장되므로
+        같은 슬라이스를 다시 요청하면 디스크를 읽지 않습니다. use_cache=False이면 캐시를 거치지 않습니다.
+        """
+        with self._reading(filepath) as (mtime,):
+            virtual = self.virtual_variables.get(filepath, {}).get(var_name)
+            key = (filepath, mtime, self._cache_var_key(filepath, var_name), make_slice_key(indexers),
+                   make_slice_key(self._decode_options.get(filepath)))
+            cached = self.slice_cache.get(key) if use_cache else None
+            if cached is not None:
+                logger.debug(f"슬라이스 캐시 적중: {var_name} {indexers}")
+                return cached
+
+            if virtual is not None:
+                data = virtual.read(indexers, use_cache)
+            else:
+                data = self._read_appended(filepath, mtime, var_name, indexers, key[4]) if use_cache else None
+                if data is None:
+                    data = self._read_in_worker(filepath, var_name, indexers, mtime)
+                if data is None:
+                    data = self._read_local(filepath, var_name, indexers)
+            if not use_cache:
+                return data
+            self.slice_cache.put(key, data)
+            logger.debug(f"슬라이스 캐시 저장: {var_name} {indexers} ({data.nbytes} bytes)")
+            return data
+
+    def _read_local(self, filepath, var_name, indexers):
+        """GUI 프로세스(현재 스레드)에서 파일을 직접 읽습니다."""
+        if filepath in self.open_hdf5:
+            # h5py로 요청된 하이퍼슬랩만 읽습니다.
+            self._tune_chunk_cache(filepath, var_name, indexers)
+            return self.open_hdf5[filepath].read(var_name, indexers)
+        self._tune_chunk_cache(filepath, var_name, indexers)
+        ds = self.open_datasets[filepath]
+        if var_name not in ds.variables:
+            raise KeyError(f"데이터셋 '{filepath}'에 변수 '{var_name}'가 없습니다.")
+        data = self._read_netcdf_parallel(filepath, var_name, indexers)
+        if data is None:
+            variable = ds[var_name]
+            if indexers:
+                variable = variable.isel(indexers)
+            data = variable.compute()
+        return data
+
+    def _read_in_worker(self, filepath, var_name, indexers, mtime):
+        """
+        큰 슬라이스를 계산 프로세스 풀의 작업자가 읽고 디코딩해 공유 세그먼트에 바로 쓰게 합니다.
+        결과 DataArray는 세그먼트를 복사 없이 감싸며, 슬라이스 캐시와 플롯 창이 놓는 순간 세그먼트가 해제됩니다.
+        worker_read_min_bytes가 None이거나, 프로세스 백엔드가 아니거나, 슬라이스가 작거나,
+        작업자가 결과를 쓰지 못하면 None을 반환하고 호출자가 직접 읽습니다.
+        """
+        if self.worker_read_min_bytes is None or self.compute_backend.name != 'process':
+            return None
+        dataset = self.get_variable_dataset(filepath, var_name)
+        if var_name not in dataset.variables:
+            raise KeyError(f"데이터셋 '{filepath}'에 변수 '{var_name}'가 없습니다.")
+        template = dataset[var_name].isel(indexers) if indexers else dataset[var_name]
+        dtype = self.decoded_dtype(filepath, template)
+        if template.size * dtype.itemsize < self.worker_read_min_bytes:
+            return None
+        segment = SharedSegment(template.shape, dtype)
+        try:
+            written = self.compute_backend.submit(
+                read_into_segment, segment.descriptor(), filepath, mtime, var_name, indexers,
+                self._decode_options.get(filepath), filepath in self.open_hdf5).result()
+            if not written:
+                logger.debug(f"작업자 읽기 결과가 세그먼트와 맞지 않아 직접 읽습니다: {var_name}")
+                return None
+            coords = {name: coord.variable for name, coord in template.coords.items()}
+            return xr.DataArray(segment.array, dims=template.dims, coords=coords, name=template.name,
+                                attrs=dict(template.attrs))
+        except Exception as e:
+            logger.warning(f"작업자 프로세스 읽기 실패, 직접 읽습니다: {var_name} ({e})")
+            return None
+        finally:
+            segment.release()
+
+    def decoded_dtype(self, filepath, template):
+        """디코딩 후 dtype. NetCDF는 xarray가 알려 주고, HDF5는 채움값/스케일 속성이 있으면 실수로 바뀝니다."""
+        dtype = np.dtype(template.dtype)
+        if filepath not in self.open_hdf5:
+            return dtype
+        attrs = template.attrs
+        if 'scale_factor' in attrs or 'add_offset' in attrs or ('_FillValue' in attrs and dtype.kind != 'f'):
+            return np.dtype(np.float64)
+        return dtype
+
+    def read_variables(self, filepath, requests, progress_callback=None, cancel_event=None):
+        """
+        같은 파일의 여러 (변수, 인덱서) 요청을 한 작업에서 읽어 요청 순서대로 DataArray 목록을 반환합니다.
+        같은 요청은 한 번만 읽고, 결과는 슬라이스 캐시에 들어가므로 연결된 플롯 창들은 캐시에서 다시 그립니다.
+        """
+        unique = {}
+        for var_name, indexers in requests:
+            unique.setdefault((var_name, make_slice_key(indexers)), (var_name, indexers))
+        results = {}
+        for count, (key, (var_name, indexers)) in enumerate(unique.items(), start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ReadCancelled("읽기 취소됨")
+            results[key] = self.read_variable(filepath, var_name, indexers)
+            if progress_callback:
+                progress_callback(int(100 * count / len(unique)), f"읽는 중: {var_name}")
+        return [results[(var_name, make_slice_key(indexers))] for var_name, indexers in requests]
+
+    def resolve_indexers(self, filepath, var_name, options=None, keep_dims=None):
+        """
+        플롯 옵션의 'region', 'time_range', 'index_ranges'를 isel 인덱서로 변환합니다.
+        keep_dims가 주어지면 마지막 keep_dims개 차원을 제외한 차원을 옵션의 'slice' 인덱스로 고정합니다.
+        좌표 이진 탐색만 수행하므로 변수 데이터는 읽지 않습니다.
+        """
+        options = options or {}
+        ds = self.get_variable_dataset(filepath, var_name)
+        time_range = options.get('time_range')
+        time_index = self.get_time_index(filepath, var_name) if time_range else None
+        indexers = subset.resolve_indexers(ds, var_name,
+                                           region=options.get('region'),
+                                           time_range=time_range if time_index is None else None,
+                                           index_ranges=options.get('index_ranges'))
+        if time_index is not None:
+            indexers[time_index.dim] = time_index.range(*time_range)
+        region = options.get('region')
+        if region:
+            # 1차원 위도/경도 차원이 없는 곡선 격자는 좌표 색인으로 인덱스 사각형을 구해 다른 인덱서와 합칩니다.
+            coord_index = self.get_coord_index(filepath, var_name)
+            if coord_index.kind == 'curvilinear':
+                indexers.update(coord_index.region_indexers(region.get('lat'), region.get('lon')))
+        if keep_dims is not None and ds[var_name].ndim > keep_dims:
+            indexers = subset.fix_leading_dims(ds[var_name].dims, indexers, options.get('slice'), keep=keep_dims)
+        return indexers
+
+    def resolve_hovmoller_indexers(self, filepath, var_name, options=None):
+        """
+        플롯 옵션의 영역/시간 범위와 'hovmoller' 설정({'axis': 'lon'|'lat', 'reduce': 'mean'|'select', 'at': 좌표})을
+        read_hovmoller()의 인덱서로 변환합니다. 깊이 등 나머지 차원은 'slice' 인덱스로 고정합니다.
+        """
+        options = options or {}
+        settings = options.get('hovmoller') or {}
+        reduce = settings.get('reduce', 'mean')
+        return hovmoller_indexers(self.get_variable_dataset(filepath, var_name), var_name,
+                                  self.resolve_indexers(filepath, var_name, options), options.get('slice'),
+                                  keep=settings.get('axis', 'lon'), reduce=reduce, at=settings.get('at'),
+                                  coord_index=self.get_coord_index(filepath, var_name) if reduce == 'select' else None)
+
+    def get_time_index(self, filepath, var_name):
+        """
+        변수 시간 축의 TimeIndex를 반환합니다. CF 시간은 파일당 한 번만 디코딩해 int64 epoch로 보관하며,
+        시간 차원이 없거나 시간으로 해석할 수 없으면 None입니다.
+        """
+        with self._lock:
+            ds = self.get_variable_dataset(filepath, var_name)
+            dim = subset.find_axis_dim(ds, ds[var_name], 'time')
+            if dim is None or dim not in ds.coords:
+                return None
+            key = (filepath, dim)
+            if key not in self._time_indexes:
+                try:
+                    index = TimeIndex.from_dataset(ds, dim)
+                    logger.info(f"시간 색인 생성: {index.describe()} in {os.path.basename(filepath)}")
+                except ValueError as e:
+                    logger.warning(f"시간 색인을 만들 수 없습니다: {var_name} ({e})")
+                    index = None
+                self._time_indexes[key] = index
+            return self._time_indexes[key]
+
+    def get_series_time_index(self, filepaths, var_name):
+        """
+        여러 파일(예: 월별 파일로 나뉜 수년치 시간 자료)의 시간 축을 순서대로 이은 TimeIndex.
+        열지 않은 파일은 시간 좌표만 잠시 열어 읽고, 파일별 색인은 (경로, mtime)으로 캐시해 다시 디코딩하지 않습니다.
+        시간 축이 없는 파일이 있으면 ValueError.
+        """
+        filepaths = [filepaths] if isinstance(filepaths, str) else list(filepaths)
+        indexes = []
+        for filepath in filepaths:
+            if filepath in self.open_datasets or filepath in self.open_hdf5:
+                index = self.get_time_index(filepath, var_name)
+            else:
+                index = self._closed_file_time_index(filepath, var_name)
+            if index is None:
+                raise ValueError(f"시간 축이 없습니다: {os.path.basename(filepath)} ({var_name})")
+            indexes.append(index)
+        return TimeIndex.concat(indexes, sources=filepaths)
+
+    def _closed_file_time_index(self, filepath, var_name):
+        with self._lock:
+            key = (filepath, os.stat(filepath).st_mtime_ns, var_name)
+            if key not in self._series_time_indexes:
+                for old_key in [k for k in self._series_time_indexes if k[0] == filepath and k[2] == var_name]:
+                    del self._series_time_indexes[old_key] # 파일이 바뀌었으면 이전 색인을 버립니다.
+                with SourceReader(self, filepath, var_name) as (ds, _read):
+                    dim = subset.find_axis_dim(ds, ds[var_name], 'time')
+                    self._series_time_indexes[key] = TimeIndex.from_dataset(ds, dim) if dim in ds.coords else None
+            return self._series_time_indexes[key]
+
+    def get_coord_index(self, filepath, var_name):
+        """
+        변수 격자의 좌표 색인(CoordinateIndex)을 반환합니다.
+        같은 격자를 공유하는 변수들은 데이터셋당 한 번 만든 색인을 재사용합니다.
+        """
+        with self._lock:
+            ds = self.get_variable_dataset(filepath, var_name)
+            variable = ds[var_name]
+            key = (filepath, tuple(variable.dims), variable.attrs.get('coordinates', ''))
+            index = self._coord_indexes.get(key)
+            if index is None:
+                index = CoordinateIndex(ds, var_name)
+                self._coord_indexes[key] = index
+                logger.info(f"좌표 색인 생성: {var_name} ({index.kind}) in {os.path.basename(filepath)}")
+            return index
+
+    def compare(self, filepath, var_name, other_filepath, other_var, indexers=None, mode='difference', tolerance=None,
+                regrid_method='bilinear', progress_callback=None, cancel_event=None):
+        """
+        두 데이터셋의 같은 물리량을 비교한 DataArray(A−B, A/B, 시간 RMSE 지도)를 반환합니다.
+        결과와 요약 통계는 두 파일의 mtime을 포함한 키로 슬라이스 캐시에 저장됩니다.
+        """
+        with self._reading(filepath, other_filepath) as (mtime, other_mtime):
+            compare_key = ('compare', mode, other_filepath, other_mtime, self._cache_var_key(other_filepath, other_var),
+                           make_slice_key(tolerance), regrid_method)
+            key = (filepath, mtime, self._cache_var_key(filepath, var_name), make_slice_key(indexers),
+                   make_slice_key(self._decode_options.get(filepath)) + compare_key)
+            cached = self.slice_cache.get(key)
+            if cached is not None:
+                return cached
+            comparison = Comparison(self, filepath, var_name, other_filepath, other_var, tolerance, regrid_method)
+            result = comparison.run(indexers, mode, progress_callback, cancel_event)
+            self.slice_cache.put(key, result)
+            return result
+
+    def read_hovmoller(self, filepath, var_name, indexers=None, keep='lon', reduce='mean',
+                       progress_callback=None, cancel_event=None):
+        """
+        시간 × 경도(keep='lon') 또는 시간 × 위도(keep='lat') Hovmöller 배열을 반환합니다.
+        시간 축 청크 블록 단위로 읽어 나머지 수평 축을 평균(또는 indexers로 고정한 한 점)하므로 3차원 필드 전체를
+        메모리에 올리지 않습니다. 결과는 슬라이스 캐시에 저장되어 색상표 등만 바꿔 다시 그리면 즉시 반환됩니다.
+        """
+        with self._reading(filepath) as (mtime,):
+            key = (filepath, mtime, self._cache_var_key(filepath, var_name), make_slice_key(indexers),
+                   make_slice_key(self._decode_options.get(filepath)) + ('hovmoller', keep, reduce))
+            cached = self.slice_cache.get(key)
+            if cached is not None:
+                return cached
+            result = compute_hovmoller(self, filepath, var_name, indexers or {}, keep, reduce,
+                                       progress_callback=progress_callback, cancel_event=cancel_event)
+            self.slice_cache.put(key, result)
+            return result
+
+    def get_mesh(self, filepath, var_name):
+        """
+        변수의 곡선/비정형 수평 격자(MeshGeometry)를 반환합니다. 직교 격자이면 None.
+        같은 격자를 쓰는 변수들은 하나의 MeshGeometry(와 삼각 분할)를 공유합니다.
+        """
+        with self._lock:
+            ds = self.get_variable_dataset(filepath, var_name)
+            variable = ds[var_name]
+            key = (filepath, tuple(variable.dims), variable.attrs.get('coordinates', ''), variable.attrs.get('mesh', ''),
+                   variable.attrs.get('location', ''))
+            if key not in self._meshes:
+                mesh = find_mesh(ds, var_name)
+                if mesh is not None:
+                    # 차원 구성이 달라도(예: 2D/3D 변수) 같은 수평 격자면 기존 삼각 분할을 재사용합니다.
+                    mesh = next((m for k, m in self._meshes.items() if m is not None and k[0] == filepath and
+                                 (m.kind, m.dims, m.location) == (mesh.kind, mesh.dims, mesh.location)), mesh)
+                    logger.info(f"메시 격자 인식: {var_name} ({mesh.kind}, {mesh.location}) in {os.path.basename(filepath)}")
+                self._meshes[key] = mesh
+            return self._meshes[key]
+
+    def _drop_coord_indexes(self, filepath):
+        with self._lock:
+            for key in [k for k in self._coord_indexes if k[0] == filepath]:
+                del self._coord_indexes[key]
+            for key in [k for k in self._meshes if k[0] == filepath]:
+                del self._meshes[key]
+            for key in [k for k in self._time_indexes if k[0] == filepath]:
+                del self._time_indexes[key]
+            for key in [k for k in self._hdf5_coord_datasets if k[0] == filepath]:
+                del self._hdf5_coord_datasets[key]
+            self.transect_engine.clear(filepath)
+
+    def nearest_indexers(self, filepath, var_name, lat=None, lon=None, **axis_values):
+        """위도/경도(및 다른 축 값)에 가장 가까운 격자점의 isel 인덱서를 반환합니다. 시간 값은 시간 색인으로 찾습니다."""
+        time_index = self.get_time_index(filepath, var_name)
+        moment = axis_values.pop(time_index.dim, None) if time_index is not None else None
+        indexers = self.get_coord_index(filepath, var_name).nearest_indexers(lat=lat, lon=lon, **axis_values)
+        if moment is not None:
+            indexers[time_index.dim] = time_index.nearest(moment)
+        return indexers
+
+    def value_at(self, filepath, var_name, lat=None, lon=None, **axis_values):
+        """
+        주어진 위치(와 시간/깊이 등)에서 가장 가까운 격자점의 값을 읽어 반환합니다.
+        지정하지 않은 나머지 차원은 그대로 남으므로 결과는 스칼라 또는 배열일 수 있습니다.
+        """
+        indexers = self.nearest_indexers(filepath, var_name, lat=lat, lon=lon, **axis_values)
+        return self.read_variable(filepath, var_name, indexers)
+
+    def read_point_series(self, filepaths, var_name, point_indexers, time_dim=None,
+                          progress_callback=None, cancel_event=None):
+        """
+        한 격자점(point_indexers)의 전체 시계열을 읽습니다. filepaths가 여러 개면 시간 축으로 이어 붙입니다.
+        각 파일은 시간 축 청크 경계에 맞춘 블록으로 격자점 기둥만 읽으므로 지도 전체를 읽지 않습니다.
+        결과는 첫 파일 기준 키로 슬라이스 캐시에 저장되어 플롯 창이 다시 요청하면 즉시 반환됩니다.
+        """
+        if isinstance(filepaths, str):
+            filepaths = [filepaths]
+        filepaths = list(filepaths)
+        with self._reading(*filepaths) as mtimes:
+            first, mtime = filepaths[0], mtimes[0]
+            series_key = ('series',) + tuple(zip(filepaths[1:], mtimes[1:]))
+            key = (first, mtime, self._cache_var_key(first, var_name), make_slice_key(point_indexers),
+                   make_slice_key(self._decode_options.get(first)) + series_key)
+            cached = self.slice_cache.get(key)
+            if cached is not None:
+                return cached
+
+            pieces = []
+            for number, path in enumerate(filepaths, start=1):
+                ds = self.get_variable_dataset(path, var_name)
+                variable = ds[var_name]
+                dim = time_dim or subset.find_axis_dim(ds, variable, 'time') or variable.dims[0]
+                point = {d: i for d, i in point_indexers.items() if d in variable.dims and d != dim}
+                if self.is_virtual_variable(path, var_name):
+                    # 파생 변수는 잎 변수들의 격자점 기둥만 읽어 계산합니다.
+                    pieces.append(self.read_variable(path, var_name, point, use_cache=False))
+                    continue
+                self._tune_chunk_cache(path, var_name, point)
+                if path in self.open_hdf5:
+                    # HDF5 하이퍼슬랩 한 번으로 격자점 기둥만 읽습니다.
+                    pieces.append(self.open_hdf5[path].read(var_name, point))
+                    continue
+                message = f"시계열 추출 중 ({number}/{len(filepaths)}): {os.path.basename(path)}"
+                pieces.append(read_along(variable.isel(point), dim, progress_callback, cancel_event,
+                                         message=message).compute())
+            series = pieces[0] if len(pieces) == 1 else xr.concat(pieces, dim=dim)
+            self.slice_cache.put(key, series)
+            logger.info(f"격자점 시계열 추출 완료: {var_name} {point_indexers} ({len(filepaths)}개 파일)")
+            return series
+
+    def read_transect(self, filepath, var_name, path, indexers=None, n_samples=200, method='bilinear'):
+        """
+        (위도, 경도) 꼭짓점 경로를 따라 변수의 단면을 추출합니다 (예: 깊이 × 거리).
+        indexers로 시간 등 나머지 차원을 고정하며, 보간 가중치는 격자/경로별로 재사용됩니다.
+        """
+        with self._reading(filepath) as (mtime,):
+            transect_key = ('transect', method, int(n_samples)) + tuple(map(tuple, path))
+            key = (filepath, mtime, self._cache_var_key(filepath, var_name), make_slice_key(indexers),
+                   make_slice_key(self._decode_options.get(filepath)) + transect_key)
+            cached = self.slice_cache.get(key)
+            if cached is not None:
+                return cached
+
+            weights = self.transect_engine.get_weights(filepath, self.get_coord_index(filepath, var_name),
+                                                       path, n_samples, method)
+            other_indexers = {d: i for d, i in (indexers or {}).items() if d not in weights.grid_dims}
+            r0, c0 = int(weights.rows.min()), int(weights.cols.min())
+            box = {weights.grid_dims[0]: slice(r0, int(weights.rows.max()) + 1),
+                   weights.grid_dims[1]: slice(c0, int(weights.cols.max()) + 1)}
+            if self.is_virtual_variable(filepath, var_name) or filepath in self.open_hdf5:
+                # 파생 변수와 HDF5는 경로를 감싸는 수평 사각형만 읽고 가중치 인덱스를 그에 맞게 옮깁니다.
+                variable = self.read_variable(filepath, var_name, {**other_indexers, **box}, use_cache=False)
+                weights = TransectWeights(weights.rows - r0, weights.cols - c0, weights.weights, weights.lats,
+                                          weights.lons, weights.distance, weights.grid_dims)
+            else:
+                self._tune_chunk_cache(filepath, var_name, {**other_indexers, **box})
+                variable = self.open_datasets[filepath][var_name]
+                if other_indexers:
+                    variable = variable.isel(other_indexers)
+            section = self.transect_engine.extract(variable, weights)
+            self.slice_cache.put(key, section)
+            return section
+
+    def regrid(self, filepath, var_name, target_filepath, target_var, indexers=None, method='bilinear',
+               progress_callback=None, cancel_event=None):
+        """
+        변수(indexers로 선택한 부분)를 다른 변수(target_filepath의 target_var)의 격자로 재격자화합니다.
+        가중치는 격자 쌍/방법별로 한 번만 만들고, 앞 차원(시간 등)은 블록 단위로 읽어 희소 행렬 곱을 적용합니다.
+        """
+        with self._reading(filepath) as (mtime,):
+            indexers = dict(indexers or {})
+            source = Grid.from_coord_index(self.get_coord_index(filepath, var_name), indexers)
+            target = Grid.from_coord_index(self.get_coord_index(target_filepath, target_var))
+            regrid_key = ('regrid', method, target.key)
+            key = (filepath, mtime, self._cache_var_key(filepath, var_name), make_slice_key(indexers),
+                   make_slice_key(self._decode_options.get(filepath)) + regrid_key)
+            cached = self.slice_cache.get(key)
+            if cached is not None:
+                return cached
+
+            weights = self.regrid_engine.get_weights(source, target, method)
+            variable = self.get_variable_dataset(filepath, var_name)[var_name]
+            template = variable.isel(indexers) if indexers else variable
+            other_dims = [dim for dim in template.dims if dim not in source.dims]
+            if not other_dims:
+                data = self.read_variable(filepath, var_name, indexers, use_cache=False)
+                result = self.regrid_engine.apply(weights, data, source, target, method)
+            else:
+                # 첫 앞 차원을 따라 저장 청크에 맞춘 블록으로 읽어 메모리에는 한 블록과 결과만 둡니다.
+                dim = other_dims[0]
+                blocks = list(iter_blocks(template, dim, chunk_len=chunk_sizes(variable).get(dim)))
+                pieces = []
+                for count, block in enumerate(blocks, start=1):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ReadCancelled("재격자화 취소됨")
+                    block_indexers = {**indexers, dim: compose_indexer(indexers.get(dim), block, variable.sizes[dim])}
+                    data = self.read_variable(filepath, var_name, block_indexers, use_cache=False)
+                    pieces.append(self.regrid_engine.apply(weights, data, source, target, method))
+                    if progress_callback:
+                        progress_callback(int(100 * count / len(blocks)), f"재격자화 중: {var_name}")
+                result = pieces[0] if len(pieces) == 1 else xr.concat(pieces, dim=dim)
+            self.slice_cache.put(key, result)
+            logger.info(f"재격자화 완료: {var_name} {source.shape} -> {target.shape} ({method})")
+            return result
+
+    def _tune_chunk_cache(self, filepath, var_name, indexers):
+        """
+        읽기 모양(지도/시계열/단면)에 맞춰 변수의 청크 캐시 크기와 선점 값을 조정합니다.
+        청크 저장이 아니거나 저장소에 접근할 수 없으면 아무것도 하지 않습니다.
+        """
+        try:
+            if filepath in self.open_hdf5:
+                hdf5_file = self.open_hdf5[filepath]
+                dims, shape, chunks, itemsize = hdf5_file.layout(var_name)
+                ds = self.get_variable_dataset(filepath, var_name)
+            else:
+                store = self._nc_stores.get(filepath)
+                if store is None:
+                    return
+                ds = self.open_datasets[filepath]
+                variable = ds[var_name]
+                sizes = chunk_sizes(variable)
+                dims, shape, itemsize = variable.dims, variable.shape, variable.encoding.get('dtype', variable.dtype).itemsize
+                chunks = tuple(sizes[d] for d in dims) if len(sizes) == len(dims) else None
+            if not chunks:
+                return
+            time_dim = subset.find_axis_dim(ds, ds[var_name], 'time')
+            changes = self.chunk_tuner.plan(filepath, var_name, dims, shape, chunks, itemsize, indexers, time_dim)
+        except Exception as e:
+            logger.warning(f"청크 캐시 조정 실패 ({var_name}): {e}")
+            return
+        # 이번 변수와, 전체 상한을 지키려고 줄인 다른 변수의 캐시를 적용합니다.
+        for (changed_path, changed_var), setting in changes.items():
+            try:
+                self._apply_chunk_cache(changed_path, changed_var, setting)
+            except Exception as e:
+                logger.warning(f"청크 캐시 조정 실패 ({changed_var}): {e}")
+
+    def _apply_chunk_cache(self, filepath, var_name, setting):
+        if filepath in self.open_hdf5:
+            self.open_hdf5[filepath].set_chunk_cache(var_name, setting['size'], setting['preemption'],
+                                                     setting['nelems'])
+        else:
+            store = self._nc_stores.get(filepath)
+            if store is None:
+                return
+            nc_dataset = store.ds # 파일 관리자가 자체적으로 잠금을 잡으므로 잠금 밖에서 가져옵니다.
+            with store.lock:
+                nc_dataset.variables[var_name].set_var_chunk_cache(
+                    size=setting['size'], nelems=setting['nelems'], preemption=setting['preemption'])
+        logger.debug(f"청크 캐시 조정: {var_name} {setting['pattern']} "
+                     f"{setting['size'] / 1024 / 1024:.1f}MB, preemption={setting['preemption']}")
+
+    def get_diagnostics(self):
+        """
+        캐시 진단 정보: 공유 슬라이스 캐시 통계와 파일/변수별 청크 캐시 설정 및 추정 읽기 효율
+        (요청한 바이트 / 압축 해제해야 하는 청크 바이트, 측정한 캐시 적중률이 아님).
+        """
+        return {
+            "slice_cache": self.slice_cache.stats(),
+            "chunk_cache_total": (self.chunk_tuner.total_bytes(), self.chunk_tuner.total_max_bytes),
+            "chunk_cache": {f"{os.path.basename(filepath)}:{var_name}": report
+                            for (filepath, var_name), report in self.chunk_tuner.report().items()},
+        }
+
+    def _read_netcdf_parallel(self, filepath, var_name, indexers):
+        """
+        netCDF4(HDF5 기반) 파일의 큰 압축 하이퍼슬랩을 청크 단위 병렬 압축 해제로 읽고 CF 디코딩을 적용합니다.
+        병렬 경로를 쓸 수 없는 요청(작은 읽기, 배열 인덱싱, 지원하지 않는 필터 등)이면 None을 반환합니다.
+        """
+        with self._lock:
+            if filepath not in self._parallel_handles:
+                handle = None
+                if filepath in self._nc_stores and h5py.is_hdf5(filepath):
+                    try:
+                        handle = h5py.File(filepath, 'r')
+                    except OSError as e:
+                        logger.debug(f"병렬 읽기용 HDF5 핸들 열기 실패: {e}")
+                self._parallel_handles[filepath] = handle
+            handle = self._parallel_handles[filepath]
+        if handle is None or var_name not in handle or not isinstance(handle[var_name], h5py.Dataset):
+            return None
+
+        variable = self.open_datasets[filepath][var_name]
+        indexers = indexers or {}
+        selection = tuple(indexers.get(dim, slice(None)) for dim in variable.dims)
+        raw = read_parallel(handle[var_name], selection)
+        if raw is None:
+            return None
+
+        lazy = variable.isel(indexers) if indexers else variable
+        # xarray가 디코딩하며 encoding으로 옮긴 CF 속성을 되돌려 같은 방식으로 디코딩합니다.
+        encoded_attrs = {key: value for key, value in variable.encoding.items() if key in CF_ENCODING_KEYS}
+        decode_options = self._decode_options.get(filepath, {})
+        decoded = xr.conventions.decode_cf_variable(
+            var_name, xr.Variable(lazy.dims, raw, attrs={**lazy.attrs, **encoded_attrs}),
+            mask_and_scale=decode_options.get('mask_and_scale', True),
+            decode_times=decode_options.get('decode_times', True),
+            use_cftime=decode_options.get('use_cftime'))
+        return lazy.copy(data=np.asarray(decoded.values))
+
+    def _close_parallel_handle(self, filepath):
+        with self._lock:
+            handle = self._parallel_handles.pop(filepath, None)
+            if handle is not None:
+                handle.close()
@@ -0,0 +1,331 @@
+# oceanocal_v2/expressions.py
+
+import ast
+import logging
+import operator
+import os
+import warnings
+
+import numpy as np
+import xarray as xr
+
+from .chunked_io import iter_blocks, chunk_sizes, compose_indexer, DEFAULT_BLOCK_BYTES
+from .slice_cache import make_slice_key
+
+logger = logging.getLogger(__name__)
+
+# 식에서 쓸 수 있는 함수 (모두 DataArray에 그대로 적용되는 numpy ufunc 또는 xr.where)
+FUNCTIONS = {
+    'sqrt': np.sqrt, 'abs': np.abs, 'exp': np.exp, 'log': np.log, 'log10': np.log10,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arcsin': np.arcsin, 'arccos': np.arccos,
+    'arctan': np.arctan, 'arctan2': np.arctan2, 'hypot': np.hypot, 'deg2rad': np.deg2rad,
+    'rad2deg': np.rad2deg, 'minimum': np.minimum, 'maximum': np.maximum, 'floor': np.floor,
+    'ceil': np.ceil, 'isnan': np.isnan, 'where': xr.where,
+}
+CONSTANTS = {'pi': np.pi, 'e': np.e, 'nan': np.nan}
+REDUCTIONS = ('mean', 'sum', 'min', 'max', 'std') # var.mean('time') 형태로 쓰는 차원 축약
+
+_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+    ast.USub: operator.neg, ast.UAdd: operator.pos, ast.Invert: operator.invert,
+    ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+}
+
+
+class ExpressionError(ValueError):
+    """식의 문법이 허용되지 않거나 변수/차원을 찾을 수 없을 때 발생합니다."""
+
+
+class _Leaf:
+    def __init__(self, name):
+        self.name = name
+        self.key = name
+
+    def evaluate(self, virtual, indexers, use_cache):
+        return virtual.read_leaf(self.name, indexers, use_cache)
+
+    def probe(self, probes):
+        return probes[self.name]
+
+
+class _Constant:
+    def __init__(self, value):
+        self.value = value
+        self.key = repr(value)
+
+    def evaluate(self, virtual, indexers, use_cache):
+        return self.value
+
+    def probe(self, probes):
+        return self.value
+
+
+class _Apply:
+    """연산자/함수를 인자 노드들의 결과에 그대로 적용합니다 (xarray가 차원 이름으로 브로드캐스트)."""
+    def __init__(self, fn, args, key):
+        self.fn = fn
+        self.args = args
+        self.key = key
+
+    def evaluate(self, virtual, indexers, use_cache):
+        return self.fn(*(arg.evaluate(virtual, indexers, use_cache) for arg in self.args))
+
+    def probe(self, probes):
+        return self.fn(*(arg.probe(probes) for arg in self.args))
+
+
+class _Reduce:
+    """
+    child.method(dim) 축약. dim을 따라 블록 단위로 누적하므로 축약 전 배열 전체를 메모리에 올리지 않고,
+    결과는 슬라이스 캐시에 메모이즈되어 (예: sst - sst.mean('time')) 시간 단계를 바꿔도 다시 계산하지 않습니다.
+    """
+    def __init__(self, method, child, dim, key):
+        self.method = method
+        self.child = child
+        self.dim = dim
+        self.key = key
+        self.child_dims = ()
+
+    def evaluate(self, virtual, indexers, use_cache):
+        return virtual.reduce(self, indexers, use_cache)
+
+    def probe(self, probes):
+        child = self.child.probe(probes)
+        if not isinstance(child, xr.DataArray) or self.dim not in child.dims:
+            raise ExpressionError(f"'{self.child.key}'에 차원 '{self.dim}'이(가) 없습니다.")
+        self.child_dims = child.dims
+        return getattr(child, self.method)(self.dim)
+
+
+def _compile(node, names):
+    """허용된 AST 노드만 평가 노드로 바꿉니다. 쓰인 변수 이름은 names에 모읍니다."""
+    key = ast.unparse(node)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return _Constant(node.value)
+    if isinstance(node, ast.Name):
+        if node.id in CONSTANTS:
+            return _Constant(CONSTANTS[node.id])
+        names.add(node.id)
+        return _Leaf(node.id)
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        return _Apply(_OPERATORS[type(node.op)], [_compile(node.left, names), _compile(node.right, names)], key)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+        return _Apply(_OPERATORS[type(node.op)], [_compile(node.operand, names)], key)
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in _OPERATORS:
+        return _Apply(_OPERATORS[type(node.ops[0])],
+                      [_compile(node.left, names), _compile(node.comparators[0], names)], key)
+    if isinstance(node, ast.Call):
+        if isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS and not node.keywords:
+            return _Apply(FUNCTIONS[node.func.id], [_compile(arg, names) for arg in node.args], key)
+        if isinstance(node.func, ast.Attribute) and node.func.attr in REDUCTIONS:
+            dims = [arg.value for arg in node.args if isinstance(arg, ast.Constant)]
+            dims += [kw.value.value for kw in node.keywords if kw.arg == 'dim' and isinstance(kw.value, ast.Constant)]
+            if len(dims) != 1 or len(node.args) + len(node.keywords) != 1 or not isinstance(dims[0], str):
+                raise ExpressionError(f"축약은 차원 이름 하나를 받습니다: {key}")
+            return _Reduce(node.func.attr, _compile(node.func.value, names), dims[0], key)
+    raise ExpressionError(f"허용되지 않는 식입니다: {key}")
+
+
+class _Accumulator:
+    """축약 결과를 블록마다 합칩니다. NaN은 건너뛰며 std는 블록별 평균/제곱편차를 병합합니다 (ddof=0)."""
+    def __init__(self, method, dim):
+        self.method = method
+        self.dim = dim
+        self.template = None
+        self.count = self.total = self.mean = self.m2 = self.extreme = None
+
+    def add(self, part):
+        values = np.asarray(part.values, dtype=float)
+        axis = part.dims.index(self.dim)
+        if self.template is None:
+            self.template = part.isel({self.dim: 0}, drop=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            count = np.sum(np.isfinite(values), axis=axis)
+            if self.method in ('min', 'max'):
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning) # 모두 NaN인 칸은 NaN으로 둡니다.
+                    block = np.nanmin(values, axis=axis) if self.method == 'min' else np.nanmax(values, axis=axis)
+                combine = np.fmin if self.method == 'min' else np.fmax
+                self.extreme = block if self.extreme is None else combine(self.extreme, block)
+                return
+            total = np.nansum(values, axis=axis)
+            if self.method == 'std':
+                mean = np.where(count > 0, total / np.maximum(count, 1), 0.0)
+                m2 = np.nansum((values - np.expand_dims(mean, axis)) ** 2, axis=axis)
+                if self.count is None:
+                    self.count, self.mean, self.m2 = count, mean, m2
+                else:
+                    n = self.count + count
+                    delta = mean - self.mean
+                    safe_n = np.maximum(n, 1)
+                    self.mean = self.mean + delta * count / safe_n
+                    self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe_n
+                    self.count = n
+                return
+            self.total = total if self.total is None else self.total + total
+            self.count = count if self.count is None else self.count + count
+
+    def result(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self.method in ('min', 'max'):
+                values = self.extreme
+            elif self.method == 'sum':
+                values = self.total
+            elif self.method == 'mean':
+                values = np.where(self.count > 0, self.total / np.maximum(self.count, 1), np.nan)
+            else:
+                values = np.where(self.count > 0, np.sqrt(self.m2 / np.maximum(self.count, 1)), np.nan)
+        return self.template.copy(data=np.asarray(values, dtype=float))
+
+
+def _conform(result, template):
+    """계산 결과를 템플릿의 차원 순서(필요하면 브로드캐스트)에 맞춥니다."""
+    if not isinstance(result, xr.DataArray):
+        result = xr.DataArray(result)
+    if set(result.dims) != set(template.dims):
+        result = result.broadcast_like(template)
+    return result.transpose(*template.dims)
+
+
+class VirtualVariable:
+    """
+    같은 파일의 변수들로 정의한 파생 변수 (예: sqrt(u**2 + v**2), sst - sst.mean('time')).
+    값은 요청된 슬라이스에 대해서만 계산하며, 슬라이스가 크면 첫 차원을 따라 블록 단위로 계산합니다.
+    잎 변수는 DatasetManager.read_variable로 읽으므로 병렬 청크 읽기와 슬라이스 캐시를 그대로 씁니다.
+    """
+    def __init__(self, dataset_manager, filepath, name, expression, block_bytes=DEFAULT_BLOCK_BYTES):
+        if not name.isidentifier():
+            raise ExpressionError(f"파생 변수 이름은 식별자여야 합니다: {name}")
+        self.dataset_manager = dataset_manager
+        self.filepath = filepath
+        self.name = name
+        self.expression = expression.strip()
+        self.block_bytes = block_bytes
+        try:
+            tree = ast.parse(self.expression, mode='eval')
+        except SyntaxError as e:
+            raise ExpressionError(f"식을 해석할 수 없습니다: {e.msg}")
+        names = set()
+        self.root = _compile(tree.body, names)
+        if not names:
+            raise ExpressionError("식에 변수가 하나 이상 있어야 합니다.")
+        for leaf in names:
+            if not dataset_manager.has_variable(filepath, leaf) or dataset_manager.is_virtual_variable(filepath, leaf):
+                raise ExpressionError(f"변수 '{leaf}'를 찾을 수 없습니다.")
+        self.variables = sorted(names)
+        self._template = None
+        self._dataset = None
+        self.template # 차원/자료형을 미리 검증합니다.
+
+    def reset(self):
+        """파일이 다시 열리면 좌표를 담은 템플릿을 새로 만듭니다."""
+        self._template = None
+        self._dataset = None
+
+    def _leaf_variable(self, name):
+        return self.dataset_manager.get_variable_dataset(self.filepath, name)[name]
+
+    @property
+    def template(self):
+        """값은 0-stride 자리표시자이고 차원/좌표/속성만 실제인 DataArray."""
+        if self._template is None:
+            leaves = {name: self._leaf_variable(name) for name in self.variables}
+            self.sizes = {}
+            for variable in leaves.values():
+                self.sizes.update(variable.sizes)
+            # 크기 1짜리 배열로 식을 한 번 계산해 결과의 차원 순서와 자료형을 얻습니다.
+            # 잎의 자료형은 디코딩 후 자료형입니다 (HDF5의 압축 정수는 스케일/채움값을 적용하면 실수).
+            probes = {name: xr.DataArray(np.ones((1,) * variable.ndim,
+                                                 dtype=self.dataset_manager.decoded_dtype(self.filepath, variable)),
+                                         dims=variable.dims)
+                      for name, variable in leaves.items()}
+            try:
+                probe = self.root.probe(probes)
+            except ExpressionError:
+                raise
+            except Exception as e: # 브로드캐스트할 수 없는 차원 조합 등
+                raise ExpressionError(f"식을 계산할 수 없습니다: {e}")
+            if not isinstance(probe, xr.DataArray):
+                raise ExpressionError("식의 결과가 배열이 아닙니다.")
+            dims = probe.dims
+            coords, attrs = {}, {'long_name': self.name, 'expression': self.expression}
+            for variable in leaves.values():
+                for coord_name, coord in variable.coords.items():
+                    if coord_name not in coords and set(coord.dims) <= set(dims):
+                        coords[coord_name] = coord
+                if variable.dims == dims and 'coordinates' in variable.attrs:
+                    attrs.setdefault('coordinates', variable.attrs['coordinates'])
+            shape = tuple(self.sizes[dim] for dim in dims)
+            placeholder = np.broadcast_to(np.zeros((), dtype=probe.dtype), shape)
+            self._template = xr.DataArray(placeholder, dims=dims, coords=coords, name=self.name, attrs=attrs)
+        return self._template
+
+    def dataset(self):
+        """인덱서 계산과 좌표 색인에 쓸 경량 Dataset (파생 변수 + 잎 변수의 좌표)."""
+        if self._dataset is None:
+            base = self.dataset_manager.get_variable_dataset(self.filepath, self.variables[0])
+            self._dataset = base.assign({self.name: self.template})
+        return self._dataset
+
+    def _chunk_len(self, dim):
+        """dim을 가진 첫 잎 변수의 저장 청크 길이 (블록을 청크 경계에 맞추는 데 씁니다)."""
+        hdf5_file = self.dataset_manager.get_hdf5(self.filepath)
+        for name in self.variables:
+            if hdf5_file is not None:
+                dims, _, chunks, _ = hdf5_file.layout(name)
+                if chunks and dim in dims:
+                    return chunks[list(dims).index(dim)]
+                continue
+            variable = self.dataset_manager.get_dataset(self.filepath)[name]
+            if dim in variable.dims:
+                return chunk_sizes(variable).get(dim)
+        return None
+
+    def read(self, indexers=None, use_cache=True):
+        """요청된 슬라이스만 계산해 DataArray로 반환합니다."""
+        indexers = dict(indexers or {})
+        template = self.template.isel(indexers) if indexers else self.template
+        if template.ndim == 0 or template.size * template.dtype.itemsize <= self.block_bytes:
+            result = self.root.evaluate(self, indexers, use_cache)
+            result = _conform(result, template)
+        else:
+            # 중간 배열이 슬라이스 전체 크기로 커지지 않도록 첫 차원을 따라 블록 단위로 계산합니다.
+            dim = template.dims[0]
+            out = np.empty(template.shape, dtype=template.dtype)
+            for block in iter_blocks(template, dim, self.block_bytes, self._chunk_len(dim)):
+                block_indexers = {**indexers, dim: compose_indexer(indexers.get(dim), block, self.sizes[dim])}
+                part = self.root.evaluate(self, block_indexers, False)
+                out[block] = _conform(part, template.isel({dim: block})).values
+            result = template.copy(data=out)
+        result.name = self.name
+        result.attrs = dict(self.template.attrs)
+        return result
+
+    def read_leaf(self, name, indexers, use_cache):
+        variable = self._leaf_variable(name)
+        leaf_indexers = {dim: index for dim, index in indexers.items() if dim in variable.dims}
+        return self.dataset_manager.read_variable(self.filepath, name, leaf_indexers, use_cache=use_cache)
+
+    def reduce(self, node, indexers, use_cache):
+        # 축약 차원 자체의 선택은 무시합니다 (바깥 블록 안에서도 축약은 차원 전체에 대해 계산).
+        indexers = {dim: index for dim, index in indexers.items() if dim in node.child_dims and dim != node.dim}
+        cache = self.dataset_manager.slice_cache
+        key = (self.filepath, os.stat(self.filepath).st_mtime_ns, ('expr', node.key), make_slice_key(indexers),
+               make_slice_key(self.dataset_manager.get_decode_options(self.filepath)))
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        sizes = [self.sizes[dim] for dim in node.child_dims]
+        child = xr.DataArray(np.broadcast_to(np.zeros((), dtype=float), sizes), dims=node.child_dims)
+        child = child.isel(indexers) if indexers else child
+        accumulator = _Accumulator(node.method, node.dim)
+        for block in iter_blocks(child, node.dim, self.block_bytes, self._chunk_len(node.dim)):
+            part = node.child.evaluate(self, {**indexers, node.dim: block}, False)
+            accumulator.add(part.transpose(*child.dims))
+        result = accumulator.result()
+        cache.put(key, result) # 축약은 비싸므로 use_cache와 관계없이 메모이즈합니다.
+        logger.debug(f"파생 변수 축약 계산: {node.key} {indexers}")
+        return result
@@ -0,0 +1,116 @@
+# oceanocal_v2/file_watch.py
+
+import logging
+import os
+import sys
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+WATCH_DEBOUNCE_MS = 500 # 기록 중인 파일은 변경 알림이 연달아 오므로 잠잠해질 때까지 기다렸다가 한 번만 확인합니다
+RETRY_MS = 2000 # 쓰는 도중이라 열 수 없거나 잠시 사라진 파일을 다시 확인하기까지의 시간
+HDF5_LOCKING_ENV = 'HDF5_USE_FILE_LOCKING'
+
+
+def configure_hdf5_file_locking(watch_enabled):
+    """
+    파일 감시를 켜면 HDF5 파일 잠금을 끕니다 (HDF5_USE_FILE_LOCKING=FALSE).
+    뷰어가 열어 둔 netCDF4/HDF5 파일에는 잠금이 걸려 다른 프로세스의 기록기가 'a' 모드로 열지 못하므로
+    (NetCDF: HDF error) 실시간 파일 감시가 동작하지 않습니다. HDF5는 이 환경 변수를 라이브러리 초기화 때
+    한 번만 읽으므로 h5py/netCDF4를 가져오기 전에 호출해야 합니다. 사용자가 직접 설정한 값은 바꾸지 않습니다.
+    """
+    if not watch_enabled or HDF5_LOCKING_ENV in os.environ:
+        return
+    if 'h5py' in sys.modules or 'netCDF4' in sys.modules:
+        logger.warning("HDF5 라이브러리를 이미 가져와 파일 잠금 설정을 바꿀 수 없습니다.")
+        return
+    os.environ[HDF5_LOCKING_ENV] = 'FALSE'
+    logger.info("파일 감시를 위해 HDF5 파일 잠금을 껐습니다 (HDF5_USE_FILE_LOCKING=FALSE).")
+
+
+def hdf5_file_locking_disabled():
+    """이 프로세스에서 HDF5 파일 잠금이 꺼져 있는지 (기록기가 감시 중인 파일을 열 수 있는지) 반환합니다."""
+    return os.environ.get(HDF5_LOCKING_ENV, '').strip().upper() in ('FALSE', '0')
+
+
+class FileWatcher(QObject):
+    """
+    열린 파일을 QFileSystemWatcher로 감시해 디스크 변경을 DatasetManager에 반영하는 감시기.
+    무제한 차원에 레코드가 덧붙은 경우(관측 중 기록되는 실시간 파일) file_appended를, 그 밖의 변경은
+    file_changed를 보냅니다. 덧붙이기면 DatasetManager가 기존 슬라이스를 유지하고 새 레코드만 읽습니다.
+    netCDF4/HDF5 파일은 HDF5 파일 잠금이 꺼져 있어야(configure_hdf5_file_locking) 기록기가 함께 쓸 수 있습니다.
+    """
+    file_appended = pyqtSignal(str, dict) # 경로, {차원: (이전 길이, 새 길이)}
+    file_changed = pyqtSignal(str) # 경로 (덧붙이기가 아닌 변경: 전체 다시 그리기)
+
+    def __init__(self, dataset_manager, status_callback=None, delay_ms=WATCH_DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.dataset_manager = dataset_manager
+        self.status_callback = status_callback
+        self.enabled = True
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._pending = set()
+        self._delay_ms = delay_ms
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._flush)
+
+    def _report_status(self, message, timeout=2000):
+        if self.status_callback:
+            self.status_callback(message, timeout)
+
+    def sync(self):
+        """DatasetManager에 열린 파일 목록에 맞춰 감시 대상을 더하거나 뺍니다 (파일을 열고 닫은 뒤 호출)."""
+        wanted = set(self.dataset_manager.get_file_list()) if self.enabled else set()
+        watched = set(self._watcher.files())
+        for path in watched - wanted:
+            self._watcher.removePath(path)
+            self._pending.discard(path)
+        for path in wanted - watched:
+            if os.path.exists(path) and not self._watcher.addPath(path):
+                logger.warning(f"파일 감시를 시작할 수 없습니다: {path}")
+
+    def set_enabled(self, enabled):
+        """감시를 켜거나 끕니다. 끄면 파일은 다음 읽기 때 mtime 확인으로만 갱신됩니다."""
+        self.enabled = bool(enabled)
+        self.sync()
+        logger.info(f"파일 감시 {'켜짐' if self.enabled else '꺼짐'}")
+
+    def _on_file_changed(self, path):
+        self._pending.add(path)
+        self._timer.start(self._delay_ms)
+
+    def _flush(self):
+        pending, self._pending = self._pending, set()
+        retry = False
+        for path in pending:
+            if path not in self.dataset_manager.get_file_list():
+                continue
+            if not os.path.exists(path):
+                # 새 파일로 바꿔 쓰는 기록기(임시 파일 → 이름 바꾸기)는 잠시 파일이 사라졌다 나타납니다.
+                self._pending.add(path)
+                retry = True
+                continue
+            if path not in self._watcher.files():
+                self._watcher.addPath(path) # 바꿔 쓴 파일은 감시가 풀리므로 다시 등록합니다.
+            try:
+                growth = self.dataset_manager.refresh_file(path)
+            except Exception as e:
+                logger.debug(f"변경된 파일을 아직 열 수 없어 다시 시도합니다: {path} ({e})")
+                self._pending.add(path)
+                retry = True
+                continue
+            if growth is None:
+                continue
+            if growth:
+                summary = ", ".join(f"{dim} +{new - old}" for dim, (old, new) in growth.items())
+                self._report_status(f"레코드 추가: {os.path.basename(path)} ({summary})", 3000)
+                self.file_appended.emit(path, growth)
+            else:
+                self._report_status(f"파일 변경 감지, 다시 읽음: {os.path.basename(path)}", 3000)
+                self.file_changed.emit(path)
+        if retry:
+            self._timer.start(RETRY_MS)
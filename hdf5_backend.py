@@ -0,0 +1,212 @@
+# oceanocal_v2/hdf5_backend.py
+
+import logging
+import os
+
+import numpy as np
+import xarray as xr
+import h5py
+
+from .parallel_read import read_hyperslab
+
+logger = logging.getLogger(__name__)
+
+HDF5_EXTENSIONS = ('.h5', '.hdf5', '.he5', '.hdf')
+
+DEFAULT_CHUNK_CACHE = {
+    'rdcc_nbytes': 64 * 1024 * 1024, # 파일당 청크 캐시 크기
+    'rdcc_w0': 0.75, # 완전히 읽힌 청크를 우선 제거하는 정도
+    'rdcc_nslots': 100003, # 해시 슬롯 수 (소수 권장)
+}
+
+
+# 차원 스케일과 netCDF4가 내부적으로 쓰는 속성 (사용자 메타데이터가 아님)
+_INTERNAL_ATTRS = ('DIMENSION_LIST', 'REFERENCE_LIST', 'CLASS', 'NAME', '_Netcdf4Dimid', '_Netcdf4Coordinates',
+                   '_nc3_strict', '_NCProperties')
+
+
+def is_hdf5_path(filepath):
+    """
+    HDF5 전용 백엔드를 사용할 파일인지 판단합니다. 확장자만으로는 부족하므로(.hdf는 대부분 HDF4)
+    파일 서명(h5py.is_hdf5)까지 확인하고, HDF5가 아니면 xarray(netCDF4) 경로로 넘깁니다.
+    """
+    if os.path.splitext(filepath)[1].lower() not in HDF5_EXTENSIONS:
+        return False
+    try:
+        return h5py.is_hdf5(filepath)
+    except OSError:
+        return False
+
+
+def _decode_attr(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in ('S', 'O'):
+            return [_decode_attr(v) for v in value.tolist()]
+        return value.tolist() if value.size > 1 else value.item()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class HDF5File:
+    """
+    h5py로 연 HDF5 파일. 그룹 구조는 트리에서 펼칠 때만 한 단계씩 탐색하고,
+    데이터는 요청된 데이터셋의 하이퍼슬랩만 읽습니다.
+    """
+    def __init__(self, filepath, chunk_cache=None):
+        self.filepath = filepath
+        self.chunk_cache = {**DEFAULT_CHUNK_CACHE, **(chunk_cache or {})}
+        self._file = h5py.File(filepath, 'r', **self.chunk_cache)
+        self.attrs = {key: _decode_attr(value) for key, value in self._file.attrs.items()}
+        self._dims_cache = {} # {dataset path: (dims, {dim: coord values})}
+        self._tuned = {} # {dataset path: 데이터셋별 청크 캐시로 다시 연 h5py.Dataset}
+        logger.info(f"HDF5 파일 열림 (h5py): {filepath}")
+
+    def close(self):
+        self._tuned.clear()
+        self._file.close()
+
+    def _dataset(self, path):
+        tuned = self._tuned.get(path)
+        return tuned if tuned is not None else self._file[path]
+
+    def layout(self, path):
+        """(차원, 모양, 청크 모양 또는 None, 원소 바이트 수)를 반환합니다."""
+        dataset = self._file[path]
+        return self.dims(path)[0], dataset.shape, dataset.chunks, dataset.dtype.itemsize
+
+    def set_chunk_cache(self, path, nbytes, w0=None, nslots=None):
+        """
+        데이터셋 하나에만 적용되는 청크 캐시(H5Pset_chunk_cache)로 데이터셋을 다시 엽니다.
+        파일 전체 rdcc 설정보다 우선합니다.
+        """
+        dapl = h5py.h5p.create(h5py.h5p.DATASET_ACCESS)
+        dapl.set_chunk_cache(int(nslots or self.chunk_cache['rdcc_nslots']), int(nbytes),
+                             float(self.chunk_cache['rdcc_w0'] if w0 is None else w0))
+        dsid = h5py.h5d.open(self._file.id, path.encode('utf-8'), dapl=dapl)
+        self._tuned[path] = h5py.Dataset(dsid)
+
+    def __contains__(self, path):
+        return path in self._file and isinstance(self._file[path], h5py.Dataset)
+
+    def list_group(self, group_path='/'):
+        """그룹의 바로 아래 항목만 [{'name', 'path', 'type', 'shape', 'dtype'}] 형식으로 반환합니다."""
+        group = self._file[group_path]
+        children = []
+        for name, link in group.items():
+            path = f"{group_path.rstrip('/')}/{name}"
+            if isinstance(link, h5py.Group):
+                children.append({'name': name, 'path': path, 'type': 'group'})
+            elif isinstance(link, h5py.Dataset):
+                children.append({'name': name, 'path': path, 'type': 'dataset',
+                                 'shape': link.shape, 'dtype': str(link.dtype)})
+        return children
+
+    def get_info(self, path):
+        """데이터셋(또는 그룹)의 메타데이터를 DatasetManager.get_variable_info와 같은 형식으로 반환합니다."""
+        node = self._file[path]
+        info = {
+            "name": path,
+            "attributes": {key: _decode_attr(value) for key, value in node.attrs.items()
+                           if key not in _INTERNAL_ATTRS},
+        }
+        if isinstance(node, h5py.Dataset):
+            info.update({
+                "dimensions": list(self.dims(path)[0]),
+                "shape": node.shape,
+                "dtype": str(node.dtype),
+                "chunks": node.chunks,
+                "compression": node.compression,
+            })
+        return info
+
+    def dims(self, path):
+        """
+        데이터셋의 차원 이름과 1차원 좌표 값을 구합니다.
+        차원 스케일(netCDF4가 만든 파일 포함)이 붙어 있으면 그 이름과 값을, 없으면 phony_dim_N을 사용합니다.
+        """
+        cached = self._dims_cache.get(path)
+        if cached is not None:
+            return cached
+        dataset = self._file[path]
+        names, coords = [], {}
+        for axis, dim in enumerate(dataset.dims):
+            name = None
+            if len(dim):
+                scale = dim[0]
+                name = os.path.basename(scale.name)
+                # netCDF4가 좌표 변수 없이 만든 차원 스케일은 값이 의미 없으므로 건너뜁니다.
+                placeholder = _decode_attr(scale.attrs.get('NAME', b'')).startswith('This is a netCDF dimension but not')
+                if (scale.ndim == 1 and scale.shape[0] == dataset.shape[axis] and scale.name != dataset.name
+                        and not placeholder):
+                    coords[name] = scale[()]
+            name = name or dim.label or f"phony_dim_{axis}"
+            if name in names:
+                name = f"{name}_{axis}"
+            names.append(name)
+        result = (tuple(names), coords)
+        self._dims_cache[path] = result
+        return result
+
+    def coordinate_dataset(self, path):
+        """
+        인덱서 계산과 좌표 색인에 쓸 경량 xarray.Dataset을 만듭니다.
+        변수 값은 0-stride 자리표시자이므로 데이터는 읽지 않습니다. 좌표에는 차원 스케일의 속성(units 등)을 붙여
+        숫자로 저장된 CF 시간도 시간 색인이 디코딩할 수 있게 합니다.
+        """
+        dataset = self._file[path]
+        dims, coords = self.dims(path)
+        coord_attrs = {}
+        for dim in dataset.dims:
+            scale = dim[0] if len(dim) else None
+            if scale is not None and os.path.basename(scale.name) in coords:
+                coord_attrs[os.path.basename(scale.name)] = {key: _decode_attr(value) for key, value in scale.attrs.items()
+                                                             if key not in _INTERNAL_ATTRS}
+        coords = {name: (name, values, coord_attrs.get(name, {})) for name, values in coords.items()}
+        placeholder = np.broadcast_to(np.zeros((), dtype=dataset.dtype), dataset.shape)
+        return xr.Dataset({path: (dims, placeholder, self.get_info(path)['attributes'])}, coords=coords)
+
+    def read(self, path, indexers=None):
+        """
+        indexers({dim: int | slice | 정수 배열})에 해당하는 하이퍼슬랩만 읽어 DataArray로 반환합니다.
+        정수 배열 선택은 h5py 제약에 맞춰 축마다 하나씩 정렬된 인덱스로 읽은 뒤 원래 순서로 되돌립니다.
+        """
+        dataset = self._dataset(path)
+        dims, coords = self.dims(path)
+        indexers = indexers or {}
+        selection, post_takes = [], []
+        for dim in dims:
+            index = indexers.get(dim, slice(None))
+            if isinstance(index, (list, np.ndarray)):
+                index = np.asarray(index)
+                if not post_takes:
+                    # h5py는 정렬된 배열 선택 하나만 허용하므로 고유 정렬 인덱스로 읽고 나중에 순서를 복원합니다.
+                    unique, inverse = np.unique(index, return_inverse=True)
+                    selection.append(unique)
+                    post_takes.append((dim, inverse))
+                else:
+                    selection.append(slice(None))
+                    post_takes.append((dim, index))
+            else:
+                selection.append(index)
+        data = read_hyperslab(dataset, selection)
+
+        kept_dims = [dim for dim, index in zip(dims, selection) if not isinstance(index, (int, np.integer))]
+        for dim, take in post_takes:
+            data = np.take(data, take, axis=kept_dims.index(dim))
+
+        attrs = self.get_info(path)['attributes']
+        if np.issubdtype(data.dtype, np.number):
+            # xarray CF 디코딩과 같이 _FillValue와 missing_value(스칼라 또는 목록)를 모두 결측으로 처리합니다.
+            missing = [np.ravel(attrs[key]) for key in ('_FillValue', 'missing_value') if attrs.get(key) is not None]
+            if missing:
+                data = np.where(np.isin(data, np.concatenate(missing)), np.nan, data)
+        scale, offset = attrs.get('scale_factor'), attrs.get('add_offset')
+        if scale is not None or offset is not None:
+            data = data * (scale if scale is not None else 1) + (offset if offset is not None else 0)
+
+        array_coords = {dim: coords[dim][indexers.get(dim, slice(None))]
+                        for dim in kept_dims if dim in coords}
+        return xr.DataArray(data, dims=kept_dims, coords=array_coords, name=path, attrs=attrs)
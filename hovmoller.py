@@ -0,0 +1,96 @@
+# oceanocal_v2/hovmoller.py
+
+import logging
+
+import numpy as np
+import xarray as xr
+
+from .chunked_io import iter_blocks, chunk_sizes, compose_indexer, ReadCancelled, DEFAULT_BLOCK_BYTES
+from .subset import find_axis_dim, fix_leading_dims
+
+logger = logging.getLogger(__name__)
+
+# 남기는 축: 줄이는 축
+HOVMOLLER_AXES = {'lon': 'lat', 'lat': 'lon'}
+HOVMOLLER_REDUCTIONS = ('mean', 'select')
+
+
+def hovmoller_dims(dataset, var_name, keep='lon'):
+    """(시간 차원, 남기는 수평 차원, 줄이는 수평 차원)을 찾습니다. 없으면 ValueError."""
+    if keep not in HOVMOLLER_AXES:
+        raise ValueError(f"Hovmöller 축은 'lon' 또는 'lat'이어야 합니다: {keep}")
+    variable = dataset[var_name]
+    time_dim = find_axis_dim(dataset, variable, 'time')
+    keep_dim = find_axis_dim(dataset, variable, keep)
+    reduce_dim = find_axis_dim(dataset, variable, HOVMOLLER_AXES[keep])
+    if time_dim is None or keep_dim is None or reduce_dim is None:
+        raise ValueError(f"변수 '{var_name}'에 시간과 1차원 위도/경도 차원이 있어야 Hovmöller 도표를 만들 수 있습니다.")
+    return time_dim, keep_dim, reduce_dim
+
+
+def hovmoller_indexers(dataset, var_name, indexers, slice_state=None, keep='lon', reduce='mean', at=None,
+                       coord_index=None):
+    """
+    영역/시간 범위 인덱서에 Hovmöller 이외의 차원(깊이 등)을 'slice' 단계로 고정하는 인덱서를 더합니다.
+    reduce='select'이면 줄이는 축을 at 좌표에 가장 가까운 한 점으로 고정합니다.
+    """
+    time_dim, keep_dim, reduce_dim = hovmoller_dims(dataset, var_name, keep)
+    others = [dim for dim in dataset[var_name].dims if dim not in (time_dim, keep_dim, reduce_dim)]
+    indexers = fix_leading_dims(others, indexers, slice_state, keep=0)
+    if reduce == 'select':
+        if at is None or coord_index is None:
+            raise ValueError("reduce='select'에는 선택할 좌표 값(at)이 필요합니다.")
+        indexers[reduce_dim] = coord_index.axes[reduce_dim].nearest(at)
+    return indexers
+
+
+def compute_hovmoller(dataset_manager, filepath, var_name, indexers, keep='lon', reduce='mean',
+                      block_bytes=DEFAULT_BLOCK_BYTES, progress_callback=None, cancel_event=None):
+    """
+    (시간 × 남기는 축) Hovmöller 배열을 시간 축 청크 블록 단위로 읽으며 계산합니다.
+    줄이는 축은 블록마다 바로 평균(위도 방향 평균은 cos(위도) 가중)하므로 메모리에는 블록 하나만 있습니다.
+    """
+    dataset = dataset_manager.get_variable_dataset(filepath, var_name)
+    variable = dataset[var_name]
+    time_dim, keep_dim, reduce_dim = hovmoller_dims(dataset, var_name, keep)
+    template = variable.isel(indexers) if indexers else variable
+    weights = None
+    if reduce == 'mean' and reduce_dim in template.dims and reduce_dim in template.coords and keep == 'lon':
+        weights = np.cos(np.deg2rad(np.asarray(template[reduce_dim].values, dtype=float)))
+
+    blocks = list(iter_blocks(template, time_dim, block_bytes, chunk_sizes(variable).get(time_dim)))
+    rows = []
+    for number, block in enumerate(blocks, start=1):
+        if cancel_event is not None and cancel_event.is_set():
+            raise ReadCancelled("Hovmöller 계산 취소됨")
+        block_indexers = {**indexers, time_dim: compose_indexer(indexers.get(time_dim), block, variable.sizes[time_dim])}
+        data = dataset_manager.read_variable(filepath, var_name, block_indexers, use_cache=False)
+        if reduce_dim in data.dims:
+            data = data.transpose(time_dim, reduce_dim, keep_dim)
+            values = np.asarray(data.values, dtype=np.float64)
+            finite = np.isfinite(values)
+            w = np.ones(values.shape[1]) if weights is None else weights
+            w = np.broadcast_to(w[None, :, None], values.shape) * finite
+            total = w.sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                reduced = (np.where(finite, values, 0.0) * w).sum(axis=1) / total
+            reduced = np.where(total > 0, reduced, np.nan)
+        else:
+            reduced = np.asarray(data.transpose(time_dim, keep_dim).values, dtype=np.float64)
+        rows.append(reduced)
+        if progress_callback:
+            progress_callback(int(100 * number / len(blocks)), f"Hovmöller 계산 중: {var_name}")
+
+    coords = {time_dim: template[time_dim].values}
+    if keep_dim in template.coords:
+        coords[keep_dim] = template[keep_dim].values
+    if reduce_dim in template.dims:
+        label = f"{reduce_dim} 평균"
+    elif reduce_dim in template.coords:
+        label = f"{reduce_dim} = {float(template[reduce_dim].values):g}"
+    else:
+        label = f"{reduce_dim} = {indexers.get(reduce_dim)}"
+    result = xr.DataArray(np.concatenate(rows, axis=0), dims=(time_dim, keep_dim), coords=coords, name=var_name,
+                          attrs={**variable.attrs, 'hovmoller': label})
+    logger.info(f"Hovmöller 계산 완료: {var_name} ({time_dim} × {keep_dim}, {label}, 블록 {len(blocks)}개)")
+    return result
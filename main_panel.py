@@ -1,21 +1,33 @@
 import logging
 import os
 import json
+import numpy as np
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QMessageBox,
-    QTreeWidget, QTreeWidgetItem, QTextEdit, QFileDialog, QSplitter
+    QTreeWidget, QTreeWidgetItem, QTextEdit, QFileDialog, QSplitter, QInputDialog
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QUrl, pyqtSignal
+from PyQt6.QtGui import QIcon
 
 # 필요한 매니저 클래스 임포트 확인 (상대 경로가 맞는지 중요)
 from .dataset_manager import DatasetManager
 from .handlers.plot_handler import PlotHandler
 from .plot_window_manager import PlotWindowManager
 from .settings_manager import SettingsManager
+from .data_export import EXPORT_FORMATS, export_subset
+from .preview import PreviewCache
+from .climatology import CALENDAR_BINS, export_climatology
+from .time_stats import TIME_STATISTICS, export_time_statistics
+from .compare import COMPARE_MODES
+from .hovmoller import HOVMOLLER_AXES
+from .spectral import BULK_PARAMETERS, spectral_dims, storm_events, format_storm_summary
+from .workers import start_worker
 
 logger = logging.getLogger(__name__)
 
 class MainPanel(QWidget):
+    files_changed = pyqtSignal() # 파일을 열거나 닫아 DatasetManager의 파일 목록이 바뀜 (파일 감시 대상 갱신)
+
     def __init__(self, parent=None,
                  dataset_manager=None,
                  plot_handler=None,
@@ -29,6 +41,8 @@ class MainPanel(QWidget):
         self.plot_manager = plot_manager
         self.settings_manager = settings_manager
         self.update_status_bar_callback = update_status_bar_callback
+        self.preview_cache = PreviewCache() # 변수 미리보기 PNG 디스크 캐시
+        self._preview_items = {} # {(파일 경로, 변수): 미리보기를 기다리는 트리 항목}
 
         self._setup_ui()
         self._connect_signals()
@@ -66,6 +80,7 @@ class MainPanel(QWidget):
 
     def _connect_signals(self):
         self.tree_widget.itemClicked.connect(self._on_tree_item_clicked)
+        self.tree_widget.itemExpanded.connect(self._on_tree_item_expanded)
         logger.info("MainPanel 시그널 연결 완료.")
 
     def _on_tree_item_clicked(self, item, column):
@@ -79,8 +94,26 @@ class MainPanel(QWidget):
 
         current_file_path = self.dataset_manager.get_current_file_path()
         dataset = self.dataset_manager.get_dataset(current_file_path)
-
-        if dataset:
+        hdf5_file = self.dataset_manager.get_hdf5(current_file_path) if current_file_path else None
+
+        if item_type == "virtual_variable" and current_file_path:
+            variable = self.dataset_manager.get_variable_dataset(current_file_path, item_value)[item_value]
+            expression = self.dataset_manager.get_virtual_variables(current_file_path).get(item_value, "")
+            info_str += f"식: {expression}\n"
+            info_str += f"크기: {variable.shape}\n"
+            info_str += f"차원: {list(variable.dims)}\n"
+            info_str += "값은 플롯/내보내기에서 요청한 슬라이스만 계산합니다.\n"
+        elif hdf5_file and item_type in ("file", "hdf5_group", "hdf5_dataset"):
+            path = item.data(0, Qt.ItemDataRole.UserRole + 1) or '/'
+            info = hdf5_file.get_info(path)
+            info_str += f"경로: {path}\n"
+            for key in ("dimensions", "shape", "dtype", "chunks", "compression"):
+                if key in info:
+                    info_str += f"{key}: {info[key]}\n"
+            info_str += "\n--- 속성 ---\n"
+            for attr, val in info["attributes"].items():
+                info_str += f"{attr}: {val}\n"
+        elif dataset:
             if item_type == "file":
                 info_str += "--- 파일 전역 속성 ---\n"
                 for attr, val in dataset.attrs.items():
@@ -118,6 +151,7 @@ class MainPanel(QWidget):
             try:
                 self.dataset_manager.open_file(file_path) # 'load_file'을 'open_file'로 변경
                 self._update_tree_widget()
+                self.files_changed.emit()
                 if self.update_status_bar_callback:
                     self.update_status_bar_callback(f"'{os.path.basename(file_path)}' 로드 완료.", 2000)
                 logger.info(f"파일 '{file_path}' 트리 위젯에 로드 완료.")
@@ -130,18 +164,27 @@ class MainPanel(QWidget):
             logger.warning("DatasetManager가 MainPanel에 설정되지 않았습니다.")
             QMessageBox.warning(self, "오류", "데이터셋 매니저가 초기화되지 않았습니다. 애플리케이션 설정을 확인하세요.")
 
+    def refresh_tree(self):
+        """파일을 MainPanel 밖에서 연 뒤(세션 복원 등) 현재 파일의 트리를 다시 그립니다."""
+        self._update_tree_widget()
+        self.files_changed.emit()
+
     def _update_tree_widget(self):
         """
         DatasetManager에서 현재 활성화된 데이터를 기반으로 트리 위젯을 업데이트하고
         각 아이템에 사용자 정의 데이터(타입)를 저장합니다.
         """
+        self._preview_items.clear() # 이전 트리의 항목은 곧 삭제되므로 늦게 도착한 미리보기는 버립니다.
         self.tree_widget.clear()
         self.info_text_edit.clear()
 
         current_file_path = self.dataset_manager.get_current_file_path()
         dataset = self.dataset_manager.get_dataset(current_file_path)
+        hdf5_file = self.dataset_manager.get_hdf5(current_file_path) if current_file_path else None
 
-        if dataset:
+        if hdf5_file:
+            self._build_hdf5_tree(current_file_path, hdf5_file)
+        elif dataset:
             file_name = os.path.basename(current_file_path if current_file_path else 'Unknown File')
             file_item = QTreeWidgetItem(self.tree_widget, [file_name])
             file_item.setData(0, Qt.ItemDataRole.UserRole, "file")
@@ -171,12 +214,15 @@ class MainPanel(QWidget):
             for var in dataset.data_vars:
                 var_item = QTreeWidgetItem(data_vars_item, [var])
                 var_item.setData(0, Qt.ItemDataRole.UserRole, "data_variable")
+                if dataset[var].ndim >= 2:
+                    self._request_preview(var_item, current_file_path, var)
                 attrs_item = QTreeWidgetItem(var_item, ["Attributes"])
                 for attr, value in dataset[var].attrs.items():
                     attr_sub_item = QTreeWidgetItem(attrs_item, [f"{attr}: {value}"])
                     attr_sub_item.setData(0, Qt.ItemDataRole.UserRole, "attribute")
                 attrs_item.setExpanded(False)
             data_vars_item.setExpanded(True)
+            self._add_virtual_variables(file_item, current_file_path)
 
             # Global Attributes
             global_attrs_item = QTreeWidgetItem(file_item, ["Global Attributes"])
@@ -187,6 +233,113 @@ class MainPanel(QWidget):
             global_attrs_item.setExpanded(True)
         logger.info("트리 위젯 업데이트 완료.")
 
+    def _build_hdf5_tree(self, file_path, hdf5_file):
+        """
+        HDF5 파일의 최상위 그룹만 트리에 추가합니다. 하위 그룹은 펼칠 때 읽습니다.
+        """
+        file_item = QTreeWidgetItem(self.tree_widget, [os.path.basename(file_path)])
+        file_item.setData(0, Qt.ItemDataRole.UserRole, "file")
+        file_item.setData(0, Qt.ItemDataRole.UserRole + 1, '/')
+        self._add_hdf5_children(file_item, hdf5_file, '/')
+        self._add_virtual_variables(file_item, file_path)
+        file_item.setExpanded(True)
+
+        global_attrs_item = QTreeWidgetItem(file_item, ["Global Attributes"])
+        for attr, value in hdf5_file.attrs.items():
+            attr_sub_item = QTreeWidgetItem(global_attrs_item, [f"{attr}: {value}"])
+            attr_sub_item.setData(0, Qt.ItemDataRole.UserRole, "attribute")
+
+    def _add_hdf5_children(self, parent_item, hdf5_file, group_path):
+        for child in hdf5_file.list_group(group_path):
+            if child['type'] == 'group':
+                child_item = QTreeWidgetItem(parent_item, [child['name']])
+                child_item.setData(0, Qt.ItemDataRole.UserRole, "hdf5_group")
+                # 펼치기 화살표가 보이도록 자리표시 항목을 둡니다.
+                placeholder = QTreeWidgetItem(child_item, ["..."])
+                placeholder.setData(0, Qt.ItemDataRole.UserRole, "placeholder")
+            else:
+                child_item = QTreeWidgetItem(parent_item, [f"{child['name']} {child['shape']}"])
+                child_item.setData(0, Qt.ItemDataRole.UserRole, "hdf5_dataset")
+                if len(child['shape']) >= 2:
+                    self._request_preview(child_item, hdf5_file.filepath, child['path'])
+            child_item.setData(0, Qt.ItemDataRole.UserRole + 1, child['path'])
+
+    def _add_virtual_variables(self, file_item, file_path):
+        """식으로 정의한 파생 변수를 'Derived Variables' 아래에 일반 변수처럼 보여줍니다."""
+        expressions = self.dataset_manager.get_virtual_variables(file_path)
+        if not expressions:
+            return
+        derived_item = QTreeWidgetItem(file_item, ["Derived Variables"])
+        for name, expression in expressions.items():
+            var_item = QTreeWidgetItem(derived_item, [name])
+            var_item.setData(0, Qt.ItemDataRole.UserRole, "virtual_variable")
+            var_item.setToolTip(0, f"{name} = {expression}")
+            if self.dataset_manager.get_variable_dataset(file_path, name)[name].ndim >= 2:
+                self._request_preview(var_item, file_path, name)
+        derived_item.setExpanded(True)
+
+    def define_virtual_variable(self):
+        """이름과 식을 입력받아 현재 파일에 파생 변수를 정의하고 트리에 추가합니다."""
+        file_path = self.dataset_manager.get_current_file_path()
+        if not file_path:
+            QMessageBox.warning(self, "파생 변수", "먼저 파일을 여세요.")
+            return
+        name, ok = QInputDialog.getText(self, "파생 변수 정의", "변수 이름:")
+        if not ok or not name.strip():
+            return
+        expression, ok = QInputDialog.getText(
+            self, "파생 변수 정의",
+            f"'{name.strip()}' 식 (예: sqrt(u**2 + v**2), sst - sst.mean('time'), temp - 273.15):",
+            text=self.dataset_manager.get_virtual_variables(file_path).get(name.strip(), ""))
+        if not ok or not expression.strip():
+            return
+        try:
+            self.dataset_manager.define_virtual_variable(file_path, name.strip(), expression)
+        except ValueError as e:
+            QMessageBox.critical(self, "파생 변수 오류", str(e))
+            logger.warning(f"파생 변수 정의 실패: {name} = {expression}: {e}")
+            return
+        self._update_tree_widget()
+        if self.update_status_bar_callback:
+            self.update_status_bar_callback(f"파생 변수 '{name.strip()}' 정의됨.", 2000)
+
+    def _request_preview(self, item, file_path, var_name):
+        """
+        변수 미리보기(간격을 둔 저해상도 읽기 + 컬러맵 LUT)를 작업자 스레드에서 만들거나 디스크 캐시에서 찾아
+        트리 항목의 아이콘과 툴팁으로 보여줍니다.
+        """
+        if self.settings_manager and not self.settings_manager.get_app_setting('tree_previews', True):
+            return
+        key = (file_path, var_name)
+        self._preview_items[key] = item
+        start_worker(self.preview_cache.get_or_create, self.dataset_manager, file_path, var_name,
+                     on_finished=lambda path, key=key: self._apply_preview(key, path))
+
+    def _apply_preview(self, key, path):
+        item = self._preview_items.pop(key, None)
+        if item is None or path is None:
+            return
+        item.setIcon(0, QIcon(path))
+        image_url = QUrl.fromLocalFile(path).toString()
+        item.setToolTip(0, f"<b>{key[1]}</b><br><img src=\"{image_url}\">")
+
+    def _on_tree_item_expanded(self, item):
+        """HDF5 그룹을 처음 펼칠 때 바로 아래 항목만 읽어 채웁니다."""
+        if item.data(0, Qt.ItemDataRole.UserRole) != "hdf5_group":
+            return
+        if item.childCount() != 1 or item.child(0).data(0, Qt.ItemDataRole.UserRole) != "placeholder":
+            return
+        hdf5_file = self.dataset_manager.get_hdf5(self.dataset_manager.get_current_file_path())
+        if hdf5_file is None:
+            return
+        item.takeChild(0)
+        try:
+            self._add_hdf5_children(item, hdf5_file, item.data(0, Qt.ItemDataRole.UserRole + 1))
+        except Exception as e:
+            logger.error(f"HDF5 그룹 읽기 오류: {e}")
+            if self.update_status_bar_callback:
+                self.update_status_bar_callback(f"HDF5 그룹 읽기 오류: {e}", 5000)
+
     def close_current_file(self):
         """
         현재 로드된 파일을 닫고 트리 위젯을 비웁니다.
@@ -195,6 +348,7 @@ class MainPanel(QWidget):
             current_file_path = self.dataset_manager.get_current_file_path()
             if current_file_path:
                 self.dataset_manager.close_file(current_file_path)
+                self.files_changed.emit()
                 self.tree_widget.clear()
                 self.info_text_edit.clear()
                 if self.update_status_bar_callback:
@@ -215,13 +369,15 @@ class MainPanel(QWidget):
             selected_item = self.tree_widget.currentItem()
             if selected_item:
                 item_type = selected_item.data(0, Qt.ItemDataRole.UserRole)
-                if item_type == "data_variable":
-                    variable_name = selected_item.text(0)
-                    
+                if item_type in ("data_variable", "hdf5_dataset", "virtual_variable"):
+                    if item_type == "hdf5_dataset":
+                        variable_name = selected_item.data(0, Qt.ItemDataRole.UserRole + 1)
+                    else:
+                        variable_name = selected_item.text(0)
+
                     current_file_path = self.dataset_manager.get_current_file_path()
-                    dataset = self.dataset_manager.get_dataset(current_file_path)
 
-                    if dataset and (variable_name in dataset.data_vars or variable_name in dataset.coords):
+                    if current_file_path and self.dataset_manager.has_variable(current_file_path, variable_name):
                         self.plot_handler.create_or_update_plot_window(current_file_path, variable_name) # 파일 경로도 함께 전달
                         if self.update_status_bar_callback:
                             self.update_status_bar_callback(f"'{variable_name}' 플롯 생성 요청.", 2000)
@@ -249,11 +405,315 @@ class MainPanel(QWidget):
 
     def export_data(self):
         """
-        데이터 내보내기 기능을 위한 플레이스홀더 메소드.
-        MainWindow의 export_action에 연결됩니다.
+        현재 선택(활성 플롯 창의 변수와 영역/슬라이스, 없으면 트리에서 선택한 변수 전체)을
+        NetCDF4/Zarr/CSV/Parquet으로 내보냅니다. 블록 단위로 스트리밍하며 상태바에 진행률과 취소 버튼을 표시합니다.
+        """
+        selection = self._current_export_selection()
+        if selection is None:
+            QMessageBox.warning(self, "내보내기 오류", "내보낼 변수를 트리에서 선택하거나 플롯 창을 활성화하세요.")
+            return
+        file_path, variable_name, indexers = selection
+
+        last_dir = self.settings_manager.get_app_setting('last_export_directory', os.path.dirname(file_path))
+        base_name = f"{os.path.splitext(os.path.basename(file_path))[0]}_{variable_name.strip('/').replace('/', '_')}"
+        filters = ";;".join(label for label, _ in EXPORT_FORMATS.values())
+        output_path, selected_filter = QFileDialog.getSaveFileName(self, "데이터 내보내기",
+                                                                   os.path.join(last_dir, base_name), filters)
+        if not output_path:
+            return
+        fmt = next(key for key, (label, _) in EXPORT_FORMATS.items() if label == selected_filter)
+        extension = EXPORT_FORMATS[fmt][1]
+        if not output_path.lower().endswith(extension):
+            output_path += extension
+        self.settings_manager.save_app_setting('last_export_directory', os.path.dirname(output_path))
+
+        main_window = self.window()
+        if hasattr(main_window, 'run_background_task'):
+            main_window.run_background_task(export_subset, self.dataset_manager, file_path, variable_name, indexers,
+                                            output_path, fmt, description="데이터 내보내기")
+        else:
+            export_subset(self.dataset_manager, file_path, variable_name, indexers, output_path, fmt)
+        logger.info(f"MainPanel: 데이터 내보내기 시작 {variable_name} -> {output_path}")
+
+    def compute_climatology(self):
+        """
+        선택한 변수의 달력 구간별 기후값을 파일 시계열(같은 격자의 여러 파일 선택 가능)로 계산해 NetCDF로 저장하고 엽니다.
+        누적값은 디스크에 남으므로 같은 폴더에 새 날짜 파일이 생기면 그 파일만 더해 갱신합니다.
+        """
+        selection = self._current_export_selection()
+        if selection is None:
+            QMessageBox.warning(self, "기후값", "변수를 트리에서 선택하거나 플롯 창을 활성화하세요.")
+            return
+        file_path, variable_name, _ = selection
+        if self.dataset_manager.is_virtual_variable(file_path, variable_name):
+            QMessageBox.warning(self, "기후값", "파생 변수는 여러 파일에 걸친 기후값을 계산할 수 없습니다.")
+            return
+        freq, ok = QInputDialog.getItem(self, "기후값 계산", "달력 구간:", list(CALENDAR_BINS), 0, False)
+        if not ok:
+            return
+        series_files, _ = QFileDialog.getOpenFileNames(
+            self, "기후값 시계열 파일 선택 (취소하면 현재 파일만)", os.path.dirname(file_path),
+            "NetCDF/HDF5 Files (*.nc *.nc4 *.netcdf *.h5 *.hdf5 *.he5);;All Files (*)")
+        series_files = series_files or [file_path]
+        base_name = f"{variable_name.strip('/').replace('/', '_')}_{freq}_climatology.nc"
+        output_path, _ = QFileDialog.getSaveFileName(self, "기후값 저장", os.path.join(os.path.dirname(file_path), base_name),
+                                                     "NetCDF Files (*.nc)")
+        if not output_path:
+            return
+
+        main_window = self.window()
+        if hasattr(main_window, 'run_background_task'):
+            main_window.run_background_task(export_climatology, self.dataset_manager, series_files, variable_name, freq,
+                                            output_path, description="기후값 계산",
+                                            on_finished=self.load_file_into_tree)
+        else:
+            self.load_file_into_tree(export_climatology(self.dataset_manager, series_files, variable_name, freq,
+                                                        output_path))
+        logger.info(f"MainPanel: 기후값 계산 시작 {variable_name} ({freq}, 파일 {len(series_files)}개)")
+
+    def compare_variables(self):
+        """
+        선택한 변수(또는 활성 플롯 창의 변수와 영역/슬라이스)를 다른 열린 파일의 변수와 비교하는 플롯을 엽니다.
+        요약 통계는 정보 패널에 표시됩니다.
+        """
+        selection = self._current_export_selection()
+        if selection is None:
+            QMessageBox.warning(self, "비교 플롯", "비교할 변수를 트리에서 선택하거나 플롯 창을 활성화하세요.")
+            return
+        file_path, variable_name, _ = selection
+        active_window = self.plot_manager.get_active_plot_window() if self.plot_manager else None
+        options = dict(active_window.options) if active_window is not None and \
+            active_window.file_path == file_path and active_window.variable_name == variable_name else {}
+
+        files = self.dataset_manager.get_file_list()
+        labels = [f"{os.path.basename(path)} ({os.path.dirname(path)})" for path in files]
+        default = next((i for i, path in enumerate(files) if path != file_path), 0)
+        label, ok = QInputDialog.getItem(self, "비교 플롯", f"A: {variable_name}\nB 파일:", labels, default, False)
+        if not ok:
+            return
+        other_file_path = files[labels.index(label)]
+        other_variable, ok = QInputDialog.getText(self, "비교 플롯", "B 변수:", text=variable_name)
+        if not ok or not other_variable.strip():
+            return
+        other_variable = other_variable.strip()
+        if not self.dataset_manager.has_variable(other_file_path, other_variable):
+            QMessageBox.warning(self, "비교 플롯", f"B 파일에 변수 '{other_variable}'가 없습니다.")
+            return
+        mode_label, ok = QInputDialog.getItem(self, "비교 플롯", "비교 방식:", list(COMPARE_MODES.values()), 0, False)
+        if not ok:
+            return
+        mode = next(key for key, value in COMPARE_MODES.items() if value == mode_label)
+        try:
+            self.plot_manager.open_comparison_window(self.dataset_manager, file_path, variable_name, other_file_path,
+                                                     other_variable, mode, options, self.update_status_bar_callback)
+        except ValueError as e:
+            QMessageBox.critical(self, "비교 플롯 오류", str(e))
+            logger.warning(f"비교 플롯 실패: {variable_name} vs {other_variable}: {e}")
+
+    def compute_time_statistics(self):
+        """
+        선택한 변수의 시간 축 통계(평균, 표준편차, 최솟값/최댓값, 유효값 개수)를 파일 시계열 전체로 계산해
+        NetCDF로 저장하고 엽니다. 블록 축소는 계산 백엔드(기본: 프로세스 풀)에서 실행됩니다.
+        """
+        selection = self._current_export_selection()
+        if selection is None:
+            QMessageBox.warning(self, "시간 통계", "변수를 트리에서 선택하거나 플롯 창을 활성화하세요.")
+            return
+        file_path, variable_name, _ = selection
+        if self.dataset_manager.is_virtual_variable(file_path, variable_name):
+            QMessageBox.warning(self, "시간 통계", "파생 변수는 여러 파일에 걸친 통계를 계산할 수 없습니다.")
+            return
+        series_files, _ = QFileDialog.getOpenFileNames(
+            self, "시간 통계 시계열 파일 선택 (취소하면 현재 파일만)", os.path.dirname(file_path),
+            "NetCDF/HDF5 Files (*.nc *.nc4 *.netcdf *.h5 *.hdf5 *.he5);;All Files (*)")
+        series_files = sorted(series_files) or [file_path]
+        try:
+            series = self.dataset_manager.get_series_time_index(series_files, variable_name)
+        except (ValueError, KeyError) as e:
+            QMessageBox.warning(self, "시간 통계", f"시간 축을 읽을 수 없습니다: {e}")
+            return
+        span = f"{self._format_date(series.start)} ~ {self._format_date(series.end)}"
+        text, ok = QInputDialog.getText(self, "시간 통계", f"시간 범위 (시작 ~ 끝, 전체: {span}):", text=span)
+        if not ok:
+            return
+        time_range = [part.strip() for part in text.split('~')] if text.strip() and text.strip() != span else None
+        if time_range is not None and len(time_range) != 2:
+            QMessageBox.warning(self, "시간 통계", "시간 범위는 '2001-01 ~ 2003-12'처럼 입력하세요.")
+            return
+        base_name = f"{variable_name.strip('/').replace('/', '_')}_time_statistics.nc"
+        output_path, _ = QFileDialog.getSaveFileName(self, "시간 통계 저장",
+                                                     os.path.join(os.path.dirname(file_path), base_name),
+                                                     "NetCDF Files (*.nc)")
+        if not output_path:
+            return
+
+        statistics = list(TIME_STATISTICS)
+        main_window = self.window()
+        if hasattr(main_window, 'run_background_task'):
+            main_window.run_background_task(export_time_statistics, self.dataset_manager, series_files, variable_name,
+                                            statistics, output_path, time_range, description="시간 통계 계산",
+                                            on_finished=self.load_file_into_tree)
+        else:
+            self.load_file_into_tree(export_time_statistics(self.dataset_manager, series_files, variable_name,
+                                                            statistics, output_path, time_range))
+        logger.info(f"MainPanel: 시간 통계 계산 시작 {variable_name} (파일 {len(series_files)}개)")
+
+    @staticmethod
+    def _format_date(value):
+        return str(np.datetime_as_string(value, unit='m')).replace('T', ' ') if value is not None else '-'
+
+    def open_hovmoller_plot(self):
         """
-        QMessageBox.information(self, "기능 미구현", "데이터 내보내기 기능은 아직 구현되지 않았습니다.")
-        logger.info("MainPanel: 데이터 내보내기 기능 호출 (미구현).")
+        선택한 변수(또는 활성 플롯 창의 변수와 영역/시간 범위)로 Hovmöller 플롯을 엽니다.
+        줄인 배열은 백그라운드에서 시간 청크 단위로 계산해 캐시에 올린 뒤 창을 엽니다.
+        """
+        selection = self._current_export_selection()
+        if selection is None:
+            QMessageBox.warning(self, "Hovmöller 플롯", "변수를 트리에서 선택하거나 플롯 창을 활성화하세요.")
+            return
+        file_path, variable_name, _ = selection
+        active_window = self.plot_manager.get_active_plot_window() if self.plot_manager else None
+        options = dict(active_window.options) if active_window is not None and \
+            active_window.file_path == file_path and active_window.variable_name == variable_name else {}
+        options.pop('title', None)
+
+        axis_labels = {'lon': "시간 × 경도 (위도 방향으로 줄임)", 'lat': "시간 × 위도 (경도 방향으로 줄임)"}
+        axis_label, ok = QInputDialog.getItem(self, "Hovmöller 플롯", "가로축:", list(axis_labels.values()), 0, False)
+        if not ok:
+            return
+        axis = next(key for key, value in axis_labels.items() if value == axis_label)
+        reduced = HOVMOLLER_AXES[axis]
+        reduce_labels = {'mean': f"선택 범위 {reduced} 평균", 'select': f"한 {reduced} 좌표 선택"}
+        reduce_label, ok = QInputDialog.getItem(self, "Hovmöller 플롯", "줄이는 방식:", list(reduce_labels.values()),
+                                                0, False)
+        if not ok:
+            return
+        reduce = next(key for key, value in reduce_labels.items() if value == reduce_label)
+        at = None
+        if reduce == 'select':
+            at, ok = QInputDialog.getDouble(self, "Hovmöller 플롯", f"{reduced} 좌표:", 0.0, -360.0, 360.0, 3)
+            if not ok:
+                return
+        options['hovmoller'] = {'axis': axis, 'reduce': reduce, 'at': at}
+
+        def open_window(_result=None):
+            try:
+                self.plot_manager.open_hovmoller_window(self.dataset_manager, file_path, variable_name, axis, reduce,
+                                                        at, options, self.update_status_bar_callback)
+            except ValueError as e:
+                QMessageBox.critical(self, "Hovmöller 플롯 오류", str(e))
+                logger.warning(f"Hovmöller 플롯 실패: {variable_name}: {e}")
+
+        try:
+            indexers = self.dataset_manager.resolve_hovmoller_indexers(file_path, variable_name, options)
+        except ValueError as e:
+            QMessageBox.critical(self, "Hovmöller 플롯 오류", str(e))
+            return
+        main_window = self.window()
+        if hasattr(main_window, 'run_background_task'):
+            main_window.run_background_task(self.dataset_manager.read_hovmoller, file_path, variable_name, indexers,
+                                            axis, reduce, description="Hovmöller 계산", on_finished=open_window)
+        else:
+            open_window()
+        logger.info(f"MainPanel: Hovmöller 계산 시작 {variable_name} (시간 × {axis}, {reduce})")
+
+    def analyze_spectrum(self):
+        """
+        선택한 변수의 스펙트럼 분석을 엽니다. 주파수 차원이 있는 스펙트럼 변수는 방향 스펙트럼 극좌표,
+        파일(들)의 적분 모수(Hs/Tp/파향) 시계열, Hs 기준 폭풍 구간 탐색을, 1차원 시계열은 Welch 파워 스펙트럼을 제공합니다.
+        """
+        selection = self._current_export_selection()
+        if selection is None:
+            QMessageBox.warning(self, "스펙트럼 분석", "변수를 트리에서 선택하거나 플롯 창을 활성화하세요.")
+            return
+        file_path, variable_name, _ = selection
+        active_window = self.plot_manager.get_active_plot_window() if self.plot_manager else None
+        options = dict(active_window.options) if active_window is not None and \
+            active_window.file_path == file_path and active_window.variable_name == variable_name else {}
+        options.pop('title', None)
+        dataset = self.dataset_manager.get_variable_dataset(file_path, variable_name)
+        try:
+            _freq_dim, dir_dim = spectral_dims(dataset, variable_name)
+        except ValueError:
+            # 스펙트럼 변수가 아니면 1차원 시계열의 파워 스펙트럼만 계산합니다.
+            self._open_spectrum(file_path, variable_name, 'psd', options=options)
+            return
+
+        choices = {'bulk': "적분 모수 시계열 (Hs/Tp/파향)", 'storms': "폭풍 구간 탐색 (Hs 기준)"}
+        if dir_dim is not None:
+            choices = {'polar': "방향 스펙트럼 (극좌표)", **choices}
+        label, ok = QInputDialog.getItem(self, "스펙트럼 분석", "분석:", list(choices.values()), 0, False)
+        if not ok:
+            return
+        kind = next(key for key, value in choices.items() if value == label)
+        if kind == 'polar':
+            self._open_spectrum(file_path, variable_name, 'polar', options=options)
+            return
+
+        series_files, _ = QFileDialog.getOpenFileNames(
+            self, "스펙트럼 파일 선택 (취소하면 현재 파일만)", os.path.dirname(file_path),
+            "NetCDF/HDF5 Files (*.nc *.nc4 *.netcdf *.h5 *.hdf5 *.he5);;All Files (*)")
+        series_files = sorted(series_files) or [file_path]
+        if kind == 'bulk':
+            parameters = {key: value for key, value in BULK_PARAMETERS.items()
+                          if dir_dim is not None or key not in ('dirm', 'dp')}
+            label, ok = QInputDialog.getItem(self, "스펙트럼 분석", "적분 모수:", list(parameters.values()), 0, False)
+            if not ok:
+                return
+            parameter = next(key for key, value in parameters.items() if value == label)
+            on_finished = lambda _bulk: self._open_spectrum(file_path, variable_name, 'bulk', parameter, series_files,
+                                                           options)
+        else:
+            threshold, ok = QInputDialog.getDouble(self, "폭풍 구간 탐색", "Hs 기준 (m):", 3.0, 0.0, 30.0, 2)
+            if not ok:
+                return
+            on_finished = lambda bulk: self._show_storms(bulk, threshold, series_files)
+
+        main_window = self.window()
+        if hasattr(main_window, 'run_background_task'):
+            main_window.run_background_task(self.dataset_manager.spectral.bulk_series, series_files, variable_name,
+                                            description="스펙트럼 분석", on_finished=on_finished)
+        else:
+            on_finished(self.dataset_manager.spectral.bulk_series(series_files, variable_name))
+        logger.info(f"MainPanel: 스펙트럼 분석 시작 {variable_name} ({kind}, 파일 {len(series_files)}개)")
+
+    def _open_spectrum(self, file_path, variable_name, kind, parameter='hs', series_files=None, options=None):
+        try:
+            self.plot_manager.open_spectrum_window(self.dataset_manager, file_path, variable_name, kind, parameter,
+                                                   series_files, options, self.update_status_bar_callback)
+        except ValueError as e:
+            QMessageBox.critical(self, "스펙트럼 분석 오류", str(e))
+            logger.warning(f"스펙트럼 분석 실패: {variable_name} ({kind}): {e}")
+
+    def _show_storms(self, bulk, threshold, series_files):
+        """적분 모수에서 Hs가 기준을 넘는 구간을 찾아 정보 패널에 표시합니다 (지점이 여럿이면 지점별 최대값 기준)."""
+        hs = bulk['hs']
+        record_dim = bulk.attrs.get('record_dim') or hs.dims[0]
+        others = [dim for dim in hs.dims if dim != record_dim]
+        if others:
+            hs = hs.max(dim=others)
+        self.show_info(format_storm_summary(storm_events(hs, threshold), threshold, series_files))
+
+    def show_info(self, text):
+        """정보 패널에 텍스트를 표시합니다 (비교 요약 통계 등)."""
+        self.info_text_edit.setText(text)
+
+    def _current_export_selection(self):
+        """(파일 경로, 변수 이름, isel 인덱서)를 반환합니다. 플롯 창이 활성화되어 있으면 그 창의 선택을 씁니다."""
+        active_window = self.plot_manager.get_active_plot_window() if self.plot_manager else None
+        if active_window is not None and hasattr(active_window, 'get_current_indexers'):
+            return active_window.file_path, active_window.variable_name, active_window.get_current_indexers()
+
+        selected_item = self.tree_widget.currentItem()
+        file_path = self.dataset_manager.get_current_file_path()
+        if selected_item is None or not file_path:
+            return None
+        item_type = selected_item.data(0, Qt.ItemDataRole.UserRole)
+        if item_type == "hdf5_dataset":
+            return file_path, selected_item.data(0, Qt.ItemDataRole.UserRole + 1), {}
+        if item_type in ("data_variable", "coordinate", "virtual_variable"):
+            return file_path, selected_item.text(0), {}
+        return None
 
     def refresh_plot(self):
         """
@@ -5,10 +5,11 @@ import os
 import json
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QSplitter, QTreeWidget, QTreeWidgetItem, QTextEdit,
-    QFileDialog, QMenu, QStatusBar, QWidget, QHBoxLayout, QMessageBox, QStyleFactory
+    QFileDialog, QMenu, QStatusBar, QWidget, QHBoxLayout, QMessageBox, QStyleFactory,
+    QProgressBar, QPushButton, QDialog
 )
 from PyQt6.QtGui import QAction, QIcon
-from PyQt6.QtCore import Qt, QPoint, QSize
+from PyQt6.QtCore import Qt, QPoint, QSize, QByteArray, QTimer
 
 # 중요: PlotWindowManager, DatasetManager, PlotHandler, SettingsManager, MainPanel
 #       등의 클래스들이 각각의 파일에서 올바르게 임포트되었는지 확인하세요.
@@ -19,6 +20,12 @@ from .dataset_manager import DatasetManager
 from .handlers.plot_handler import PlotHandler
 from .settings_manager import SettingsManager
 from .main_panel import MainPanel
+from .workers import start_worker
+from .batch_export import build_job, run_batch_export
+from .batch_export_dialog import BatchExportDialog
+from .session_manager import SessionManager
+from .compute_backend import create_backend
+from .file_watch import FileWatcher, hdf5_file_locking_disabled
 
 setup_logger()
 logger = logging.getLogger(__name__) # MainWindow 클래스 내에서 로깅 사용
@@ -33,15 +40,28 @@ def icon(filename):
     return QIcon(path) if os.path.exists(path) else QIcon()
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, settings_manager=None):
         super().__init__()
         self.setWindowTitle("OceanoCal NetCDF Viewer")
         self.setWindowIcon(icon('app_icon.png'))
 
-        self.settings_manager = SettingsManager(SETTINGS_PATH) 
-        self.dataset_manager = DatasetManager(status_callback=self.update_status_bar)
+        self.settings_manager = settings_manager or SettingsManager(SETTINGS_PATH)
+        cache_max_mb = self.settings_manager.get_app_setting('slice_cache_max_mb', 512)
+        compute_backend = create_backend(self.settings_manager.get_app_setting('compute_backend', 'process'),
+                                         int(self.settings_manager.get_app_setting('compute_workers', 0)) or None)
+        self.dataset_manager = DatasetManager(status_callback=self.update_status_bar,
+                                              cache_max_bytes=int(cache_max_mb) * 1024 * 1024,
+                                              compute_backend=compute_backend)
+        worker_read_mb = int(self.settings_manager.get_app_setting('worker_read_min_mb', 0))
+        self.dataset_manager.worker_read_min_bytes = worker_read_mb * 1024 * 1024 if worker_read_mb > 0 else None
         self.plot_manager = PlotWindowManager(self, self.settings_manager, status_callback=self.update_status_bar) # PlotWindowManager 초기화
         self.plot_handler = PlotHandler(self, self.dataset_manager, self.plot_manager, self.settings_manager) # PlotHandler 초기화
+        self.session_manager = SessionManager(self.dataset_manager, self.plot_manager)
+        # 열린 파일에 레코드가 덧붙으면(실시간 관측 파일) 새 레코드만 읽어 플롯 창을 연장합니다.
+        self.file_watcher = FileWatcher(self.dataset_manager, status_callback=self.update_status_bar, parent=self)
+        self.file_watcher.enabled = bool(self.settings_manager.get_app_setting('watch_files', True))
+        self.file_watcher.file_appended.connect(self.plot_manager.on_file_appended)
+        self.file_watcher.file_changed.connect(self.plot_manager.on_file_changed)
 
         self._apply_dark_theme()
         self._load_window_state() 
@@ -52,6 +72,10 @@ class MainWindow(QMainWindow):
         self._create_toolbars()
         self._create_status_bar()
 
+        if self.settings_manager.get_app_setting('restore_session', True):
+            # 메인 창이 먼저 그려지도록 이벤트 루프가 돈 뒤에 복원합니다.
+            QTimer.singleShot(0, self._restore_session)
+
         logger.info("MainWindow 초기화 완료.")
 
     def _setup_ui(self):
@@ -61,6 +85,7 @@ class MainWindow(QMainWindow):
                                     plot_manager=self.plot_manager,
                                     settings_manager=self.settings_manager,
                                     update_status_bar_callback=self.update_status_bar)
+        self.main_panel.files_changed.connect(self.file_watcher.sync)
         self.setCentralWidget(self.main_panel)
         logger.info("MainPanel 설정 완료.")
 
@@ -76,6 +101,22 @@ class MainWindow(QMainWindow):
         self.close_action.setStatusTip("현재 파일을 닫습니다.")
         self.close_action.triggered.connect(self.main_panel.close_current_file)
 
+        self.export_data_action = QAction(icon('export.png'), "데이터 내보내기...", self)
+        self.export_data_action.setStatusTip("선택한 변수의 현재 영역/슬라이스를 NetCDF4, Zarr, CSV, Parquet으로 내보냅니다.")
+        self.export_data_action.triggered.connect(self.main_panel.export_data)
+
+        self.define_variable_action = QAction(icon('tune.png'), "파생 변수 정의...", self)
+        self.define_variable_action.setStatusTip("현재 파일의 변수로 이루어진 식(예: sqrt(u**2 + v**2))을 새 변수로 정의합니다.")
+        self.define_variable_action.triggered.connect(self.main_panel.define_virtual_variable)
+
+        self.climatology_action = QAction(icon('chart.png'), "기후값 계산...", self)
+        self.climatology_action.setStatusTip("선택한 변수의 월/계절/연중일 기후값을 파일 시계열로 누적 계산합니다.")
+        self.climatology_action.triggered.connect(self.main_panel.compute_climatology)
+
+        self.time_stats_action = QAction(icon('chart.png'), "시간 통계...", self)
+        self.time_stats_action.setStatusTip("선택한 변수의 여러 파일에 걸친 시간 평균/표준편차/최솟값/최댓값 지도를 병렬로 계산합니다.")
+        self.time_stats_action.triggered.connect(self.main_panel.compute_time_statistics)
+
         self.exit_action = QAction(icon('exit.png'), "&종료", self)
         self.exit_action.setShortcut("Ctrl+Q")
         self.exit_action.setStatusTip("애플리케이션을 종료합니다.")
@@ -107,6 +148,37 @@ class MainWindow(QMainWindow):
         self.export_plot_action.setStatusTip("현재 활성화된 플롯을 이미지로 내보냅니다.")
         self.export_plot_action.triggered.connect(self.plot_manager.export_current_plot) # plot_manager에 연결
 
+        self.batch_export_action = QAction(icon('export.png'), "일괄 내보내기...", self)
+        self.batch_export_action.setStatusTip("변수의 시간/깊이 슬라이스를 PNG 프레임과 MP4/GIF 애니메이션으로 내보냅니다.")
+        self.batch_export_action.triggered.connect(self.show_batch_export_dialog)
+
+        self.compare_plot_action = QAction(icon('chart.png'), "비교 플롯...", self)
+        self.compare_plot_action.setStatusTip("두 파일의 같은 변수로 A−B, A/B, RMSE 지도를 만들고 요약 통계를 표시합니다.")
+        self.compare_plot_action.triggered.connect(self.main_panel.compare_variables)
+
+        self.hovmoller_plot_action = QAction(icon('chart.png'), "Hovmöller 플롯...", self)
+        self.hovmoller_plot_action.setStatusTip("시간 × 경도/위도 Hovmöller 도표를 시간 청크 단위로 계산해 엽니다.")
+        self.hovmoller_plot_action.triggered.connect(self.main_panel.open_hovmoller_plot)
+
+        self.spectrum_action = QAction(icon('chart.png'), "스펙트럼 분석...", self)
+        self.spectrum_action.setStatusTip("파랑 스펙트럼의 방향 스펙트럼, Hs/Tp/파향, 폭풍 구간 또는 시계열의 파워 스펙트럼을 계산합니다.")
+        self.spectrum_action.triggered.connect(self.main_panel.analyze_spectrum)
+
+        self.link_plots_action = QAction(icon('chart.png'), "플롯 창 연결", self)
+        self.link_plots_action.setStatusTip("열린 플롯 창들이 시간/깊이 슬라이스와 확대 범위를 공유하도록 연결하고 나란히 배치합니다.")
+        self.link_plots_action.triggered.connect(self.plot_manager.link_all_windows)
+
+        self.unlink_plots_action = QAction(icon('close.png'), "플롯 창 연결 해제", self)
+        self.unlink_plots_action.setStatusTip("플롯 창 사이의 슬라이스/확대 범위 공유를 끊습니다.")
+        self.unlink_plots_action.triggered.connect(self.plot_manager.unlink_all_windows)
+
+        self.watch_files_action = QAction("파일 변경 감시", self)
+        self.watch_files_action.setCheckable(True)
+        self.watch_files_action.setChecked(self.file_watcher.enabled)
+        self.watch_files_action.setStatusTip("열린 파일에 덧붙는 레코드를 감지해 열린 플롯을 자동으로 연장합니다. "
+                                             "netCDF4/HDF5 파일은 시작할 때 감시가 켜져 있어야 기록기가 파일을 함께 열 수 있습니다.")
+        self.watch_files_action.toggled.connect(self._set_file_watching)
+
         self.close_all_plots_action = QAction(icon('close_all.png'), "모든 플롯 닫기", self)
         self.close_all_plots_action.setStatusTip("모든 플롯 창을 닫습니다.")
         self.close_all_plots_action.triggered.connect(self.plot_manager.close_all_plot_windows) # plot_manager에 연결
@@ -116,6 +188,10 @@ class MainWindow(QMainWindow):
         self.about_action.setStatusTip("OceanoCal 정보 표시")
         self.about_action.triggered.connect(self.show_about_dialog)
 
+        self.diagnostics_action = QAction(icon('info.png'), "캐시 진단", self)
+        self.diagnostics_action.setStatusTip("슬라이스 캐시 적중률과 청크 캐시 설정(추정 효율)을 표시합니다.")
+        self.diagnostics_action.triggered.connect(self.show_diagnostics_dialog)
+
         logger.info("액션 생성 완료.")
 
     def _create_menus(self):
@@ -124,6 +200,10 @@ class MainWindow(QMainWindow):
         file_menu = menu_bar.addMenu("&파일")
         file_menu.addAction(self.open_action)
         file_menu.addAction(self.close_action)
+        file_menu.addAction(self.export_data_action)
+        file_menu.addAction(self.define_variable_action)
+        file_menu.addAction(self.climatology_action)
+        file_menu.addAction(self.time_stats_action)
         file_menu.addSeparator()
         file_menu.addAction(self.exit_action)
 
@@ -135,11 +215,19 @@ class MainWindow(QMainWindow):
         plot_menu.addAction(self.refresh_plot_action)
         plot_menu.addAction(self.plot_options_action)
         plot_menu.addAction(self.export_plot_action)
+        plot_menu.addAction(self.batch_export_action)
+        plot_menu.addAction(self.compare_plot_action)
+        plot_menu.addAction(self.hovmoller_plot_action)
+        plot_menu.addAction(self.spectrum_action)
         plot_menu.addSeparator()
+        plot_menu.addAction(self.link_plots_action)
+        plot_menu.addAction(self.unlink_plots_action)
+        plot_menu.addAction(self.watch_files_action)
         plot_menu.addAction(self.close_all_plots_action)
 
         help_menu = menu_bar.addMenu("&도움말")
         help_menu.addAction(self.about_action)
+        help_menu.addAction(self.diagnostics_action)
 
         logger.info("메뉴 생성 완료.")
 
@@ -163,6 +251,19 @@ class MainWindow(QMainWindow):
         self.statusBar = QStatusBar()
         self.setStatusBar(self.statusBar)
         self.statusBar.showMessage("준비", 2000)
+
+        # 백그라운드 작업(내보내기 등) 진행률과 취소 버튼
+        self.task_progress = QProgressBar()
+        self.task_progress.setRange(0, 100)
+        self.task_progress.setMaximumWidth(200)
+        self.task_progress.hide()
+        self.task_cancel_button = QPushButton("취소")
+        self.task_cancel_button.clicked.connect(self._cancel_background_task)
+        self.task_cancel_button.hide()
+        self.statusBar.addPermanentWidget(self.task_progress)
+        self.statusBar.addPermanentWidget(self.task_cancel_button)
+        self._background_worker = None
+        self._background_description = ""
         logger.info("상태바 생성 완료.")
 
     def update_status_bar(self, message, timeout=0):
@@ -173,13 +274,101 @@ class MainWindow(QMainWindow):
         else:
             logger.warning(f"상태바가 초기화되지 않았습니다. 메시지: {message}")
 
+    def run_background_task(self, fn, *args, description="작업", on_finished=None, **kwargs):
+        """
+        진행률/취소를 지원하는 함수(progress_callback, cancel_event 키워드 인자)를 백그라운드에서 실행하고
+        상태바에 진행률 막대와 취소 버튼을 표시합니다. 한 번에 하나의 작업만 실행합니다.
+        """
+        if self._background_worker is not None:
+            QMessageBox.information(self, description, f"'{self._background_description}' 작업이 아직 실행 중입니다.")
+            return None
+
+        def finished(result):
+            self._end_background_task()
+            self.update_status_bar(f"{description} 완료.", 5000)
+            logger.info(f"{description} 완료.")
+            if on_finished:
+                on_finished(result)
+
+        def failed(message):
+            cancelled = worker.cancel_event.is_set()
+            self._end_background_task()
+            if cancelled:
+                self.update_status_bar(f"{description} 취소됨.", 5000)
+                logger.info(f"{description} 취소됨.")
+            else:
+                self.update_status_bar(f"{description} 오류: {message}", 5000)
+                QMessageBox.critical(self, f"{description} 오류", message)
+
+        self.task_progress.setValue(0)
+        self.task_progress.show()
+        self.task_cancel_button.setEnabled(True)
+        self.task_cancel_button.show()
+        self._background_description = description
+        worker = start_worker(fn, *args, on_finished=finished, on_error=failed, on_progress=self._on_task_progress,
+                              report_progress=True, **kwargs)
+        self._background_worker = worker
+        self.update_status_bar(f"{description} 시작...")
+        return worker
+
+    def _on_task_progress(self, percent, message):
+        self.task_progress.setValue(percent)
+        if message:
+            self.statusBar.showMessage(message)
+
+    def _cancel_background_task(self):
+        if self._background_worker is not None:
+            self._background_worker.cancel()
+            self.task_cancel_button.setEnabled(False)
+            self.update_status_bar(f"{self._background_description} 취소 중...")
+
+    def _end_background_task(self):
+        self._background_worker = None
+        self.task_progress.hide()
+        self.task_cancel_button.hide()
+
+    def show_batch_export_dialog(self):
+        if not self.dataset_manager.get_file_list():
+            QMessageBox.information(self, "일괄 내보내기", "먼저 파일을 여세요.")
+            return
+        active_window = self.plot_manager.get_active_plot_window()
+        default_selection = None
+        plot_options = {}
+        if active_window is not None and hasattr(active_window, 'variable_name'):
+            default_selection = (active_window.file_path, active_window.variable_name)
+            plot_options = active_window.get_current_plot_options()
+
+        dialog = BatchExportDialog(self.dataset_manager, self.settings_manager, default_selection, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        settings = dialog.get_export_settings()
+        try:
+            # 현재 플롯 창의 변수는 그 창의 영역/색 범위/제목 옵션을 그대로 사용합니다.
+            jobs = [build_job(self.dataset_manager, filepath, var_name, settings['frame_dim'],
+                              plot_options if (filepath, var_name) == default_selection else {},
+                              settings['output_dir'])
+                    for filepath, var_name in settings['variables']]
+        except Exception as e:
+            QMessageBox.critical(self, "일괄 내보내기 오류", f"내보내기 작업을 준비할 수 없습니다: {e}")
+            logger.error(f"일괄 내보내기 준비 오류: {e}", exc_info=True)
+            return
+
+        def show_outputs(outputs):
+            QMessageBox.information(self, "일괄 내보내기", "다음 항목을 만들었습니다:\n" + "\n".join(outputs))
+
+        self.run_background_task(run_batch_export, jobs, description="일괄 내보내기", on_finished=show_outputs,
+                                 formats=settings['formats'], fps=settings['fps'],
+                                 max_workers=settings['max_workers'], dpi=settings['dpi'],
+                                 dataset_manager=self.dataset_manager)
+
     def _open_file_dialog(self):
         # settings_manager에서 마지막으로 열었던 디렉토리를 가져옵니다.
         # 변경: get_setting -> get_app_setting
         last_dir = self.settings_manager.get_app_setting('last_opened_directory', os.path.expanduser('~'))
         
         filepath, _ = QFileDialog.getOpenFileName(self, "NetCDF 파일 열기", last_dir,
-                                                  "NetCDF 파일 (*.nc *.nc4);;모든 파일 (*.*)")
+                                                  "NetCDF/HDF 파일 (*.nc *.nc4 *.h5 *.hdf5 *.he5);;NetCDF 파일 (*.nc *.nc4);;"
+                                                  "HDF5 파일 (*.h5 *.hdf5 *.he5);;모든 파일 (*.*)")
         if filepath:
             self.dataset_manager.current_file_path = filepath # DatasetManager에 현재 파일 경로 설정
             self.main_panel.load_file_into_tree(filepath)
@@ -190,6 +379,30 @@ class MainWindow(QMainWindow):
         else:
             logger.info("파일 열기 취소됨.")
 
+    def _restore_session(self):
+        """
+        이전 세션의 파일을 다시 열고(파생 변수 포함) 플롯 창을 썸네일로 띄운 뒤,
+        실제 플롯은 PlotWindowManager가 백그라운드에서 하나씩 다시 그립니다.
+        썸네일이 없는 창은 만들 때 바로 그려지므로 파일을 먼저 열어 두어야 합니다.
+        """
+        session = self.session_manager.load()
+        if not session:
+            return
+        opened = self.session_manager.restore_files(session, self.dataset_manager.open_file)
+        windows = self.session_manager.restore_plot_windows(session, self.update_status_bar)
+        if opened:
+            self.main_panel.refresh_tree()
+        self.plot_manager.rehydrate_pending(windows)
+        self.update_status_bar(f"세션 복원: 파일 {len(opened)}개, 플롯 창 {len(windows)}개", 3000)
+        logger.info(f"세션 복원: 파일 {len(opened)}개, 플롯 창 {len(windows)}개")
+
+    def _set_file_watching(self, enabled):
+        self.file_watcher.set_enabled(enabled)
+        self.settings_manager.save_app_setting('watch_files', bool(enabled))
+        if enabled and not hdf5_file_locking_disabled():
+            # HDF5 파일 잠금은 시작할 때만 정해지므로 지금 켜면 netCDF4/HDF5 파일의 기록기가 막힐 수 있습니다.
+            self.update_status_bar("netCDF4/HDF5 파일을 함께 기록하려면 프로그램을 다시 시작하세요 (HDF5 파일 잠금).", 5000)
+
     def _load_window_state(self):
         # 변경: load_settings -> load_app_settings
         settings = self.settings_manager.load_app_settings()
@@ -197,9 +410,10 @@ class MainWindow(QMainWindow):
         if settings is None:
             settings = {}
         
-        if 'window_geometry' in settings and 'window_state' in settings:
-            self.restoreGeometry(settings['window_geometry'])
-            self.restoreState(settings['window_state'])
+        if isinstance(settings.get('window_geometry'), str) and isinstance(settings.get('window_state'), str):
+            # JSON에 저장할 수 있도록 base64 문자열로 보관합니다.
+            self.restoreGeometry(QByteArray.fromBase64(settings['window_geometry'].encode('ascii')))
+            self.restoreState(QByteArray.fromBase64(settings['window_state'].encode('ascii')))
             logger.info("이전 윈도우 상태 로드됨.")
         else:
             self.resize(1000, 700) # 기본 크기 설정
@@ -213,8 +427,8 @@ class MainWindow(QMainWindow):
         if settings is None:
             settings = {}
 
-        settings['window_geometry'] = self.saveGeometry()
-        settings['window_state'] = self.saveState()
+        settings['window_geometry'] = bytes(self.saveGeometry().toBase64()).decode('ascii')
+        settings['window_state'] = bytes(self.saveState().toBase64()).decode('ascii')
         # 변경: save_settings -> save_app_settings
         self.settings_manager.save_app_settings(settings)
         logger.info("현재 윈도우 상태 저장됨.")
@@ -358,6 +572,31 @@ class MainWindow(QMainWindow):
                           "<p>NetCDF 파일을 탐색하고 플롯하기 위한 도구입니다.</p>")
         logger.info("정보 다이얼로그 표시.")
 
+    def show_diagnostics_dialog(self):
+        diagnostics = self.dataset_manager.get_diagnostics()
+        slice_stats = diagnostics["slice_cache"]
+        lines = [
+            "--- 슬라이스 캐시 ---",
+            f"항목: {slice_stats['entries']}, 사용량: {slice_stats['bytes'] / 1024 / 1024:.1f} / "
+            f"{slice_stats['max_bytes'] / 1024 / 1024:.0f} MB",
+            f"적중: {slice_stats['hits']}, 실패: {slice_stats['misses']}, 제거: {slice_stats['evictions']}, "
+            f"적중률: {slice_stats['hit_ratio']:.1%}",
+            "",
+            "--- 청크 캐시 (변수별) ---",
+            "조정한 캐시 합계: {:.1f} / {:.0f} MB".format(*(n / 1024 / 1024 for n in diagnostics["chunk_cache_total"])),
+            "추정 효율 = 요청 바이트 / 압축 해제 바이트 (읽기 모양으로 계산한 값, 측정한 적중률 아님)",
+        ]
+        for name, report in diagnostics["chunk_cache"].items():
+            cache_mb = f"{report['cache_bytes'] / 1024 / 1024:.1f} MB" if report['cache_bytes'] else "기본값"
+            efficiency = (f"{report['estimated_efficiency']:.1%}" if report['estimated_efficiency'] is not None
+                          else "N/A")
+            lines.append(f"{name}: 캐시 {cache_mb}, preemption={report['preemption']}, 읽기 {report['reads']}회 "
+                         f"{report['patterns']}, 추정 효율 {efficiency}")
+        if not diagnostics["chunk_cache"]:
+            lines.append("청크 저장 변수를 아직 읽지 않았습니다.")
+        QMessageBox.information(self, "캐시 진단", "\n".join(lines))
+        logger.info("캐시 진단 표시.")
+
     def show_settings_dialog(self):
         """
         설정 다이얼로그를 표시합니다.
@@ -369,8 +608,13 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         # 윈도우 상태 저장
         self._save_window_state()
+        # 열린 파일과 플롯 창(썸네일 포함)을 다음 실행에서 복원할 수 있도록 저장
+        self.session_manager.save()
         # 모든 플롯 창 닫기
         if self.plot_manager:
             self.plot_manager.close_all_plot_windows()
+        # 예약된 설정 저장을 기다리지 않고 바로 씁니다.
+        self.settings_manager.flush()
+        self.dataset_manager.compute_backend.shutdown()
         event.accept()
         logger.info("애플리케이션 종료.")
\ No newline at end of file
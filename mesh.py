@@ -0,0 +1,170 @@
+# oceanocal_v2/mesh.py
+
+import logging
+
+import numpy as np
+from matplotlib.tri import Triangulation
+
+from .subset import find_2d_coord, LAT_NAMES, LON_NAMES
+
+logger = logging.getLogger(__name__)
+
+FVCOM_CONNECTIVITY = 'nv' # FVCOM 삼각형 꼭짓점 번호 (three × nele, 1부터 시작)
+FVCOM_FACE_DIM = 'nele'
+
+
+class MeshGeometry:
+    """
+    1차원 좌표로 표현할 수 없는 수평 격자.
+    'curvilinear'는 2차원 위도/경도(ROMS 등)를 그대로 pcolormesh에 쓰고,
+    'unstructured'는 노드 좌표와 삼각형 연결(UGRID/FVCOM, 연결 정보가 없으면 들로네 분할)로 tripcolor에 씁니다.
+    삼각 분할은 격자당 한 번 만들어 두고 시간 단계가 바뀌어도 재사용합니다.
+    """
+    def __init__(self, kind, dims, x, y, triangles=None, location='node', face_index=None):
+        self.kind = kind
+        self.dims = tuple(dims) # 수평 차원 (곡선 격자 2개, 비정형 격자 1개)
+        self.x = np.asarray(x, dtype=float) # 경도 (비정형 격자는 노드 좌표)
+        self.y = np.asarray(y, dtype=float)
+        self.location = location # 비정형 격자에서 값이 놓인 위치: 'node' 또는 'face'
+        self._triangles = triangles
+        self.face_index = face_index # 삼각형별 원래 면 번호 (다각형 면을 부채꼴로 나눈 경우)
+        self._triangulation = None
+
+    @property
+    def triangulation(self):
+        """노드 좌표와 삼각형 연결로 만든 Triangulation (연결 정보가 없으면 처음 요청할 때 들로네 분할)."""
+        if self._triangulation is None:
+            self._triangulation = Triangulation(self.x, self.y, self._triangles)
+            logger.info(f"삼각 분할 생성: 노드 {self.x.size}개, 삼각형 {len(self._triangulation.triangles)}개")
+        return self._triangulation
+
+    def horizontal_coords(self, indexers=None):
+        """곡선 격자의 2차원 경도/위도에 수평 차원 인덱서를 적용해 반환합니다."""
+        indexers = indexers or {}
+        selection = tuple(indexers.get(dim, slice(None)) for dim in self.dims)
+        return self.x[selection], self.y[selection]
+
+    def masked_triangulation(self, values):
+        """
+        값이 NaN인 노드/면이 들어간 삼각형을 가린 Triangulation.
+        캐시된 분할의 좌표와 연결 배열을 그대로 공유하므로 분할을 다시 계산하지 않습니다.
+        """
+        base = self.triangulation
+        missing = ~np.isfinite(values)
+        if not missing.any():
+            return base
+        if self.location == 'face':
+            mask = missing[self.face_index]
+        else:
+            mask = missing[base.triangles].any(axis=1)
+        return Triangulation(base.x, base.y, base.triangles, mask=mask)
+
+    def face_values(self, values):
+        """면 값을 삼각형별 값으로 펼칩니다 (다각형 면은 나눈 삼각형들이 같은 값을 가짐)."""
+        return np.asarray(values)[self.face_index]
+
+
+def find_mesh(dataset, var_name):
+    """
+    변수의 수평 격자가 곡선/비정형이면 MeshGeometry를, 1차원 위도/경도 축이 있는 직교 격자이거나
+    격자를 알 수 없으면 None을 반환합니다.
+    """
+    variable = dataset[var_name]
+    mesh = _ugrid_mesh(dataset, variable) or _fvcom_mesh(dataset, variable) or _scattered_mesh(dataset, variable)
+    if mesh is not None:
+        return mesh
+    lat2d = find_2d_coord(dataset, variable, 'lat')
+    lon2d = find_2d_coord(dataset, variable, 'lon')
+    if lat2d is not None and lon2d is not None and lat2d.dims == lon2d.dims and \
+            all(dim in variable.dims for dim in lat2d.dims):
+        return MeshGeometry('curvilinear', lat2d.dims, lon2d.values, lat2d.values)
+    return None
+
+
+def _ugrid_mesh(dataset, variable):
+    """UGRID 규약: 변수의 'mesh'/'location' 속성과 메시 토폴로지 변수의 노드 좌표/면 연결."""
+    topology = dataset.variables.get(variable.attrs.get('mesh', ''))
+    if topology is None or topology.attrs.get('cf_role') != 'mesh_topology':
+        return None
+    location = variable.attrs.get('location', 'node')
+    node_names = str(topology.attrs.get('node_coordinates', '')).split()
+    connectivity = dataset.variables.get(topology.attrs.get('face_node_connectivity', ''))
+    if len(node_names) != 2 or connectivity is None or location not in ('node', 'face'):
+        return None
+    x, y = _order_lon_lat(dataset, node_names)
+    faces = np.asarray(connectivity.values)
+    face_dim = topology.attrs.get('face_dimension')
+    if face_dim is not None and connectivity.dims[0] != face_dim:
+        faces = faces.T # (꼭짓점 수, 면) 순서로 저장된 경우
+    fill = connectivity.attrs.get('_FillValue', connectivity.encoding.get('_FillValue'))
+    start = int(connectivity.attrs.get('start_index', 0))
+    triangles, face_index = _fan_triangulate(faces, start, fill)
+    dim = variable.dims[-1]
+    return MeshGeometry('unstructured', (dim,), x, y, triangles, location, face_index)
+
+
+def _fvcom_mesh(dataset, variable):
+    """FVCOM: 'nv'(three × nele, 1부터 시작) 연결과 노드 lon/lat. 'nele' 차원 변수는 면 값입니다."""
+    if FVCOM_CONNECTIVITY not in dataset.variables or not variable.dims:
+        return None
+    dim = variable.dims[-1]
+    connectivity = dataset[FVCOM_CONNECTIVITY]
+    if dim == FVCOM_FACE_DIM:
+        location = 'face'
+    elif dim == 'node':
+        location = 'node'
+    else:
+        return None
+    x, y = _order_lon_lat(dataset, ['lon', 'lat'] if 'lon' in dataset.variables else ['x', 'y'])
+    faces = np.asarray(connectivity.values)
+    if connectivity.dims[0] == FVCOM_FACE_DIM:
+        triangles = faces - 1
+    else:
+        triangles = faces.T - 1
+    return MeshGeometry('unstructured', (dim,), x, y, triangles.astype(np.int64), location,
+                        np.arange(len(triangles)))
+
+
+def _scattered_mesh(dataset, variable):
+    """연결 정보 없이 한 차원을 공유하는 1차원 위도/경도 노드(관측점 등)는 들로네 분할로 그립니다."""
+    if not variable.dims:
+        return None
+    dim = variable.dims[-1]
+    lat = lon = None
+    for name in list(variable.coords) + str(variable.attrs.get('coordinates', '')).split():
+        if name not in dataset.variables or dataset[name].dims != (dim,) or name == dim:
+            continue
+        lowered = name.lower()
+        standard_name = dataset[name].attrs.get('standard_name')
+        if lowered in LAT_NAMES or standard_name == 'latitude':
+            lat = dataset[name]
+        elif lowered in LON_NAMES or standard_name == 'longitude':
+            lon = dataset[name]
+    if lat is None or lon is None or lat.size < 3:
+        return None
+    return MeshGeometry('unstructured', (dim,), lon.values, lat.values)
+
+
+def _order_lon_lat(dataset, names):
+    """좌표 변수 두 개를 (경도, 위도) 순서의 값으로 반환합니다."""
+    first, second = (dataset[name] for name in names)
+    if first.attrs.get('standard_name') == 'latitude' or first.name.lower() in LAT_NAMES:
+        first, second = second, first
+    return first.values, second.values
+
+
+def _fan_triangulate(faces, start, fill):
+    """
+    (면 × 최대 꼭짓점 수) 연결 배열을 삼각형으로 나눕니다. 다각형 면은 첫 꼭짓점 기준 부채꼴로 나누며
+    채움값/음수로 끝나는 면도 처리합니다. (삼각형 배열, 삼각형별 면 번호)를 반환합니다.
+    """
+    faces = np.ma.filled(np.ma.masked_invalid(np.asarray(faces, dtype=float)), -1)
+    if fill is not None:
+        faces = np.where(faces == fill, -1, faces)
+    faces = np.where(faces >= start, faces - start, -1).astype(np.int64)
+    triangles, face_index = [], []
+    for k in range(1, faces.shape[1] - 1):
+        valid = (faces[:, 0] >= 0) & (faces[:, k] >= 0) & (faces[:, k + 1] >= 0)
+        triangles.append(np.stack([faces[valid, 0], faces[valid, k], faces[valid, k + 1]], axis=1))
+        face_index.append(np.nonzero(valid)[0])
+    return np.concatenate(triangles), np.concatenate(face_index)
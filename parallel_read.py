@@ -0,0 +1,130 @@
+# oceanocal_v2/parallel_read.py
+
+import logging
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024 # 이보다 작은 읽기는 h5py 기본 경로가 더 빠릅니다
+PARALLEL_MIN_CHUNKS = 4
+
+FILTER_DEFLATE = 1 # H5Z_FILTER_DEFLATE
+FILTER_SHUFFLE = 2 # H5Z_FILTER_SHUFFLE
+FILTER_FLETCHER32 = 3 # H5Z_FILTER_FLETCHER32
+SUPPORTED_FILTERS = {FILTER_DEFLATE, FILTER_SHUFFLE, FILTER_FLETCHER32}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """압축 해제용 스레드 풀 (프로세스당 하나, 코어 수만큼)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="chunk-decode")
+        return _executor
+
+
+def filter_pipeline(dataset):
+    """데이터셋의 필터 코드 목록을 적용 순서대로 반환합니다."""
+    dcpl = dataset.id.get_create_plist()
+    return [dcpl.get_filter(i)[0] for i in range(dcpl.get_nfilters())]
+
+
+def _normalize_selection(selection, shape):
+    """int / step 1 slice만으로 된 선택을 축마다 (start, stop, 축 유지 여부)로 바꿉니다. 지원하지 않으면 None."""
+    ranges = []
+    for index, size in zip(selection, shape):
+        if isinstance(index, (int, np.integer)):
+            start = int(index) % size
+            ranges.append((start, start + 1, False))
+        elif isinstance(index, slice):
+            start, stop, step = index.indices(size)
+            if step != 1 or stop <= start:
+                return None
+            ranges.append((start, stop, True))
+        else:
+            return None
+    return ranges
+
+
+def _decode_chunk(raw, filter_mask, filters, dtype, chunk_shape):
+    """원시 청크 바이트에 필터를 역순으로 적용해 numpy 배열로 만듭니다 (zlib은 GIL을 해제합니다)."""
+    for position in reversed(range(len(filters))):
+        if filter_mask & (1 << position):
+            continue # 이 청크에서는 건너뛴 필터
+        code = filters[position]
+        if code == FILTER_FLETCHER32:
+            raw = raw[:-4]
+        elif code == FILTER_DEFLATE:
+            raw = zlib.decompress(raw)
+        elif code == FILTER_SHUFFLE:
+            buffer = np.frombuffer(raw, dtype=np.uint8)
+            raw = buffer.reshape(dtype.itemsize, -1).T.tobytes()
+    return np.frombuffer(raw, dtype=dtype).reshape(chunk_shape)
+
+
+def read_hyperslab(dataset, selection):
+    """
+    h5py 데이터셋에서 selection(축마다 int 또는 step 1 slice)을 읽습니다.
+    deflate/shuffle/fletcher32로 압축된 청크 데이터셋의 큰 요청은 청크 경계로 나눠
+    스레드 풀에서 동시에 압축을 풀고 미리 할당한 배열에 채웁니다. 그 밖에는 h5py 기본 읽기를 사용합니다.
+    """
+    selection = tuple(selection) + (slice(None),) * (dataset.ndim - len(selection))
+    parallel = read_parallel(dataset, selection)
+    if parallel is not None:
+        return parallel
+    return dataset[selection] if selection else dataset[()]
+
+
+def read_parallel(dataset, selection):
+    """병렬 경로를 쓸 수 있는 요청이면 원시(디코딩 전) 배열을, 아니면 None을 반환합니다."""
+    chunk_shape = dataset.chunks
+    if chunk_shape is None or dataset.ndim == 0:
+        return None
+    filters = filter_pipeline(dataset)
+    if not filters or not set(filters) <= SUPPORTED_FILTERS:
+        return None
+    ranges = _normalize_selection(selection, dataset.shape)
+    if ranges is None:
+        return None
+    out_shape = tuple(stop - start for start, stop, _ in ranges)
+    n_bytes = int(np.prod(out_shape)) * dataset.dtype.itemsize
+    chunk_grid = [range(start // c, (stop - 1) // c + 1) for (start, stop, _), c in zip(ranges, chunk_shape)]
+    n_chunks = int(np.prod([len(g) for g in chunk_grid]))
+    if n_bytes < PARALLEL_MIN_BYTES or n_chunks < PARALLEL_MIN_CHUNKS:
+        return None
+
+    dtype = dataset.dtype
+    out = np.empty(out_shape, dtype=dtype)
+    dsid = dataset.id
+    fill_value = dataset.fillvalue
+
+    def load(chunk_coords):
+        offset = tuple(i * c for i, c in zip(chunk_coords, chunk_shape))
+        # 청크 경계와 요청 범위의 겹치는 부분
+        src, dst = [], []
+        for (start, stop, _), origin, c in zip(ranges, offset, chunk_shape):
+            lo, hi = max(start, origin), min(stop, origin + c)
+            src.append(slice(lo - origin, hi - origin))
+            dst.append(slice(lo - start, hi - start))
+        if dsid.get_chunk_info_by_coord(offset).byte_offset is None:
+            out[tuple(dst)] = fill_value # 한 번도 기록되지 않은 청크 (그 밖의 읽기 오류는 호출자에게 전달)
+            return
+        filter_mask, raw = dsid.read_direct_chunk(offset)
+        chunk = _decode_chunk(raw, filter_mask, filters, dtype, chunk_shape)
+        out[tuple(dst)] = chunk[tuple(src)]
+
+    # list()로 모든 작업의 예외를 이 스레드로 전달합니다.
+    list(_get_executor().map(load, product(*chunk_grid)))
+    logger.debug(f"병렬 청크 읽기: {dataset.name} {n_chunks}개 청크, {n_bytes / 1024 / 1024:.1f}MB")
+
+    squeeze_axes = tuple(axis for axis, (_, _, keep) in enumerate(ranges) if not keep)
+    return out.squeeze(axis=squeeze_axes) if squeeze_axes else out
@@ -16,10 +16,12 @@ from .handlers.colorbar_handler import get_colormap
 from .handlers.overlay_handler import get_overlay_traces
 
 class PlotWindow(QDialog):
-    def __init__(self, parent=None, settings_manager=None, var_name=None, plot_type=None, options=None, filepath=None):
+    def __init__(self, parent=None, settings_manager=None, var_name=None, plot_type=None, options=None, filepath=None,
+                 dataset_manager=None):
         super().__init__(parent)
         self.setWindowTitle(f"Plot: {var_name}")
         self.settings_manager = settings_manager
+        self.dataset_manager = dataset_manager # 공유 슬라이스 캐시를 사용하기 위한 DatasetManager (선택)
         self.filepath = filepath
         self.var_name = var_name
         self.plot_type = plot_type
@@ -52,8 +54,23 @@ class PlotWindow(QDialog):
             # In a full application, pass the DatasetManager instance to PlotWindowManager,
             # and then to PlotWindow, so it can use already opened datasets.
             # For now, this will open the file again for each plot window.
-            self.ds = xr.open_dataset(self.filepath)
-            self.data_var = self.ds[self.var_name]
+            if self.dataset_manager:
+                # DatasetManager의 슬라이스 캐시에서 디코딩된 배열을 가져옵니다 (창 간 공유).
+                self.ds = self.dataset_manager.get_variable_dataset(self.filepath, self.var_name)
+                if self.options.get('transect_path'):
+                    # 경로를 따라 (깊이 × 거리) 단면을 추출합니다. 시간 등 나머지 차원은 'slice' 옵션으로 고정.
+                    indexers = self.dataset_manager.resolve_indexers(self.filepath, self.var_name, self.options, keep_dims=3)
+                    self.data_var = self.dataset_manager.read_transect(
+                        self.filepath, self.var_name, self.options['transect_path'], indexers,
+                        n_samples=self.options.get('transect_samples', 200),
+                        method=self.options.get('transect_method', 'bilinear'))
+                else:
+                    # 'region'/'time_range'/'index_ranges' 옵션을 읽기 전에 isel로 적용합니다.
+                    indexers = self.dataset_manager.resolve_indexers(self.filepath, self.var_name, self.options)
+                    self.data_var = self.dataset_manager.read_variable(self.filepath, self.var_name, indexers)
+            else:
+                self.ds = xr.open_dataset(self.filepath)
+                self.data_var = self.ds[self.var_name].compute() # 옵션 변경 시 디스크를 다시 읽지 않도록 한 번만 로드
             self.plot_data()
         except Exception as e:
             QMessageBox.critical(self, "데이터 로드 오류", f"데이터를 로드하는 중 오류 발생:\\n{e}")
@@ -148,7 +165,8 @@ class PlotWindow(QDialog):
             )
 
         elif self.plot_type == "2D_section" and len(dims) == 2:
-            x_dim, y_dim = dims[0], dims[1]
+            # Heatmap의 z 행은 y축에 대응하므로 (y, x) = (dims[0], dims[1]) 입니다 (예: 깊이 × 거리).
+            y_dim, x_dim = dims[0], dims[1]
             x_data = self.data_var[x_dim].values
             y_data = self.data_var[y_dim].values
 
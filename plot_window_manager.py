@@ -1,8 +1,12 @@
 # oceanocal_v2/plot_window_manager.py
 
 import logging
-from PyQt6.QtWidgets import QMainWindow, QVBoxLayout, QWidget, QMessageBox, QFileDialog
+from PyQt6.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QMessageBox, QFileDialog, QLabel,
+                             QSlider, QApplication, QDateTimeEdit)
+from PyQt6.QtCore import pyqtSignal, Qt, QByteArray
+from PyQt6.QtGui import QPixmap
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 import xarray as xr
@@ -15,15 +19,32 @@ logger = logging.getLogger(__name__)
 # MainPanel이나 PlotHandler에서 DatasetManager와 PlotWindowManager를 임포트할 때
 # 상위 디렉토리에서 임포트하므로 . 대신 ..을 사용합니다.
 from .dataset_manager import DatasetManager
+from .subset import find_axis_dim, unwrap_lon, fix_leading_dims
+from .coord_index import SortedAxis
+from .slice_cache import make_slice_key
+from .workers import start_worker
+from .view_link import ViewLinkBus
+from .compare import COMPARE_MODES, format_summary
+from .hovmoller import HOVMOLLER_AXES
+from .spectral import BULK_PARAMETERS, BULK_LABELS, bulk_parameters, spectral_dims, density_direction_weights
+
+SLICE_AXES = ('time', 'depth') # 슬라이더로 넘길 수 있는 고정 차원 종류
 
 class PlotWindow(QMainWindow):
     """
     개별 플롯을 표시하는 윈도우 클래스.
     """
+    # 지도 클릭으로 격자점 시계열 추출이 끝나면 (창 제목, 시계열 플롯 옵션)을 전달합니다.
+    point_series_requested = pyqtSignal(str, dict)
+    # refresh_plot()이 그리기를 마칠 때마다 발생합니다 (연결된 창의 축 범위 공유에 사용).
+    plot_refreshed = pyqtSignal()
+    # 비교 플롯을 다시 그릴 때마다 요약 통계 문자열을 전달합니다 (정보 패널 표시용).
+    comparison_summary_ready = pyqtSignal(str)
+
     def __init__(self, plot_id: str, title: str, 
                  dataset_manager: DatasetManager, 
                  file_path: str, variable_name: str, plot_type: str, options: dict, 
-                 update_status_bar_callback=None, parent=None):
+                 update_status_bar_callback=None, parent=None, thumbnail_path=None):
         super().__init__(parent)
         self.plot_id = plot_id
         self.dataset_manager = dataset_manager
@@ -32,12 +53,22 @@ class PlotWindow(QMainWindow):
         self.plot_type = plot_type
         self.options = options # 플롯 옵션 저장
         self.update_status_bar_callback = update_status_bar_callback
+        self._current_indexers = {} # 마지막으로 그린 슬라이스의 isel 인덱서
+        self.thumbnail_label = None # 세션 복원 중 실제 플롯 대신 보여주는 썸네일
+        self.link_bus = None # PlotWindowManager가 설정하는 ViewLinkBus (슬라이스/축 범위 공유)
+        self.comparison_summary = None # 비교 플롯의 마지막 요약 통계 문자열
+        self._compare_worker = None # 비교 결과를 계산 중인 작업자
+        self._compare_pending_key = None # 계산 중인 비교 요청 키
+        self._compare_ready_key = None # 결과가 캐시에 들어간 마지막 비교 요청 키
         
         self.setWindowTitle(title)
         self.setGeometry(100, 100, 800, 600)
 
         self._setup_ui()
-        self.refresh_plot() # 초기 플롯 그리기
+        if thumbnail_path:
+            self._show_thumbnail(thumbnail_path) # 실제 플롯은 rehydrate()에서 그립니다.
+        else:
+            self.refresh_plot() # 초기 플롯 그리기
         logger.info(f"PlotWindow '{title}' 생성 완료. ID: {plot_id}")
 
     def _setup_ui(self):
@@ -51,27 +82,382 @@ class PlotWindow(QMainWindow):
 
         self.toolbar = NavigationToolbar(self.canvas, self)
         self.layout.addWidget(self.toolbar)
+        self.canvas.mpl_connect('button_press_event', self._on_canvas_click)
+
+        # 2D 플롯에서 고정된 시간/깊이 차원을 넘기는 슬라이더 (해당 차원이 있을 때만 보임)
+        self.slice_sliders = {}
+        for kind in SLICE_AXES:
+            row = QWidget()
+            row_layout = QHBoxLayout(row)
+            row_layout.setContentsMargins(4, 0, 4, 0)
+            name_label, value_label = QLabel(), QLabel()
+            slider = QSlider(Qt.Orientation.Horizontal)
+            slider.valueChanged.connect(lambda position, kind=kind: self._on_slice_slider(kind, position))
+            row_layout.addWidget(name_label)
+            row_layout.addWidget(slider, 1)
+            row_layout.addWidget(value_label)
+            if kind == 'time':
+                # 날짜를 직접 입력해 가장 가까운 시간 단계로 이동 (시간 색인의 이진 탐색)
+                self.date_picker = QDateTimeEdit()
+                self.date_picker.setDisplayFormat("yyyy-MM-dd HH:mm")
+                self.date_picker.setCalendarPopup(True)
+                self.date_picker.setToolTip("이동할 날짜와 시간 (가장 가까운 시간 단계를 찾습니다)")
+                self.date_picker.editingFinished.connect(self._on_date_picked)
+                row_layout.addWidget(self.date_picker)
+            row.hide()
+            self.layout.addWidget(row)
+            self.slice_sliders[kind] = (row, name_label, slider, value_label)
         logger.debug("PlotWindow UI 설정 완료.")
 
+    def _show_thumbnail(self, thumbnail_path):
+        """저장된 썸네일을 캔버스 자리에 보여줍니다."""
+        self.thumbnail_label = QLabel()
+        self.thumbnail_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.thumbnail_label.setPixmap(QPixmap(thumbnail_path).scaled(
+            self.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        self.thumbnail_label.setToolTip("이전 세션의 플롯을 불러오는 중...")
+        self.canvas.hide()
+        self.toolbar.hide()
+        self.layout.insertWidget(0, self.thumbnail_label)
+
+    def is_placeholder(self):
+        """세션 복원 후 아직 썸네일만 보여주고 있는지 여부."""
+        return self.thumbnail_label is not None
+
+    def rehydrate(self, on_done=None):
+        """
+        썸네일로 띄운 창의 데이터를 백그라운드에서 읽어 슬라이스 캐시에 올린 뒤 GUI 스레드에서 실제 플롯으로 바꿉니다.
+        파일이 열려 있지 않으면 바로 refresh_plot()의 오류 표시로 넘어갑니다.
+        """
+        def finish(*_):
+            self._finish_restore()
+            if on_done:
+                on_done()
+
+        if (self.file_path not in self.dataset_manager.get_file_list()
+                or not self.dataset_manager.has_variable(self.file_path, self.variable_name)):
+            finish()
+            return
+        start_worker(self._read_plot_variable, on_finished=finish, on_error=finish)
+
+    def _finish_restore(self):
+        if self.thumbnail_label is not None:
+            self.layout.removeWidget(self.thumbnail_label)
+            self.thumbnail_label.deleteLater()
+            self.thumbnail_label = None
+            self.canvas.show()
+            self.toolbar.show()
+        self.refresh_plot()
+
+    def save_thumbnail(self, path, dpi=40):
+        """현재 플롯(복원 대기 중이면 보여주고 있는 썸네일)을 PNG로 저장합니다."""
+        if self.thumbnail_label is not None:
+            self.thumbnail_label.pixmap().save(path, "PNG")
+        else:
+            self.figure.savefig(path, dpi=dpi)
+
+    def _read_plot_variable(self):
+        """
+        현재 옵션의 슬라이스를 읽어 (isel 인덱서, DataArray)를 반환합니다.
+        슬라이스 캐시를 거치므로 세션 복원 시 백그라운드 스레드에서 미리 호출해 둘 수 있습니다.
+        """
+        # 영역/시간/인덱스 범위를 좌표 이진 탐색으로 isel 인덱서로 바꾼 뒤 필요한 부분만 읽습니다.
+        transect_path = self.options.get('transect_path')
+        keep_dims = self._keep_dims()
+        indexers = self.dataset_manager.resolve_indexers(self.file_path, self.variable_name, self.options, keep_dims)
+        if transect_path and keep_dims:
+            # 경로를 따라 추출한 (깊이 × 거리) 단면. 보간 가중치는 시간 단계가 바뀌어도 재사용됩니다.
+            variable = self.dataset_manager.read_transect(self.file_path, self.variable_name, transect_path, indexers,
+                                                          n_samples=self.options.get('transect_samples', 200),
+                                                          method=self.options.get('transect_method', 'bilinear'))
+        elif self.options.get('regrid_target') and keep_dims:
+            # 다른 변수의 격자(예: 위성 L3 격자)로 옮겨 그립니다. 가중치는 격자 쌍마다 한 번만 만듭니다.
+            target = self.options['regrid_target']
+            variable = self.dataset_manager.regrid(self.file_path, self.variable_name, target['file_path'],
+                                                   target['variable_name'], indexers,
+                                                   method=target.get('method', 'bilinear'))
+        elif self.options.get('compare') and keep_dims:
+            indexers, kwargs = self._compare_request(indexers)
+            variable = self.dataset_manager.compare(self.file_path, self.variable_name, **kwargs)
+        elif self.plot_type == "hovmoller":
+            # 시간 블록 단위로 읽으며 나머지 수평 축을 줄인 (시간 × 경도/위도) 배열. 줄인 결과가 캐시됩니다.
+            settings = self.options.get('hovmoller') or {}
+            indexers = self.dataset_manager.resolve_hovmoller_indexers(self.file_path, self.variable_name, self.options)
+            variable = self.dataset_manager.read_hovmoller(self.file_path, self.variable_name, indexers,
+                                                           keep=settings.get('axis', 'lon'),
+                                                           reduce=settings.get('reduce', 'mean'))
+        elif self.plot_type == "spectrum_polar":
+            # 주파수 × 방향 스펙트럼 한 레코드. 나머지 차원(시간/지점)은 'slice' 인덱스로 고정합니다.
+            indexers = self.dataset_manager.spectral.record_indexers(self.file_path, self.variable_name, indexers,
+                                                                     self.options.get('slice'))
+            variable = self.dataset_manager.read_variable(self.file_path, self.variable_name, indexers)
+        elif self.plot_type == "power_spectrum":
+            indexers = self._series_indexers()
+            variable = self.dataset_manager.spectral.psd(self.file_path, self.variable_name, indexers,
+                                                         nperseg=self.options.get('nperseg', 256))
+        elif self.plot_type == "time_series" and self.options.get('spectral_parameter'):
+            # 스펙트럼 파일(들)의 적분 모수 시계열. 파일별 결과는 SpectralEngine이 캐시합니다.
+            bulk = self.dataset_manager.spectral.bulk_series(self.options.get('series_files') or [self.file_path],
+                                                             self.variable_name)
+            variable = bulk[self.options['spectral_parameter']]
+            record_dim = bulk.attrs.get('record_dim')
+            others = [dim for dim in variable.dims if dim != record_dim]
+            indexers = fix_leading_dims(others, {}, self.options.get('slice'), keep=0)
+            variable = variable.isel(indexers)
+        elif self.plot_type == "time_series" and self.options.get('point'):
+            # 지도에서 추출한 격자점 시계열 (추출 작업자가 이미 캐시에 넣어 두었음)
+            variable = self.dataset_manager.read_point_series(self.options.get('series_files') or [self.file_path],
+                                                              self.variable_name, self.options['point'])
+        else:
+            # 슬라이스 캐시를 거쳐 읽으므로 옵션만 바뀐 새로고침은 디스크를 다시 읽지 않습니다.
+            variable = self.dataset_manager.read_variable(self.file_path, self.variable_name, indexers)
+        return indexers, variable
+
+    def _compare_request(self, indexers):
+        """비교 플롯의 (isel 인덱서, DatasetManager.compare 키워드 인자)."""
+        compare = self.options['compare']
+        indexers = dict(indexers)
+        if compare.get('mode') == 'rmse':
+            # RMSE 지도는 시간 차원을 한 단계로 고정하지 않고 선택 범위 전체를 따라 줄입니다.
+            dataset = self.dataset_manager.get_variable_dataset(self.file_path, self.variable_name)
+            time_dim = find_axis_dim(dataset, dataset[self.variable_name], 'time')
+            selected = self.dataset_manager.resolve_indexers(self.file_path, self.variable_name, self.options)
+            indexers.pop(time_dim, None)
+            if time_dim in selected:
+                indexers[time_dim] = selected[time_dim]
+        return indexers, {'other_filepath': compare['file_path'], 'other_var': compare['variable_name'],
+                          'indexers': indexers, 'mode': compare.get('mode', 'difference'),
+                          'tolerance': compare.get('tolerance'),
+                          'regrid_method': compare.get('regrid_method', 'bilinear')}
+
+    def _start_background_compare(self):
+        """
+        비교 플롯의 결과가 아직 계산되지 않았으면 작업자에서 계산을 시작하고 True를 반환합니다.
+        계산이 끝나면 결과가 슬라이스 캐시에 들어가 있으므로 refresh_plot()을 다시 불러 캐시에서 그립니다.
+        """
+        keep_dims = self._keep_dims()
+        if (not self.options.get('compare') or not keep_dims or self.options.get('transect_path')
+                or self.options.get('regrid_target')):
+            return False
+        indexers = self.dataset_manager.resolve_indexers(self.file_path, self.variable_name, self.options, keep_dims)
+        _, kwargs = self._compare_request(indexers)
+        paths = (self.file_path, kwargs['other_filepath'])
+        key = (make_slice_key(kwargs), tuple(os.stat(path).st_mtime_ns for path in paths if os.path.exists(path)))
+        if key == self._compare_ready_key:
+            return False
+        if self._compare_worker is not None:
+            if key == self._compare_pending_key:
+                return True # 같은 비교를 이미 계산 중
+            self._compare_worker.cancel()
+
+        def finish(_result):
+            if key != self._compare_pending_key:
+                return # 취소되었거나 다른 비교로 바뀜
+            self._compare_worker, self._compare_pending_key, self._compare_ready_key = None, None, key
+            self._report_status("비교 계산 완료", 2000)
+            self.refresh_plot()
+
+        def fail(message):
+            if key != self._compare_pending_key:
+                return
+            self._compare_worker, self._compare_pending_key = None, None
+            self._report_status(f"비교 계산 오류: {message}", 5000)
+            self._display_error_message(f"비교 계산 오류: {message}")
+
+        self._compare_pending_key = key
+        self._compare_worker = start_worker(
+            self.dataset_manager.compare, self.file_path, self.variable_name, **kwargs, report_progress=True,
+            on_progress=lambda percent, message: self._report_status(f"{message} {percent}%", 0),
+            on_finished=finish, on_error=fail)
+        self.ax.text(0.5, 0.5, "비교 계산 중...", horizontalalignment='center', verticalalignment='center',
+                     transform=self.ax.transAxes, fontsize=12)
+        self.canvas.draw()
+        logger.info(f"PlotWindow '{self.windowTitle()}': 비교 계산 시작 {kwargs['other_filepath']}")
+        return True
+
+    def _series_indexers(self):
+        """1차원 시계열 분석용 인덱서: 시간 차원만 남기고 나머지 차원을 'slice' 인덱스로 고정합니다."""
+        indexers = self.dataset_manager.resolve_indexers(self.file_path, self.variable_name, self.options)
+        dataset = self.dataset_manager.get_variable_dataset(self.file_path, self.variable_name)
+        variable = dataset[self.variable_name]
+        time_dim = find_axis_dim(dataset, variable, 'time') or variable.dims[0]
+        others = [dim for dim in variable.dims if dim != time_dim]
+        return fix_leading_dims(others, indexers, self.options.get('slice'), keep=0)
+
+    def _keep_dims(self):
+        """2D 플롯은 마지막 두 차원(비정형 격자 1개, 횡단면 3개)을 제외한 차원을 'slice' 옵션의 인덱스로 고정합니다."""
+        keep_dims = 2 if self.plot_type in ("time_depth_heatmap", "2d_heatmap", "map_2d") else None
+        mesh = self._plot_mesh()
+        if mesh is not None and mesh.kind == 'unstructured':
+            keep_dims = 1 # 비정형 격자는 노드/면 차원 하나가 수평면입니다.
+        if self.options.get('transect_path') and keep_dims:
+            keep_dims = 3 # 횡단면은 수직 차원과 수평 두 차원을 남깁니다.
+        return keep_dims
+
+    def plot_request(self):
+        """
+        일반 슬라이스 읽기로 그리는 창이면 (변수, isel 인덱서)를, 횡단면/재격자화/격자점 시계열처럼
+        따로 계산하는 창이면 None을 반환합니다. ViewLinkBus가 파일별로 묶어 읽을 때 씁니다.
+        """
+        if any(self.options.get(key) for key in ('transect_path', 'regrid_target', 'point', 'compare')):
+            return None
+        if self.plot_type in ("hovmoller", "power_spectrum", "spectrum_polar") or self.options.get('spectral_parameter'):
+            return None
+        if not self.dataset_manager.has_variable(self.file_path, self.variable_name):
+            return None
+        indexers = self.dataset_manager.resolve_indexers(self.file_path, self.variable_name, self.options,
+                                                         self._keep_dims())
+        return self.variable_name, indexers
+
+    def _slice_axis(self, kind):
+        """
+        이 플롯에서 인덱스 하나로 고정된 시간/깊이 차원의 (차원 이름, 범위 시작, 범위 길이, 좌표 값).
+        시간 범위 등으로 일부만 선택했으면 그 범위 안에서만 넘깁니다. 해당 차원이 없으면 None.
+        """
+        if self.file_path not in self.dataset_manager.get_file_list():
+            return None
+        dataset = self.dataset_manager.get_variable_dataset(self.file_path, self.variable_name)
+        variable = dataset[self.variable_name]
+        dim = find_axis_dim(dataset, variable, kind)
+        if dim is None or not isinstance(self._current_indexers.get(dim), (int, np.integer)):
+            return None
+        size = variable.sizes[dim]
+        selected = self.dataset_manager.resolve_indexers(self.file_path, self.variable_name, self.options).get(dim)
+        start, stop = (selected.indices(size)[:2] if isinstance(selected, slice) else (0, size))
+        time_index = self.dataset_manager.get_time_index(self.file_path, self.variable_name) if kind == 'time' else None
+        if time_index is not None and time_index.dim == dim:
+            values = time_index.datetimes(slice(start, stop)) # HDF5의 숫자 CF 시간도 디코딩된 시간으로 표시
+        else:
+            values = dataset[dim].values[start:stop] if dim in dataset.coords else np.arange(start, stop)
+        return dim, start, stop - start, values
+
+    def set_slice_value(self, kind, value):
+        """
+        시간/깊이 슬라이스를 좌표 값에 가장 가까운 단계로 옮깁니다 (다시 그리지는 않음).
+        슬라이스가 바뀌었으면 True를 반환합니다.
+        """
+        axis = self._slice_axis(kind)
+        if axis is None:
+            return False
+        dim, start, length, _values = axis
+        absolute = self.dataset_manager.nearest_indexers(self.file_path, self.variable_name, **{dim: value}).get(dim)
+        if absolute is None:
+            return False
+        position = int(np.clip(absolute - start, 0, length - 1))
+        slice_state = dict(self.options.get('slice') or {})
+        if slice_state.get(dim) == position:
+            return False
+        slice_state[dim] = position
+        self.options['slice'] = slice_state
+        return True
+
+    def _on_slice_slider(self, kind, position):
+        axis = self._slice_axis(kind)
+        if axis is None:
+            return
+        value = axis[3][position]
+        self.slice_sliders[kind][3].setText(self._format_axis_value(value))
+        if self.link_bus is not None:
+            self.link_bus.set_slice(self, kind, value) # 연결된 창들과 함께 잠시 뒤 한 번에 반영
+        elif self.set_slice_value(kind, value):
+            self.refresh_plot()
+
+    def _on_date_picked(self):
+        axis = self._slice_axis('time')
+        if axis is None:
+            return
+        value = np.datetime64(self.date_picker.dateTime().toPyDateTime(), 'us')
+        if self.link_bus is not None:
+            self.link_bus.set_slice(self, 'time', value)
+        elif self.set_slice_value('time', value):
+            self.refresh_plot()
+
+    def _update_slice_sliders(self):
+        """현재 고정된 시간/깊이 단계에 맞게 슬라이더를 보이거나 숨기고 위치를 맞춥니다."""
+        for kind, (row, name_label, slider, value_label) in self.slice_sliders.items():
+            axis = self._slice_axis(kind)
+            if axis is None or axis[2] < 2:
+                row.hide()
+                continue
+            dim, start, length, values = axis
+            position = int(np.clip(self._current_indexers[dim] - start, 0, length - 1))
+            slider.blockSignals(True)
+            slider.setRange(0, length - 1)
+            slider.setValue(position)
+            slider.blockSignals(False)
+            name_label.setText(dim)
+            value_label.setText(self._format_axis_value(values[position]))
+            if kind == 'time':
+                self._update_date_picker(values, position)
+            row.show()
+
+    def _update_date_picker(self, values, position):
+        """날짜 선택기의 범위와 값을 현재 시간 슬라이스에 맞춥니다 (시간 좌표가 날짜가 아니면 숨김)."""
+        is_date = np.issubdtype(np.asarray(values).dtype, np.datetime64)
+        self.date_picker.setVisible(is_date)
+        if not is_date:
+            return
+        to_datetime = lambda value: np.datetime64(value, 'ms').astype(datetime)
+        self.date_picker.blockSignals(True)
+        self.date_picker.setDateTimeRange(to_datetime(np.min(values)), to_datetime(np.max(values)))
+        self.date_picker.setDateTime(to_datetime(values[position]))
+        self.date_picker.blockSignals(False)
+
+    def _time_axis(self, variable):
+        """
+        1차원 플롯의 가로축 (값, 레이블). 파일(또는 시계열 파일들)의 시간 축이면 시간 색인에 한 번 디코딩해 둔
+        시간을 쓰고, 시간 축이 아니거나 길이가 맞지 않으면 인덱스를 씁니다.
+        """
+        dim = variable.dims[0] if variable.ndim == 1 else None
+        times = None
+        if dim is not None and not self.options.get('spectral_parameter'):
+            series_files = self.options.get('series_files')
+            try:
+                if series_files:
+                    time_index = self.dataset_manager.get_series_time_index(series_files, self.variable_name)
+                    selection = slice(None)
+                else:
+                    time_index = self.dataset_manager.get_time_index(self.file_path, self.variable_name)
+                    selection = self._current_indexers.get(dim, slice(None))
+            except (ValueError, KeyError) as e:
+                logger.debug(f"PlotWindow: 시간 색인 없음 ({e})")
+                time_index = None
+            if time_index is not None and time_index.dim == dim:
+                times = time_index.datetimes(selection)
+        if times is None and dim in variable.coords and np.issubdtype(variable[dim].dtype, np.datetime64):
+            times = variable[dim].values
+        if times is None or np.ndim(times) != 1 or len(times) != variable.size:
+            return np.arange(variable.size), 'Index'
+        return times, 'Time'
+
+    def _format_axis_value(self, value):
+        if isinstance(value, np.datetime64):
+            return str(np.datetime_as_string(value, unit='m')).replace('T', ' ')
+        if isinstance(value, (float, np.floating)):
+            return f"{value:.4g}"
+        return str(value)
+
     def refresh_plot(self):
         """
         현재 설정된 변수와 옵션을 사용하여 플롯을 새로 그립니다.
         """
+        self._set_polar_axes(self.plot_type == "spectrum_polar")
         self.ax.clear()
         
-        dataset = self.dataset_manager.get_dataset(self.file_path)
-        if not dataset:
+        if self.file_path not in self.dataset_manager.get_file_list():
             self._display_error_message("데이터셋을 찾을 수 없습니다.")
             logger.warning(f"PlotWindow: 데이터셋을 찾을 수 없어 플롯 새로고침 실패. File: {self.file_path}")
             return
 
-        if self.variable_name not in dataset.data_vars and self.variable_name not in dataset.coords:
+        if not self.dataset_manager.has_variable(self.file_path, self.variable_name):
             self._display_error_message(f"변수 '{self.variable_name}'를 찾을 수 없습니다.")
             logger.warning(f"PlotWindow: 변수 '{self.variable_name}'를 찾을 수 없어 플롯 새로고침 실패. File: {self.file_path}")
             return
-        
-        variable = dataset[self.variable_name]
-        
+        if self._start_background_compare():
+            return # 계산이 끝나면 다시 그립니다
+        dataset = self.dataset_manager.get_variable_dataset(self.file_path, self.variable_name)
+        self._current_indexers, variable = self._read_plot_variable()
+
         # 공통 옵션 적용
         title = self.options.get('title', self.variable_name)
         xlabel = self.options.get('xlabel', 'X-axis')
@@ -87,18 +473,9 @@ class PlotWindow(QMainWindow):
         # 플롯 타입에 따른 로직 분기
         if self.plot_type == "time_series" or self.plot_type == "1d_generic":
             # 1D 데이터 플롯 (시간 또는 일반 1D)
-            x_data = None
-            if 'time' in variable.dims and 'time' in dataset.coords:
-                x_data = dataset['time'].values
-                if len(x_data) != len(variable.values):
-                     x_data = np.arange(len(variable.values)) # 길이가 다르면 인덱스 사용
-                     xlabel = 'Index'
-                else:
-                    xlabel = 'Time'
-                    self.figure.autofmt_xdate() # 시간 축 레이블 회전
-            else:
-                x_data = np.arange(len(variable.values))
-                xlabel = 'Index'
+            x_data, xlabel = self._time_axis(variable)
+            if xlabel == 'Time':
+                self.figure.autofmt_xdate() # 시간 축 레이블 회전
             
             self.ax.plot(x_data, variable.values)
             self.ax.set_title(title)
@@ -108,8 +485,8 @@ class PlotWindow(QMainWindow):
 
         elif self.plot_type == "profile":
             # 1D 프로파일 플롯 (깊이 vs 값)
-            if 'depth' in variable.dims and 'depth' in dataset.coords:
-                y_data = dataset['depth'].values
+            if 'depth' in variable.dims and 'depth' in variable.coords:
+                y_data = variable['depth'].values
                 if len(y_data) != len(variable.values):
                     y_data = np.arange(len(variable.values))
                     ylabel = 'Index'
@@ -125,8 +502,16 @@ class PlotWindow(QMainWindow):
                 self._display_error_message(f"프로파일 플롯을 위한 'depth' 차원을 찾을 수 없습니다.")
                 logger.warning(f"PlotWindow: 'depth' 차원 없음 for profile plot of {self.variable_name}.")
 
-        elif self.plot_type == "time_depth_heatmap" or self.plot_type == "2d_heatmap" or self.plot_type == "map_2d":
-            # 2D 데이터 플롯 (시간-깊이, 일반 2D 히트맵, 지도)
+        elif self.plot_type == "map_2d" and self._plot_mesh() is not None:
+            # 곡선 격자는 2차원 위도/경도로 pcolormesh, 비정형 격자는 캐시된 삼각 분할로 tripcolor
+            self._draw_mesh(self._plot_mesh(), variable, cmap, vmin, vmax, zlabel, log_scale)
+            self.ax.set_xlabel(self.options.get('xlabel', 'Longitude'))
+            self.ax.set_ylabel(self.options.get('ylabel', 'Latitude'))
+            self.ax.set_title(title)
+            self.ax.grid(grid)
+
+        elif self.plot_type in ("time_depth_heatmap", "2d_heatmap", "map_2d", "hovmoller"):
+            # 2D 데이터 플롯 (시간-깊이, 일반 2D 히트맵, 지도, Hovmöller)
             if variable.ndim < 2:
                 self._display_error_message(f"2D 플롯을 위한 차원 수가 부족합니다: {variable.ndim}D")
                 logger.warning(f"PlotWindow: 2D 플롯을 위한 차원 수 부족 ({variable.ndim}) for {self.variable_name}.")
@@ -134,8 +519,9 @@ class PlotWindow(QMainWindow):
                 return
 
             dim1_name, dim2_name = variable.dims[0], variable.dims[1]
-            x_coords = dataset.coords.get(dim2_name)
-            y_coords = dataset.coords.get(dim1_name)
+            # 부분 선택된 변수의 좌표를 사용해야 데이터와 크기가 맞습니다.
+            x_coords = variable.coords.get(dim2_name)
+            y_coords = variable.coords.get(dim1_name)
 
             if x_coords is None or y_coords is None:
                 self._display_error_message(f"2D 플롯을 위한 좌표 변수 '{dim1_name}' 또는 '{dim2_name}'를 찾을 수 없습니다.")
@@ -146,6 +532,8 @@ class PlotWindow(QMainWindow):
             else:
                 x_data = x_coords.values
                 y_data = y_coords.values
+                if find_axis_dim(dataset, variable, 'lon') == dim2_name:
+                    x_data = unwrap_lon(x_data) # 경도 이음매를 가로지르는 영역 선택 대비
 
                 # 시간 축 처리
                 if np.issubdtype(x_data.dtype, np.datetime64):
@@ -175,12 +563,24 @@ class PlotWindow(QMainWindow):
                 cb = self.figure.colorbar(pcm, ax=self.ax, label=zlabel)
                 if log_scale:
                     cb.ax.set_yscale('log')
+                self._install_probe(pcm, x_data, y_data, variable.values, time_format)
 
                 self.ax.set_xlabel(xlabel)
                 self.ax.set_ylabel(ylabel)
                 self.ax.set_title(title)
                 self.ax.grid(grid)
 
+        elif self.plot_type == "power_spectrum":
+            # Welch 파워 스펙트럼 (로그-로그)
+            self.ax.loglog(variable['frequency'].values, variable.values)
+            self.ax.set_xlabel(self.options.get('xlabel', 'Frequency (Hz)'))
+            self.ax.set_ylabel(self.options.get('ylabel', variable.attrs.get('units', 'PSD')))
+            self.ax.set_title(title)
+            self.ax.grid(grid, which='both')
+
+        elif self.plot_type == "spectrum_polar":
+            self._draw_directional_spectrum(dataset, variable, title, cmap, vmin, vmax, zlabel, log_scale)
+
         elif self.plot_type == "scalar":
             self._display_error_message(f"스칼라 변수 '{self.variable_name}'는 그래프로 표시할 수 없습니다.")
             logger.info(f"PlotWindow: 스칼라 변수 {self.variable_name}는 플롯할 수 없음.")
@@ -190,8 +590,186 @@ class PlotWindow(QMainWindow):
 
         self.canvas.draw()
         self.figure.tight_layout() # 레이아웃 조정
+        self._update_slice_sliders()
+        if variable.attrs.get('comparison'):
+            self.comparison_summary = format_summary(variable.attrs)
+            self.comparison_summary_ready.emit(self.comparison_summary)
+        self.plot_refreshed.emit()
         logger.info(f"PlotWindow '{self.windowTitle()}' 플롯 새로고침 완료. Type: {self.plot_type}")
 
+    def _on_canvas_click(self, event):
+        """
+        시간 차원이 있는 지도에서 클릭한 격자점의 전체 시계열을 백그라운드에서 추출합니다.
+        확대/이동 도구가 켜져 있을 때는 무시합니다.
+        """
+        if self.plot_type != "map_2d" or event.inaxes is not self.ax or event.button != 1 or self.toolbar.mode:
+            return
+        if self.options.get('transect_path'):
+            return
+        if event.xdata is None or event.ydata is None:
+            return
+        if self.file_path not in self.dataset_manager.get_file_list():
+            return
+        dataset = self.dataset_manager.get_variable_dataset(self.file_path, self.variable_name)
+        time_dim = find_axis_dim(dataset, dataset[self.variable_name], 'time')
+        index = self.dataset_manager.get_coord_index(self.file_path, self.variable_name)
+        if time_dim is None or index.kind is None:
+            return
+
+        point = index.nearest_indexers(lat=event.ydata, lon=event.xdata)
+        for dim, value in self._current_indexers.items():
+            # 깊이 등 지도에서 고정된 다른 차원은 현재 슬라이스를 그대로 사용
+            if dim not in point and dim != time_dim and isinstance(value, (int, np.integer)):
+                point[dim] = int(value)
+        series_files = self.options.get('series_files') or [self.file_path]
+        title = f"{self.variable_name} 시계열 ({event.ydata:.3f}, {event.xdata:.3f})"
+        options = {'point': point, 'series_files': series_files, 'title': title, 'ylabel': self.variable_name}
+
+        self._report_status(f"격자점 시계열 추출 중: {point}", 0)
+        start_worker(self.dataset_manager.read_point_series, series_files, self.variable_name, point, time_dim,
+                     report_progress=True,
+                     on_progress=lambda percent, message: self._report_status(f"{message} {percent}%", 0),
+                     on_finished=lambda _series: self.point_series_requested.emit(title, options),
+                     on_error=lambda message: self._report_status(f"시계열 추출 오류: {message}", 5000))
+        logger.info(f"PlotWindow '{self.windowTitle()}': 격자점 시계열 추출 요청 {point}")
+
+    def _report_status(self, message, timeout=2000):
+        if self.update_status_bar_callback:
+            self.update_status_bar_callback(message, timeout)
+
+    def _plot_mesh(self):
+        """지도 플롯의 곡선/비정형 격자 (직교 격자, 횡단면, 재격자화된 지도이면 None)."""
+        if self.plot_type != "map_2d" or self.options.get('transect_path') or self.options.get('regrid_target'):
+            return None
+        if self.file_path not in self.dataset_manager.get_file_list():
+            return None
+        return self.dataset_manager.get_mesh(self.file_path, self.variable_name)
+
+    def _draw_mesh(self, mesh, variable, cmap, vmin, vmax, zlabel, log_scale):
+        """조밀 격자로 다시 샘플링하지 않고 원래 격자 그대로 그립니다."""
+        if mesh.kind == 'curvilinear':
+            x_data, y_data = mesh.horizontal_coords(self._current_indexers)
+            values = variable.transpose(*mesh.dims).values
+            artist = self.ax.pcolormesh(x_data, y_data, np.ma.masked_invalid(values), cmap=cmap, vmin=vmin, vmax=vmax,
+                                        shading='auto')
+        else:
+            values = np.asarray(variable.values, dtype=float).ravel()
+            finite = values[np.isfinite(values)]
+            if finite.size:
+                vmin = np.min(finite) if vmin is None else vmin
+                vmax = np.max(finite) if vmax is None else vmax
+            triangulation = mesh.masked_triangulation(values)
+            if mesh.location == 'face':
+                artist = self.ax.tripcolor(triangulation, facecolors=mesh.face_values(values), cmap=cmap,
+                                           vmin=vmin, vmax=vmax)
+            else:
+                artist = self.ax.tripcolor(triangulation, np.where(np.isfinite(values), values, vmin or 0.0),
+                                           cmap=cmap, vmin=vmin, vmax=vmax, shading='gouraud')
+        cb = self.figure.colorbar(artist, ax=self.ax, label=zlabel)
+        if log_scale:
+            cb.ax.set_yscale('log')
+        self.ax.set_aspect('equal', adjustable='datalim')
+        self._install_mesh_probe(mesh, artist, values)
+
+    def _set_polar_axes(self, polar):
+        """방향 스펙트럼은 극좌표 축, 나머지 플롯은 일반 축을 쓰도록 필요할 때만 축을 바꿉니다."""
+        if (self.ax.name == 'polar') == polar:
+            return
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111, projection='polar' if polar else None)
+
+    def _draw_directional_spectrum(self, dataset, variable, title, cmap, vmin, vmax, zlabel, log_scale):
+        """
+        주파수 × 방향 스펙트럼을 극좌표(북쪽 0°, 시계 방향, 반지름 = 주파수)로 그리고
+        제목에 그 레코드의 Hs/Tp/평균 파향을 표시합니다.
+        """
+        freq_dim, dir_dim = spectral_dims(dataset, self.variable_name)
+        if dir_dim is None or variable.ndim != 2:
+            self._display_error_message(f"방향 스펙트럼 플롯에는 주파수 × 방향 2차원 변수가 필요합니다: {variable.dims}")
+            return
+        variable = variable.transpose(freq_dim, dir_dim)
+        freq = variable[freq_dim].values.astype(float)
+        direction = variable[dir_dim].values.astype(float) % 360.0
+        order = np.argsort(direction)
+        values = variable.values[:, order]
+        theta = np.deg2rad(direction[order])
+        # 마지막 방향 구간이 첫 구간과 이어지도록 한 바퀴를 닫습니다.
+        theta = np.concatenate([theta, theta[:1] + 2 * np.pi])
+        values = np.concatenate([values, values[:, :1]], axis=1)
+        pcm = self.ax.pcolormesh(theta, freq, values, cmap=cmap, vmin=vmin, vmax=vmax, shading='auto')
+        self.ax.set_theta_zero_location('N')
+        self.ax.set_theta_direction(-1)
+        cb = self.figure.colorbar(pcm, ax=self.ax, label=zlabel, pad=0.1)
+        if log_scale:
+            cb.ax.set_yscale('log')
+        params = bulk_parameters(variable.values, freq, variable[dir_dim].values,
+                                 dir_weights=density_direction_weights(variable, variable[dir_dim].values))
+        self.ax.set_title(f"{title}\nHs={params['hs']:.2f} m, Tp={params['tp']:.1f} s, "
+                          f"Dir={params['dirm']:.0f}°")
+
+    def _install_mesh_probe(self, mesh, artist, values):
+        """
+        곡선 격자는 좌표 색인의 KD-트리, 비정형 격자는 삼각 분할의 TriFinder(격자당 한 번 생성)로
+        마우스 위치의 값을 찾아 툴바 좌표 표시줄에 보여줍니다.
+        """
+        artist.set_mouseover(False)
+        if mesh.kind == 'curvilinear':
+            coord_index = self.dataset_manager.get_coord_index(self.file_path, self.variable_name)
+            offsets = []
+            for dim in mesh.dims:
+                index = self._current_indexers.get(dim, slice(None))
+                offsets.append((index.start or 0) if isinstance(index, slice) and index.step in (None, 1) else None)
+
+            def lookup(x, y):
+                if None in offsets or coord_index.kind != 'curvilinear':
+                    return None
+                point = coord_index.nearest_indexers(lat=y, lon=x)
+                i, j = point[mesh.dims[0]] - offsets[0], point[mesh.dims[1]] - offsets[1]
+                if 0 <= i < values.shape[0] and 0 <= j < values.shape[1]:
+                    return values[i, j]
+                return None
+        else:
+            trifinder = mesh.triangulation.get_trifinder()
+
+            def lookup(x, y):
+                triangle = int(trifinder(x, y))
+                if triangle < 0:
+                    return None
+                if mesh.location == 'face':
+                    return values[mesh.face_index[triangle]]
+                nodes = mesh.triangulation.triangles[triangle]
+                distances = (mesh.x[nodes] - x) ** 2 + (mesh.y[nodes] - y) ** 2
+                return values[nodes[int(np.argmin(distances))]]
+
+        def format_coord(x, y):
+            value = lookup(x, y)
+            if value is None:
+                return f"lon={x:.4f}, lat={y:.4f}"
+            return f"lon={x:.4f}, lat={y:.4f}, 값={value:.4g}"
+
+        self.ax.format_coord = format_coord
+
+    def _install_probe(self, mesh, x_data, y_data, values, time_format):
+        """
+        마우스 위치의 값을 좌표 이진 탐색으로 찾아 툴바 좌표 표시줄에 보여줍니다.
+        QuadMesh.contains()로 모든 셀을 검사하는 기본 동작은 끕니다.
+        """
+        mesh.set_mouseover(False)
+        x_is_time = np.issubdtype(np.asarray(x_data).dtype, np.datetime64)
+        y_is_time = np.issubdtype(np.asarray(y_data).dtype, np.datetime64) # Hovmöller는 시간이 세로축
+        x_axis = SortedAxis(mdates.date2num(x_data) if x_is_time else x_data)
+        y_axis = SortedAxis(mdates.date2num(y_data) if y_is_time else y_data)
+
+        def format_coord(x, y):
+            i, j = y_axis.nearest(y), x_axis.nearest(x)
+            x_text = mdates.num2date(x).strftime(time_format) if x_is_time else f"{x:.4g}"
+            y_text = mdates.num2date(y).strftime(time_format) if y_is_time else f"{y:.4g}"
+            if i is None or j is None or i >= values.shape[0] or j >= values.shape[1]:
+                return f"x={x_text}, y={y_text}"
+            return f"x={x_text}, y={y_text}, 값={values[i, j]:.4g}"
+
+        self.ax.format_coord = format_coord
+
     def _display_error_message(self, message: str):
         """플롯 영역에 오류 메시지를 표시합니다."""
         self.ax.clear()
@@ -205,6 +783,10 @@ class PlotWindow(QMainWindow):
         """현재 플롯의 옵션을 반환합니다."""
         return self.options
 
+    def get_current_indexers(self) -> dict:
+        """마지막으로 그린 슬라이스(영역/시간/고정 차원)의 isel 인덱서를 반환합니다."""
+        return dict(self._current_indexers)
+
     def update_plot_options(self, new_options: dict):
         """
         새로운 옵션으로 플롯을 업데이트하고 새로고침합니다.
@@ -231,9 +813,39 @@ class PlotWindow(QMainWindow):
                 self._report_status(f"플롯 내보내기 오류: {e}", 5000)
                 logger.error(f"플롯 내보내기 실패: {e}")
 
+    def extend_plot(self):
+        """
+        파일에 레코드가 덧붙은 뒤 호출됩니다. 단일 시계열은 선의 데이터만 바꾸고(새 레코드만 읽음),
+        확대/이동하지 않은 축은 새 끝을 따라갑니다. 그 밖의 플롯은 다시 그립니다 (이전 슬라이스는 캐시에 남아 있음).
+        """
+        if self.is_placeholder():
+            return
+        lines = self.ax.get_lines()
+        if self.plot_type != "time_series" or len(lines) != 1 or self.options.get('spectral_parameter'):
+            self.refresh_plot()
+            return
+        try:
+            self._current_indexers, variable = self._read_plot_variable()
+        except Exception as e:
+            logger.warning(f"PlotWindow: 덧붙은 레코드 읽기 실패, 다시 그립니다: {e}")
+            self.refresh_plot()
+            return
+        x_data, _xlabel = self._time_axis(variable)
+        lines[0].set_data(x_data, variable.values)
+        self.ax.relim()
+        self.ax.autoscale_view() # 사용자가 확대한 축은 autoscale이 꺼져 있어 그대로 둡니다.
+        self.canvas.draw_idle()
+        self.plot_refreshed.emit()
+        logger.debug(f"PlotWindow: 시계열 연장 {self.variable_name} ({variable.size}개)")
+
     def closeEvent(self, event):
         """윈도우가 닫힐 때 Matplotlib figure를 닫아 메모리 누수를 방지합니다."""
         plt.close(self.figure)
+        if self._compare_worker is not None:
+            self._compare_worker.cancel()
+            self._compare_pending_key = None
+        if self.link_bus is not None:
+            self.link_bus.unlink(self)
         logger.info(f"PlotWindow '{self.windowTitle()}' 닫힘. ID: {self.plot_id}")
         super().closeEvent(event)
 
@@ -248,6 +860,9 @@ class PlotWindowManager:
         self.status_callback = status_callback # 상태바 업데이트 콜백
         self.open_plot_windows = {} # {plot_id: PlotWindow instance}
         self.active_plot_window = None # 현재 활성화된 플롯 창 (가장 최근에 상호작용한 창)
+        self._rehydrate_queue = [] # 세션 복원 후 실제 플롯으로 바꿀 썸네일 창들 (순서대로 하나씩)
+        self._rehydrating = False
+        self.link_bus = ViewLinkBus(status_callback) # 연결된 창들의 슬라이스/축 범위 공유
         logger.info("PlotWindowManager 초기화.")
 
     def _report_status(self, message, timeout=2000):
@@ -260,9 +875,11 @@ class PlotWindowManager:
     def create_new_plot_window(self, plot_id: str, title: str, 
                                dataset_manager: DatasetManager, 
                                file_path: str, variable_name: str, plot_type: str, options: dict,
-                               update_status_bar_callback=None):
+                               update_status_bar_callback=None, thumbnail_path=None, geometry=None):
         """
         새로운 플롯 창을 생성하거나, 이미 열려 있는 경우 해당 창을 활성화하고 데이터를 새로고침합니다.
+        thumbnail_path가 있으면 새 창은 데이터를 읽지 않고 썸네일만 보여줍니다 (세션 복원, rehydrate_pending() 참고).
+        geometry는 QWidget.saveGeometry()의 base64 문자열입니다. 생성되거나 활성화된 창을 반환합니다.
         """
         if plot_id in self.open_plot_windows and self.open_plot_windows[plot_id].isVisible():
             plot_window = self.open_plot_windows[plot_id]
@@ -279,9 +896,19 @@ class PlotWindowManager:
             plot_window = PlotWindow(
                 plot_id, title, 
                 dataset_manager, file_path, variable_name, plot_type, options, 
-                update_status_bar_callback, parent=self.main_window # parent 설정
+                update_status_bar_callback, parent=self.main_window, # parent 설정
+                thumbnail_path=thumbnail_path
             )
+            if geometry:
+                plot_window.restoreGeometry(QByteArray.fromBase64(geometry.encode('ascii')))
+            plot_window.link_bus = self.link_bus
             self.open_plot_windows[plot_id] = plot_window
+            plot_window.point_series_requested.connect(
+                lambda series_title, series_options, source=plot_window:
+                    self._open_point_series_window(source, series_title, series_options))
+            plot_window.comparison_summary_ready.connect(self._show_comparison_summary)
+            if plot_window.comparison_summary:
+                self._show_comparison_summary(plot_window.comparison_summary) # 첫 그리기는 연결 전에 끝남
             plot_window.show()
             plot_window.raise_()
             self.set_active_plot_window(plot_window)
@@ -291,7 +918,38 @@ class PlotWindowManager:
             plot_window.destroyed.connect(lambda: self._remove_plot_window(plot_id))
             self._report_status(f"새 플롯 창 '{title}' 생성 및 표시.", 2000)
             logger.info(f"PlotWindowManager: 새 플롯 창 '{title}' 생성 및 표시.")
+        return plot_window
 
+    def rehydrate_pending(self, windows=None):
+        """
+        썸네일만 보여주는 창들을 주어진 순서대로 하나씩 백그라운드에서 읽어 실제 플롯으로 바꿉니다.
+        한 번에 한 창씩 읽으므로 복원 직후 GUI와 디스크가 한꺼번에 몰리지 않습니다.
+        """
+        windows = windows if windows is not None else list(self.open_plot_windows.values())
+        self._rehydrate_queue += [w for w in windows if w.is_placeholder() and w not in self._rehydrate_queue]
+        if not self._rehydrating:
+            self._rehydrate_next()
+
+    def _rehydrate_next(self):
+        while self._rehydrate_queue:
+            window = self._rehydrate_queue.pop(0)
+            if window.plot_id in self.open_plot_windows and window.is_placeholder():
+                self._report_status(f"플롯 복원 중: {window.windowTitle()} (남은 창 {len(self._rehydrate_queue)}개)", 0)
+                self._rehydrating = True
+                window.rehydrate(on_done=self._rehydrate_next)
+                return
+        if self._rehydrating:
+            self._rehydrating = False
+            self._report_status("세션 플롯 복원 완료.", 2000)
+
+
+    def _open_point_series_window(self, source_window, title, options):
+        """지도 창에서 추출한 격자점 시계열을 새 1D 플롯 창으로 엽니다."""
+        point_id = ",".join(f"{dim}={index}" for dim, index in sorted(options['point'].items()))
+        self.create_new_plot_window(f"{source_window.plot_id}@{point_id}", title,
+                                    source_window.dataset_manager, source_window.file_path,
+                                    source_window.variable_name, "time_series", options,
+                                    source_window.update_status_bar_callback)
 
     def _remove_plot_window(self, plot_id: str):
         """플롯 창이 닫힐 때 딕셔너리에서 제거합니다."""
@@ -303,6 +961,122 @@ class PlotWindowManager:
                 self.active_plot_window = None
 
 
+    def open_comparison_window(self, dataset_manager, file_path, variable_name, other_file_path, other_variable,
+                               mode='difference', options=None, update_status_bar_callback=None):
+        """
+        A(file_path의 variable_name)와 B(other_file_path의 other_variable)를 비교하는 플롯 창을 엽니다.
+        mode: 'difference'(A−B), 'ratio'(A/B), 'rmse'(시간 RMSE 지도). options의 영역/슬라이스는 A 기준입니다.
+        """
+        options = {k: v for k, v in (options or {}).items() if k not in ('compare', 'point', 'transect_path')}
+        options['compare'] = {'file_path': other_file_path, 'variable_name': other_variable, 'mode': mode}
+        if mode == 'difference':
+            options.setdefault('cmap', 'RdBu_r')
+        has_grid = (dataset_manager.get_coord_index(file_path, variable_name).kind is not None
+                    or dataset_manager.get_mesh(file_path, variable_name) is not None)
+        title = (f"{variable_name}: {COMPARE_MODES[mode]} "
+                 f"({os.path.basename(file_path)} vs {os.path.basename(other_file_path)})")
+        plot_id = f"compare:{mode}:{file_path}:{variable_name}:{other_file_path}:{other_variable}"
+        return self.create_new_plot_window(plot_id, title, dataset_manager, file_path, variable_name,
+                                           "map_2d" if has_grid else "2d_heatmap", options,
+                                           update_status_bar_callback)
+
+    def open_hovmoller_window(self, dataset_manager, file_path, variable_name, axis='lon', reduce='mean', at=None,
+                              options=None, update_status_bar_callback=None):
+        """
+        시간 × 경도(axis='lon') 또는 시간 × 위도(axis='lat') Hovmöller 플롯 창을 엽니다.
+        reduce='mean'이면 나머지 수평 축의 선택 범위를 평균하고, 'select'이면 좌표 at에 가장 가까운 한 줄을 씁니다.
+        """
+        options = {k: v for k, v in (options or {}).items() if k not in ('compare', 'point', 'transect_path',
+                                                                           'regrid_target')}
+        options['hovmoller'] = {'axis': axis, 'reduce': reduce, 'at': at}
+        options.setdefault('xlabel', 'Longitude' if axis == 'lon' else 'Latitude')
+        options.setdefault('ylabel', 'Time')
+        reduced = HOVMOLLER_AXES[axis]
+        detail = f"{reduced} 평균" if reduce == 'mean' else f"{reduced}={at}"
+        title = f"{variable_name}: Hovmöller (시간 × {axis}, {detail})"
+        plot_id = f"hovmoller:{axis}:{reduce}:{at}:{file_path}:{variable_name}"
+        return self.create_new_plot_window(plot_id, title, dataset_manager, file_path, variable_name, "hovmoller",
+                                           options, update_status_bar_callback)
+
+    def open_spectrum_window(self, dataset_manager, file_path, variable_name, kind, parameter='hs', series_files=None,
+                             options=None, update_status_bar_callback=None):
+        """
+        스펙트럼 분석 플롯 창을 엽니다.
+        kind: 'polar'(방향 스펙트럼 극좌표), 'psd'(1차원 시계열의 Welch 파워 스펙트럼),
+        'bulk'(series_files 전체의 적분 모수 parameter 시계열).
+        """
+        options = {k: v for k, v in (options or {}).items() if k not in ('compare', 'point', 'transect_path',
+                                                                           'regrid_target', 'hovmoller')}
+        name = os.path.basename(file_path)
+        if kind == 'polar':
+            plot_type, title = "spectrum_polar", f"{variable_name}: 방향 스펙트럼 ({name})"
+        elif kind == 'psd':
+            plot_type, title = "power_spectrum", f"{variable_name}: 파워 스펙트럼 ({name})"
+        elif kind == 'bulk':
+            plot_type = "time_series"
+            options['spectral_parameter'] = parameter
+            options['series_files'] = list(series_files or [file_path])
+            options.setdefault('ylabel', BULK_LABELS[parameter])
+            title = f"{variable_name}: {BULK_PARAMETERS[parameter]} ({name}, 파일 {len(options['series_files'])}개)"
+        else:
+            raise ValueError(f"알 수 없는 스펙트럼 분석 종류: {kind}")
+        plot_id = f"spectrum:{kind}:{parameter if kind == 'bulk' else ''}:{file_path}:{variable_name}"
+        return self.create_new_plot_window(plot_id, title, dataset_manager, file_path, variable_name, plot_type,
+                                           options, update_status_bar_callback)
+
+    def _windows_for_file(self, file_path):
+        return [window for window in self.open_plot_windows.values()
+                if window.file_path == file_path or file_path in (window.options.get('series_files') or [])]
+
+    def on_file_appended(self, file_path, growth):
+        """파일 감시기: 레코드가 덧붙은 파일을 보여 주는 창들을 새 레코드만 읽어 연장합니다."""
+        windows = self._windows_for_file(file_path)
+        for window in windows:
+            window.extend_plot()
+        if windows:
+            logger.info(f"PlotWindowManager: 덧붙은 레코드로 플롯 창 {len(windows)}개 연장 ({os.path.basename(file_path)})")
+
+    def on_file_changed(self, file_path):
+        """파일 감시기: 덧붙이기가 아닌 변경이면 그 파일을 보여 주는 창들을 다시 그립니다."""
+        for window in self._windows_for_file(file_path):
+            if not window.is_placeholder():
+                window.refresh_plot()
+
+    def _show_comparison_summary(self, text):
+        main_panel = getattr(self.main_window, 'main_panel', None)
+        if main_panel is not None and hasattr(main_panel, 'show_info'):
+            main_panel.show_info(text)
+
+    def link_all_windows(self):
+        """
+        열린 플롯 창들을 연결해 시간/깊이 슬라이스와 축 범위를 공유하고 화면에 나란히 배치합니다.
+        """
+        windows = [w for w in self.open_plot_windows.values() if w.isVisible()]
+        if len(windows) < 2:
+            self._report_status("연결하려면 플롯 창이 두 개 이상 열려 있어야 합니다.", 3000)
+            return
+        self.link_bus.link(windows)
+        self._tile_windows(windows)
+        self._report_status(f"플롯 창 {len(windows)}개 연결됨: 슬라이스와 확대 범위를 공유합니다.", 3000)
+
+    def unlink_all_windows(self):
+        for window in list(self.open_plot_windows.values()):
+            self.link_bus.unlink(window)
+        self._report_status("플롯 창 연결 해제.", 2000)
+
+    def _tile_windows(self, windows):
+        """창들을 화면의 사용 가능 영역에 격자 모양으로 나란히 놓습니다."""
+        screen = QApplication.primaryScreen()
+        if screen is None:
+            return
+        area = screen.availableGeometry()
+        columns = int(np.ceil(np.sqrt(len(windows))))
+        rows = int(np.ceil(len(windows) / columns))
+        width, height = area.width() // columns, area.height() // rows
+        for number, window in enumerate(windows):
+            row, column = divmod(number, columns)
+            window.setGeometry(area.x() + column * width, area.y() + row * height, width, height)
+
     def set_active_plot_window(self, window: QMainWindow):
         """현재 활성화된 플롯 창을 설정합니다."""
         self.active_plot_window = window
@@ -320,6 +1094,7 @@ class PlotWindowManager:
             if plot_id in self.open_plot_windows: # 닫는 과정에서 제거될 수 있으므로 다시 확인
                 self.open_plot_windows[plot_id].close()
         self.open_plot_windows.clear()
+        self._rehydrate_queue.clear()
         self.active_plot_window = None
         self._report_status("모든 플롯 창 닫힘.", 2000)
         logger.info("PlotWindowManager: 모든 플롯 창 닫힘.")
@@ -0,0 +1,132 @@
+# oceanocal_v2/preview.py
+
+import hashlib
+import logging
+import os
+import threading
+
+import numpy as np
+
+from .app_paths import APP_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SIZE = 96 # 미리보기 긴 변의 최대 픽셀 수
+PREVIEW_CMAP = 'viridis'
+PREVIEW_CACHE_MAX_FILES = 2000 # 디스크 캐시에 남겨 둘 미리보기 PNG 수
+
+_luts = {} # {컬러맵 이름: (256, 4) uint8 LUT}
+
+
+def colormap_lut(cmap=PREVIEW_CMAP):
+    """컬러맵을 256단계 RGBA uint8 LUT로 만들어 둡니다."""
+    lut = _luts.get(cmap)
+    if lut is None:
+        import matplotlib
+        lut = matplotlib.colormaps[cmap](np.linspace(0.0, 1.0, 256), bytes=True)
+        _luts[cmap] = lut
+    return lut
+
+
+def preview_indexers(dims, shape, size=PREVIEW_SIZE):
+    """
+    마지막 두 차원은 긴 변이 size 픽셀 안팎이 되도록 간격을 둔 slice로, 나머지 차원은 첫 인덱스로 고정합니다.
+    2차원 미만 변수는 None을 반환합니다.
+    """
+    if len(dims) < 2:
+        return None
+    step = max(1, int(np.ceil(max(shape[-2:]) / size)))
+    indexers = {dim: 0 for dim in dims[:-2]}
+    indexers.update({dim: slice(None, None, step) for dim in dims[-2:]})
+    return indexers
+
+
+def render_preview(values, cmap=PREVIEW_CMAP):
+    """
+    2D 배열을 2~98 백분위수 범위로 정규화해 LUT로 칠한 RGBA 배열로 만듭니다.
+    NaN은 투명하게 두고, 플롯(origin='lower')과 같은 방향이 되도록 행을 뒤집습니다.
+    """
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values)
+    lut = colormap_lut(cmap)
+    if not finite.any():
+        return np.zeros(values.shape + (4,), dtype=np.uint8)
+    low, high = np.percentile(values[finite], [2, 98])
+    scale = 255.0 / (high - low) if high > low else 0.0
+    index = np.clip((np.where(finite, values, low) - low) * scale, 0, 255).astype(np.uint8)
+    rgba = lut[index]
+    rgba[~finite] = 0
+    return rgba[::-1]
+
+
+class PreviewCache:
+    """
+    트리에서 보여줄 변수 미리보기 PNG를 (파일 경로, mtime, 변수) 키로 디스크에 캐시합니다.
+    미리보기는 간격을 둔 저해상도 읽기 한 번으로 만들므로 전체 해상도를 읽지 않습니다.
+    """
+    def __init__(self, cache_dir=None, size=PREVIEW_SIZE, cmap=PREVIEW_CMAP, max_files=PREVIEW_CACHE_MAX_FILES):
+        self.cache_dir = cache_dir or os.path.join(APP_DATA_DIR, "previews")
+        self.size = size
+        self.cmap = cmap
+        self.max_files = max_files
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._prune()
+
+    def path_for(self, filepath, var_name, expression=""):
+        """파일(mtime)이나 파생 변수의 식이 바뀌면 다른 경로가 되므로 오래된 미리보기는 자연히 쓰이지 않습니다."""
+        mtime = os.stat(filepath).st_mtime_ns
+        key = f"{os.path.abspath(filepath)}|{mtime}|{var_name}|{expression}|{self.size}|{self.cmap}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+    def get_or_create(self, dataset_manager, filepath, var_name):
+        """
+        캐시된 미리보기 경로를 반환하고, 없으면 만들어 저장합니다 (작업자 스레드에서 호출).
+        2차원 미만이거나 숫자가 아닌 변수는 None을 반환합니다.
+        """
+        virtual = dataset_manager.is_virtual_variable(filepath, var_name)
+        expression = dataset_manager.get_virtual_variables(filepath).get(var_name, "")
+        path = self.path_for(filepath, var_name, expression)
+        if os.path.exists(path):
+            return path
+        hdf5_file = dataset_manager.get_hdf5(filepath)
+        if virtual:
+            variable = dataset_manager.get_variable_dataset(filepath, var_name)[var_name]
+            dims, shape = variable.dims, variable.shape
+        elif hdf5_file is not None:
+            dims, shape = hdf5_file.layout(var_name)[:2]
+        else:
+            variable = dataset_manager.get_dataset(filepath)[var_name]
+            dims, shape = variable.dims, variable.shape
+            if variable.dtype.kind not in 'biuf':
+                return None
+        indexers = preview_indexers(list(dims), shape, self.size)
+        if indexers is None or 0 in shape:
+            return None
+        # 슬라이스 캐시와 청크 캐시 조정을 거치지 않고 읽어 미리보기가 플롯용 캐시를 밀어내지 않게 합니다.
+        if virtual:
+            values = dataset_manager.read_variable(filepath, var_name, indexers, use_cache=False).values
+        elif hdf5_file is not None:
+            values = hdf5_file.read(var_name, indexers).values
+        else:
+            values = variable.isel(indexers).values
+        if values.dtype.kind not in 'biuf':
+            return None
+        from PIL import Image
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        Image.fromarray(render_preview(values, self.cmap), 'RGBA').save(temp_path, format='PNG')
+        os.replace(temp_path, path)
+        logger.debug(f"미리보기 생성: {os.path.basename(filepath)}:{var_name} {values.shape}")
+        return path
+
+    def _prune(self):
+        """캐시 파일이 max_files를 넘으면 오래된 것부터 지웁니다."""
+        try:
+            entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                       if name.endswith(".png")]
+            if len(entries) <= self.max_files:
+                return
+            entries.sort(key=os.path.getmtime)
+            for path in entries[:len(entries) - self.max_files]:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"미리보기 캐시 정리 실패: {e}")
@@ -0,0 +1,239 @@
+# oceanocal_v2/regrid.py
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import xarray as xr
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+from .app_paths import APP_DATA_DIR
+from .subset import unwrap_lon, lonlat_to_xyz, fractional_index, periodic_corners
+
+logger = logging.getLogger(__name__)
+
+REGRID_METHODS = ('bilinear', 'nearest', 'conservative')
+WEIGHTS_MEMORY_ENTRIES = 16 # 메모리에 유지할 가중치 행렬 수 (디스크 캐시는 제한 없음)
+IDW_NEIGHBOURS = 4 # 곡선 격자 원본의 'bilinear'에 쓰는 최근접 이웃 수
+WEIGHTS_FORMAT = 2 # 가중치 계산 방식이 바뀌면 올려 예전 디스크 캐시를 쓰지 않게 합니다 (2: 전 지구 경도 이음매 보간)
+
+
+class Grid:
+    """
+    재격자화의 원본/대상 격자. 직교 격자는 1차원 위도/경도, 곡선 격자는 같은 모양의 2차원 위도/경도입니다.
+    key는 좌표 값으로 만든 해시이므로 다른 파일이라도 같은 격자면 같은 가중치를 공유합니다.
+    """
+    def __init__(self, kind, dims, lat, lon):
+        self.kind = kind
+        self.dims = tuple(dims) # (행 차원, 열 차원)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        if kind == 'rectilinear':
+            self.lon = unwrap_lon(self.lon) # 이음매를 가로질러 선택된 경도는 단조 증가로 펼칩니다.
+            self.shape = (self.lat.size, self.lon.size)
+        else:
+            self.shape = self.lat.shape
+        digest = hashlib.sha1(f"{kind}|{self.shape}".encode("utf-8"))
+        digest.update(np.ascontiguousarray(self.lat).tobytes())
+        digest.update(np.ascontiguousarray(self.lon).tobytes())
+        self.key = digest.hexdigest()[:20]
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    @classmethod
+    def from_coord_index(cls, coord_index, indexers=None):
+        """CoordinateIndex의 격자에 (수평 차원에 대한) isel 인덱서를 적용한 격자를 만듭니다."""
+        indexers = indexers or {}
+        if coord_index.kind == 'rectilinear':
+            dims = (coord_index.lat_dim, coord_index.lon_dim)
+            lat = coord_index.axes[coord_index.lat_dim].values
+            lon = coord_index.axes[coord_index.lon_dim].values
+            lat = lat[indexers[dims[0]]] if dims[0] in indexers else lat
+            lon = lon[indexers[dims[1]]] if dims[1] in indexers else lon
+        elif coord_index.kind == 'curvilinear':
+            dims = coord_index.grid_dims
+            selection = tuple(indexers.get(dim, slice(None)) for dim in dims)
+            lat, lon = coord_index.lat2d[selection], coord_index.lon2d[selection]
+        else:
+            raise ValueError(f"변수 '{coord_index.var_name}'의 위도/경도 격자를 찾을 수 없어 재격자화할 수 없습니다.")
+        if np.ndim(lat) != (1 if coord_index.kind == 'rectilinear' else 2) or np.ndim(lon) != np.ndim(lat):
+            raise ValueError("재격자화하려면 수평 두 차원이 모두 남아 있어야 합니다.")
+        return cls(coord_index.kind, dims, lat, lon)
+
+    def points(self):
+        """모든 격자점의 (위도, 경도)를 행 우선 순서로 펼친 배열 두 개."""
+        if self.kind == 'rectilinear':
+            lon, lat = np.meshgrid(self.lon, self.lat)
+            return lat.ravel(), lon.ravel()
+        return self.lat.ravel(), self.lon.ravel()
+
+    def coords(self):
+        """결과 DataArray에 붙일 좌표."""
+        if self.kind == 'rectilinear':
+            return {self.dims[0]: self.lat, self.dims[1]: self.lon}
+        return {'lat': (self.dims, self.lat), 'lon': (self.dims, self.lon)}
+
+
+def _cell_edges(centers):
+    """격자 중심 좌표에서 셀 경계를 구합니다 (양 끝은 인접 간격의 절반만큼 연장)."""
+    centers = np.asarray(centers, dtype=np.float64)
+    if centers.size == 1:
+        return np.array([centers[0] - 0.5, centers[0] + 0.5])
+    middle = (centers[:-1] + centers[1:]) / 2
+    return np.concatenate([[2 * centers[0] - middle[0]], middle, [2 * centers[-1] - middle[-1]]])
+
+
+def _overlap_matrix(source_edges, target_edges, periodic=None):
+    """1차원 셀 구간의 겹친 길이 행렬 (대상 × 원본). 경도는 ±360 이동한 구간과의 겹침도 더합니다."""
+    s_lo = np.minimum(source_edges[:-1], source_edges[1:])[None, :]
+    s_hi = np.maximum(source_edges[:-1], source_edges[1:])[None, :]
+    t_lo = np.minimum(target_edges[:-1], target_edges[1:])[:, None]
+    t_hi = np.maximum(target_edges[:-1], target_edges[1:])[:, None]
+    shifts = (-periodic, 0.0, periodic) if periodic else (0.0,)
+    overlap = sum(np.clip(np.minimum(s_hi + shift, t_hi) - np.maximum(s_lo + shift, t_lo), 0.0, None)
+                  for shift in shifts)
+    return sparse.csr_matrix(overlap)
+
+
+class RegridEngine:
+    """
+    (원본 격자, 대상 격자, 방법)마다 희소 보간 가중치 행렬을 한 번 만들어 디스크에 캐시하고,
+    시간 단계마다 희소 행렬 곱 한 번으로 재격자화합니다. 결측값(육지 마스크 등)은 가중치를 다시 정규화해 제외합니다.
+    """
+    def __init__(self, cache_dir=None, memory_entries=WEIGHTS_MEMORY_ENTRIES):
+        self.cache_dir = cache_dir or os.path.join(APP_DATA_DIR, "regrid")
+        self.memory_entries = memory_entries
+        self._weights = OrderedDict() # {디스크 경로: csr_matrix}
+        self._lock = threading.Lock()
+
+    def weights_path(self, source, target, method):
+        return os.path.join(self.cache_dir, f"{source.key}_{target.key}_{method}_v{WEIGHTS_FORMAT}.npz")
+
+    def get_weights(self, source, target, method='bilinear'):
+        """(대상 격자점 수 × 원본 격자점 수) CSR 가중치 행렬을 메모리/디스크 캐시에서 찾거나 만듭니다."""
+        if method not in REGRID_METHODS:
+            raise ValueError(f"지원하지 않는 재격자화 방법입니다: {method}")
+        path = self.weights_path(source, target, method)
+        with self._lock:
+            weights = self._weights.get(path)
+            if weights is not None:
+                self._weights.move_to_end(path)
+                return weights
+        weights = self._load(path, source, target)
+        if weights is None:
+            weights = self._compute_weights(source, target, method)
+            self._save(path, weights)
+            logger.info(f"재격자화 가중치 계산: {source.shape} -> {target.shape} ({method}, {weights.nnz}개 항)")
+        with self._lock:
+            self._weights[path] = weights
+            while len(self._weights) > self.memory_entries:
+                self._weights.popitem(last=False)
+        return weights
+
+    def apply(self, weights, data, source, target, method=''):
+        """
+        data(원본 격자의 두 수평 차원 + 임의의 앞 차원)를 대상 격자로 옮긴 DataArray를 반환합니다.
+        앞 차원의 모든 단계를 열로 모아 희소 행렬 곱 한 번으로 계산합니다.
+        """
+        other_dims = [dim for dim in data.dims if dim not in source.dims]
+        data = data.transpose(*other_dims, *source.dims)
+        leading_shape = data.shape[:len(other_dims)]
+        columns = np.asarray(data.values, dtype=np.float64).reshape(-1, source.size).T
+        finite = np.isfinite(columns)
+        numerator = weights @ np.where(finite, columns, 0.0)
+        denominator = weights @ finite.astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1.0), np.nan)
+        values = values.T.reshape(leading_shape + target.shape)
+        coords = {dim: data.coords[dim] for dim in other_dims if dim in data.coords}
+        coords.update(target.coords())
+        attrs = {**data.attrs, 'regrid_method': method} if method else dict(data.attrs)
+        return xr.DataArray(values, dims=other_dims + list(target.dims), coords=coords, name=data.name, attrs=attrs)
+
+    def _compute_weights(self, source, target, method):
+        if method == 'conservative':
+            return self._conservative_weights(source, target)
+        target_lat, target_lon = target.points()
+        if source.kind == 'rectilinear':
+            rows, cols, values = self._rectilinear_weights(source, target_lat, target_lon, method)
+        else:
+            rows, cols, values = self._curvilinear_weights(source, target_lat, target_lon, method)
+        weights = sparse.csr_matrix((values, (rows, cols)), shape=(target.size, source.size))
+        weights.eliminate_zeros()
+        return weights
+
+    def _rectilinear_weights(self, source, target_lat, target_lon, method):
+        fi = fractional_index(source.lat, target_lat)
+        fj = fractional_index(source.lon, target_lon, periodic=360)
+        valid = np.nonzero(np.isfinite(fi) & np.isfinite(fj))[0]
+        fi, fj = fi[valid], fj[valid]
+        n_lat, n_lon = source.shape
+        if method == 'nearest' or n_lat < 2 or n_lon < 2:
+            cols = np.rint(fi).astype(np.int64) * n_lon + np.rint(fj).astype(np.int64) % n_lon
+            return valid, cols, np.ones(valid.size)
+        i0 = np.minimum(np.floor(fi).astype(np.int64), n_lat - 2)
+        j0, j1, wx = periodic_corners(fj, n_lon) # 전 지구 원본은 이음매 칸의 마지막 열과 첫 열을 잇습니다
+        wy = fi - i0
+        rows = np.tile(valid, 4)
+        cols = np.concatenate([i0 * n_lon + j0, i0 * n_lon + j1, (i0 + 1) * n_lon + j0, (i0 + 1) * n_lon + j1])
+        values = np.concatenate([(1 - wy) * (1 - wx), (1 - wy) * wx, wy * (1 - wx), wy * wx])
+        return rows, cols, values
+
+    def _curvilinear_weights(self, source, target_lat, target_lon, method):
+        """
+        곡선 격자 원본은 KD-트리로 찾습니다. 'nearest'는 최근접 한 점, 'bilinear'는 가까운 네 점의 역거리 가중치이며
+        원본 격자 간격의 두 배보다 먼 대상 점(격자 바깥)은 비워 둡니다.
+        """
+        xyz = lonlat_to_xyz(source.lon.ravel(), source.lat.ravel())
+        positions = np.nonzero(np.all(np.isfinite(xyz), axis=1))[0]
+        tree = cKDTree(xyz[positions])
+        spacing = max(np.nanmedian(np.linalg.norm(np.diff(xyz.reshape(source.shape + (3,)), axis=axis), axis=-1))
+                      for axis in (0, 1) if source.shape[axis] > 1)
+        k = 1 if method == 'nearest' else min(IDW_NEIGHBOURS, positions.size)
+        distance, found = tree.query(lonlat_to_xyz(target_lon, target_lat), k=k, distance_upper_bound=2 * spacing)
+        distance, found = distance.reshape(target_lat.size, k), found.reshape(target_lat.size, k)
+        hit = np.isfinite(distance)
+        rows = np.broadcast_to(np.arange(target_lat.size)[:, None], hit.shape)[hit]
+        values = 1.0 / np.maximum(distance[hit], 1e-12)
+        return rows, positions[found[hit]], values
+
+    def _conservative_weights(self, source, target):
+        """
+        직교 격자 사이의 면적 보존 가중치. 셀 겹친 면적은 위도 방향 sin(위도) 구간 × 경도 구간이므로
+        두 1차원 겹침 행렬의 크로네커 곱으로 만듭니다.
+        """
+        if source.kind != 'rectilinear' or target.kind != 'rectilinear':
+            raise ValueError("보존(conservative) 재격자화는 직교 격자 사이에서만 지원합니다.")
+        sin_edges = lambda lat: np.sin(np.deg2rad(np.clip(_cell_edges(lat), -90.0, 90.0)))
+        lat_overlap = _overlap_matrix(sin_edges(source.lat), sin_edges(target.lat))
+        lon_overlap = _overlap_matrix(_cell_edges(source.lon), _cell_edges(target.lon), periodic=360.0)
+        weights = sparse.kron(lat_overlap, lon_overlap, format='csr')
+        weights.eliminate_zeros()
+        return weights
+
+    def _load(self, path, source, target):
+        if not os.path.exists(path):
+            return None
+        try:
+            weights = sparse.load_npz(path).tocsr()
+        except Exception as e:
+            logger.warning(f"재격자화 가중치 파일을 읽을 수 없어 다시 계산합니다 ({path}): {e}")
+            return None
+        if weights.shape != (target.size, source.size):
+            return None
+        return weights
+
+    def _save(self, path, weights):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+            sparse.save_npz(temp_path, weights)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"재격자화 가중치를 저장할 수 없습니다 ({path}): {e}")
@@ -0,0 +1,173 @@
+# oceanocal_v2/session_manager.py
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from .app_paths import app_data_path
+
+logger = logging.getLogger(__name__)
+
+SESSION_VERSION = 1
+THUMBNAIL_DPI = 40 # 10x6인치 figure 기준 400x240 픽셀
+
+
+def _json_default(value):
+    """플롯 옵션에 섞여 들어오는 numpy 값/슬라이스를 JSON으로 바꿉니다."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, slice):
+        return {'start': value.start, 'stop': value.stop, 'step': value.step}
+    return str(value)
+
+
+class SessionManager:
+    """
+    열린 파일과 플롯 창(plot_id, 유형, 옵션, 슬라이스 상태, 창 위치)과 렌더링 썸네일을 세션 파일에 저장합니다.
+    다음 실행에서는 썸네일로 창을 바로 띄우고, 파일을 연 뒤 실제 플롯을 백그라운드에서 하나씩 다시 그립니다.
+    """
+    def __init__(self, dataset_manager, plot_manager, session_path=None):
+        self.dataset_manager = dataset_manager
+        self.plot_manager = plot_manager
+        self.session_path = session_path or app_data_path("session", "session.json")
+        self.thumbnail_dir = os.path.join(os.path.dirname(self.session_path), "thumbnails")
+
+    def thumbnail_path(self, plot_id):
+        digest = hashlib.sha1(plot_id.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.thumbnail_dir, f"{digest}.png")
+
+    def capture(self):
+        """현재 상태를 JSON으로 저장할 수 있는 세션 딕셔너리로 만들고 플롯 창의 썸네일을 씁니다."""
+        os.makedirs(self.thumbnail_dir, exist_ok=True)
+        files = [{'path': path, 'decode_options': self.dataset_manager.get_decode_options(path),
+                  'virtual_variables': self.dataset_manager.get_virtual_variables(path)}
+                 for path in self.dataset_manager.get_file_list()]
+        active = self.plot_manager.get_active_plot_window()
+        windows = []
+        for plot_id, window in self.plot_manager.open_plot_windows.items():
+            if not window.isVisible():
+                continue
+            thumbnail = self.thumbnail_path(plot_id)
+            try:
+                window.save_thumbnail(thumbnail, dpi=THUMBNAIL_DPI)
+            except Exception as e:
+                logger.warning(f"썸네일 저장 실패 ({plot_id}): {e}")
+                thumbnail = None
+            windows.append({
+                'plot_id': plot_id,
+                'title': window.windowTitle(),
+                'file_path': window.file_path,
+                'variable_name': window.variable_name,
+                'plot_type': window.plot_type,
+                'options': window.get_current_plot_options(), # 영역/시간 범위와 'slice' 고정 인덱스 포함
+                'geometry': bytes(window.saveGeometry().toBase64()).decode('ascii'),
+                'thumbnail': thumbnail,
+                'active': window is active,
+            })
+        self._remove_stale_thumbnails({w['thumbnail'] for w in windows})
+        return {
+            'version': SESSION_VERSION,
+            'current_file': self.dataset_manager.get_current_file_path(),
+            'files': files,
+            'plot_windows': windows,
+        }
+
+    def save(self):
+        """세션을 임시 파일에 쓴 뒤 os.replace로 교체합니다."""
+        try:
+            payload = json.dumps(self.capture(), ensure_ascii=False, indent=2, default=_json_default)
+        except Exception as e:
+            logger.error(f"세션 저장 준비 중 오류 발생: {e}", exc_info=True)
+            return False
+        directory = os.path.dirname(os.path.abspath(self.session_path))
+        temp_path = None
+        try:
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, prefix=".session-",
+                                             suffix=".tmp", delete=False) as f:
+                temp_path = f.name
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.session_path)
+        except Exception as e:
+            logger.error(f"세션 파일을 저장하는 중 오류 발생: {e}", exc_info=True)
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+        logger.info(f"세션 저장됨: {self.session_path}")
+        return True
+
+    def load(self):
+        """저장된 세션 딕셔너리를 반환합니다 (없거나 읽을 수 없으면 None)."""
+        if not os.path.exists(self.session_path):
+            return None
+        try:
+            with open(self.session_path, "r", encoding="utf-8") as f:
+                session = json.load(f)
+        except Exception as e:
+            logger.error(f"세션 파일을 읽는 중 오류 발생: {e}")
+            return None
+        if not isinstance(session, dict) or session.get('version') != SESSION_VERSION:
+            logger.warning(f"지원하지 않는 세션 파일 형식: {self.session_path}")
+            return None
+        return session
+
+    def restore_plot_windows(self, session, update_status_bar_callback=None):
+        """
+        세션의 플롯 창을 썸네일 상태로 바로 띄웁니다 (데이터를 읽지 않음).
+        활성 창이 먼저 다시 그려지도록 순서를 정해 띄운 창 목록을 반환합니다.
+        """
+        entries = sorted(session.get('plot_windows', []), key=lambda entry: not entry.get('active'))
+        windows = []
+        for entry in entries:
+            thumbnail = entry.get('thumbnail')
+            window = self.plot_manager.create_new_plot_window(
+                entry['plot_id'], entry['title'], self.dataset_manager, entry['file_path'],
+                entry['variable_name'], entry['plot_type'], entry.get('options') or {},
+                update_status_bar_callback,
+                thumbnail_path=thumbnail if thumbnail and os.path.exists(thumbnail) else None,
+                geometry=entry.get('geometry'))
+            windows.append(window)
+        return windows
+
+    def restore_files(self, session, open_file):
+        """
+        세션의 파일을 open_file(path, decode_options)로 다시 열고 파생 변수를 다시 정의합니다.
+        사라진 파일은 건너뜁니다. 연 파일 목록을 반환합니다.
+        """
+        opened = []
+        for entry in session.get('files', []):
+            path = entry.get('path')
+            if not path or not os.path.exists(path):
+                logger.warning(f"세션 복원: 파일을 찾을 수 없어 건너뜀: {path}")
+                continue
+            try:
+                open_file(path, entry.get('decode_options') or None)
+                opened.append(path)
+            except Exception as e:
+                logger.error(f"세션 복원: 파일 열기 실패 {path}: {e}")
+                continue
+            for name, expression in (entry.get('virtual_variables') or {}).items():
+                try:
+                    self.dataset_manager.define_virtual_variable(path, name, expression)
+                except ValueError as e:
+                    logger.warning(f"세션 복원: 파생 변수 '{name}' 정의 실패: {e}")
+        current = session.get('current_file')
+        if current in opened:
+            self.dataset_manager.current_file_path = current
+        return opened
+
+    def _remove_stale_thumbnails(self, keep):
+        for name in os.listdir(self.thumbnail_dir):
+            path = os.path.join(self.thumbnail_dir, name)
+            if path not in keep and name.endswith(".png"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
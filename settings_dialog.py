@@ -4,12 +4,15 @@ import os
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QWidget,
     QGroupBox, QGridLayout, QLabel, QLineEdit, QPushButton,
-    QColorDialog, QFontDialog, QComboBox, QCheckBox, QListWidget, QListWidgetItem
+    QColorDialog, QFontDialog, QComboBox, QCheckBox, QListWidget, QListWidgetItem,
+    QSpinBox
 )
 from PyQt6.QtGui import QColor, QFont
 from PyQt6.QtCore import Qt
 import logging
 
+from .compute_backend import COMPUTE_BACKENDS
+
 class SettingsDialog(QDialog):
     def __init__(self, settings_manager, parent=None):
         super().__init__(parent)
@@ -65,6 +68,38 @@ class SettingsDialog(QDialog):
 
         general_group.setLayout(general_layout)
         layout.addWidget(general_group)
+
+        cache_group = QGroupBox("데이터 캐시")
+        cache_layout = QGridLayout()
+        cache_layout.addWidget(QLabel("슬라이스 캐시 크기 (MB):"), 0, 0)
+        self.slice_cache_spin = QSpinBox()
+        self.slice_cache_spin.setRange(16, 65536)
+        self.slice_cache_spin.setSingleStep(64)
+        self.slice_cache_spin.setToolTip("디코딩된 데이터 슬라이스를 메모리에 보관하는 최대 크기입니다. 다음 실행부터 적용됩니다.")
+        cache_layout.addWidget(self.slice_cache_spin, 0, 1)
+        cache_group.setLayout(cache_layout)
+        layout.addWidget(cache_group)
+
+        compute_group = QGroupBox("계산")
+        compute_layout = QGridLayout()
+        compute_layout.addWidget(QLabel("계산 백엔드:"), 0, 0)
+        self.compute_backend_combo = QComboBox()
+        for kind, label in COMPUTE_BACKENDS.items():
+            self.compute_backend_combo.addItem(label, kind)
+        self.compute_backend_combo.setToolTip("기후값/시간 통계 같은 무거운 축소 계산을 실행할 곳입니다. 다음 실행부터 적용됩니다.")
+        compute_layout.addWidget(self.compute_backend_combo, 0, 1)
+        compute_layout.addWidget(QLabel("작업자 프로세스 수 (0 = 자동):"), 1, 0)
+        self.compute_workers_spin = QSpinBox()
+        self.compute_workers_spin.setRange(0, 256)
+        compute_layout.addWidget(self.compute_workers_spin, 1, 1)
+        compute_layout.addWidget(QLabel("작업자 읽기 최소 크기 (MB, 0 = 사용 안 함):"), 2, 0)
+        self.worker_read_spin = QSpinBox()
+        self.worker_read_spin.setRange(0, 65536)
+        self.worker_read_spin.setToolTip("이보다 큰 슬라이스는 작업자 프로세스가 읽어 공유 메모리로 복사 없이 넘깁니다. "
+                                         "프로세스 풀 백엔드에서만 쓰이며 다음 실행부터 적용됩니다.")
+        compute_layout.addWidget(self.worker_read_spin, 2, 1)
+        compute_group.setLayout(compute_layout)
+        layout.addWidget(compute_group)
         layout.addStretch(1)
 
     def _setup_plot_tab(self):
@@ -228,6 +263,11 @@ class SettingsDialog(QDialog):
         index = self.app_theme_combo.findText(app_theme, Qt.MatchFlag.MatchExactly)
         if index != -1:
             self.app_theme_combo.setCurrentIndex(index)
+        self.slice_cache_spin.setValue(int(self.settings_manager.get_app_setting('slice_cache_max_mb', 512)))
+        index = self.compute_backend_combo.findData(self.settings_manager.get_app_setting('compute_backend', 'process'))
+        self.compute_backend_combo.setCurrentIndex(max(index, 0))
+        self.compute_workers_spin.setValue(int(self.settings_manager.get_app_setting('compute_workers', 0)))
+        self.worker_read_spin.setValue(int(self.settings_manager.get_app_setting('worker_read_min_mb', 0)))
 
         # Plot Tab
         self.default_title_edit.setText(self._temp_plot_options.get('title_text', ''))
@@ -261,26 +301,32 @@ class SettingsDialog(QDialog):
         logging.info("UI에 설정 로드 완료.")
 
     def accept_settings(self):
-        # General Tab
-        self.settings_manager.save_app_setting('theme', self.app_theme_combo.currentText())
-
-        # Plot Tab
-        self.settings_manager.save_plot_option('title_text', self.default_title_edit.text())
-        self.settings_manager.save_plot_option('xaxis_label', self.default_xaxis_label_edit.text())
-        self.settings_manager.save_plot_option('yaxis_label', self.default_yaxis_label_edit.text())
-        self.settings_manager.save_plot_option('cbar_label', self.default_cbar_label_edit.text())
-        self.settings_manager.save_plot_option('cmap', self.default_cmap_combo.currentText())
-        self.settings_manager.save_plot_option('theme', self.default_plotly_theme_combo.currentText())
-        self.settings_manager.save_plot_option('plot_font_family', self._temp_plot_options.get('plot_font_family', 'Arial'))
-        self.settings_manager.save_plot_option('plot_font_size', self._temp_plot_options.get('plot_font_size', 12))
-
-        # Overlay Tab
-        active_overlays = []
-        for i in range(self.overlay_list_widget.count()):
-            item = self.overlay_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                active_overlays.append(item.text())
-        self.settings_manager.set_active_overlays(active_overlays)
+        # 여러 값을 바꾸지만 디스크 쓰기는 한 번만 예약됩니다.
+        with self.settings_manager.batch():
+            # General Tab
+            self.settings_manager.save_app_setting('theme', self.app_theme_combo.currentText())
+            self.settings_manager.save_app_setting('slice_cache_max_mb', self.slice_cache_spin.value())
+            self.settings_manager.save_app_setting('compute_backend', self.compute_backend_combo.currentData())
+            self.settings_manager.save_app_setting('compute_workers', self.compute_workers_spin.value())
+            self.settings_manager.save_app_setting('worker_read_min_mb', self.worker_read_spin.value())
+
+            # Plot Tab
+            self.settings_manager.save_plot_option('title_text', self.default_title_edit.text())
+            self.settings_manager.save_plot_option('xaxis_label', self.default_xaxis_label_edit.text())
+            self.settings_manager.save_plot_option('yaxis_label', self.default_yaxis_label_edit.text())
+            self.settings_manager.save_plot_option('cbar_label', self.default_cbar_label_edit.text())
+            self.settings_manager.save_plot_option('cmap', self.default_cmap_combo.currentText())
+            self.settings_manager.save_plot_option('theme', self.default_plotly_theme_combo.currentText())
+            self.settings_manager.save_plot_option('plot_font_family', self._temp_plot_options.get('plot_font_family', 'Arial'))
+            self.settings_manager.save_plot_option('plot_font_size', self._temp_plot_options.get('plot_font_size', 12))
+
+            # Overlay Tab
+            active_overlays = []
+            for i in range(self.overlay_list_widget.count()):
+                item = self.overlay_list_widget.item(i)
+                if item.checkState() == Qt.CheckState.Checked:
+                    active_overlays.append(item.text())
+            self.settings_manager.set_active_overlays(active_overlays)
 
         self.accept()
         logging.info("설정 저장 및 다이얼로그 닫힘.")
\ No newline at end of file
@@ -1,14 +1,54 @@
 # oceanocal_v2/settings_manager.py
 
+import atexit
 import json
 import os
 import logging
+import secrets
+import stat
+import threading
+from contextlib import contextmanager
+
+SAVE_DELAY_SECONDS = 1.0 # 마지막 변경 후 이 시간 동안 추가 변경이 없으면 디스크에 씁니다
+
+
+def _create_replacement(path):
+    """
+    path를 교체할 임시 파일을 같은 폴더에 만들어 (파일 객체, 임시 경로)를 반환합니다.
+    0666으로 만들어 커널이 umask를 적용하게 하고(새 파일의 기본 권한), 기존 파일이 있으면 그 권한을 그대로 줍니다.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = None
+    directory = os.path.dirname(os.path.abspath(path))
+    while True:
+        temp_path = os.path.join(directory, f".settings-{secrets.token_hex(4)}.tmp")
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            break
+        except FileExistsError:
+            continue
+    if mode is not None:
+        os.chmod(temp_path, mode)
+    return os.fdopen(fd, "w", encoding="utf-8"), temp_path
 
 class SettingsManager:
-    def __init__(self, settings_path=None):
+    """
+    settings.json을 메모리에 들고 있는 설정 저장소.
+    값을 바꾸면 dirty 표시만 하고, 변경이 잠잠해지면(SAVE_DELAY_SECONDS) 백그라운드 타이머가
+    임시 파일에 쓴 뒤 os.replace로 원자적으로 교체합니다. 종료 시 flush()로 남은 변경을 씁니다.
+    """
+    def __init__(self, settings_path=None, save_delay=SAVE_DELAY_SECONDS):
         self.BASE_DIR = os.path.dirname(os.path.abspath(__file__))
         self.SETTINGS_PATH = settings_path if settings_path else os.path.join(self.BASE_DIR, "settings.json")
         self._settings = {}
+        self.save_delay = save_delay
+        self._lock = threading.RLock() # _settings, _dirty, _timer 보호
+        self._write_lock = threading.Lock() # 파일 쓰기 직렬화
+        self._dirty = False
+        self._timer = None
+        self._batch_depth = 0
         self._default_plot_options = {
             'title_text': 'Variable Plot',
             'xaxis_label': 'X-Axis',
@@ -20,13 +60,17 @@ class SettingsManager:
             'plot_font_size': 12
         }
         self.load_settings()
+        atexit.register(self.flush) # 창을 정상적으로 닫지 못한 경우에도 남은 변경을 씁니다
         logging.info("SettingsManager 초기화.")
 
     def load_settings(self):
         try:
             if os.path.exists(self.SETTINGS_PATH):
                 with open(self.SETTINGS_PATH, "r", encoding="utf-8") as f:
-                    self._settings = json.load(f)
+                    loaded = json.load(f)
+                with self._lock:
+                    self._settings = loaded
+                    self._dirty = False
                 logging.info(f"설정 파일 로드됨: {self.SETTINGS_PATH}")
             else:
                 self._settings = {}
@@ -39,21 +83,91 @@ class SettingsManager:
             self._settings = {}
 
     def save_settings(self):
+        """모든 설정을 즉시 저장합니다."""
+        with self._lock:
+            self._dirty = True
+        self.flush()
+
+    def mark_dirty(self):
+        """변경을 기록하고 저장을 예약합니다. 연속된 변경은 한 번의 쓰기로 합쳐집니다."""
+        with self._lock:
+            self._dirty = True
+            if self._batch_depth:
+                return # batch()가 끝날 때 한 번만 예약
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @contextmanager
+    def batch(self):
+        """with 블록 안의 여러 변경을 하나의 저장 예약으로 묶습니다."""
+        with self._lock:
+            self._batch_depth += 1
         try:
-            with open(self.SETTINGS_PATH, "w", encoding="utf-8") as f:
-                json.dump(self._settings, f, ensure_ascii=False, indent=2)
-            logging.info(f"설정 파일 저장됨: {self.SETTINGS_PATH}")
-        except Exception as e:
-            logging.error(f"설정 파일을 저장하는 중 오류 발생: {e}", exc_info=True)
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                pending = self._batch_depth == 0 and self._dirty
+            if pending:
+                self.mark_dirty()
+
+    def flush(self):
+        """
+        변경이 있으면 지금 디스크에 씁니다. 같은 폴더의 임시 파일에 쓰고 fsync한 뒤 os.replace로 교체하므로
+        쓰는 도중 프로그램이 죽어도 기존 settings.json은 손상되지 않습니다.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            payload = json.dumps(self._settings, ensure_ascii=False, indent=2)
+            self._dirty = False
+
+        with self._write_lock:
+            temp_path = None
+            try:
+                f, temp_path = _create_replacement(self.SETTINGS_PATH)
+                with f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.SETTINGS_PATH)
+                logging.info(f"설정 파일 저장됨: {self.SETTINGS_PATH}")
+            except Exception as e:
+                logging.error(f"설정 파일을 저장하는 중 오류 발생: {e}", exc_info=True)
+                if temp_path and os.path.exists(temp_path):
+                    os.remove(temp_path)
+                with self._lock:
+                    self._dirty = True # 다음 flush에서 다시 시도
 
     def get_app_setting(self, key, default=None):
-        return self._settings.get("app_settings", {}).get(key, default)
+        with self._lock:
+            return self._settings.get("app_settings", {}).get(key, default)
 
     def save_app_setting(self, key, value):
-        if "app_settings" not in self._settings:
-            self._settings["app_settings"] = {}
-        self._settings["app_settings"][key] = value
-        self.save_settings()
+        with self._lock:
+            self._settings.setdefault("app_settings", {})[key] = value
+        self.mark_dirty()
+
+    def set_app_setting(self, key, value):
+        """save_app_setting과 같습니다."""
+        self.save_app_setting(key, value)
+
+    def load_app_settings(self):
+        """앱 설정 전체의 사본을 반환합니다."""
+        with self._lock:
+            return dict(self._settings.get("app_settings", {}))
+
+    def save_app_settings(self, settings):
+        """앱 설정 전체를 주어진 딕셔너리로 바꿉니다."""
+        with self._lock:
+            self._settings["app_settings"] = dict(settings)
+        self.mark_dirty()
 
     def get_plot_option(self, key, default=None):
         return self._settings.get("plot_options", {}).get(key, self._default_plot_options.get(key, default))
@@ -66,14 +180,14 @@ class SettingsManager:
         return {**self._default_plot_options, **saved_plot_options}
 
     def save_plot_option(self, key, value):
-        if "plot_options" not in self._settings:
-            self._settings["plot_options"] = {}
-        self._settings["plot_options"][key] = value
-        self.save_settings()
+        with self._lock:
+            self._settings.setdefault("plot_options", {})[key] = value
+        self.mark_dirty()
 
     def get_active_overlays(self):
         return self._settings.get("active_overlays", [])
 
     def set_active_overlays(self, overlays):
-        self._settings["active_overlays"] = overlays
-        self.save_settings()
\ No newline at end of file
+        with self._lock:
+            self._settings["active_overlays"] = overlays
+        self.mark_dirty()
\ No newline at end of file
@@ -0,0 +1,272 @@
+# oceanocal_v2/shared_transport.py
+
+import atexit
+import ctypes
+import logging
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+
+import numpy as np
+import xarray as xr
+
+from .hdf5_backend import HDF5File
+
+try:
+    from multiprocessing import shared_memory
+except ImportError: # 공유 메모리를 쓸 수 없는 환경에서는 메모리 매핑 임시 파일만 사용
+    shared_memory = None
+
+logger = logging.getLogger(__name__)
+
+SHM_HEADROOM_BYTES = 64 * 1024 * 1024 # /dev/shm에 이만큼은 남겨 둡니다 (넘으면 임시 파일로 대체)
+TRANSPORT_DIR = os.path.join(tempfile.gettempdir(), "oceanocal_transport")
+
+_retired = [] # 더 이상 참조되지 않지만 아직 닫지 못한 버퍼 (내보낸 포인터가 사라진 뒤 닫음)
+_live = {} # {버퍼 이름: 버퍼} - 살아 있는 세그먼트
+_lock = threading.Lock()
+
+
+def _shm_has_room(nbytes):
+    """
+    리눅스의 /dev/shm은 크기를 넘겨 만들어도 쓰는 순간 SIGBUS가 나므로 남은 공간을 미리 확인합니다.
+    컨테이너의 기본 /dev/shm(64MB)처럼 작으면 임시 파일 매핑을 씁니다.
+    """
+    if shared_memory is None:
+        return False
+    if sys.platform.startswith('linux') and os.path.isdir('/dev/shm'):
+        return shutil.disk_usage('/dev/shm').free > nbytes + SHM_HEADROOM_BYTES
+    return True
+
+
+class _SharedBuffer:
+    """multiprocessing.shared_memory 블록."""
+    kind = 'shm'
+
+    def __init__(self, size=None, name=None):
+        self.block = shared_memory.SharedMemory(name=name, create=name is None, size=size or 0)
+        self.name = self.block.name
+        self.buf = self.block.buf
+
+    def close(self):
+        self.block.close() # 실패하면(뷰가 남음) 나중에 다시 시도할 수 있도록 buf는 닫힌 뒤에 지웁니다.
+        self.buf = None
+
+    def detach(self):
+        """
+        종료 시 아직 뷰가 남아 닫을 수 없는 블록: SharedMemory가 매핑을 놓게 해 그 __del__이 close()에서
+        BufferError를 내지 않게 합니다. 매핑은 남은 뷰가 사라질 때 함께 해제됩니다.
+        """
+        self._mapping = (self.block._buf, self.block._mmap)
+        self.block._buf = self.block._mmap = None
+        self.buf = None
+
+    def unlink(self):
+        # POSIX에서는 매핑이 남아 있어도 이름을 지울 수 있고, Windows는 마지막 핸들이 닫힐 때 사라집니다.
+        try:
+            self.block.unlink()
+        except FileNotFoundError:
+            pass
+        return True
+
+
+class _FileBuffer:
+    """메모리 매핑한 임시 파일 (공유 메모리가 없거나 부족할 때)."""
+    kind = 'file'
+
+    def __init__(self, size=None, name=None):
+        if name is None:
+            os.makedirs(TRANSPORT_DIR, exist_ok=True)
+            fd, name = tempfile.mkstemp(prefix="segment_", suffix=".bin", dir=TRANSPORT_DIR)
+            os.ftruncate(fd, size)
+        else:
+            fd = os.open(name, os.O_RDWR)
+            size = os.fstat(fd).st_size
+        try:
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.name = name
+        self.buf = self.map
+
+    def close(self):
+        self.map.close()
+        self.buf = None
+
+    def detach(self):
+        self.buf = None # mmap은 __del__에서 닫지 않으므로 참조만 놓습니다.
+
+    def unlink(self):
+        try:
+            os.remove(self.name)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False # Windows: 아직 매핑된 파일은 지울 수 없음 (닫은 뒤 다시 시도)
+        return True
+
+
+def _open_buffer(kind, size=None, name=None):
+    return _SharedBuffer(size, name) if kind == 'shm' else _FileBuffer(size, name)
+
+
+def _retire(buffer):
+    """세그먼트의 마지막 배열 뷰가 사라졌을 때: 이름을 바로 지우고, 닫기는 내보낸 포인터가 풀린 뒤로 미룹니다."""
+    buffer.removed = buffer.unlink()
+    with _lock:
+        _live.pop(buffer.name, None)
+        _retired.append(buffer)
+
+
+def reap():
+    """참조가 끝난 세그먼트를 닫고 지웁니다. 새 세그먼트를 만들 때와 종료할 때 호출됩니다."""
+    with _lock:
+        pending, _retired[:] = list(_retired), []
+    keep = []
+    for buffer in pending:
+        if buffer.buf is not None:
+            try:
+                buffer.close()
+            except BufferError:
+                keep.append(buffer) # 아직 파괴 중인 뷰가 버퍼를 잡고 있음
+                continue
+        if not buffer.removed:
+            buffer.removed = buffer.unlink()
+            if not buffer.removed:
+                keep.append(buffer)
+    if keep:
+        with _lock:
+            _retired.extend(keep)
+
+
+def _shutdown():
+    """
+    종료 시: 닫을 수 있는 세그먼트는 닫고, 아직 배열(슬라이스 캐시, 플롯 등)이 참조하는 세그먼트는 이름만 지운 뒤
+    매핑을 떼어 둡니다. 그대로 두면 인터프리터 정리 중 SharedMemory.__del__이 BufferError를 출력합니다.
+    """
+    reap()
+    with _lock:
+        remaining = list(_live.values()) + list(_retired)
+        _live.clear()
+        _retired[:] = []
+    for buffer in remaining:
+        if not getattr(buffer, 'removed', False):
+            buffer.removed = buffer.unlink()
+        if buffer.buf is not None:
+            try:
+                buffer.close()
+            except BufferError:
+                buffer.detach()
+
+
+atexit.register(_shutdown)
+
+
+def transport_stats():
+    """(살아 있는 세그먼트 수, 바이트 수)."""
+    with _lock:
+        return len(_live), sum(buffer.nbytes for buffer in _live.values())
+
+
+class SharedSegment:
+    """
+    프로세스 사이에서 복사 없이 주고받는 배열 버퍼 하나.
+    만든 쪽(GUI 프로세스)이 소유하며, array와 그 모든 뷰(xarray DataArray, 슬라이스 캐시, 플롯 창)가
+    사라지는 순간 버퍼가 해제됩니다. 작업자 프로세스는 descriptor로 같은 버퍼에 붙어 읽거나 씁니다.
+    """
+    def __init__(self, shape, dtype):
+        reap()
+        self.shape = tuple(int(n) for n in shape)
+        self.dtype = np.dtype(dtype)
+        nbytes = int(np.prod(self.shape, dtype=np.int64)) * self.dtype.itemsize
+        kind = 'shm' if _shm_has_room(nbytes) else 'file'
+        try:
+            buffer = _open_buffer(kind, max(nbytes, 1))
+        except OSError as e:
+            if kind != 'shm':
+                raise
+            logger.warning(f"공유 메모리 할당 실패, 임시 파일 매핑으로 대체: {e}")
+            kind, buffer = 'file', _open_buffer('file', max(nbytes, 1))
+        self.kind = kind
+        self.name = buffer.name
+        buffer.nbytes = nbytes
+        # ctypes 배열이 버퍼를 내보내는 주체가 되어, 이 세그먼트의 모든 numpy 뷰가 이 객체를 base로 참조합니다.
+        exporter = (ctypes.c_char * max(nbytes, 1)).from_buffer(buffer.buf)
+        weakref.finalize(exporter, _retire, buffer)
+        count = int(np.prod(self.shape, dtype=np.int64))
+        self._array = np.frombuffer(exporter, dtype=self.dtype, count=count).reshape(self.shape)
+        with _lock:
+            _live[self.name] = buffer
+
+    @property
+    def array(self):
+        """세그먼트 전체를 보는 numpy 배열 (복사 없음). release() 뒤에는 None."""
+        return self._array
+
+    def descriptor(self):
+        """작업자 프로세스로 넘길 수 있는 작은 설명 (종류, 이름, 모양, dtype)."""
+        return self.kind, self.name, self.shape, self.dtype.str
+
+    def release(self):
+        """이 객체의 참조를 놓습니다. 다른 뷰가 남아 있으면 그 뷰가 사라질 때 해제됩니다."""
+        self._array = None
+
+
+@contextmanager
+def attach(descriptor):
+    """
+    작업자 프로세스: descriptor의 버퍼에 붙어 numpy 배열 뷰를 돌려주고, 끝나면 매핑만 닫습니다 (해제는 소유자 몫).
+    with 블록을 나가기 전에 호출자도 뷰 참조를 지워야 매핑을 닫을 수 있습니다.
+    """
+    kind, name, shape, dtype = descriptor
+    buffer = _open_buffer(kind, name=name)
+    count = int(np.prod(shape, dtype=np.int64))
+    array = np.frombuffer(buffer.buf, dtype=np.dtype(dtype), count=count).reshape(shape)
+    try:
+        yield array
+    finally:
+        del array # 버퍼를 참조하는 뷰가 남아 있으면 close()가 실패합니다.
+        buffer.close()
+
+
+# --- 작업자 프로세스에서 슬라이스 읽기 ----------------------------------------------------------------------
+
+_worker_handles = {} # 작업자 프로세스별로 열어 둔 파일 {(경로, mtime, 디코딩 옵션): 핸들}
+
+
+def _worker_handle(filepath, mtime, decode_options, hdf5):
+    key = (filepath, mtime, repr(sorted((decode_options or {}).items())), hdf5)
+    handle = _worker_handles.get(key)
+    if handle is None:
+        for old_key in [k for k in _worker_handles if k[0] == filepath]:
+            _worker_handles.pop(old_key).close() # 파일이 바뀌었으면 이전 핸들을 닫습니다.
+        if hdf5:
+            handle = HDF5File(filepath)
+        else:
+            handle = xr.open_dataset(filepath, **(decode_options or {}))
+        _worker_handles[key] = handle
+    return handle
+
+
+def read_into_segment(descriptor, filepath, mtime, var_name, indexers, decode_options=None, hdf5=False):
+    """
+    작업자 프로세스: 파일을 (프로세스당 한 번) 열고 슬라이스를 디코딩해 공유 세그먼트에 바로 씁니다.
+    결과의 모양이 다르거나 dtype을 손실 없이 맞출 수 없으면 쓰지 않고 False를 반환합니다.
+    """
+    handle = _worker_handle(filepath, mtime, decode_options, hdf5)
+    if hdf5:
+        data = handle.read(var_name, indexers)
+    else:
+        data = handle[var_name].isel(indexers or {})
+    values = np.asarray(data.values if hasattr(data, 'values') else data)
+    with attach(descriptor) as target:
+        written = values.shape == target.shape and np.can_cast(values.dtype, target.dtype, casting='safe')
+        if written:
+            np.copyto(target, values, casting='safe')
+        del target
+    return written
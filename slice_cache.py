@@ -0,0 +1,137 @@
+# oceanocal_v2/slice_cache.py
+
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024 # 512 MB
+
+
+def make_slice_key(indexers):
+    """
+    isel 인덱서(또는 디코딩 옵션) 딕셔너리를 캐시 키로 쓸 수 있는 해시 가능한 튜플로 변환합니다.
+    """
+    if not indexers:
+        return ()
+    items = []
+    for name in sorted(indexers, key=str):
+        value = indexers[name]
+        if isinstance(value, slice):
+            value = ('slice', value.start, value.stop, value.step)
+        elif isinstance(value, np.ndarray):
+            value = ('array',) + tuple(value.ravel().tolist())
+        elif isinstance(value, (list, tuple)):
+            value = ('seq',) + tuple(value)
+        elif isinstance(value, dict):
+            value = ('dict',) + make_slice_key(value)
+        elif isinstance(value, np.generic):
+            value = value.item()
+        items.append((name, value))
+    return tuple(items)
+
+
+def estimate_nbytes(value):
+    """캐시 항목이 차지하는 메모리 크기(바이트)를 추정합니다."""
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is None:
+        return 0
+    # DataArray는 좌표 변수의 크기도 함께 계산합니다.
+    coords = getattr(value, 'coords', None)
+    if coords is not None:
+        nbytes += sum(coord.nbytes for name, coord in coords.items() if name != getattr(value, 'name', None))
+    return int(nbytes)
+
+
+class SliceCache:
+    """
+    디코딩된 변수 슬라이스를 바이트 예산 내에서 보관하는 LRU 캐시.
+    키는 (filepath, mtime_ns, var_name, slice_key, decode_key) 형식이며,
+    DatasetManager 하나당 하나의 인스턴스를 모든 플롯 창이 공유합니다.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict() # {key: (value, nbytes)}
+        self._current_bytes = 0
+        self._lock = threading.RLock() # 백그라운드 작업자와 GUI 스레드가 함께 접근
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        logger.info(f"SliceCache 초기화. 예산: {self.max_bytes / 1024 ** 2:.0f} MB")
+
+    def get(self, key):
+        """캐시된 값을 반환하고 최근 사용으로 표시합니다. 없으면 None을 반환합니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """값을 캐시에 저장하고 예산을 넘으면 가장 오래된 항목부터 제거합니다."""
+        nbytes = estimate_nbytes(value) if nbytes is None else int(nbytes)
+        if nbytes > self.max_bytes:
+            logger.debug(f"SliceCache: 예산보다 큰 항목은 캐시하지 않습니다 ({nbytes} bytes).")
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._current_bytes += nbytes
+            self._evict()
+        return True
+
+    def _evict(self):
+        while self._current_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._current_bytes -= nbytes
+            self.evictions += 1
+
+    def invalidate(self, filepath=None):
+        """
+        주어진 파일의 모든 항목을 제거합니다. filepath가 None이면 캐시 전체를 비웁니다.
+        """
+        with self._lock:
+            if filepath is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._current_bytes = 0
+            else:
+                stale = [key for key in self._entries if key[0] == filepath]
+                for key in stale:
+                    self._current_bytes -= self._entries.pop(key)[1]
+                removed = len(stale)
+        if removed:
+            logger.info(f"SliceCache: {removed}개 항목 무효화 ({filepath if filepath else '전체'}).")
+        return removed
+
+    def entries(self, filepath):
+        """주어진 파일의 (키, 값) 목록 (최근 사용 순서 유지)."""
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._entries.items() if key[0] == filepath]
+
+    def set_max_bytes(self, max_bytes):
+        """캐시 예산을 변경하고 필요하면 즉시 항목을 제거합니다."""
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    def stats(self) -> dict:
+        """적중/실패 횟수와 현재 사용량을 반환합니다."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
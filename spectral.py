@@ -0,0 +1,339 @@
+# oceanocal_v2/spectral.py
+
+import hashlib
+import logging
+import os
+import threading
+
+import numpy as np
+import xarray as xr
+from scipy import signal
+
+from .app_paths import APP_DATA_DIR
+from .chunked_io import iter_blocks, chunk_sizes, compose_indexer, SourceReader, ReadCancelled, DEFAULT_BLOCK_BYTES
+from .slice_cache import make_slice_key
+from . import subset
+
+logger = logging.getLogger(__name__)
+
+FREQ_NAMES = ('frequency', 'frequencies', 'freq', 'f', 'fr')
+DIR_NAMES = ('direction', 'directions', 'dir', 'dirs', 'theta')
+BANDWIDTH_NAMES = ('bandwidth', 'df', 'delta_f', 'freq_bandwidth')
+DIRECTION_UNITS = ('degree', 'degrees', 'deg', 'rad', 'radian', 'radians')
+# 적분 모수 이름: 설명
+BULK_PARAMETERS = {
+    'hs': "유의파고 Hs (m)",
+    'tp': "첨두 주기 Tp (s)",
+    'tm02': "평균 주기 Tm02 (s)",
+    'dirm': "평균 파향 (deg)",
+    'dp': "첨두 파향 (deg)",
+}
+# 플롯 축 레이블 (플롯 글꼴에 한글이 없을 수 있으므로 영문)
+BULK_LABELS = {
+    'hs': "Hs (m)",
+    'tp': "Tp (s)",
+    'tm02': "Tm02 (s)",
+    'dirm': "Mean direction (deg)",
+    'dp': "Peak direction (deg)",
+}
+BULK_CACHE_VERSION = 1
+
+
+def spectral_dims(dataset, var_name):
+    """스펙트럼 변수의 (주파수 차원, 방향 차원 또는 None)을 찾습니다. 주파수 차원이 없으면 ValueError."""
+    variable = dataset[var_name]
+    freq_dim = dir_dim = None
+    for dim in variable.dims:
+        attrs = dataset[dim].attrs if dim in dataset.variables else {}
+        units = str(attrs.get('units', '')).strip().lower()
+        standard_name = str(attrs.get('standard_name', ''))
+        if dim.lower() in FREQ_NAMES or units in ('hz', 's-1', '1/s') or 'frequency' in standard_name:
+            freq_dim = freq_dim or dim
+        elif dim.lower() in DIR_NAMES or (units in DIRECTION_UNITS and 'direction' in standard_name):
+            dir_dim = dir_dim or dim
+    if freq_dim is None:
+        raise ValueError(f"변수 '{var_name}'에서 주파수 차원을 찾을 수 없습니다.")
+    return freq_dim, dir_dim
+
+
+def frequency_weights(freq):
+    """불균등 간격(로그 간격 등) 주파수에도 맞는 사다리꼴 적분 가중치 (Hz)."""
+    freq = np.asarray(freq, dtype=np.float64)
+    if freq.size < 2:
+        return np.ones_like(freq)
+    edges = np.concatenate([[freq[0]], (freq[1:] + freq[:-1]) / 2, [freq[-1]]])
+    return np.diff(edges)
+
+
+def direction_weights(direction_deg, radians=True):
+    """방향 구간 폭. 방향 좌표가 감소하거나 360°를 넘어 이어져도 원형 간격으로 계산합니다."""
+    direction = np.asarray(direction_deg, dtype=np.float64)
+    if direction.size < 2:
+        return np.ones_like(direction)
+    wrapped = lambda d: np.abs((d + 180.0) % 360.0 - 180.0)
+    width = (wrapped(np.roll(direction, -1) - direction) + wrapped(direction - np.roll(direction, 1))) / 2
+    return np.deg2rad(width) if radians else width
+
+
+def density_direction_weights(variable, direction):
+    """스펙트럼 밀도 단위가 도(degree)당이면 도 단위, 아니면 CF 규약(rad-1)대로 라디안 단위 방향 폭."""
+    density_units = str(variable.attrs.get('units', '')).lower()
+    return direction_weights(direction, radians='deg' not in density_units)
+
+
+def bulk_parameters(spectra, freq, direction=None, freq_weights=None, dir_weights=None):
+    """
+    (..., 주파수[, 방향]) 분산 밀도 스펙트럼 배열에서 모든 레코드의 적분 모수를 한 번에 계산합니다.
+    NaN 성분은 0으로 보고, 에너지가 없는 레코드는 NaN을 돌려줍니다. {모수 이름: (...) 배열}을 반환합니다.
+    """
+    spectra = np.nan_to_num(np.asarray(spectra, dtype=np.float64), nan=0.0)
+    freq = np.asarray(freq, dtype=np.float64)
+    wf = frequency_weights(freq) if freq_weights is None else np.asarray(freq_weights, dtype=np.float64)
+    if direction is not None:
+        theta = np.deg2rad(np.asarray(direction, dtype=np.float64))
+        wd = direction_weights(direction) if dir_weights is None else np.asarray(dir_weights, dtype=np.float64)
+        directional = spectra * wd
+        energy = directional.sum(axis=-1) # E(f)
+    else:
+        energy = spectra
+    m0 = energy @ wf
+    m2 = energy @ (wf * freq ** 2)
+    peak = np.argmax(energy, axis=-1)
+    valid = m0 > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = {
+            'hs': np.where(valid, 4.0 * np.sqrt(np.maximum(m0, 0.0)), np.nan),
+            'tp': np.where(valid, 1.0 / freq[peak], np.nan),
+            'tm02': np.where(valid & (m2 > 0), np.sqrt(m0 / m2), np.nan),
+        }
+    if direction is not None:
+        # 평균 파향: 에너지 가중 방향 단위벡터 합의 방향 (원형 평균)
+        weighted = directional * wf[:, None]
+        a = (weighted * np.sin(theta)).sum(axis=(-2, -1))
+        b = (weighted * np.cos(theta)).sum(axis=(-2, -1))
+        result['dirm'] = np.where(valid, np.rad2deg(np.arctan2(a, b)) % 360.0, np.nan)
+        peak_row = np.take_along_axis(spectra, peak[..., None, None], axis=-2)[..., 0, :]
+        result['dp'] = np.where(valid, np.asarray(direction, dtype=np.float64)[np.argmax(peak_row, axis=-1)] % 360.0,
+                                np.nan)
+    return result
+
+
+def welch_psd(values, fs=1.0, nperseg=256):
+    """
+    1차원 시계열의 Welch 파워 스펙트럼 밀도 (주파수, PSD).
+    중간의 결측값은 선형 보간으로 메우고, 앞뒤 결측 구간은 잘라냅니다.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    finite = np.isfinite(values)
+    if finite.sum() < 4:
+        raise ValueError("파워 스펙트럼을 계산하기에 유효한 값이 너무 적습니다.")
+    first, last = np.flatnonzero(finite)[[0, -1]]
+    values, finite = values[first:last + 1], finite[first:last + 1]
+    if not finite.all():
+        positions = np.arange(values.size)
+        values = np.interp(positions, positions[finite], values[finite])
+    return signal.welch(values, fs=fs, nperseg=min(int(nperseg), values.size), detrend='constant')
+
+
+def sampling_rate(times):
+    """시간 좌표의 표본화 주파수 (Hz). datetime64가 아니거나 간격을 알 수 없으면 1."""
+    times = np.asarray(times)
+    if times.size < 2 or not np.issubdtype(times.dtype, np.datetime64):
+        return 1.0
+    step = np.median(np.diff(times).astype('timedelta64[ns]').astype(np.float64)) / 1e9
+    return 1.0 / step if step > 0 else 1.0
+
+
+def storm_events(hs, threshold):
+    """
+    Hs 시계열(시간 좌표가 있는 1차원 DataArray)에서 threshold를 넘는 연속 구간을 찾습니다.
+    [{'start', 'end', 'peak_time', 'hs_max', 'records'}] 목록을 반환합니다.
+    """
+    values = np.asarray(hs.values, dtype=np.float64)
+    times = hs[hs.dims[0]].values if hs.dims[0] in hs.coords else np.arange(values.size)
+    above = np.concatenate([[False], np.nan_to_num(values, nan=-np.inf) > threshold, [False]])
+    starts = np.flatnonzero(~above[:-1] & above[1:])
+    ends = np.flatnonzero(above[:-1] & ~above[1:])
+    events = []
+    for start, end in zip(starts, ends):
+        peak = start + int(np.nanargmax(values[start:end]))
+        events.append({'start': times[start], 'end': times[end - 1], 'peak_time': times[peak],
+                       'hs_max': float(values[peak]), 'records': int(end - start)})
+    return events
+
+
+class SpectralEngine:
+    """
+    파랑 스펙트럼 파일(*_spec02.nc 등)의 분석.
+    적분 모수(Hs, Tp, Tm02, 평균/첨두 파향)는 파일의 모든 레코드에 대해 시간 블록 단위로 벡터화해 계산하고,
+    결과를 파일(경로, mtime)별로 메모리와 디스크에 보관하므로 한 달치 파일을 다시 훑을 때는 읽지 않습니다.
+    """
+    def __init__(self, dataset_manager, cache_dir=None, block_bytes=DEFAULT_BLOCK_BYTES):
+        self.dataset_manager = dataset_manager
+        self.cache_dir = cache_dir or os.path.join(APP_DATA_DIR, "spectral")
+        self.block_bytes = block_bytes
+        self._bulk = {} # {캐시 파일 경로: (mtime_ns, xarray.Dataset)}
+        self._psd = {} # {(경로, mtime, 변수, 슬라이스, nperseg): DataArray}
+        self._lock = threading.Lock()
+
+    def cache_path(self, filepath, var_name, indexers=None):
+        key = f"{os.path.abspath(filepath)}|{var_name}|{make_slice_key(indexers)!r}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.cache_dir, f"{var_name.strip('/').replace('/', '_')}_bulk_{digest}.nc")
+
+    def record_indexers(self, filepath, var_name, indexers=None, slice_state=None):
+        """스펙트럼 한 레코드를 고르는 인덱서: 주파수/방향을 제외한 차원을 'slice' 인덱스로 고정합니다."""
+        ds = self.dataset_manager.get_variable_dataset(filepath, var_name)
+        spectral = [dim for dim in spectral_dims(ds, var_name) if dim is not None]
+        others = [dim for dim in ds[var_name].dims if dim not in spectral]
+        return subset.fix_leading_dims(others, indexers or {}, slice_state, keep=0)
+
+    def bulk(self, filepath, var_name, indexers=None, progress_callback=None, cancel_event=None):
+        """파일의 모든 레코드에 대한 적분 모수 Dataset. 파일이 바뀌지 않았으면 캐시에서 반환합니다."""
+        path = self.cache_path(filepath, var_name, indexers)
+        mtime = os.stat(filepath).st_mtime_ns
+        with self._lock:
+            cached = self._bulk.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        result = self._load(path, mtime)
+        if result is None:
+            result = self._compute_bulk(filepath, var_name, indexers or {}, progress_callback, cancel_event)
+            result.attrs['source_mtime_ns'] = str(mtime)
+            self._save(result, path)
+        with self._lock:
+            self._bulk[path] = (mtime, result)
+        return result
+
+    def bulk_series(self, filepaths, var_name, indexers=None, progress_callback=None, cancel_event=None):
+        """여러 스펙트럼 파일(예: 한 달치)의 적분 모수를 시간 축으로 이어 붙입니다. 파일별 결과는 캐시됩니다."""
+        filepaths = [filepaths] if isinstance(filepaths, str) else list(filepaths)
+        pieces = []
+        for number, filepath in enumerate(filepaths, start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ReadCancelled("스펙트럼 분석 취소됨")
+            pieces.append(self.bulk(filepath, var_name, indexers, cancel_event=cancel_event))
+            if progress_callback:
+                progress_callback(int(100 * number / len(filepaths)),
+                                  f"스펙트럼 적분 모수 ({number}/{len(filepaths)}): {os.path.basename(filepath)}")
+        if len(pieces) == 1:
+            return pieces[0]
+        time_dim = pieces[0].attrs.get('record_dim')
+        return xr.concat(pieces, dim=time_dim, combine_attrs='drop_conflicts')
+
+    def psd(self, filepath, var_name, indexers=None, nperseg=256):
+        """1차원 시계열(indexers로 나머지 차원을 고정한 변수)의 Welch 파워 스펙트럼 DataArray."""
+        manager = self.dataset_manager
+        mtime = os.stat(filepath).st_mtime_ns
+        key = (filepath, mtime, var_name, make_slice_key(indexers), int(nperseg))
+        with self._lock:
+            cached = self._psd.get(key)
+        if cached is not None:
+            return cached
+        series = manager.read_variable(filepath, var_name, indexers)
+        if series.ndim != 1:
+            raise ValueError(f"파워 스펙트럼은 1차원 시계열에만 계산할 수 있습니다: {series.dims}")
+        dim = series.dims[0]
+        fs = sampling_rate(series[dim].values) if dim in series.coords else 1.0
+        freq, power = welch_psd(series.values, fs, nperseg)
+        units = series.attrs.get('units', '')
+        result = xr.DataArray(power, dims=('frequency',), coords={'frequency': freq}, name=var_name,
+                              attrs={'long_name': f"{var_name} 파워 스펙트럼 밀도",
+                                     'units': f"({units})^2/Hz" if units else "1/Hz", 'sampling_rate_hz': fs})
+        with self._lock:
+            self._psd[key] = result
+        return result
+
+    def clear(self, filepath=None):
+        with self._lock:
+            if filepath is None:
+                self._psd.clear()
+            else:
+                for key in [k for k in self._psd if k[0] == filepath]:
+                    del self._psd[key]
+
+    def _compute_bulk(self, filepath, var_name, indexers, progress_callback, cancel_event):
+        with SourceReader(self.dataset_manager, filepath, var_name) as (ds, read):
+            freq_dim, dir_dim = spectral_dims(ds, var_name)
+            variable = ds[var_name]
+            template = variable.isel(indexers) if indexers else variable
+            record_dims = [dim for dim in template.dims if dim not in (freq_dim, dir_dim)]
+            spectral = [freq_dim] + ([dir_dim] if dir_dim else [])
+            freq = ds[freq_dim].values if freq_dim in ds.coords else np.arange(template.sizes[freq_dim])
+            freq_weights = self._bandwidth(ds, freq_dim)
+            direction = dir_weights = None
+            if dir_dim is not None:
+                direction = ds[dir_dim].values
+                dir_weights = density_direction_weights(variable, direction)
+            record_dim = subset.find_axis_dim(ds, template, 'time') or (record_dims[0] if record_dims else None)
+            shape = tuple(template.sizes[dim] for dim in record_dims)
+            outputs = {name: np.full(shape, np.nan) for name in BULK_PARAMETERS
+                       if dir_dim is not None or name not in ('dirm', 'dp')}
+
+            blocks = list(iter_blocks(template, record_dim, self.block_bytes, chunk_sizes(variable).get(record_dim))) \
+                if record_dim else [slice(None)]
+            axis = record_dims.index(record_dim) if record_dim else 0
+            for number, block in enumerate(blocks, start=1):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ReadCancelled("스펙트럼 분석 취소됨")
+                block_indexers = dict(indexers)
+                if record_dim:
+                    block_indexers[record_dim] = compose_indexer(indexers.get(record_dim), block, variable.sizes[record_dim])
+                values = read(block_indexers).transpose(*record_dims, *spectral).values
+                params = bulk_parameters(values, freq, direction, freq_weights, dir_weights)
+                target = tuple(block if i == axis else slice(None) for i in range(len(record_dims)))
+                for name, array in outputs.items():
+                    array[target] = params[name]
+                if progress_callback:
+                    progress_callback(int(100 * number / len(blocks)), f"스펙트럼 적분 모수 계산 중: {var_name}")
+
+            coords = {dim: template[dim].values for dim in record_dims if dim in template.coords}
+            result = xr.Dataset({name: xr.DataArray(array, dims=record_dims, coords=coords,
+                                                    attrs={'long_name': BULK_PARAMETERS[name]})
+                                 for name, array in outputs.items()},
+                                attrs={'source': os.path.abspath(filepath), 'variable': var_name,
+                                       'record_dim': record_dim or '', 'version': BULK_CACHE_VERSION})
+        logger.info(f"스펙트럼 적분 모수 계산 완료: {var_name} ({os.path.basename(filepath)}, 레코드 {int(np.prod(shape))}개)")
+        return result
+
+    def _bandwidth(self, ds, freq_dim):
+        """파일에 주파수 구간 폭 변수가 있으면 그 값을, 없으면 None(사다리꼴 가중치)을 씁니다."""
+        for name in BANDWIDTH_NAMES:
+            if name in ds.variables and ds[name].dims == (freq_dim,):
+                return np.asarray(ds[name].values, dtype=np.float64)
+        return None
+
+    def _load(self, path, mtime):
+        if not os.path.exists(path):
+            return None
+        try:
+            with xr.open_dataset(path) as cached:
+                if cached.attrs.get('source_mtime_ns') != str(mtime) or cached.attrs.get('version') != BULK_CACHE_VERSION:
+                    return None
+                return cached.load()
+        except (OSError, ValueError) as e:
+            logger.warning(f"스펙트럼 캐시를 읽을 수 없어 다시 계산합니다: {path}: {e}")
+            return None
+
+    def _save(self, result, path):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            result.to_netcdf(temp_path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"스펙트럼 캐시 저장 실패: {path}: {e}")
+
+
+def format_storm_summary(events, threshold, files=None):
+    """폭풍 구간 목록을 정보 패널용 텍스트로 만듭니다."""
+    def when(value):
+        if isinstance(value, np.datetime64):
+            return str(np.datetime_as_string(value, unit='m')).replace('T', ' ')
+        return str(value)
+
+    lines = [f"Hs > {threshold:g} m 구간: {len(events)}개" + (f" (파일 {len(files)}개)" if files else "")]
+    for event in events:
+        lines.append(f"  {when(event['start'])} ~ {when(event['end'])}: 최대 Hs {event['hs_max']:.2f} m "
+                     f"({when(event['peak_time'])}, 레코드 {event['records']}개)")
+    return "\n".join(lines)
@@ -0,0 +1,224 @@
+# oceanocal_v2/subset.py
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LAT_NAMES = ('lat', 'latitude', 'nav_lat', 'y_lat')
+LON_NAMES = ('lon', 'longitude', 'nav_lon', 'x_lon')
+TIME_NAMES = ('time', 't', 'ocean_time', 'valid_time')
+DEPTH_NAMES = ('depth', 'deptht', 'depthu', 'depthv', 'lev', 'level', 'z', 's_rho', 'siglay', 'pressure')
+
+
+def find_axis_dim(dataset, variable, kind):
+    """
+    변수의 차원 중 위도('lat'), 경도('lon'), 시간('time'), 깊이('depth')에 해당하는 차원 이름을 찾습니다.
+    차원 이름, 좌표 변수의 standard_name/units/axis 속성 순으로 확인합니다.
+    """
+    names, standard_name, units, axis = {
+        'lat': (LAT_NAMES, 'latitude', ('degrees_north', 'degree_north', 'degrees_n'), 'Y'),
+        'lon': (LON_NAMES, 'longitude', ('degrees_east', 'degree_east', 'degrees_e'), 'X'),
+        'time': (TIME_NAMES, 'time', (), 'T'),
+        'depth': (DEPTH_NAMES, 'depth', ('dbar', 'decibar'), 'Z'),
+    }[kind]
+    for dim in variable.dims:
+        if dim.lower() in names:
+            return dim
+    for dim in variable.dims:
+        if dim not in dataset.coords:
+            continue
+        attrs = dataset[dim].attrs
+        if attrs.get('standard_name') == standard_name or attrs.get('axis') == axis:
+            return dim
+        if str(attrs.get('units', '')).lower() in units:
+            return dim
+        if kind == 'time' and np.issubdtype(dataset[dim].dtype, np.datetime64):
+            return dim
+    return None
+
+
+def find_2d_coord(dataset, variable, kind):
+    """변수에 연결된 2차원 위도/경도 좌표 변수(예: ROMS의 lat_rho)를 찾습니다."""
+    names = LAT_NAMES if kind == 'lat' else LON_NAMES
+    standard_name = 'latitude' if kind == 'lat' else 'longitude'
+    candidates = list(variable.coords)
+    candidates += str(variable.attrs.get('coordinates', '')).split()
+    for name in candidates:
+        if name not in dataset.variables:
+            continue
+        coord = dataset[name]
+        if coord.ndim != 2:
+            continue
+        lowered = name.lower()
+        if coord.attrs.get('standard_name') == standard_name or lowered in names or lowered.startswith(kind):
+            return coord
+    return None
+
+
+def axis_slice(values, lo, hi):
+    """
+    정렬된 1차원 좌표에서 [lo, hi] 구간에 해당하는 인덱스 slice를 이진 탐색으로 구합니다.
+    오름차순과 내림차순(예: 북→남 위도) 좌표를 모두 지원하며,
+    구간이 격자 간격보다 좁으면 가장 가까운 한 점을 반환합니다.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    if n == 0:
+        return slice(0, 0)
+    lo, hi = min(lo, hi), max(lo, hi)
+    if values[0] <= values[-1]:
+        start = int(np.searchsorted(values, lo, side='left'))
+        stop = int(np.searchsorted(values, hi, side='right'))
+    else:
+        reversed_values = values[::-1]
+        start = n - int(np.searchsorted(reversed_values, hi, side='right'))
+        stop = n - int(np.searchsorted(reversed_values, lo, side='left'))
+    if start >= stop:
+        nearest = int(np.argmin(np.abs(values - (lo + hi) / 2.0)))
+        return slice(nearest, nearest + 1)
+    return slice(start, stop)
+
+
+def lon_wrap_width(lon_min, lon_max):
+    """
+    lon_min에서 동쪽으로 lon_max까지의 경도 폭(0 이상 360 미만). 폭이 360 이상이면 전체 경도로 보고 360을 반환합니다.
+    lon_min > lon_max인 날짜변경선 구간(170, -170)은 20이 됩니다.
+    """
+    width = lon_max - lon_min
+    return 360.0 if width >= 360 else width % 360
+
+
+def lon_selection(values, lon_min, lon_max):
+    """
+    경도 구간 선택. 데이터가 0–360 또는 -180–180 규약 중 무엇을 쓰든 요청 경계를 맞춰 변환하고,
+    구간이 경도 이음매(seam)를 가로지르면 두 구간을 이어 붙인 정수 인덱스 배열을 반환합니다.
+    lon_min > lon_max(예: 170, -170)는 날짜변경선을 가로지르는 동쪽 방향 구간으로 해석합니다.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    width = lon_wrap_width(lon_min, lon_max)
+    if n == 0 or width >= 360:
+        return slice(None)
+    if np.any(np.diff(values) < 0):
+        # 정렬되지 않은 경도는 이진 탐색을 쓸 수 없으므로 마스크로 처리합니다.
+        wrapped = (values - lon_min) % 360
+        return np.nonzero(wrapped <= width)[0]
+
+    base = values[0]
+    lo = (lon_min - base) % 360 + base
+    hi = lo + width
+    if hi <= base + 360:
+        return axis_slice(values, lo, hi)
+    indices = np.arange(n)
+    east = indices[axis_slice(values, lo, base + 360)]
+    west = indices[axis_slice(values, base, hi - 360)]
+    return np.concatenate([east, west[~np.isin(west, east)]])
+
+
+def unwrap_lon(values):
+    """이음매를 가로질러 선택된 경도(예: 350, 355, 0, 5)를 단조 증가하도록 360을 더해 펼칩니다."""
+    values = np.asarray(values, dtype=float)
+    if values.size > 1 and np.any(np.diff(values) < 0):
+        return np.where(values < values[0], values + 360, values)
+    return values
+
+
+def resolve_indexers(dataset, var_name, region=None, time_range=None, index_ranges=None):
+    """
+    플롯 요청의 영역/시간/인덱스 범위를 데이터를 읽기 전에 적용할 isel 인덱서로 변환합니다.
+
+    region: {'lat': [min, max], 'lon': [min, max]}
+    time_range: [start, end] (날짜 문자열 또는 datetime)
+    index_ranges: {dim: [start, stop]}
+    """
+    variable = dataset[var_name]
+    indexers = {}
+
+    for dim, bounds in (index_ranges or {}).items():
+        if dim in variable.dims and bounds is not None:
+            start, stop = bounds
+            indexers[dim] = slice(start, stop)
+
+    if region:
+        lat_dim = find_axis_dim(dataset, variable, 'lat')
+        lon_dim = find_axis_dim(dataset, variable, 'lon')
+        if region.get('lat') is not None and lat_dim and lat_dim in dataset.coords:
+            indexers[lat_dim] = axis_slice(dataset[lat_dim].values, *region['lat'])
+        if region.get('lon') is not None and lon_dim and lon_dim in dataset.coords:
+            indexers[lon_dim] = lon_selection(dataset[lon_dim].values, *region['lon'])
+        if not lat_dim or not lon_dim:
+            # 곡선 격자는 DatasetManager가 좌표 색인(KD-트리)으로 영역을 처리합니다.
+            logger.debug(f"변수 '{var_name}'에 1차원 위도/경도 차원이 없습니다.")
+
+    if time_range:
+        time_dim = find_axis_dim(dataset, variable, 'time')
+        if time_dim and time_dim in dataset.indexes:
+            start, end = time_range
+            # 단조 증가하는 시간 인덱스에서 이진 탐색으로 구간을 찾습니다 (CFTimeIndex 포함).
+            indexers[time_dim] = dataset.indexes[time_dim].slice_indexer(start, end)
+        else:
+            logger.warning(f"변수 '{var_name}'에서 시간 차원을 찾을 수 없어 시간 범위를 무시합니다.")
+
+    return indexers
+
+
+def fix_leading_dims(dims, indexers, slice_state=None, keep=2):
+    """
+    마지막 keep개 차원만 남기도록 나머지 차원을 slice_state({dim: index})의 인덱스로 고정합니다.
+    이미 범위가 선택된 차원은 그 범위 안에서의 상대 인덱스로 해석합니다.
+    """
+    slice_state = slice_state or {}
+    indexers = dict(indexers)
+    for dim in dims[:-keep] if keep else dims:
+        current = indexers.get(dim)
+        if isinstance(current, (int, np.integer)):
+            continue
+        position = int(slice_state.get(dim, 0))
+        if isinstance(current, slice):
+            position += current.start or 0
+        elif current is not None and not np.isscalar(current):
+            position = int(np.asarray(current)[position])
+        indexers[dim] = position
+    return indexers
+
+
+def lonlat_to_xyz(lon, lat):
+    """경위도를 단위 구 위의 3차원 좌표로 변환합니다 (경도 순환과 극 근처 왜곡을 피하기 위함)."""
+    lon_r = np.deg2rad(lon)
+    lat_r = np.deg2rad(lat)
+    cos_lat = np.cos(lat_r)
+    return np.column_stack([cos_lat * np.cos(lon_r), cos_lat * np.sin(lon_r), np.sin(lat_r)])
+
+
+def fractional_index(axis_values, targets, periodic=None):
+    """
+    좌표축 값에 대한 실수 인덱스를 구합니다 (내림차순 축, 순환 경도 지원). 범위 밖은 NaN.
+    순환 축이 한 바퀴(전 지구 경도)를 덮으면 마지막 점과 첫 점 사이(이음매 칸)도 보간하며, 그 구간의 인덱스는
+    n-1~n(내림차순 축은 -1~0)이므로 호출하는 쪽에서 모서리 인덱스를 n으로 나눈 나머지로 씁니다.
+    """
+    values = np.asarray(axis_values, dtype=float)
+    index = np.arange(len(values), dtype=float)
+    if len(values) > 1 and values[0] > values[-1]:
+        values, index = values[::-1], index[::-1]
+    targets = np.asarray(targets, dtype=float)
+    if periodic:
+        targets = (targets - values[0]) % periodic + values[0]
+        if len(values) > 1:
+            gap = values[0] + periodic - values[-1]
+            if 0 < gap <= 1.5 * np.max(np.diff(values)):
+                values = np.append(values, values[0] + periodic)
+                index = np.append(index, 2 * index[-1] - index[-2])
+    return np.interp(targets, values, index, left=np.nan, right=np.nan)
+
+
+def periodic_corners(fj, size):
+    """
+    실수 인덱스 fj를 감싸는 두 모서리 인덱스 (j0, j1)와 j1 쪽 가중치를 구합니다.
+    이음매 칸(fj가 n-1~n 또는 -1~0)은 마지막 점과 첫 점을 이웃으로 잇고, 마지막 점 자체는 앞 칸에 넣습니다.
+    """
+    j0 = np.floor(fj).astype(np.int64)
+    j0 = np.where(fj == size - 1, size - 2, j0)
+    wx = fj - j0
+    return j0 % size, (j0 + 1) % size, wx
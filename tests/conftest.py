@@ -0,0 +1,14 @@
+# oceanocal_v2/tests/conftest.py
+
+import importlib.util
+import os
+import sys
+
+# 저장소 디렉터리 이름과 관계없이 테스트에서 oceanocal_v2 패키지로 가져올 수 있게 등록합니다.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if 'oceanocal_v2' not in sys.modules:
+    spec = importlib.util.spec_from_file_location('oceanocal_v2', os.path.join(ROOT, '__init__.py'),
+                                                  submodule_search_locations=[ROOT])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules['oceanocal_v2'] = package
+    spec.loader.exec_module(package)
@@ -0,0 +1,51 @@
+# oceanocal_v2/tests/test_batch_export.py
+
+import os
+
+import numpy as np
+import xarray as xr
+from PIL import Image
+
+from oceanocal_v2.batch_export import build_job, run_batch_export, write_gif
+from oceanocal_v2.dataset_manager import DatasetManager
+
+
+def test_write_gif_streams_every_frame(tmp_path):
+    frame_dir = tmp_path / 'frames'
+    frame_dir.mkdir()
+    frames = []
+    for number in range(4):
+        pixels = np.zeros((30, 40, 3), dtype=np.uint8)
+        pixels[:, :, number % 3] = 60 * (number + 1)
+        pixels[5:10, 5 + 5 * number:10 + 5 * number] = 255
+        Image.fromarray(pixels).save(frame_dir / f'frame_{number:04d}.png')
+        frames.append(pixels)
+    output = write_gif(str(frame_dir), fps=5)
+    with Image.open(output) as gif:
+        assert gif.n_frames == 4
+        assert gif.info['duration'] == 200 and gif.info['loop'] == 0
+        for number, expected in enumerate(frames):
+            gif.seek(number)
+            np.testing.assert_array_equal(np.asarray(gif.convert('RGB')), expected)
+
+
+def test_batch_export_renders_virtual_variable(tmp_path, monkeypatch):
+    # spawn으로 뜬 렌더러 프로세스도 oceanocal_v2 패키지를 가져올 수 있게 합니다 (sys.path는 자식에게 전달됨).
+    packages = tmp_path / 'packages'
+    packages.mkdir()
+    os.symlink(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), packages / 'oceanocal_v2')
+    monkeypatch.syspath_prepend(str(packages))
+    path = str(tmp_path / 'uv.nc')
+    shape = (3, 4, 5)
+    xr.Dataset({'u': (('time', 'lat', 'lon'), np.full(shape, 3.0)), 'v': (('time', 'lat', 'lon'), np.full(shape, 4.0))},
+               coords={'time': np.arange(3), 'lat': np.arange(4.0), 'lon': np.arange(5.0)}).to_netcdf(path)
+    manager = DatasetManager()
+    try:
+        manager.open_file(path)
+        manager.define_virtual_variable(path, 'speed', 'sqrt(u**2 + v**2)')
+        job = build_job(manager, path, 'speed', 'time', output_dir=str(tmp_path / 'out'))
+        assert job['virtual'] and job['vmin'] == 5.0
+        outputs = run_batch_export([job], formats=('png',), max_workers=1, dpi=20, dataset_manager=manager)
+    finally:
+        manager.close_file(path)
+    assert sorted(os.listdir(outputs[0])) == ['frame_00000.png', 'frame_00001.png', 'frame_00002.png']
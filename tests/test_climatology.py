@@ -0,0 +1,29 @@
+# oceanocal_v2/tests/test_climatology.py
+
+import h5py
+import numpy as np
+
+from oceanocal_v2.dataset_manager import DatasetManager
+
+
+def test_monthly_climatology_of_hdf5_with_numeric_time(tmp_path):
+    path = str(tmp_path / 'monthly.h5')
+    days = np.array([15.0 + 30 * i for i in range(24)]) # 360일 달력: 2년치 매월 16일
+    values = np.repeat(np.arange(24.0)[:, None], 3, axis=1)
+    with h5py.File(path, 'w') as f:
+        time = f.create_dataset('time', data=days)
+        time.attrs['units'] = 'days since 2000-01-01'
+        time.attrs['calendar'] = '360_day'
+        time.make_scale('time')
+        sst = f.create_dataset('sst', data=values, chunks=(6, 3))
+        sst.dims[0].attach_scale(time)
+    manager = DatasetManager()
+    try:
+        manager.open_file(path)
+        manager.climatology.cache_dir = str(tmp_path / 'climatology')
+        clim = manager.climatology.climatology([path], 'sst', 'month')
+        np.testing.assert_allclose(clim.values[:, 0], np.arange(12.0) + 6)
+        anomaly = manager.climatology.anomaly(path, 'sst', freq='month')
+        np.testing.assert_allclose(anomaly.values[:, 0], np.where(np.arange(24) < 12, -6.0, 6.0))
+    finally:
+        manager.close_file(path)
@@ -0,0 +1,55 @@
+# oceanocal_v2/tests/test_coord_index.py
+
+import cftime
+import numpy as np
+import xarray as xr
+
+from oceanocal_v2.coord_index import CoordinateIndex
+from oceanocal_v2.dataset_manager import DatasetManager
+
+
+def _360_day_dataset():
+    times = [cftime.Datetime360Day(2000, month, 30) for month in range(1, 13)]
+    return xr.Dataset({'sst': (('time', 'lat', 'lon'), np.arange(12 * 3 * 4, dtype=float).reshape(12, 3, 4))},
+                      coords={'time': times, 'lat': [-10.0, 0.0, 10.0], 'lon': [0.0, 90.0, 180.0, 270.0]})
+
+
+def test_coordinate_index_360_day_time_axis():
+    index = CoordinateIndex(_360_day_dataset(), 'sst')
+    assert index.kind == 'rectilinear'
+    indexers = index.nearest_indexers(lat=1.0, lon=95.0, time=cftime.Datetime360Day(2000, 2, 30))
+    assert indexers == {'lat': 1, 'lon': 1, 'time': 1}
+    assert index.nearest_indexers(time='2000-06-29')['time'] == 5
+
+
+def test_dataset_manager_nearest_indexers_360_day(tmp_path):
+    path = str(tmp_path / 'sst_360.nc')
+    _360_day_dataset().to_netcdf(path)
+    manager = DatasetManager()
+    try:
+        manager.open_file(path)
+        indexers = manager.nearest_indexers(path, 'sst', lat=-9.0, lon=265.0,
+                                            time=cftime.Datetime360Day(2000, 12, 1))
+        assert indexers == {'lat': 0, 'lon': 3, 'time': 10}
+    finally:
+        manager.close_file(path)
+
+
+def test_resolve_indexers_merges_curvilinear_region_with_time_range(tmp_path):
+    lon2d, lat2d = np.meshgrid(np.arange(-180.0, 180.0, 10.0), np.arange(-30.0, 40.0, 10.0))
+    times = np.arange('2000-01', '2001-01', dtype='datetime64[M]').astype('datetime64[ns]')
+    ds = xr.Dataset({'sst': (('time', 'y', 'x'), np.zeros((12,) + lon2d.shape))},
+                    coords={'time': times, 'lon': (('y', 'x'), lon2d), 'lat': (('y', 'x'), lat2d)})
+    ds['sst'].attrs['coordinates'] = 'lat lon'
+    path = str(tmp_path / 'curvilinear.nc')
+    ds.to_netcdf(path)
+    manager = DatasetManager()
+    try:
+        manager.open_file(path)
+        indexers = manager.resolve_indexers(path, 'sst', {'time_range': ['2000-03', '2000-05'],
+                                                          'region': {'lat': [-10, 10], 'lon': [-30, 30]}})
+        assert np.arange(12)[indexers['time']].tolist() == [2, 3, 4]
+        assert lat2d[indexers['y'], 0].tolist() == [-10.0, 0.0, 10.0]
+        assert lon2d[0, indexers['x']].tolist() == [-30.0, -20.0, -10.0, 0.0, 10.0, 20.0, 30.0]
+    finally:
+        manager.close_file(path)
@@ -0,0 +1,61 @@
+# oceanocal_v2/tests/test_dataset_manager.py
+
+import os
+import threading
+
+import numpy as np
+import xarray as xr
+
+from oceanocal_v2.dataset_manager import DatasetManager, FileInUseError
+
+
+def test_worker_reads_survive_concurrent_refresh(tmp_path):
+    path = str(tmp_path / 'live.nc')
+    xr.Dataset({'sst': (('y', 'x'), np.arange(200.0).reshape(10, 20))}).to_netcdf(path)
+    manager = DatasetManager()
+    manager.open_file(path)
+    errors = []
+
+    def read_loop():
+        try:
+            for _ in range(50):
+                manager.read_variable(path, 'sst', {'y': 1}, use_cache=False)
+        except Exception as e: # 닫힌 핸들을 읽는 등 경쟁 상태
+            errors.append(e)
+
+    workers = [threading.Thread(target=read_loop) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    try:
+        for step in range(50):
+            os.utime(path, ns=(step * 1_000_000_000, step * 1_000_000_000)) # 파일 변경으로 감지되게 합니다
+            try:
+                manager.refresh_file(path)
+            except FileInUseError:
+                pass # 파일 감시기처럼 읽기가 끝난 뒤 다시 시도합니다
+    finally:
+        for worker in workers:
+            worker.join()
+        manager.close_file(path)
+    assert not errors
+
+
+def test_refresh_reopens_after_reads_finish(tmp_path):
+    path = str(tmp_path / 'grow.nc')
+    xr.Dataset({'sst': (('x',), np.zeros(4))}).to_netcdf(path)
+    manager = DatasetManager()
+    manager.open_file(path)
+    try:
+        with manager._reading(path):
+            xr.Dataset({'sst': (('x',), np.ones(6))}).to_netcdf(path + '.tmp')
+            os.replace(path + '.tmp', path) # 새 파일로 바꿔 쓰는 기록기
+            os.utime(path, ns=(10**18, 10**18))
+            try:
+                manager.refresh_file(path)
+                raise AssertionError("읽는 중에 파일을 다시 열었습니다")
+            except FileInUseError:
+                pass
+            assert manager.read_variable(path, 'sst').shape == (4,) # 읽는 동안에는 열린 핸들을 그대로 씁니다
+        assert manager.read_variable(path, 'sst').values.tolist() == [1.0] * 6
+    finally:
+        manager.close_file(path)
@@ -0,0 +1,25 @@
+# oceanocal_v2/tests/test_expressions.py
+
+import h5py
+import numpy as np
+
+from oceanocal_v2.dataset_manager import DatasetManager
+
+
+def test_blocked_virtual_variable_keeps_decoded_dtype_of_packed_hdf5_leaf(tmp_path):
+    path = str(tmp_path / 'packed.h5')
+    raw = np.arange(64 * 32, dtype=np.int16).reshape(64, 32)
+    with h5py.File(path, 'w') as f:
+        sst = f.create_dataset('sst', data=raw, chunks=(8, 32))
+        sst.attrs['scale_factor'] = 0.01
+        sst.attrs['add_offset'] = 0.5
+    manager = DatasetManager()
+    try:
+        manager.open_file(path)
+        virtual = manager.define_virtual_variable(path, 'double_sst', 'sst * 2')
+        virtual.block_bytes = 1024 # 여러 블록으로 나눠 계산하게 합니다
+        result = manager.read_variable(path, 'double_sst', use_cache=False)
+        assert result.dtype.kind == 'f'
+        np.testing.assert_allclose(result.values, (raw * 0.01 + 0.5) * 2)
+    finally:
+        manager.close_file(path)
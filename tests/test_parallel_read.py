@@ -0,0 +1,18 @@
+# oceanocal_v2/tests/test_parallel_read.py
+
+import h5py
+import numpy as np
+
+from oceanocal_v2 import parallel_read
+
+
+def test_unallocated_chunks_read_as_fill_value(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel_read, 'PARALLEL_MIN_BYTES', 0)
+    with h5py.File(str(tmp_path / 'sparse.h5'), 'w') as f:
+        dataset = f.create_dataset('a', shape=(8, 8), chunks=(4, 4), dtype='f4', compression='gzip',
+                                   fillvalue=-1)
+        dataset[:4, :4] = 1
+        result = parallel_read.read_parallel(dataset, (slice(None), slice(None)))
+    expected = np.full((8, 8), -1, dtype='f4')
+    expected[:4, :4] = 1
+    np.testing.assert_array_equal(result, expected)
@@ -0,0 +1,37 @@
+# oceanocal_v2/tests/test_settings_manager.py
+
+import os
+import stat
+
+import pytest
+
+from oceanocal_v2.settings_manager import SettingsManager
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="POSIX 권한 비트 확인")
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_settings_file_follows_umask(tmp_path):
+    path = str(tmp_path / 'settings.json')
+    previous = os.umask(0o027)
+    try:
+        manager = SettingsManager(path)
+        manager.save_app_setting('theme', 'dark')
+        manager.flush()
+    finally:
+        os.umask(previous)
+    assert _mode(path) == 0o640
+
+
+def test_atomic_save_keeps_existing_permissions(tmp_path):
+    path = str(tmp_path / 'settings.json')
+    manager = SettingsManager(path)
+    manager.save_settings()
+    os.chmod(path, 0o604)
+    manager.save_app_setting('theme', 'dark')
+    manager.flush()
+    assert _mode(path) == 0o604
+    assert os.listdir(tmp_path) == ['settings.json']
@@ -0,0 +1,55 @@
+# oceanocal_v2/tests/test_subset.py
+
+import numpy as np
+import xarray as xr
+
+from oceanocal_v2.coord_index import CoordinateIndex
+from oceanocal_v2.subset import lon_selection, lon_wrap_width
+
+
+def test_lon_wrap_width():
+    assert lon_wrap_width(170, -170) == 20
+    assert lon_wrap_width(-10, 10) == 20
+    assert lon_wrap_width(0, 360) == 360
+
+
+def test_lon_selection_crosses_dateline():
+    lons = np.arange(-180.0, 180.0)
+    selected = lons[lon_selection(lons, 170, -170)]
+    assert len(selected) == 21
+    assert set(selected) == set(range(170, 180)) | set(range(-180, -169))
+
+
+def test_lon_selection_dateline_on_0_360_grid():
+    lons = np.arange(0.0, 360.0)
+    selected = lons[lon_selection(lons, 170, -170)]
+    assert np.array_equal(selected, np.arange(170.0, 191.0))
+
+
+def test_lon_selection_full_circle():
+    lons = np.arange(-180.0, 180.0)
+    assert lon_selection(lons, -180, 180) == slice(None)
+
+
+def test_curvilinear_region_crosses_dateline():
+    # 0~360 격자에서는 날짜 변경선이 격자 안쪽이므로 선택 영역이 전체 폭보다 좁아야 합니다.
+    lon1d = np.arange(0.0, 360.0, 10.0)
+    lat1d = np.arange(-30.0, 40.0, 10.0)
+    lon2d, lat2d = np.meshgrid(lon1d, lat1d)
+    ds = xr.Dataset({'sst': (('y', 'x'), np.zeros(lon2d.shape))},
+                    coords={'lon': (('y', 'x'), lon2d), 'lat': (('y', 'x'), lat2d)})
+    indexers = CoordinateIndex(ds, 'sst').region_indexers(lat_range=[-10, 10], lon_range=[165, -165])
+    columns = lon1d[indexers['x']]
+    assert columns.tolist() == [170.0, 180.0, 190.0]
+    assert (columns < 180).sum() == 1 and (columns > 180).sum() == 1
+    assert lat1d[indexers['y']].tolist() == [-10.0, 0.0, 10.0]
+
+
+def test_curvilinear_region_excludes_far_side_of_dateline():
+    lon1d = np.arange(-180.0, 180.0, 10.0)
+    lat1d = np.arange(-30.0, 40.0, 10.0)
+    lon2d, lat2d = np.meshgrid(lon1d, lat1d)
+    ds = xr.Dataset({'sst': (('y', 'x'), np.zeros(lon2d.shape))},
+                    coords={'lon': (('y', 'x'), lon2d), 'lat': (('y', 'x'), lat2d)})
+    indexers = CoordinateIndex(ds, 'sst').region_indexers(lat_range=[-10, 10], lon_range=[150, 175])
+    assert lon1d[indexers['x']].tolist() == [150.0, 160.0, 170.0]
@@ -0,0 +1,193 @@
+# oceanocal_v2/time_index.py
+
+import logging
+
+import numpy as np
+import xarray as xr
+from xarray.coding.times import decode_cf_datetime
+
+try:
+    import cftime
+except ImportError: # cftime이 없으면 표준 달력만 디코딩됩니다
+    cftime = None
+
+logger = logging.getLogger(__name__)
+
+STANDARD_CALENDARS = ('standard', 'gregorian', 'proleptic_gregorian')
+EPOCH_UNIT = 'us' # 마이크로초: 시간 단위 기록 수백 년도 int64로 충분하고 cftime(CFTimeIndex.asi8)과 단위가 같습니다
+EPOCH_UNITS = 'microseconds since 1970-01-01'
+_MISSING = np.iinfo(np.int64).min
+
+
+def decode_epochs(values, attrs=None):
+    """
+    시간 좌표 값을 (1970-01-01 기준 마이크로초 int64 배열, 달력)으로 디코딩합니다.
+    datetime64, cftime 객체 배열, 'units'(예: 'hours since 2000-01-01') 속성이 있는 숫자 배열을 지원합니다.
+    시간으로 해석할 수 없으면 ValueError. 결측 시간(NaT)은 int64 최솟값이 됩니다.
+    """
+    values = np.asarray(values)
+    attrs = attrs or {}
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype(f'datetime64[{EPOCH_UNIT}]').astype(np.int64), 'standard'
+    if values.dtype == object and values.size and hasattr(values.flat[0], 'calendar'):
+        return np.asarray(xr.CFTimeIndex(values.ravel()).asi8, dtype=np.int64), values.flat[0].calendar
+    units = attrs.get('units', '')
+    if np.issubdtype(values.dtype, np.number) and ' since ' in str(units):
+        decoded = decode_cf_datetime(values, units, attrs.get('calendar', 'standard'))
+        return decode_epochs(decoded)
+    raise ValueError(f"시간 좌표로 해석할 수 없습니다 (dtype={values.dtype}, units={units!r})")
+
+
+def _field_datetimes(dates):
+    """cftime 날짜들의 날짜 필드를 datetime64로 옮깁니다. 일은 그레고리력 그 달의 길이로 자릅니다."""
+    fields = np.array([(d.year, d.month, d.day, d.hour, d.minute, d.second, d.microsecond) for d in dates],
+                      dtype=np.int64).reshape(-1, 7)
+    months = ((fields[:, 0] - 1970) * 12 + fields[:, 1] - 1).astype('datetime64[M]')
+    first_days = months.astype('datetime64[D]')
+    month_lengths = ((months + 1).astype('datetime64[D]') - first_days).astype(np.int64)
+    days = first_days + (np.minimum(fields[:, 2], month_lengths) - 1)
+    clock = ((fields[:, 3] * 60 + fields[:, 4]) * 60 + fields[:, 5]) * 1_000_000 + fields[:, 6]
+    return days.astype(f'datetime64[{EPOCH_UNIT}]') + clock.astype(f'timedelta64[{EPOCH_UNIT}]')
+
+
+class TimeIndex:
+    """
+    시간 축 하나(또는 여러 파일을 이은 시계열)의 정렬된 int64 epoch 색인.
+    CF 시간은 만들 때 한 번만 디코딩하고, 날짜 구간/최근접 시간 질의는 이진 탐색(O(log n))으로 답합니다.
+    시간이 단조 증가하지 않거나 결측이 있으면 정렬 순서를 따로 보관해 원래 인덱스로 되돌립니다.
+    """
+    def __init__(self, epochs, calendar='standard', dim=None, boundaries=None, sources=None):
+        self.epochs = np.asarray(epochs, dtype=np.int64)
+        self.calendar = calendar or 'standard'
+        self.dim = dim
+        self.size = len(self.epochs)
+        # 시계열: 파일별 시작 위치 [0, n1, n1+n2, ..., 전체 길이]와 파일 경로
+        self.boundaries = np.asarray(boundaries if boundaries is not None else [0, self.size], dtype=np.int64)
+        self.sources = list(sources or [])
+        self._display = None
+        valid = self.epochs != _MISSING
+        if valid.all() and (self.size < 2 or bool(np.all(np.diff(self.epochs) >= 0))):
+            self._order = None
+            self._sorted = self.epochs
+        else:
+            positions = np.nonzero(valid)[0]
+            self._order = positions[np.argsort(self.epochs[positions], kind='stable')]
+            self._sorted = self.epochs[self._order]
+
+    @classmethod
+    def from_dataset(cls, dataset, dim):
+        """데이터셋의 1차원 시간 좌표로 색인을 만듭니다."""
+        coord = dataset[dim]
+        epochs, calendar = decode_epochs(coord.values, coord.attrs)
+        return cls(epochs, calendar, dim)
+
+    @classmethod
+    def concat(cls, indexes, sources=None):
+        """파일별 색인을 순서대로 이어 한 시계열 색인을 만듭니다 (달력은 같아야 합니다)."""
+        calendars = {index.calendar for index in indexes}
+        if len(calendars) > 1:
+            raise ValueError(f"파일들의 달력이 서로 다릅니다: {sorted(calendars)}")
+        sizes = [index.size for index in indexes]
+        epochs = np.concatenate([index.epochs for index in indexes]) if indexes else np.empty(0, np.int64)
+        return cls(epochs, calendars.pop() if calendars else 'standard', indexes[0].dim if indexes else None,
+                   boundaries=np.concatenate([[0], np.cumsum(sizes)]), sources=sources)
+
+    # --- 값 변환 -------------------------------------------------------------------------------------------
+
+    def to_epoch(self, value):
+        """날짜 문자열, datetime, numpy.datetime64, cftime 객체를 이 색인의 달력 기준 epoch 값으로 바꿉니다."""
+        if hasattr(value, 'calendar'):
+            return int(cftime.date2num(value, EPOCH_UNITS, calendar=value.calendar))
+        moment = np.datetime64(value, EPOCH_UNIT)
+        if np.isnat(moment):
+            raise ValueError(f"시간 값이 올바르지 않습니다: {value!r}")
+        if self.calendar in STANDARD_CALENDARS or cftime is None:
+            return int(moment.astype(np.int64))
+        d = moment.astype(object)
+        date = cftime.datetime(d.year, d.month, d.day, d.hour, d.minute, d.second, d.microsecond,
+                               calendar=self.calendar)
+        return int(cftime.date2num(date, EPOCH_UNITS, calendar=self.calendar))
+
+    def datetimes(self, selection=None):
+        """selection(정수, slice, 정수 배열)에 해당하는 시간을 datetime64로 반환합니다 (플롯 축/표시용)."""
+        if self._display is None:
+            self._display = self._display_times()
+        return self._display if selection is None else self._display[selection]
+
+    def _display_times(self):
+        """
+        표시용 datetime64 배열 (한 번만 만듭니다). 비표준 달력은 날짜 필드(연/월/일/시각)를 그대로 옮기고,
+        그레고리력에 없는 날짜(360일 달력의 2월 30일 등)는 그 달의 마지막 날로 맞춥니다.
+        """
+        moments = self.epochs.astype(f'datetime64[{EPOCH_UNIT}]')
+        if self.calendar in STANDARD_CALENDARS or cftime is None or not self.size:
+            return moments
+        valid = self.epochs != _MISSING
+        dates = cftime.num2date(self.epochs[valid], EPOCH_UNITS, calendar=self.calendar)
+        moments[valid] = _field_datetimes(np.atleast_1d(dates))
+        return moments
+
+    @property
+    def start(self):
+        return self.datetimes(self._sorted_position(0)) if len(self._sorted) else None
+
+    @property
+    def end(self):
+        return self.datetimes(self._sorted_position(len(self._sorted) - 1)) if len(self._sorted) else None
+
+    def _sorted_position(self, position):
+        return int(position if self._order is None else self._order[position])
+
+    # --- 질의 --------------------------------------------------------------------------------------------
+
+    def nearest(self, value):
+        """value에 가장 가까운 시간의 (원래) 인덱스. 색인이 비었으면 None."""
+        if not len(self._sorted):
+            return None
+        target = self.to_epoch(value)
+        position = int(np.searchsorted(self._sorted, target))
+        if position >= len(self._sorted) or (position > 0 and
+                                              target - self._sorted[position - 1] <= self._sorted[position] - target):
+            position -= 1
+        return self._sorted_position(position)
+
+    def range(self, start=None, end=None):
+        """
+        [start, end] 구간(양끝 포함, None이면 열림)에 드는 인덱스.
+        '2001-03'처럼 일부만 쓴 날짜 문자열의 끝은 그 기간 전체를 포함합니다 (pandas 부분 문자열 선택과 같음).
+        시간이 정렬되어 있으면 slice, 아니면 오름차순 정수 배열을 반환합니다.
+        """
+        if isinstance(end, str):
+            end_epoch = self.to_epoch(np.datetime64(end) + 1) - 1 # 다음 기간 시작 직전까지
+        elif end is not None:
+            end_epoch = self.to_epoch(end)
+        lo = 0 if start is None else int(np.searchsorted(self._sorted, self.to_epoch(start), side='left'))
+        hi = len(self._sorted) if end is None else int(np.searchsorted(self._sorted, end_epoch, side='right'))
+        hi = max(lo, hi)
+        if self._order is None:
+            return slice(lo, hi)
+        return np.sort(self._order[lo:hi])
+
+    def locate(self, position):
+        """시계열 색인의 위치를 (파일 번호, 그 파일 안의 인덱스)로 바꿉니다."""
+        number = int(np.searchsorted(self.boundaries, position, side='right')) - 1
+        return number, int(position - self.boundaries[number])
+
+    def file_ranges(self, start=None, end=None):
+        """
+        시계열에서 [start, end] 구간에 걸치는 파일만 골라 [(파일 번호, 그 파일의 인덱스 slice), ...]를 반환합니다.
+        시간이 정렬된 시계열에서만 쓸 수 있습니다.
+        """
+        selection = self.range(start, end)
+        if not isinstance(selection, slice):
+            raise ValueError("시간이 정렬되지 않은 시계열은 파일 구간으로 나눌 수 없습니다.")
+        ranges = []
+        for number in range(len(self.boundaries) - 1):
+            first, last = self.boundaries[number], self.boundaries[number + 1]
+            lo, hi = max(selection.start, first), min(selection.stop, last)
+            if lo < hi:
+                ranges.append((number, slice(int(lo - first), int(hi - first))))
+        return ranges
+
+    def describe(self):
+        return f"{self.dim}: {self.size}개 시간 ({self.start} ~ {self.end}, {self.calendar} 달력)"
@@ -0,0 +1,93 @@
+# oceanocal_v2/time_stats.py
+
+import logging
+import os
+
+import xarray as xr
+
+from .chunked_io import iter_blocks, chunk_sizes, compose_indexer, SourceReader, DEFAULT_BLOCK_BYTES
+from .compute_backend import finalize_moments
+from . import subset
+
+logger = logging.getLogger(__name__)
+
+# 통계 이름: 설명
+TIME_STATISTICS = {
+    'mean': "평균",
+    'std': "표준편차",
+    'min': "최솟값",
+    'max': "최댓값",
+    'count': "유효값 개수",
+}
+
+
+def time_statistics(dataset_manager, filepaths, var_name, statistics=('mean',), indexers=None, time_range=None,
+                    block_bytes=DEFAULT_BLOCK_BYTES, progress_callback=None, cancel_event=None):
+    """
+    여러 파일에 걸친 긴 시계열의 시간 축 통계 지도(평균, 표준편차, 최솟값/최댓값, 유효값 개수)를 계산합니다.
+    모든 파일의 시간 블록을 하나의 흐름으로 계산 백엔드에 넘기므로 파일 경계에서도 작업자가 쉬지 않습니다.
+    indexers는 시간 외 차원의 isel 인덱서(영역/깊이 고정 등)입니다. time_range([시작, 끝])가 주어지면
+    시계열 시간 색인으로 구간에 걸치는 파일과 그 안의 범위만 읽습니다. {통계: DataArray}를 담은 Dataset을 반환합니다.
+    """
+    filepaths = [filepaths] if isinstance(filepaths, str) else list(filepaths)
+    indexers = dict(indexers or {})
+    layout = {}
+    if time_range:
+        series = dataset_manager.get_series_time_index(filepaths, var_name)
+        file_ranges = [(filepaths[number], selected) for number, selected in series.file_ranges(*time_range)]
+        if not file_ranges:
+            raise ValueError(f"시간 범위에 해당하는 자료가 없습니다: {time_range[0]} ~ {time_range[1]}")
+        filepaths = [filepath for filepath, _ in file_ranges]
+        time_selections = dict(file_ranges)
+    else:
+        time_selections = {}
+
+    def block_values():
+        for number, filepath in enumerate(filepaths):
+            with SourceReader(dataset_manager, filepath, var_name) as (ds, read):
+                variable = ds[var_name]
+                time_dim = subset.find_axis_dim(ds, variable, 'time') or variable.dims[0]
+                selection = {dim: index for dim, index in indexers.items() if dim != time_dim}
+                if filepath in time_selections:
+                    selection[time_dim] = time_selections[filepath]
+                template = variable.isel(selection) if selection else variable
+                spatial_dims = [dim for dim in template.dims if dim != time_dim]
+                shape = tuple(template.sizes[dim] for dim in spatial_dims)
+                if not layout:
+                    layout.update(time_dim=time_dim, dims=spatial_dims, shape=shape, attrs=dict(variable.attrs),
+                                  coords={dim: template[dim].values for dim in spatial_dims if dim in template.coords})
+                elif (spatial_dims, shape) != (layout['dims'], layout['shape']):
+                    raise ValueError(f"격자가 첫 파일과 다릅니다: {os.path.basename(filepath)}")
+                blocks = list(iter_blocks(template, time_dim, block_bytes, chunk_sizes(variable).get(time_dim)))
+                for count, block in enumerate(blocks, start=1):
+                    block = compose_indexer(selection.get(time_dim), block, variable.sizes[time_dim])
+                    yield read({**selection, time_dim: block}).transpose(time_dim, *spatial_dims).values, {}
+                    if progress_callback:
+                        percent = int(100 * (number + count / len(blocks)) / len(filepaths))
+                        progress_callback(percent, f"시간 통계 계산 ({number + 1}/{len(filepaths)}): "
+                                                   f"{os.path.basename(filepath)}")
+
+    partial = dataset_manager.compute_backend.reduce(block_values(), 'moments', cancel_event=cancel_event)
+    if partial is None:
+        raise ValueError("통계를 계산할 시간 단계가 없습니다.")
+    result = xr.Dataset(attrs={'source_files': len(filepaths), 'variable': var_name})
+    if time_range:
+        result.attrs['time_range'] = f"{time_range[0]} ~ {time_range[1]}"
+    for statistic in statistics:
+        attrs = dict(layout['attrs']) if statistic != 'count' else {}
+        attrs['long_name'] = f"{var_name} 시간 {TIME_STATISTICS.get(statistic, statistic)}"
+        result[f"{var_name.strip('/').replace('/', '_')}_{statistic}"] = xr.DataArray(
+            finalize_moments(partial, statistic), dims=layout['dims'], coords=layout['coords'], attrs=attrs)
+    logger.info(f"시간 통계 계산 완료: {var_name} {list(statistics)} (파일 {len(filepaths)}개, "
+                f"{dataset_manager.compute_backend.name} 백엔드)")
+    return result
+
+
+def export_time_statistics(dataset_manager, filepaths, var_name, statistics, output_path, time_range=None,
+                           progress_callback=None, cancel_event=None):
+    """시간 통계를 계산해 NetCDF로 저장하고 저장한 경로를 반환합니다."""
+    result = time_statistics(dataset_manager, filepaths, var_name, statistics, time_range=time_range,
+                             progress_callback=progress_callback, cancel_event=cancel_event)
+    result.to_netcdf(output_path)
+    logger.info(f"시간 통계 저장: {output_path}")
+    return output_path
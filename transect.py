@@ -0,0 +1,149 @@
+# oceanocal_v2/transect.py
+
+import logging
+
+import numpy as np
+import xarray as xr
+
+from .chunked_io import chunk_sizes
+from .subset import fractional_index, periodic_corners
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def sample_path(points, n_samples=200):
+    """
+    (위도, 경도) 꼭짓점 목록으로 주어진 경로(선박 항적, 사용자가 그린 폴리라인)를
+    구간 길이에 비례하도록 n_samples개의 점으로 나눕니다.
+    (lats, lons, 누적 거리[km])를 반환합니다.
+    """
+    vertices = np.asarray(points, dtype=float)
+    if vertices.ndim != 2 or vertices.shape[0] < 2:
+        raise ValueError("횡단면 경로에는 최소 두 개의 (위도, 경도) 점이 필요합니다.")
+    lats, lons = vertices[:, 0], vertices[:, 1].copy()
+    # 날짜변경선을 건너는 구간은 짧은 쪽으로 잇습니다.
+    lons[1:] = lons[0] + np.cumsum((np.diff(lons) + 180) % 360 - 180)
+    segment_km = _haversine(lats[:-1], lons[:-1], lats[1:], lons[1:])
+    vertex_km = np.concatenate([[0.0], np.cumsum(segment_km)])
+    distance = np.linspace(0.0, vertex_km[-1], int(n_samples))
+    return np.interp(distance, vertex_km, lats), np.interp(distance, vertex_km, lons), distance
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.deg2rad, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class TransectWeights:
+    """
+    경로 표본점마다 참조할 격자 모서리 (행, 열) 인덱스와 보간 가중치.
+    시간 단계를 바꿔도 격자와 경로가 같으면 그대로 재사용됩니다.
+    """
+    def __init__(self, rows, cols, weights, lats, lons, distance, grid_dims):
+        self.rows = rows # (k, n) k=모서리 수 (bilinear 4, nearest 1)
+        self.cols = cols
+        self.weights = weights # (k, n), 영역 밖 표본은 NaN
+        self.lats = lats
+        self.lons = lons
+        self.distance = distance
+        self.grid_dims = grid_dims # (행 차원, 열 차원)
+
+
+class TransectEngine:
+    """
+    3D/4D 필드에서 임의 경로를 따라 (깊이 × 거리) 단면을 추출합니다.
+    경로가 지나는 저장 청크만 읽고, 보간 가중치는 (격자, 경로, 방법)별로 캐시합니다.
+    """
+    def __init__(self):
+        self._weights = {}
+
+    def clear(self, filepath=None):
+        """가중치 캐시를 비웁니다. filepath가 주어지면 해당 파일의 격자만 제거합니다."""
+        if filepath is None:
+            self._weights.clear()
+        else:
+            for key in [k for k in self._weights if k[0] == filepath]:
+                del self._weights[key]
+
+    def get_weights(self, filepath, coord_index, path, n_samples=200, method='bilinear'):
+        key = (filepath, coord_index.dims, tuple(map(tuple, path)), int(n_samples), method)
+        weights = self._weights.get(key)
+        if weights is None:
+            weights = self._compute_weights(coord_index, path, n_samples, method)
+            self._weights[key] = weights
+            logger.info(f"횡단면 보간 가중치 계산: {coord_index.var_name} ({method}, {n_samples}점)")
+        return weights
+
+    def _compute_weights(self, coord_index, path, n_samples, method):
+        lats, lons, distance = sample_path(path, n_samples)
+        if coord_index.kind == 'rectilinear':
+            lat_axis = coord_index.axes[coord_index.lat_dim]
+            lon_axis = coord_index.axes[coord_index.lon_dim]
+            fi = fractional_index(lat_axis.values, lats)
+            fj = fractional_index(lon_axis.values, lons, periodic=360)
+            valid = np.isfinite(fi) & np.isfinite(fj)
+            fi, fj = np.where(valid, fi, 0.0), np.where(valid, fj, 0.0)
+            if method == 'nearest':
+                rows = np.rint(fi).astype(int)[None, :]
+                cols = (np.rint(fj).astype(int) % lon_axis.size)[None, :]
+                weights = np.ones((1, len(lats)))
+            else:
+                i0 = np.minimum(np.floor(fi).astype(int), lat_axis.size - 2).clip(0)
+                j0, j1, wx = periodic_corners(fj, lon_axis.size)
+                wy = fi - i0
+                rows = np.stack([i0, i0, i0 + 1, i0 + 1])
+                cols = np.stack([j0, j1, j0, j1])
+                weights = np.stack([(1 - wy) * (1 - wx), (1 - wy) * wx, wy * (1 - wx), wy * wx])
+            weights[:, ~valid] = np.nan
+            grid_dims = (coord_index.lat_dim, coord_index.lon_dim)
+        elif coord_index.kind == 'curvilinear':
+            # 곡선 격자는 KD-트리 최근접 격자점을 사용합니다.
+            rows, cols = coord_index.nearest_grid_points(lats, lons)
+            rows, cols = rows[None, :], cols[None, :]
+            weights = np.ones((1, len(lats)))
+            grid_dims = coord_index.grid_dims
+        else:
+            raise ValueError(f"변수 '{coord_index.var_name}'의 위도/경도 격자를 찾을 수 없어 횡단면을 만들 수 없습니다.")
+        return TransectWeights(rows, cols, weights, lats, lons, distance, grid_dims)
+
+    def extract(self, variable, weights):
+        """
+        지연 로드 변수(수평 두 차원 외 차원은 이미 원하는 만큼 isel된 상태)에서 경로 값을 계산합니다.
+        경로가 지나는 저장 청크 블록만 읽어 모서리 값을 모은 뒤 가중합을 벡터화해 구합니다.
+        """
+        row_dim, col_dim = weights.grid_dims
+        other_dims = [d for d in variable.dims if d not in (row_dim, col_dim)]
+        variable = variable.transpose(*other_dims, row_dim, col_dim)
+        chunks = chunk_sizes(variable)
+        chunk_rows = chunks.get(row_dim, variable.sizes[row_dim])
+        chunk_cols = chunks.get(col_dim, variable.sizes[col_dim])
+
+        rows, cols = weights.rows.ravel(), weights.cols.ravel()
+        chunk_ids = (rows // chunk_rows) * (variable.sizes[col_dim] // chunk_cols + 1) + cols // chunk_cols
+        leading_shape = tuple(variable.sizes[d] for d in other_dims)
+        corners = np.full(leading_shape + (rows.size,), np.nan)
+        for chunk_id in np.unique(chunk_ids):
+            members = np.nonzero(chunk_ids == chunk_id)[0]
+            r0 = rows[members[0]] // chunk_rows * chunk_rows
+            c0 = cols[members[0]] // chunk_cols * chunk_cols
+            block = variable.isel({row_dim: slice(r0, r0 + chunk_rows),
+                                   col_dim: slice(c0, c0 + chunk_cols)}).values
+            corners[..., members] = block[..., rows[members] - r0, cols[members] - c0]
+
+        corners = corners.reshape(leading_shape + weights.rows.shape)
+        values = np.nansum(corners * weights.weights, axis=-2)
+        # 가중치 합이 0(육지 마스크 등)이거나 영역 밖이면 NaN
+        weight_sum = np.nansum(np.where(np.isfinite(corners), weights.weights, 0.0), axis=-2)
+        values = np.where(weight_sum > 0, values / np.where(weight_sum > 0, weight_sum, 1.0), np.nan)
+
+        coords = {d: variable.coords[d] for d in other_dims if d in variable.coords}
+        coords.update({'distance': weights.distance,
+                       'lat': ('distance', weights.lats),
+                       'lon': ('distance', weights.lons)})
+        result = xr.DataArray(values, dims=other_dims + ['distance'], coords=coords,
+                              name=variable.name, attrs=variable.attrs)
+        result['distance'].attrs['units'] = 'km'
+        return result
@@ -0,0 +1,164 @@
+# oceanocal_v2/view_link.py
+
+import logging
+from collections import defaultdict
+
+from PyQt6.QtCore import QObject, QTimer
+
+from .workers import start_worker
+
+logger = logging.getLogger(__name__)
+
+LINK_DEBOUNCE_MS = 60 # 슬라이더를 끄는 동안 쌓인 변경을 한 번에 반영하기까지 기다리는 시간
+
+
+class ViewLinkBus(QObject):
+    """
+    연결된 플롯 창들(예: 모델 SST와 위성 SST)이 시간/깊이 슬라이스와 축 범위를 공유하도록 하는 중앙 상태 버스.
+    슬라이스는 인덱스가 아니라 좌표 값으로 전달하므로 격자와 시간 간격이 다른 파일끼리도 가장 가까운 단계를 맞춥니다.
+    변경은 짧게 모아 한 번만 반영하고, 필요한 슬라이스는 파일마다 한 작업자에서 한꺼번에 읽은 뒤
+    모든 창을 한 번에 다시 그립니다.
+    """
+    def __init__(self, status_callback=None, delay_ms=LINK_DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.status_callback = status_callback
+        self._groups = {} # {PlotWindow: 그룹 이름}
+        self._limits = {} # {(그룹, 플롯 유형): (xlim, ylim)} - 마지막으로 공유된 축 범위
+        self._pending = defaultdict(dict) # {PlotWindow: {'time'|'depth': 좌표 값}} - 아직 반영하지 않은 슬라이스
+        self._dirty = set() # 읽기가 끝나면 다시 그릴 창
+        self._generation = 0
+        self._applying_limits = False
+        self._connected = {} # {PlotWindow: plot_refreshed 시그널 연결} - unlink 때 끊어 닫힌 창을 붙잡지 않습니다
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._flush)
+
+    def _report_status(self, message, timeout=2000):
+        if self.status_callback:
+            self.status_callback(message, timeout)
+
+    def link(self, windows, group='default'):
+        """창들을 같은 그룹으로 연결합니다. 이후 한 창의 슬라이스/축 범위 변경이 나머지 창에 전달됩니다."""
+        for window in windows:
+            self._groups[window] = group
+            if window not in self._connected:
+                self._connected[window] = window.plot_refreshed.connect(lambda window=window: self._on_refreshed(window))
+            self._attach_axes(window)
+        logger.info(f"ViewLinkBus: 플롯 창 {len(windows)}개 연결 (그룹 '{group}')")
+
+    def unlink(self, window):
+        """
+        창을 그룹에서 빼고 대기 중인 변경도 버립니다 (창이 닫힐 때 호출).
+        버스가 닫힌 창과 그 matplotlib Figure를 계속 참조하지 않도록 시그널 연결도 끊고,
+        그룹에 남은 창이 없으면 그 그룹의 공유 축 범위도 지웁니다.
+        """
+        group = self._groups.pop(window, None)
+        self._pending.pop(window, None)
+        self._dirty.discard(window)
+        connection = self._connected.pop(window, None)
+        if connection is not None:
+            try:
+                window.plot_refreshed.disconnect(connection)
+            except (TypeError, RuntimeError): # 이미 파괴 중인 창
+                pass
+        if group is not None and group not in self._groups.values():
+            for key in [key for key in self._limits if key[0] == group]:
+                del self._limits[key]
+
+    def is_linked(self, window):
+        return window in self._groups
+
+    def members(self, window):
+        """window와 같은 그룹의 창 목록 (연결되지 않은 창은 자기 자신만)."""
+        group = self._groups.get(window)
+        if group is None:
+            return [window]
+        return [member for member, member_group in self._groups.items() if member_group == group]
+
+    def set_slice(self, source, kind, value):
+        """source 창에서 바뀐 슬라이스(좌표 값)를 그룹 전체에 예약합니다. 실제 반영은 잠시 뒤 한 번에 합니다."""
+        for window in self.members(source):
+            self._pending[window][kind] = value
+        self._timer.start()
+
+    def _flush(self):
+        pending, self._pending = self._pending, defaultdict(dict)
+        changed = []
+        for window, slices in pending.items():
+            # 모든 축을 적용해야 하므로 any()로 줄이지 않습니다.
+            results = [window.set_slice_value(kind, value) for kind, value in slices.items()]
+            if any(results):
+                changed.append(window)
+        if changed:
+            self._load_and_redraw(changed)
+
+    def _load_and_redraw(self, windows):
+        """
+        창들이 필요로 하는 슬라이스를 파일별로 묶어 파일마다 한 작업자에서 읽고(같은 요청은 한 번만),
+        마지막 작업이 끝나면 모든 창을 캐시에서 다시 그립니다. 그 사이 새 변경이 오면 이전 다시 그리기는 건너뜁니다.
+        """
+        self._generation += 1
+        generation = self._generation
+        self._dirty.update(windows)
+        batches = defaultdict(list)
+        for window in windows:
+            request = window.plot_request()
+            if request is not None:
+                batches[window.file_path].append(request)
+        remaining = [len(batches)]
+
+        def done(*_):
+            remaining[0] -= 1
+            if remaining[0] <= 0 and generation == self._generation:
+                self._redraw_dirty()
+
+        if not batches:
+            self._redraw_dirty()
+            return
+        for file_path, requests in batches.items():
+            dataset_manager = windows[0].dataset_manager
+            start_worker(dataset_manager.read_variables, file_path, requests, on_finished=done, on_error=done)
+        self._report_status(f"연결된 플롯 {len(windows)}개 읽는 중 (파일 {len(batches)}개)...", 0)
+
+    def _redraw_dirty(self):
+        windows, self._dirty = self._dirty, set()
+        for window in windows:
+            window.refresh_plot()
+        self._report_status(f"연결된 플롯 {len(windows)}개 갱신.", 2000)
+
+    def _on_refreshed(self, window):
+        """다시 그린 창에 축 범위 콜백을 다시 걸고, 그룹에서 공유 중인 축 범위가 있으면 적용합니다."""
+        group = self._groups.get(window)
+        if group is None:
+            return
+        limits = self._limits.get((group, window.plot_type))
+        if limits is not None:
+            self._apply_limits(window, limits)
+        self._attach_axes(window)
+
+    def _attach_axes(self, window):
+        # Axes.clear()가 콜백 레지스트리를 새로 만들므로 다시 그릴 때마다 연결합니다.
+        window.ax.callbacks.connect('xlim_changed', lambda _ax, window=window: self._on_limits_changed(window))
+        window.ax.callbacks.connect('ylim_changed', lambda _ax, window=window: self._on_limits_changed(window))
+
+    def _on_limits_changed(self, source):
+        if self._applying_limits:
+            return
+        group = self._groups.get(source)
+        if group is None:
+            return
+        limits = (source.ax.get_xlim(), source.ax.get_ylim())
+        self._limits[(group, source.plot_type)] = limits
+        for window in self.members(source):
+            if window is not source and window.plot_type == source.plot_type:
+                self._apply_limits(window, limits)
+
+    def _apply_limits(self, window, limits):
+        self._applying_limits = True
+        try:
+            window.ax.set_xlim(limits[0])
+            window.ax.set_ylim(limits[1])
+        finally:
+            self._applying_limits = False
+        window.canvas.draw_idle()
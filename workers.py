@@ -0,0 +1,66 @@
+# oceanocal_v2/workers.py
+
+import logging
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+_active_workers = set() # 실행 중인 작업자가 가비지 컬렉션되지 않도록 참조를 유지
+
+
+class WorkerSignals(QObject):
+    """백그라운드 작업자에서 GUI 스레드로 결과를 전달하는 시그널 모음."""
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(int, str) # (퍼센트, 메시지)
+
+
+class Worker(QRunnable):
+    """
+    함수를 QThreadPool에서 실행하는 범용 작업자.
+    report_progress=True이면 함수에 progress_callback과 cancel_event 키워드 인자를 넘깁니다.
+    """
+    def __init__(self, fn, *args, report_progress=False, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+        if report_progress:
+            self.kwargs['progress_callback'] = self.signals.progress.emit
+            self.kwargs['cancel_event'] = self.cancel_event
+
+    def cancel(self):
+        """작업 함수가 cancel_event를 확인하는 경우 다음 확인 지점에서 중단됩니다."""
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            logger.error(f"백그라운드 작업 오류 ({getattr(self.fn, '__name__', self.fn)}): {e}", exc_info=True)
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+        finally:
+            _active_workers.discard(self)
+
+
+def start_worker(fn, *args, on_finished=None, on_error=None, on_progress=None, report_progress=False, **kwargs):
+    """
+    fn(*args, **kwargs)를 전역 스레드 풀에서 실행하고 작업자를 반환합니다.
+    콜백은 GUI 스레드에서 호출됩니다.
+    """
+    worker = Worker(fn, *args, report_progress=report_progress, **kwargs)
+    if on_finished:
+        worker.signals.finished.connect(on_finished)
+    if on_error:
+        worker.signals.error.connect(on_error)
+    if on_progress:
+        worker.signals.progress.connect(on_progress)
+    _active_workers.add(worker)
+    QThreadPool.globalInstance().start(worker)
+    return worker